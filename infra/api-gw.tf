@@ -2,6 +2,10 @@ resource "aws_api_gateway_rest_api" "rest_api" {
   name        = "${local.name_prefix}-api"
   description = "MapMe REST API - ${title(local.environment)} Environment"
 
+  # Handlers return base64 bodies for clients sending Accept: application/msgpack
+  # (lambda_src/common/encoding.py); API Gateway decodes them for these types
+  binary_media_types = ["application/msgpack", "application/x-msgpack"]
+
   tags = local.common_tags
 }
 
@@ -17,6 +21,54 @@ resource "aws_api_gateway_resource" "searches_res" {
   path_part   = local.routes.searches
 }
 
+resource "aws_api_gateway_resource" "trending_res" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  parent_id   = aws_api_gateway_resource.searches_res.id
+  path_part   = local.routes.trending
+}
+
+resource "aws_api_gateway_resource" "nearby_res" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  parent_id   = aws_api_gateway_resource.searches_res.id
+  path_part   = local.routes.nearby
+}
+
+resource "aws_api_gateway_resource" "tiles_res" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  parent_id   = aws_api_gateway_rest_api.rest_api.root_resource_id
+  path_part   = local.routes.tiles
+}
+
+resource "aws_api_gateway_resource" "tiles_z_res" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  parent_id   = aws_api_gateway_resource.tiles_res.id
+  path_part   = "{z}"
+}
+
+resource "aws_api_gateway_resource" "tiles_x_res" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  parent_id   = aws_api_gateway_resource.tiles_z_res.id
+  path_part   = "{x}"
+}
+
+resource "aws_api_gateway_resource" "tiles_y_res" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  parent_id   = aws_api_gateway_resource.tiles_x_res.id
+  path_part   = "{y}"
+}
+
+resource "aws_api_gateway_resource" "bootstrap_res" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  parent_id   = aws_api_gateway_rest_api.rest_api.root_resource_id
+  path_part   = local.routes.bootstrap
+}
+
+resource "aws_api_gateway_resource" "suggest_res" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  parent_id   = aws_api_gateway_rest_api.rest_api.root_resource_id
+  path_part   = local.routes.suggest
+}
+
 resource "aws_api_gateway_authorizer" "cognito" {
   name            = "${local.name_prefix}-cognito-authorizer"
   rest_api_id     = aws_api_gateway_rest_api.rest_api.id
@@ -48,6 +100,14 @@ resource "aws_api_gateway_method" "user_put" {
   authorizer_id = aws_api_gateway_authorizer.cognito.id
 }
 
+resource "aws_api_gateway_method" "user_delete" {
+  rest_api_id   = aws_api_gateway_rest_api.rest_api.id
+  resource_id   = aws_api_gateway_resource.user_res.id
+  http_method   = "DELETE"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+}
+
 resource "aws_api_gateway_integration" "user_options" {
   rest_api_id = aws_api_gateway_rest_api.rest_api.id
   resource_id = aws_api_gateway_resource.user_res.id
@@ -76,8 +136,8 @@ resource "aws_api_gateway_integration_response" "user_options" {
   http_method = aws_api_gateway_method.user_options.http_method
   status_code = aws_api_gateway_method_response.user_options.status_code
   response_parameters = {
-    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
-    "method.response.header.Access-Control-Allow-Methods" = "'GET,PUT,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,Idempotency-Key'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,PUT,DELETE,OPTIONS'"
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
 }
@@ -88,7 +148,7 @@ resource "aws_api_gateway_integration" "user_get" {
   http_method             = aws_api_gateway_method.user_get.http_method
   integration_http_method = "POST"
   type                    = "AWS_PROXY"
-  uri                     = aws_lambda_function.user.invoke_arn
+  uri                     = local.user_route_function.invoke_arn
 }
 
 resource "aws_api_gateway_integration" "user_put" {
@@ -97,7 +157,74 @@ resource "aws_api_gateway_integration" "user_put" {
   http_method             = aws_api_gateway_method.user_put.http_method
   integration_http_method = "POST"
   type                    = "AWS_PROXY"
-  uri                     = aws_lambda_function.user.invoke_arn
+  uri                     = local.user_route_function.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "user_delete" {
+  rest_api_id             = aws_api_gateway_rest_api.rest_api.id
+  resource_id             = aws_api_gateway_resource.user_res.id
+  http_method             = aws_api_gateway_method.user_delete.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = local.user_route_function.invoke_arn
+}
+
+resource "aws_api_gateway_method" "suggest_options" {
+  rest_api_id   = aws_api_gateway_rest_api.rest_api.id
+  resource_id   = aws_api_gateway_resource.suggest_res.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_method" "suggest_get" {
+  rest_api_id   = aws_api_gateway_rest_api.rest_api.id
+  resource_id   = aws_api_gateway_resource.suggest_res.id
+  http_method   = "GET"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+}
+
+resource "aws_api_gateway_integration" "suggest_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.suggest_res.id
+  http_method = aws_api_gateway_method.suggest_options.http_method
+  type        = "MOCK"
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "suggest_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.suggest_res.id
+  http_method = aws_api_gateway_method.suggest_options.http_method
+  status_code = "200"
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "suggest_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.suggest_res.id
+  http_method = aws_api_gateway_method.suggest_options.http_method
+  status_code = aws_api_gateway_method_response.suggest_options.status_code
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+}
+
+resource "aws_api_gateway_integration" "suggest_get" {
+  rest_api_id             = aws_api_gateway_rest_api.rest_api.id
+  resource_id             = aws_api_gateway_resource.suggest_res.id
+  http_method             = aws_api_gateway_method.suggest_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = local.searches_route_function.invoke_arn
 }
 
 resource "aws_lambda_permission" "apigw_user" {
@@ -159,7 +286,7 @@ resource "aws_api_gateway_integration_response" "searches_options" {
   http_method = aws_api_gateway_method.searches_options.http_method
   status_code = aws_api_gateway_method_response.searches_options.status_code
   response_parameters = {
-    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,Idempotency-Key'"
     "method.response.header.Access-Control-Allow-Methods" = "'GET,POST,OPTIONS'"
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
@@ -171,7 +298,7 @@ resource "aws_api_gateway_integration" "searches_get" {
   http_method             = aws_api_gateway_method.searches_get.http_method
   integration_http_method = "POST"
   type                    = "AWS_PROXY"
-  uri                     = aws_lambda_function.searches.invoke_arn
+  uri                     = local.searches_route_function.invoke_arn
 }
 
 resource "aws_api_gateway_integration" "searches_post" {
@@ -180,7 +307,247 @@ resource "aws_api_gateway_integration" "searches_post" {
   http_method             = aws_api_gateway_method.searches_post.http_method
   integration_http_method = "POST"
   type                    = "AWS_PROXY"
-  uri                     = aws_lambda_function.searches.invoke_arn
+  uri                     = local.searches_route_function.invoke_arn
+}
+
+resource "aws_api_gateway_method" "trending_options" {
+  rest_api_id   = aws_api_gateway_rest_api.rest_api.id
+  resource_id   = aws_api_gateway_resource.trending_res.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_method" "trending_get" {
+  rest_api_id   = aws_api_gateway_rest_api.rest_api.id
+  resource_id   = aws_api_gateway_resource.trending_res.id
+  http_method   = "GET"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+}
+
+resource "aws_api_gateway_integration" "trending_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.trending_res.id
+  http_method = aws_api_gateway_method.trending_options.http_method
+  type        = "MOCK"
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "trending_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.trending_res.id
+  http_method = aws_api_gateway_method.trending_options.http_method
+  status_code = "200"
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "trending_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.trending_res.id
+  http_method = aws_api_gateway_method.trending_options.http_method
+  status_code = aws_api_gateway_method_response.trending_options.status_code
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+}
+
+resource "aws_api_gateway_integration" "trending_get" {
+  rest_api_id             = aws_api_gateway_rest_api.rest_api.id
+  resource_id             = aws_api_gateway_resource.trending_res.id
+  http_method             = aws_api_gateway_method.trending_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = local.searches_route_function.invoke_arn
+}
+
+resource "aws_api_gateway_method" "nearby_options" {
+  rest_api_id   = aws_api_gateway_rest_api.rest_api.id
+  resource_id   = aws_api_gateway_resource.nearby_res.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_method" "nearby_get" {
+  rest_api_id   = aws_api_gateway_rest_api.rest_api.id
+  resource_id   = aws_api_gateway_resource.nearby_res.id
+  http_method   = "GET"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+}
+
+resource "aws_api_gateway_integration" "nearby_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.nearby_res.id
+  http_method = aws_api_gateway_method.nearby_options.http_method
+  type        = "MOCK"
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "nearby_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.nearby_res.id
+  http_method = aws_api_gateway_method.nearby_options.http_method
+  status_code = "200"
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "nearby_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.nearby_res.id
+  http_method = aws_api_gateway_method.nearby_options.http_method
+  status_code = aws_api_gateway_method_response.nearby_options.status_code
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+}
+
+resource "aws_api_gateway_integration" "nearby_get" {
+  rest_api_id             = aws_api_gateway_rest_api.rest_api.id
+  resource_id             = aws_api_gateway_resource.nearby_res.id
+  http_method             = aws_api_gateway_method.nearby_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = local.searches_route_function.invoke_arn
+}
+
+resource "aws_api_gateway_method" "tiles_options" {
+  rest_api_id   = aws_api_gateway_rest_api.rest_api.id
+  resource_id   = aws_api_gateway_resource.tiles_y_res.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_method" "tiles_get" {
+  rest_api_id   = aws_api_gateway_rest_api.rest_api.id
+  resource_id   = aws_api_gateway_resource.tiles_y_res.id
+  http_method   = "GET"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+
+  request_parameters = {
+    "method.request.path.z" = true
+    "method.request.path.x" = true
+    "method.request.path.y" = true
+  }
+}
+
+resource "aws_api_gateway_integration" "tiles_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.tiles_y_res.id
+  http_method = aws_api_gateway_method.tiles_options.http_method
+  type        = "MOCK"
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "tiles_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.tiles_y_res.id
+  http_method = aws_api_gateway_method.tiles_options.http_method
+  status_code = "200"
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "tiles_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.tiles_y_res.id
+  http_method = aws_api_gateway_method.tiles_options.http_method
+  status_code = aws_api_gateway_method_response.tiles_options.status_code
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+}
+
+resource "aws_api_gateway_integration" "tiles_get" {
+  rest_api_id             = aws_api_gateway_rest_api.rest_api.id
+  resource_id             = aws_api_gateway_resource.tiles_y_res.id
+  http_method             = aws_api_gateway_method.tiles_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = local.tiles_route_function.invoke_arn
+}
+
+resource "aws_api_gateway_method" "bootstrap_options" {
+  rest_api_id   = aws_api_gateway_rest_api.rest_api.id
+  resource_id   = aws_api_gateway_resource.bootstrap_res.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_method" "bootstrap_get" {
+  rest_api_id   = aws_api_gateway_rest_api.rest_api.id
+  resource_id   = aws_api_gateway_resource.bootstrap_res.id
+  http_method   = "GET"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+}
+
+resource "aws_api_gateway_integration" "bootstrap_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.bootstrap_res.id
+  http_method = aws_api_gateway_method.bootstrap_options.http_method
+  type        = "MOCK"
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "bootstrap_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.bootstrap_res.id
+  http_method = aws_api_gateway_method.bootstrap_options.http_method
+  status_code = "200"
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "bootstrap_options" {
+  rest_api_id = aws_api_gateway_rest_api.rest_api.id
+  resource_id = aws_api_gateway_resource.bootstrap_res.id
+  http_method = aws_api_gateway_method.bootstrap_options.http_method
+  status_code = aws_api_gateway_method_response.bootstrap_options.status_code
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+}
+
+# Needs both the user and searches code, so it is always served by the
+# consolidated function
+resource "aws_api_gateway_integration" "bootstrap_get" {
+  rest_api_id             = aws_api_gateway_rest_api.rest_api.id
+  resource_id             = aws_api_gateway_resource.bootstrap_res.id
+  http_method             = aws_api_gateway_method.bootstrap_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.api.invoke_arn
 }
 
 resource "aws_lambda_permission" "apigw_searches" {
@@ -191,6 +558,22 @@ resource "aws_lambda_permission" "apigw_searches" {
   source_arn    = "${aws_api_gateway_rest_api.rest_api.execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "apigw_tiles" {
+  statement_id  = "AllowAPIGatewayInvokeTiles"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.tiles.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.rest_api.execution_arn}/*/*"
+}
+
+resource "aws_lambda_permission" "apigw_api" {
+  statement_id  = "AllowAPIGatewayInvokeApi"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.api.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.rest_api.execution_arn}/*/*"
+}
+
 resource "aws_api_gateway_deployment" "deploy" {
   rest_api_id = aws_api_gateway_rest_api.rest_api.id
 
@@ -198,27 +581,71 @@ resource "aws_api_gateway_deployment" "deploy" {
     aws_api_gateway_integration.user_options,
     aws_api_gateway_integration.user_get,
     aws_api_gateway_integration.user_put,
+    aws_api_gateway_integration.user_delete,
     aws_api_gateway_integration.searches_options,
     aws_api_gateway_integration.searches_get,
     aws_api_gateway_integration.searches_post,
+    aws_api_gateway_integration.trending_options,
+    aws_api_gateway_integration.trending_get,
+    aws_api_gateway_integration.nearby_options,
+    aws_api_gateway_integration.nearby_get,
+    aws_api_gateway_integration.tiles_options,
+    aws_api_gateway_integration.tiles_get,
+    aws_api_gateway_integration.bootstrap_options,
+    aws_api_gateway_integration.bootstrap_get,
+    aws_api_gateway_integration.suggest_options,
+    aws_api_gateway_integration.suggest_get,
   ]
 
   triggers = {
     redeployment = sha1(jsonencode([
       aws_api_gateway_resource.user_res.id,
       aws_api_gateway_resource.searches_res.id,
+      aws_api_gateway_resource.trending_res.id,
+      aws_api_gateway_resource.nearby_res.id,
+      aws_api_gateway_resource.tiles_res.id,
+      aws_api_gateway_resource.tiles_z_res.id,
+      aws_api_gateway_resource.tiles_x_res.id,
+      aws_api_gateway_resource.tiles_y_res.id,
+      aws_api_gateway_resource.bootstrap_res.id,
+      aws_api_gateway_resource.suggest_res.id,
       aws_api_gateway_method.user_options.id,
       aws_api_gateway_method.user_get.id,
       aws_api_gateway_method.user_put.id,
+      aws_api_gateway_method.user_delete.id,
       aws_api_gateway_method.searches_options.id,
       aws_api_gateway_method.searches_get.id,
       aws_api_gateway_method.searches_post.id,
+      aws_api_gateway_method.trending_options.id,
+      aws_api_gateway_method.trending_get.id,
+      aws_api_gateway_method.nearby_options.id,
+      aws_api_gateway_method.nearby_get.id,
+      aws_api_gateway_method.tiles_options.id,
+      aws_api_gateway_method.tiles_get.id,
+      aws_api_gateway_method.bootstrap_options.id,
+      aws_api_gateway_method.bootstrap_get.id,
+      aws_api_gateway_method.suggest_options.id,
+      aws_api_gateway_method.suggest_get.id,
       aws_api_gateway_integration.user_options.id,
       aws_api_gateway_integration.user_get.id,
       aws_api_gateway_integration.user_put.id,
+      aws_api_gateway_integration.user_delete.id,
       aws_api_gateway_integration.searches_options.id,
       aws_api_gateway_integration.searches_get.id,
       aws_api_gateway_integration.searches_post.id,
+      aws_api_gateway_integration.trending_options.id,
+      aws_api_gateway_integration.trending_get.id,
+      aws_api_gateway_integration.nearby_options.id,
+      aws_api_gateway_integration.nearby_get.id,
+      aws_api_gateway_integration.tiles_options.id,
+      aws_api_gateway_integration.tiles_get.id,
+      aws_api_gateway_integration.bootstrap_options.id,
+      aws_api_gateway_integration.bootstrap_get.id,
+      aws_api_gateway_integration.suggest_options.id,
+      aws_api_gateway_integration.suggest_get.id,
+      local.user_route_function.invoke_arn,
+      local.searches_route_function.invoke_arn,
+      local.tiles_route_function.invoke_arn,
     ]))
   }
 
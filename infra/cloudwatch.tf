@@ -201,3 +201,147 @@ resource "aws_cloudwatch_metric_alarm" "api_latency" {
 
   tags = local.common_tags
 }
+
+# SQS - Searches Ingest Alarms
+
+resource "aws_cloudwatch_metric_alarm" "searches_ingest_dlq" {
+  alarm_name          = "${local.name_prefix}-searches-ingest-dlq"
+  comparison_operator = "GreaterThanThreshold"
+  evaluation_periods  = 1
+  metric_name         = "ApproximateNumberOfMessagesVisible"
+  namespace           = "AWS/SQS"
+  period              = 300
+  statistic           = "Maximum"
+  threshold           = 0
+  alarm_description   = "This alarm triggers when queued searches could not be written and landed in the DLQ"
+  alarm_actions       = [aws_sns_topic.alarms.arn]
+  treat_missing_data  = "notBreaching"
+
+  dimensions = {
+    QueueName = aws_sqs_queue.searches_ingest_dlq.name
+  }
+
+  tags = local.common_tags
+}
+
+# SQS - Account Purge Alarms
+
+resource "aws_cloudwatch_metric_alarm" "account_purge_dlq" {
+  alarm_name          = "${local.name_prefix}-account-purge-dlq"
+  comparison_operator = "GreaterThanThreshold"
+  evaluation_periods  = 1
+  metric_name         = "ApproximateNumberOfMessagesVisible"
+  namespace           = "AWS/SQS"
+  period              = 300
+  statistic           = "Maximum"
+  threshold           = 0
+  alarm_description   = "This alarm triggers when an account deletion could not finish and landed in the DLQ"
+  alarm_actions       = [aws_sns_topic.alarms.arn]
+  treat_missing_data  = "notBreaching"
+
+  dimensions = {
+    QueueName = aws_sqs_queue.account_purge_dlq.name
+  }
+
+  tags = local.common_tags
+}
+
+# Per-phase latency alarms (EMF metrics from common/metrics.py)
+# Metric names are handler phases (parse, validate, dynamodb, serialize) or the
+# total Duration; the Function+Route dimension set aggregates across statuses.
+
+locals {
+  p99_phase_alarms = {
+    searches_post_duration = {
+      function  = local.searches_route_function.function_name
+      route     = "POST /searches"
+      metric    = "Duration"
+      threshold = 1000
+    }
+    searches_post_dynamodb = {
+      function  = local.searches_route_function.function_name
+      route     = "POST /searches"
+      metric    = "dynamodb"
+      threshold = 500
+    }
+    searches_get_dynamodb = {
+      function  = local.searches_route_function.function_name
+      route     = "GET /searches"
+      metric    = "dynamodb"
+      threshold = 500
+    }
+    user_get_dynamodb = {
+      function  = local.user_route_function.function_name
+      route     = "GET /user"
+      metric    = "dynamodb"
+      threshold = 500
+    }
+  }
+}
+
+resource "aws_cloudwatch_metric_alarm" "p99_phase" {
+  for_each = local.p99_phase_alarms
+
+  alarm_name          = "${local.name_prefix}-${replace(each.key, "_", "-")}-p99"
+  comparison_operator = "GreaterThanThreshold"
+  evaluation_periods  = 3
+  metric_name         = each.value.metric
+  namespace           = local.metrics_namespace
+  period              = 300
+  extended_statistic  = "p99"
+  threshold           = each.value.threshold
+  alarm_description   = "p99 of ${each.value.metric} for ${each.value.route} exceeded ${each.value.threshold} ms"
+  alarm_actions       = [aws_sns_topic.alarms.arn]
+  treat_missing_data  = "notBreaching"
+
+  dimensions = {
+    Function = each.value.function
+    Route    = each.value.route
+  }
+
+  tags = local.common_tags
+}
+
+# DynamoDB circuit breaker trips (EMF metric from common/resilience.py). A trip
+# means a container stopped calling a table after repeated throttling or
+# server errors and is answering 503 until a probe succeeds.
+
+locals {
+  circuit_alarms = {
+    searches_post = {
+      function = local.searches_route_function.function_name
+      route    = "POST /searches"
+    }
+    searches_get = {
+      function = local.searches_route_function.function_name
+      route    = "GET /searches"
+    }
+    user_get = {
+      function = local.user_route_function.function_name
+      route    = "GET /user"
+    }
+  }
+}
+
+resource "aws_cloudwatch_metric_alarm" "ddb_circuit_opened" {
+  for_each = local.circuit_alarms
+
+  alarm_name          = "${local.name_prefix}-${replace(each.key, "_", "-")}-circuit-opened"
+  comparison_operator = "GreaterThanThreshold"
+  evaluation_periods  = 1
+  metric_name         = "DynamoDBCircuitOpened"
+  namespace           = local.metrics_namespace
+  period              = 300
+  statistic           = "Sum"
+  threshold           = 0
+  alarm_description   = "DynamoDB circuit breaker opened for ${each.value.route}"
+  alarm_actions       = [aws_sns_topic.alarms.arn]
+  treat_missing_data  = "notBreaching"
+
+  dimensions = {
+    Function = each.value.function
+    Route    = each.value.route
+  }
+
+  tags = local.common_tags
+}
@@ -2,13 +2,36 @@
 
 import json
 import os
-from typing import Any, Dict
-from unittest.mock import MagicMock
+import sys
+from typing import Any, Dict, Iterator
+from unittest.mock import MagicMock, patch
 
 import pytest
 from moto import mock_aws
 
 
+@pytest.fixture(autouse=True)
+def ddb_resilience() -> Iterator[None]:
+    """
+    Give each test a fresh container retry policy with retries turned off.
+
+    Handler tests count DynamoDB calls per error; tests of the retry policy
+    itself build their own ``Resilience`` or set DDB_MAX_RETRIES.
+    """
+
+    def reset() -> None:
+        # Handlers import common as a top-level package, tests as lambda_src.common
+        for name in ("common.resilience", "lambda_src.common.resilience"):
+            module = sys.modules.get(name)
+            if module is not None:
+                module._policy = None  # type: ignore[attr-defined]
+
+    reset()
+    with patch.dict(os.environ, {"DDB_MAX_RETRIES": "0"}):
+        yield
+    reset()
+
+
 @pytest.fixture
 def aws_credentials() -> None:
     """Mock AWS credentials for moto."""
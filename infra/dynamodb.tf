@@ -31,6 +31,11 @@ resource "aws_dynamodb_table" "searches" {
     type = "S"
   }
 
+  attribute {
+    name = "geohash"
+    type = "S"
+  }
+
   global_secondary_index {
     name            = "RecentSearches"
     hash_key        = "userId"
@@ -38,9 +43,127 @@ resource "aws_dynamodb_table" "searches" {
     projection_type = "ALL"
   }
 
+  # Sparse: only searches posted with coordinates carry a geohash. Serves the
+  # prefix-range queries of GET /searches/nearby.
+  global_secondary_index {
+    name               = "SearchesByGeohash"
+    hash_key           = "userId"
+    range_key          = "geohash"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["query", "lat", "lng"]
+  }
+
+  # New searches feed the heatmap tile counters (tiles_stream_handler) and
+  # the per-user search summaries (user_summary_stream_handler)
+  stream_enabled   = true
+  stream_view_type = "NEW_IMAGE"
+
   tags = local.common_tags
 
   lifecycle {
     prevent_destroy = true
   }
 }
+
+# Sharded, time-bucketed search counters and precomputed top-K lists for
+# GET /searches/trending (layout in lambda_src/common/trending.py). Counters
+# are disposable, so unlike the other tables this one may be destroyed.
+resource "aws_dynamodb_table" "trending" {
+  name         = "${local.name_prefix}-trending"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "pk"
+  range_key    = "sk"
+
+  attribute {
+    name = "pk"
+    type = "S"
+  }
+
+  attribute {
+    name = "sk"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = local.common_tags
+}
+
+# Geocoding results keyed by the normalized query (see
+# lambda_src/common/geocoding.py). Misses are stored too, with a shorter TTL.
+# Everything here can be re-fetched from the provider.
+resource "aws_dynamodb_table" "geocode_cache" {
+  name         = "${local.name_prefix}-geocode-cache"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "query"
+
+  attribute {
+    name = "query"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = local.common_tags
+}
+
+# Idempotency-Key records for retried writes (layout in
+# lambda_src/common/idempotency.py). Expired records are removed by TTL.
+resource "aws_dynamodb_table" "idempotency" {
+  name         = "${local.name_prefix}-idempotency"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "id"
+
+  attribute {
+    name = "id"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = local.common_tags
+}
+
+# Token buckets for per-user write rate limits (layout in
+# lambda_src/common/ratelimit.py). Idle buckets are removed by TTL.
+resource "aws_dynamodb_table" "rate_limits" {
+  name         = "${local.name_prefix}-rate-limits"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "id"
+
+  attribute {
+    name = "id"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = local.common_tags
+}
+
+# Heatmap cell counters, one item per Web Mercator tile (layout in
+# lambda_src/common/tiles.py). Maintained from the searches table stream.
+resource "aws_dynamodb_table" "tiles" {
+  name         = "${local.name_prefix}-tiles"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "tile"
+
+  attribute {
+    name = "tile"
+    type = "S"
+  }
+
+  tags = local.common_tags
+}
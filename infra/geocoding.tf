@@ -0,0 +1,17 @@
+# Amazon Location Service place index used to geocode searches posted without
+# coordinates. Only created when var.geocoder is "location"; results are cached
+# in aws_dynamodb_table.geocode_cache so each distinct query is resolved once.
+
+resource "aws_location_place_index" "geocoder" {
+  count = var.geocoder == "location" ? 1 : 0
+
+  index_name  = "${local.name_prefix}-places"
+  data_source = var.geocoder_data_source
+
+  data_source_configuration {
+    # Results are stored in the cache table, which requires the Storage intended use
+    intended_use = "Storage"
+  }
+
+  tags = local.common_tags
+}
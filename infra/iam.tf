@@ -20,13 +20,56 @@ data "aws_iam_policy_document" "lambda_policy_doc" {
     resources = ["arn:aws:logs:${var.aws_region}:*:*"]
   }
   statement {
-    actions = ["dynamodb:GetItem", "dynamodb:PutItem", "dynamodb:Query", "dynamodb:UpdateItem", "dynamodb:Scan"]
+    actions = ["dynamodb:GetItem", "dynamodb:PutItem", "dynamodb:Query", "dynamodb:UpdateItem", "dynamodb:Scan", "dynamodb:BatchWriteItem", "dynamodb:DeleteItem"]
     resources = [
       aws_dynamodb_table.users.arn,
       aws_dynamodb_table.searches.arn,
-      "${aws_dynamodb_table.searches.arn}/index/*"
+      "${aws_dynamodb_table.searches.arn}/index/*",
+      aws_dynamodb_table.trending.arn,
+      aws_dynamodb_table.geocode_cache.arn,
+      aws_dynamodb_table.tiles.arn,
+      aws_dynamodb_table.idempotency.arn,
+      aws_dynamodb_table.rate_limits.arn
     ]
   }
+  statement {
+    actions = [
+      "dynamodb:DescribeStream",
+      "dynamodb:GetRecords",
+      "dynamodb:GetShardIterator",
+      "dynamodb:ListStreams",
+    ]
+    resources = [aws_dynamodb_table.searches.stream_arn]
+  }
+  dynamic "statement" {
+    for_each = aws_location_place_index.geocoder
+    content {
+      actions   = ["geo:SearchPlaceIndexForText"]
+      resources = [statement.value.index_arn]
+    }
+  }
+  statement {
+    actions = [
+      "sqs:SendMessage",
+      "sqs:ReceiveMessage",
+      "sqs:DeleteMessage",
+      "sqs:GetQueueAttributes",
+    ]
+    resources = [aws_sqs_queue.searches_ingest.arn, aws_sqs_queue.account_purge.arn]
+  }
+  statement {
+    actions   = ["s3:ListBucket"]
+    resources = [aws_s3_bucket.avatars.arn]
+    condition {
+      test     = "StringLike"
+      variable = "s3:prefix"
+      values   = ["avatars/*"]
+    }
+  }
+  statement {
+    actions   = ["s3:DeleteObject"]
+    resources = ["${aws_s3_bucket.avatars.arn}/avatars/*"]
+  }
 }
 
 resource "aws_iam_policy" "lambda_policy" {
@@ -13,13 +13,16 @@ resource "aws_lambda_function" "user" {
   filename         = "${path.module}/placeholder.zip"
   source_code_hash = filebase64sha256("${path.module}/placeholder.zip")
 
-  timeout = 10
+  timeout     = 10
+  memory_size = var.lambda_memory_sizes["user"]
 
   environment {
-    variables = {
-      USERS_TABLE_NAME = aws_dynamodb_table.users.name
-      ENVIRONMENT      = local.environment
-    }
+    variables = merge(local.lambda_common_env, local.idempotency_env, local.rate_limit_env, {
+      USERS_TABLE_NAME        = aws_dynamodb_table.users.name
+      ACCOUNT_PURGE_QUEUE_URL = aws_sqs_queue.account_purge.url
+      IDENTITY_POOL_ID        = aws_cognito_identity_pool.this.id
+      USER_POOL_PROVIDER      = aws_cognito_user_pool.this.endpoint
+    })
   }
 
   tags = local.common_tags
@@ -44,14 +47,338 @@ resource "aws_lambda_function" "searches" {
   filename         = "${path.module}/placeholder.zip"
   source_code_hash = filebase64sha256("${path.module}/placeholder.zip")
 
-  timeout = 10
+  timeout     = 10
+  memory_size = var.lambda_memory_sizes["searches"]
+
+  environment {
+    variables = merge(local.lambda_common_env, local.trending_env, local.geocoding_env, local.suggest_env, local.idempotency_env, local.rate_limit_env, {
+      SEARCHES_TABLE        = aws_dynamodb_table.searches.name
+      SEARCHES_ASYNC_INGEST = var.searches_async_ingest ? "true" : "false"
+      SEARCHES_QUEUE_URL    = aws_sqs_queue.searches_ingest.url
+    })
+  }
+
+  tags = local.common_tags
+
+  # Ignore changes to code - managed by CI/CD
+  lifecycle {
+    ignore_changes = [
+      filename,
+      source_code_hash,
+      last_modified
+    ]
+  }
+}
+
+# Consolidated REST function: serves every API Gateway route from one
+# container pool (lambda_src/api_handler), so fewer containers go cold.
+# API Gateway is pointed at it when var.consolidated_api is true; the
+# per-resource functions above stay deployed either way.
+resource "aws_lambda_function" "api" {
+  function_name = "${local.name_prefix}-api"
+  role          = aws_iam_role.lambda_role.arn
+  handler       = "index.handler"
+  runtime       = "python3.11"
+
+  # Placeholder for initial creation - actual code deployed via CI/CD
+  filename         = "${path.module}/placeholder.zip"
+  source_code_hash = filebase64sha256("${path.module}/placeholder.zip")
+
+  timeout     = 10
+  memory_size = var.lambda_memory_sizes["api"]
+
+  environment {
+    variables = merge(local.lambda_common_env, local.trending_env, local.geocoding_env, local.tiles_env, local.suggest_env, local.idempotency_env, local.rate_limit_env, {
+      USERS_TABLE_NAME        = aws_dynamodb_table.users.name
+      SEARCHES_TABLE          = aws_dynamodb_table.searches.name
+      SEARCHES_ASYNC_INGEST   = var.searches_async_ingest ? "true" : "false"
+      SEARCHES_QUEUE_URL      = aws_sqs_queue.searches_ingest.url
+      ACCOUNT_PURGE_QUEUE_URL = aws_sqs_queue.account_purge.url
+      IDENTITY_POOL_ID        = aws_cognito_identity_pool.this.id
+      USER_POOL_PROVIDER      = aws_cognito_user_pool.this.endpoint
+    })
+  }
+
+  tags = local.common_tags
+
+  # Ignore changes to code - managed by CI/CD
+  lifecycle {
+    ignore_changes = [
+      filename,
+      source_code_hash,
+      last_modified
+    ]
+  }
+}
+
+locals {
+  # Functions API Gateway integrates each REST resource with
+  user_route_function     = var.consolidated_api ? aws_lambda_function.api : aws_lambda_function.user
+  searches_route_function = var.consolidated_api ? aws_lambda_function.api : aws_lambda_function.searches
+  tiles_route_function    = var.consolidated_api ? aws_lambda_function.api : aws_lambda_function.tiles
+}
+
+resource "aws_lambda_function" "searches_ingest" {
+  function_name = "${local.name_prefix}-searches-ingest"
+  role          = aws_iam_role.lambda_role.arn
+  handler       = "index.handler"
+  runtime       = "python3.11"
+
+  # Placeholder for initial creation - actual code deployed via CI/CD
+  filename         = "${path.module}/placeholder.zip"
+  source_code_hash = filebase64sha256("${path.module}/placeholder.zip")
+
+  timeout     = 30
+  memory_size = var.lambda_memory_sizes["searches_ingest"]
 
   environment {
-    variables = {
+    variables = merge(local.lambda_common_env, local.trending_env, local.geocoding_env, {
       SEARCHES_TABLE = aws_dynamodb_table.searches.name
-      ENVIRONMENT    = local.environment
+    })
+  }
+
+  tags = local.common_tags
+
+  # Ignore changes to code - managed by CI/CD
+  lifecycle {
+    ignore_changes = [
+      filename,
+      source_code_hash,
+      last_modified
+    ]
+  }
+}
+
+resource "aws_lambda_event_source_mapping" "searches_ingest" {
+  event_source_arn = aws_sqs_queue.searches_ingest.arn
+  function_name    = aws_lambda_function.searches_ingest.arn
+
+  # Collect up to 100 messages (4 BatchWriteItem calls) or 5 seconds, whichever comes first
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 5
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  scaling_config {
+    # Caps concurrent writers so bursts are smoothed against table capacity
+    maximum_concurrency = 5
+  }
+}
+
+# Merges the trending counter shards into the top-K lists served by
+# GET /searches/trending; see common/trending.py
+resource "aws_lambda_function" "trending_aggregator" {
+  function_name = "${local.name_prefix}-trending-aggregator"
+  role          = aws_iam_role.lambda_role.arn
+  handler       = "index.handler"
+  runtime       = "python3.11"
+
+  # Placeholder for initial creation - actual code deployed via CI/CD
+  filename         = "${path.module}/placeholder.zip"
+  source_code_hash = filebase64sha256("${path.module}/placeholder.zip")
+
+  timeout     = 60
+  memory_size = var.lambda_memory_sizes["trending_aggregator"]
+
+  environment {
+    variables = merge(local.lambda_common_env, local.trending_env, {
+      TRENDING_TOP_K          = tostring(var.trending_top_k)
+      TRENDING_WINDOW_BUCKETS = tostring(var.trending_window_buckets)
+    })
+  }
+
+  tags = local.common_tags
+
+  # Ignore changes to code - managed by CI/CD
+  lifecycle {
+    ignore_changes = [
+      filename,
+      source_code_hash,
+      last_modified
+    ]
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "trending_aggregator" {
+  name                = "${local.name_prefix}-trending-aggregator"
+  description         = "Refresh the trending searches lists"
+  schedule_expression = var.trending_aggregate_schedule
+
+  tags = local.common_tags
+}
+
+resource "aws_cloudwatch_event_target" "trending_aggregator" {
+  rule = aws_cloudwatch_event_rule.trending_aggregator.name
+  arn  = aws_lambda_function.trending_aggregator.arn
+}
+
+resource "aws_lambda_permission" "events_trending_aggregator" {
+  statement_id  = "AllowEventBridgeInvokeTrendingAggregator"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.trending_aggregator.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.trending_aggregator.arn
+}
+
+# Rebuilds the global top-k-per-prefix index served by GET /suggest from
+# every user's searches; see common/suggest.py
+resource "aws_lambda_function" "suggest_indexer" {
+  function_name = "${local.name_prefix}-suggest-indexer"
+  role          = aws_iam_role.lambda_role.arn
+  handler       = "index.handler"
+  runtime       = "python3.11"
+
+  # Placeholder for initial creation - actual code deployed via CI/CD
+  filename         = "${path.module}/placeholder.zip"
+  source_code_hash = filebase64sha256("${path.module}/placeholder.zip")
+
+  timeout     = 900
+  memory_size = var.lambda_memory_sizes["suggest_indexer"]
+
+  environment {
+    variables = merge(local.lambda_common_env, local.trending_env, local.suggest_env, {
+      SEARCHES_TABLE        = aws_dynamodb_table.searches.name
+      SUGGEST_SCAN_SEGMENTS = tostring(var.suggest_scan_segments)
+      SUGGEST_WORKERS       = tostring(var.suggest_workers)
+      SUGGEST_MIN_USERS     = tostring(var.suggest_min_users)
+    })
+  }
+
+  tags = local.common_tags
+
+  # Ignore changes to code - managed by CI/CD
+  lifecycle {
+    ignore_changes = [
+      filename,
+      source_code_hash,
+      last_modified
+    ]
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "suggest_indexer" {
+  name                = "${local.name_prefix}-suggest-indexer"
+  description         = "Rebuild the query suggestion index"
+  schedule_expression = var.suggest_index_schedule
+
+  tags = local.common_tags
+}
+
+resource "aws_cloudwatch_event_target" "suggest_indexer" {
+  rule = aws_cloudwatch_event_rule.suggest_indexer.name
+  arn  = aws_lambda_function.suggest_indexer.arn
+}
+
+resource "aws_lambda_permission" "events_suggest_indexer" {
+  statement_id  = "AllowEventBridgeInvokeSuggestIndexer"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.suggest_indexer.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.suggest_indexer.arn
+}
+
+# Serves GET /tiles/{z}/{x}/{y} from the counters kept by tiles_stream
+resource "aws_lambda_function" "tiles" {
+  function_name = "${local.name_prefix}-tiles"
+  role          = aws_iam_role.lambda_role.arn
+  handler       = "index.handler"
+  runtime       = "python3.11"
+
+  # Placeholder for initial creation - actual code deployed via CI/CD
+  filename         = "${path.module}/placeholder.zip"
+  source_code_hash = filebase64sha256("${path.module}/placeholder.zip")
+
+  timeout     = 10
+  memory_size = var.lambda_memory_sizes["tiles"]
+
+  environment {
+    variables = merge(local.lambda_common_env, local.tiles_env)
+  }
+
+  tags = local.common_tags
+
+  # Ignore changes to code - managed by CI/CD
+  lifecycle {
+    ignore_changes = [
+      filename,
+      source_code_hash,
+      last_modified
+    ]
+  }
+}
+
+# Folds new located searches from the searches table stream into the heatmap
+# tile counters; see common/tiles.py
+resource "aws_lambda_function" "tiles_stream" {
+  function_name = "${local.name_prefix}-tiles-stream"
+  role          = aws_iam_role.lambda_role.arn
+  handler       = "index.handler"
+  runtime       = "python3.11"
+
+  # Placeholder for initial creation - actual code deployed via CI/CD
+  filename         = "${path.module}/placeholder.zip"
+  source_code_hash = filebase64sha256("${path.module}/placeholder.zip")
+
+  timeout     = 60
+  memory_size = var.lambda_memory_sizes["tiles_stream"]
+
+  environment {
+    variables = merge(local.lambda_common_env, local.tiles_env)
+  }
+
+  tags = local.common_tags
+
+  # Ignore changes to code - managed by CI/CD
+  lifecycle {
+    ignore_changes = [
+      filename,
+      source_code_hash,
+      last_modified
+    ]
+  }
+}
+
+resource "aws_lambda_event_source_mapping" "tiles_stream" {
+  event_source_arn  = aws_dynamodb_table.searches.stream_arn
+  function_name     = aws_lambda_function.tiles_stream.arn
+  starting_position = "LATEST"
+
+  # Larger, less frequent batches fold more searches into each tile update
+  batch_size                         = 500
+  maximum_batching_window_in_seconds = 10
+  function_response_types            = ["ReportBatchItemFailures"]
+  maximum_retry_attempts             = 10
+
+  # Only located inserts reach the function
+  filter_criteria {
+    filter {
+      pattern = jsonencode({
+        eventName = ["INSERT"]
+        dynamodb  = { NewImage = { lat = { N = [{ exists = true }] } } }
+      })
     }
   }
+}
+
+# Keeps searchCount, lastSearchAt and lastQuery on each user item from the
+# searches table stream, so GET /user reads them with its single GetItem
+resource "aws_lambda_function" "user_summary_stream" {
+  function_name = "${local.name_prefix}-user-summary-stream"
+  role          = aws_iam_role.lambda_role.arn
+  handler       = "index.handler"
+  runtime       = "python3.11"
+
+  # Placeholder for initial creation - actual code deployed via CI/CD
+  filename         = "${path.module}/placeholder.zip"
+  source_code_hash = filebase64sha256("${path.module}/placeholder.zip")
+
+  timeout     = 60
+  memory_size = var.lambda_memory_sizes["user_summary_stream"]
+
+  environment {
+    variables = merge(local.lambda_common_env, {
+      USERS_TABLE_NAME = aws_dynamodb_table.users.name
+    })
+  }
 
   tags = local.common_tags
 
@@ -65,6 +392,76 @@ resource "aws_lambda_function" "searches" {
   }
 }
 
+resource "aws_lambda_event_source_mapping" "user_summary_stream" {
+  event_source_arn  = aws_dynamodb_table.searches.stream_arn
+  function_name     = aws_lambda_function.user_summary_stream.arn
+  starting_position = "LATEST"
+
+  # Bursts from one user collapse into a single update per batch
+  batch_size                         = 500
+  maximum_batching_window_in_seconds = 5
+  function_response_types            = ["ReportBatchItemFailures"]
+  maximum_retry_attempts             = 10
+
+  filter_criteria {
+    filter {
+      pattern = jsonencode({ eventName = ["INSERT"] })
+    }
+  }
+}
+
+# Deletes the account data queued by DELETE /user: avatars, searches and the
+# user item; see lambda_src/account_purge_handler
+resource "aws_lambda_function" "account_purge" {
+  function_name = "${local.name_prefix}-account-purge"
+  role          = aws_iam_role.lambda_role.arn
+  handler       = "index.handler"
+  runtime       = "python3.11"
+
+  # Placeholder for initial creation - actual code deployed via CI/CD
+  filename         = "${path.module}/placeholder.zip"
+  source_code_hash = filebase64sha256("${path.module}/placeholder.zip")
+
+  timeout     = 300
+  memory_size = var.lambda_memory_sizes["account_purge"]
+
+  environment {
+    variables = merge(local.lambda_common_env, {
+      USERS_TABLE_NAME          = aws_dynamodb_table.users.name
+      SEARCHES_TABLE            = aws_dynamodb_table.searches.name
+      AVATARS_BUCKET            = aws_s3_bucket.avatars.bucket
+      ACCOUNT_PURGE_QUEUE_URL   = aws_sqs_queue.account_purge.url
+      PURGE_DELETE_WORKERS      = tostring(var.account_purge_delete_workers)
+      PURGE_SWEEP_DELAY_SECONDS = tostring(var.account_purge_sweep_delay_seconds)
+    })
+  }
+
+  tags = local.common_tags
+
+  # Ignore changes to code - managed by CI/CD
+  lifecycle {
+    ignore_changes = [
+      filename,
+      source_code_hash,
+      last_modified
+    ]
+  }
+}
+
+resource "aws_lambda_event_source_mapping" "account_purge" {
+  event_source_arn = aws_sqs_queue.account_purge.arn
+  function_name    = aws_lambda_function.account_purge.arn
+
+  # One account per invocation, so each purge gets the whole timeout
+  batch_size              = 1
+  function_response_types = ["ReportBatchItemFailures"]
+
+  scaling_config {
+    # Each purge already runs account_purge_delete_workers batch deletes at once
+    maximum_concurrency = 2
+  }
+}
+
 resource "aws_lambda_function" "post_confirmation" {
   function_name = "${local.name_prefix}-post-confirmation"
   role          = aws_iam_role.lambda_role.arn
@@ -75,13 +472,13 @@ resource "aws_lambda_function" "post_confirmation" {
   filename         = "${path.module}/placeholder.zip"
   source_code_hash = filebase64sha256("${path.module}/placeholder.zip")
 
-  timeout = 10
+  timeout     = 10
+  memory_size = var.lambda_memory_sizes["post_confirmation"]
 
   environment {
-    variables = {
+    variables = merge(local.lambda_common_env, {
       USERS_TABLE_NAME = aws_dynamodb_table.users.name
-      ENVIRONMENT      = local.environment
-    }
+    })
   }
 
   tags = local.common_tags
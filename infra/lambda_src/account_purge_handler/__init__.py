@@ -0,0 +1 @@
+"""Account purge queue consumer Lambda handler package."""
@@ -0,0 +1,402 @@
+"""Lambda handler that deletes a user's account data queued by DELETE /user."""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+# Add parent directory to path for common imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common.ddb import account_capacity, ddb_call  # noqa: E402
+from common.deadline import current_deadline, deadline_bound  # noqa: E402
+from common.log import log_invocation, logger  # noqa: E402
+from common.memory import memory_probed  # noqa: E402
+from common.metrics import metrics, record_metrics  # noqa: E402
+from common.profiling import profiled  # noqa: E402
+from common.queue import get_queue  # noqa: E402
+from common.resilience import ddb_client_config  # noqa: E402
+from common.utils import env_int, in_context  # noqa: E402
+
+# BatchWriteItem accepts at most 25 delete requests per call
+BATCH_SIZE = 25
+MAX_UNPROCESSED_RETRIES = 5
+RETRY_BASE_DELAY_SECONDS = 0.05
+DEFAULT_DELETE_WORKERS = 8
+# Batches queued per worker before paging stops to let deletes catch up
+MAX_QUEUED_BATCHES_PER_WORKER = 4
+# A second pass after this long removes searches and summary updates that
+# were still in the ingest queue or the table stream during the first
+DEFAULT_SWEEP_DELAY_SECONDS = 900
+
+AVATAR_FOLDER = "avatars"
+
+
+def get_ddb_client() -> Tuple[Any, str, str]:
+    """Get DynamoDB client, users table name and searches table name."""
+    ddb = boto3.client("dynamodb", config=ddb_client_config())
+    users_table = os.environ.get("USERS_TABLE_NAME", "")
+    searches_table = os.environ.get("SEARCHES_TABLE", "")
+    return ddb, users_table, searches_table
+
+
+def get_s3_client() -> Tuple[Any, str]:
+    """Get S3 client and avatars bucket name."""
+    return boto3.client("s3"), os.environ.get("AVATARS_BUCKET", "")
+
+
+def get_purge_queue() -> Any:
+    """Get the purge queue, which the sweep pass is sent back to."""
+    return get_queue(os.environ.get("ACCOUNT_PURGE_QUEUE_URL", ""))
+
+
+@profiled
+@record_metrics
+@memory_probed
+@account_capacity
+@log_invocation
+@deadline_bound
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle an SQS batch of account deletion requests.
+
+    Each request deletes the user's avatar objects, every item in their
+    ``searches`` partition and then their user item. Every step deletes
+    whatever is left, so a purge cut short by the deadline or an error is
+    reported as a batch failure and SQS redelivers it to carry on where the
+    last attempt stopped. Once a first pass finishes, a sweep pass is queued
+    with a delay to catch late writes.
+
+    Args:
+        event: SQS event containing queued deletion requests
+        context: Lambda context object
+
+    Returns:
+        Partial batch response with the IDs of requests not finished
+    """
+    records = event.get("Records", [])
+    ddb, users_table, searches_table = get_ddb_client()
+    s3, bucket = get_s3_client()
+    workers = max(1, env_int("PURGE_DELETE_WORKERS", DEFAULT_DELETE_WORKERS))
+
+    failures: List[str] = []
+    for position, record in enumerate(records):
+        if current_deadline().expired():
+            metrics.add("DeadlinePartialResults", 1, unit="Count")
+            logger.warning("Purge batch cut short at deadline", unstarted=len(records) - position)
+            failures.extend(unstarted.get("messageId", "") for unstarted in records[position:])
+            break
+        if not purge_record(ddb, users_table, searches_table, s3, bucket, record, workers):
+            failures.append(record.get("messageId", ""))
+
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in failures]}
+
+
+def purge_record(
+    ddb: Any,
+    users_table: str,
+    searches_table: str,
+    s3: Any,
+    bucket: str,
+    record: Dict[str, Any],
+    workers: int,
+) -> bool:
+    """
+    Run one purge pass for a queued request.
+
+    Args:
+        ddb: DynamoDB client
+        users_table: Users table name
+        searches_table: Searches table name
+        s3: S3 client
+        bucket: Avatars bucket name
+        record: SQS record from the event
+        workers: Threads issuing BatchWriteItem deletes
+
+    Returns:
+        True if the pass finished; False to have SQS redeliver the request
+    """
+    message = parse_message(record)
+    if message is None:
+        return False
+
+    logger.bind(user_id=message["userId"])
+    try:
+        result = purge_account(
+            ddb, users_table, searches_table, s3, bucket, message["userId"], workers
+        )
+        if result["complete"] and not message["sweep"]:
+            schedule_sweep(message["userId"])
+    except ClientError as e:
+        logger.error(
+            "Account purge failed",
+            error=str(e),
+            error_code=e.response.get("Error", {}).get("Code", "Unknown"),
+        )
+        return False
+
+    logger.info("Account purge pass finished", sweep=message["sweep"], **result)
+    return bool(result["complete"])
+
+
+def parse_message(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Decode a queued deletion request.
+
+    Args:
+        record: SQS record from the event
+
+    Returns:
+        {"userId", "sweep"}, or None if the message is invalid
+    """
+    try:
+        body = json.loads(record.get("body") or "{}")
+        user_id = body["userId"]
+        # The ID becomes an S3 prefix; an empty one would match every avatar
+        if not isinstance(user_id, str) or not user_id or "/" in user_id:
+            raise ValueError("userId must be a non-empty ID")
+    except (ValueError, KeyError, TypeError) as e:
+        logger.error("Invalid purge message", message_id=record.get("messageId", ""), error=str(e))
+        return None
+    return {"userId": user_id, "sweep": bool(body.get("sweep"))}
+
+
+def purge_account(
+    ddb: Any,
+    users_table: str,
+    searches_table: str,
+    s3: Any,
+    bucket: str,
+    user_id: str,
+    workers: int,
+) -> Dict[str, Any]:
+    """
+    Delete one user's avatars, searches and user item, in that order.
+
+    The user item goes last, since it holds the identity ID a retried pass
+    still needs.
+
+    Args:
+        ddb: DynamoDB client
+        users_table: Users table name
+        searches_table: Searches table name
+        s3: S3 client
+        bucket: Avatars bucket name
+        user_id: User's Cognito sub
+        workers: Threads issuing BatchWriteItem deletes
+
+    Returns:
+        Searches and avatars deleted, and whether everything is gone
+
+    Raises:
+        ClientError: If reading or deleting the user item, or paging the
+            searches, fails
+    """
+    key = {"userId": {"S": user_id}}
+    with metrics.phase("dynamodb"):
+        response = ddb_call(
+            ddb, "get_item", TableName=users_table, Key=key, ProjectionExpression="identityId"
+        )
+    identity_id = response.get("Item", {}).get("identityId", {}).get("S", "")
+
+    with metrics.phase("s3"):
+        avatars, avatars_done = delete_avatars(s3, bucket, avatar_prefixes(user_id, identity_id))
+    with metrics.phase("dynamodb"):
+        searches, searches_done = delete_searches(ddb, searches_table, user_id, workers)
+    metrics.add("SearchesPurged", searches, unit="Count")
+
+    complete = avatars_done and searches_done
+    if complete:
+        with metrics.phase("dynamodb"):
+            ddb_call(ddb, "delete_item", TableName=users_table, Key=key)
+        metrics.add("AccountsPurged", 1, unit="Count")
+    return {"searches": searches, "avatars": avatars, "complete": complete}
+
+
+def schedule_sweep(user_id: str) -> None:
+    """
+    Queue the delayed second pass for a user whose first pass finished.
+
+    Raises:
+        ClientError: If the message cannot be sent; the first pass is then
+            retried, which finds nothing left and tries again
+    """
+    delay = min(env_int("PURGE_SWEEP_DELAY_SECONDS", DEFAULT_SWEEP_DELAY_SECONDS), 900)
+    queue = get_purge_queue()
+    if queue is None or delay <= 0:
+        return
+    with metrics.phase("queue"):
+        queue.send({"userId": user_id, "sweep": True}, delay_seconds=delay)
+
+
+def delete_searches(ddb: Any, table: str, user_id: str, workers: int) -> Tuple[int, bool]:
+    """
+    Delete every item in a user's searches partition.
+
+    Pages are read with a key-only projection, and each page's keys are
+    deleted in 25-item BatchWriteItem calls spread over a thread pool while
+    the next page is read. Deleted items never come back in a later query, so
+    a retried purge only reads what the last attempt left.
+
+    Args:
+        ddb: DynamoDB client
+        table: Searches table name
+        user_id: User's Cognito sub
+        workers: Threads issuing deletes
+
+    Returns:
+        Items deleted, and False if any were left
+
+    Raises:
+        ClientError: If a page cannot be read
+    """
+    params: Dict[str, Any] = {
+        "TableName": table,
+        "KeyConditionExpression": "userId = :userId",
+        "ExpressionAttributeValues": {":userId": {"S": user_id}},
+        "ProjectionExpression": "userId, createdAt",
+    }
+    submitted, left, complete = 0, 0, True
+    pending: Set[Future[int]] = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            response = ddb_call(ddb, "query", **params)
+            keys = response.get("Items", [])
+            for start in range(0, len(keys), BATCH_SIZE):
+                batch = keys[start : start + BATCH_SIZE]
+                pending.add(pool.submit(in_context(delete_batch), ddb, table, batch))
+                submitted += len(batch)
+            if "LastEvaluatedKey" not in response:
+                break
+            if current_deadline().expired():
+                complete = False
+                break
+            params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+            while len(pending) > workers * MAX_QUEUED_BATCHES_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                left += sum(future.result() for future in done)
+        left += sum(future.result() for future in pending)
+
+    if left:
+        logger.warning("Searches left after purge retries", unprocessed=left)
+    return submitted - left, complete and not left
+
+
+def delete_batch(ddb: Any, table: str, keys: List[Dict[str, Any]]) -> int:
+    """
+    Delete up to 25 items with BatchWriteItem, retrying unprocessed items.
+
+    Runs on a worker thread.
+
+    Args:
+        ddb: DynamoDB client
+        table: Searches table name
+        keys: Primary keys of the items
+
+    Returns:
+        Number of items not deleted
+    """
+    requests = [{"DeleteRequest": {"Key": key}} for key in keys]
+    try:
+        for attempt in range(MAX_UNPROCESSED_RETRIES + 1):
+            response = ddb_call(ddb, "batch_write_item", RequestItems={table: requests})
+            requests = response.get("UnprocessedItems", {}).get(table, [])
+            if not requests:
+                return 0
+            delay = RETRY_BASE_DELAY_SECONDS * (2**attempt)
+            if attempt < MAX_UNPROCESSED_RETRIES and delay < current_deadline().remaining():
+                time.sleep(delay)
+            else:
+                break
+    except ClientError as e:
+        logger.warning(
+            "Search delete batch failed",
+            error_code=e.response.get("Error", {}).get("Code", "Unknown"),
+        )
+    return len(requests)
+
+
+def avatar_prefixes(user_id: str, identity_id: str) -> List[str]:
+    """
+    List the avatar folders to empty for a user.
+
+    Browsers upload to ``avatars/<identity ID>/``. The identity ID comes from
+    the user item, where PUT /user records it after resolving the caller's
+    own token (see ``user_handler``). ``avatarUrl`` is never used: clients can
+    set it to any URL, including one in another user's folder.
+
+    Args:
+        user_id: User's Cognito sub
+        identity_id: Recorded Cognito identity ID; "" if none was recorded
+
+    Returns:
+        Key prefixes, each ending in ``/``
+    """
+    prefixes = [f"{AVATAR_FOLDER}/{user_id}/"]
+    if identity_id and "/" not in identity_id and identity_id != user_id:
+        prefixes.append(f"{AVATAR_FOLDER}/{identity_id}/")
+    return prefixes
+
+
+def delete_avatars(s3: Any, bucket: str, prefixes: List[str]) -> Tuple[int, bool]:
+    """
+    Delete every object under the given prefixes, 1000 keys per call.
+
+    Args:
+        s3: S3 client
+        bucket: Avatars bucket name; empty skips avatars
+        prefixes: Output of ``avatar_prefixes``
+
+    Returns:
+        Objects deleted, and False if any may be left
+    """
+    deleted = 0
+    if not bucket:
+        return deleted, True
+    for prefix in prefixes:
+        count, complete = delete_prefix(s3, bucket, prefix)
+        deleted += count
+        if not complete:
+            return deleted, False
+    return deleted, True
+
+
+def delete_prefix(s3: Any, bucket: str, prefix: str) -> Tuple[int, bool]:
+    """
+    Delete the objects under one prefix, a listed page at a time.
+
+    Args:
+        s3: S3 client
+        bucket: Avatars bucket name
+        prefix: Key prefix, ending in ``/``
+
+    Returns:
+        Objects deleted, and False if any may be left
+    """
+    deleted = 0
+    params: Dict[str, Any] = {"Bucket": bucket, "Prefix": prefix}
+    while not current_deadline().expired():
+        try:
+            response = s3.list_objects_v2(**params)
+            objects = [{"Key": entry["Key"]} for entry in response.get("Contents", [])]
+            errors: List[Dict[str, Any]] = []
+            if objects:
+                result = s3.delete_objects(
+                    Bucket=bucket, Delete={"Objects": objects, "Quiet": True}
+                )
+                errors = result.get("Errors", [])
+                deleted += len(objects) - len(errors)
+        except (BotoCoreError, ClientError) as e:
+            logger.warning("Avatar delete failed", prefix=prefix, error=str(e))
+            return deleted, False
+        if errors:
+            logger.warning("Avatar objects not deleted", prefix=prefix, errors=len(errors))
+            return deleted, False
+        if not response.get("IsTruncated"):
+            return deleted, True
+        params["ContinuationToken"] = response["NextContinuationToken"]
+    return deleted, False
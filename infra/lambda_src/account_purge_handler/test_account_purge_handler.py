@@ -0,0 +1,267 @@
+"""Unit tests for account_purge_handler Lambda function."""
+
+import json
+import os
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+import boto3
+import pytest
+
+from ..common.deadline import Deadline
+from ..common.queue import LocalQueue
+from .index import avatar_prefixes, delete_batch, handler
+
+USERS_TABLE = "test-users-table"
+SEARCHES_TABLE = "test-searches-table"
+BUCKET = "test-avatars"
+IDENTITY_ID = "us-west-1:0f6c-identity"
+AVATAR_URL = f"https://{BUCKET}.s3.us-west-1.amazonaws.com/avatars/{IDENTITY_ID}/me.png"
+
+ENV = {
+    "USERS_TABLE_NAME": USERS_TABLE,
+    "SEARCHES_TABLE": SEARCHES_TABLE,
+    "AVATARS_BUCKET": BUCKET,
+    "PURGE_DELETE_WORKERS": "4",
+}
+
+
+def create_resources() -> Any:
+    """Create the users and searches tables and the avatars bucket; return a DynamoDB client."""
+    client = boto3.client("dynamodb")
+    client.create_table(
+        TableName=USERS_TABLE,
+        KeySchema=[{"AttributeName": "userId", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "userId", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    client.create_table(
+        TableName=SEARCHES_TABLE,
+        KeySchema=[
+            {"AttributeName": "userId", "KeyType": "HASH"},
+            {"AttributeName": "createdAt", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "userId", "AttributeType": "S"},
+            {"AttributeName": "createdAt", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    boto3.client("s3").create_bucket(
+        Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": "us-west-1"}
+    )
+    return client
+
+
+def create_user(
+    client: Any, user_id: str, searches: int, avatar_url: str = "", identity_id: str = ""
+) -> None:
+    """Store a user item and ``searches`` searches for it."""
+    item = {
+        "userId": {"S": user_id},
+        "email": {"S": f"{user_id}@x"},
+        "avatarUrl": {"S": avatar_url},
+    }
+    if identity_id:
+        item["identityId"] = {"S": identity_id}
+    client.put_item(TableName=USERS_TABLE, Item=item)
+    for i in range(searches):
+        client.put_item(
+            TableName=SEARCHES_TABLE,
+            Item={
+                "userId": {"S": user_id},
+                "createdAt": {"S": str(1_700_000_000 + i)},
+                "query": {"S": f"query {i}"},
+            },
+        )
+
+
+def count_searches(client: Any, user_id: str) -> int:
+    """Count the searches left in a user's partition."""
+    response = client.query(
+        TableName=SEARCHES_TABLE,
+        KeyConditionExpression="userId = :u",
+        ExpressionAttributeValues={":u": {"S": user_id}},
+        Select="COUNT",
+    )
+    return int(response["Count"])
+
+
+def avatar_keys() -> List[str]:
+    """List every object in the avatars bucket."""
+    response = boto3.client("s3").list_objects_v2(Bucket=BUCKET)
+    return sorted(entry["Key"] for entry in response.get("Contents", []))
+
+
+def purge_event(*bodies: Dict[str, Any]) -> Dict[str, Any]:
+    """Build an SQS event with one record per body."""
+    return {
+        "Records": [
+            {"messageId": f"m{i}", "body": json.dumps(body)} for i, body in enumerate(bodies)
+        ]
+    }
+
+
+class TestHandler:
+    """Test purges against moto."""
+
+    def test_account_purged_and_sweep_queued(
+        self, mock_dynamodb: None, lambda_context: MagicMock
+    ) -> None:
+        """Test that one user's data goes, other users' stays, and a sweep follows."""
+        client = create_resources()
+        create_user(client, "alice", 130, AVATAR_URL, IDENTITY_ID)
+        create_user(client, "bob", 3)
+        s3 = boto3.client("s3")
+        for key in (
+            f"avatars/{IDENTITY_ID}/me.png",
+            f"avatars/{IDENTITY_ID}/old.png",
+            "avatars/alice/legacy.png",
+            "avatars/bob-identity/me.png",
+        ):
+            s3.put_object(Bucket=BUCKET, Key=key, Body=b"png")
+        queue = LocalQueue()
+
+        with (
+            patch.dict(os.environ, ENV),
+            patch("lambda_src.account_purge_handler.index.get_purge_queue", return_value=queue),
+        ):
+            result = handler(purge_event({"userId": "alice", "requestedAt": 1}), lambda_context)
+
+            assert result == {"batchItemFailures": []}
+            assert count_searches(client, "alice") == 0 and count_searches(client, "bob") == 3
+            assert "Item" not in client.get_item(
+                TableName=USERS_TABLE, Key={"userId": {"S": "alice"}}
+            )
+            assert "Item" in client.get_item(TableName=USERS_TABLE, Key={"userId": {"S": "bob"}})
+            assert avatar_keys() == ["avatars/bob-identity/me.png"]
+
+            # A search that lands after the first pass is removed by the sweep,
+            # which queues nothing further
+            create_user(client, "alice", 1)
+            sweep = queue.receive_event()
+            assert json.loads(sweep["Records"][0]["body"]) == {"userId": "alice", "sweep": True}
+            assert handler(sweep, lambda_context) == {"batchItemFailures": []}
+
+        assert count_searches(client, "alice") == 0 and len(queue) == 0
+
+    def test_unfinished_purge_resumed(self, mock_dynamodb: None, lambda_context: MagicMock) -> None:
+        """Test that a pass that could not finish keeps the user item and is redelivered."""
+        client = create_resources()
+        create_user(client, "alice", 30, AVATAR_URL, IDENTITY_ID)
+        queue = LocalQueue()
+        event = purge_event({"userId": "alice"})
+
+        with (
+            patch.dict(os.environ, ENV),
+            patch("lambda_src.account_purge_handler.index.get_purge_queue", return_value=queue),
+        ):
+            with patch(
+                "lambda_src.account_purge_handler.index.delete_avatars", return_value=(0, False)
+            ):
+                assert handler(event, lambda_context) == {
+                    "batchItemFailures": [{"itemIdentifier": "m0"}]
+                }
+            assert count_searches(client, "alice") == 0
+            assert "Item" in client.get_item(TableName=USERS_TABLE, Key={"userId": {"S": "alice"}})
+            assert len(queue) == 0
+
+            assert handler(event, lambda_context) == {"batchItemFailures": []}
+
+        assert "Item" not in client.get_item(TableName=USERS_TABLE, Key={"userId": {"S": "alice"}})
+        assert len(queue) == 1
+
+    def test_requests_past_deadline_redelivered(self, lambda_context: MagicMock) -> None:
+        """Test that requests not started before the deadline are reported as failures."""
+        with (
+            patch.dict(os.environ, ENV),
+            patch("lambda_src.account_purge_handler.index.get_ddb_client") as get_client,
+            patch("lambda_src.account_purge_handler.index.get_s3_client") as get_s3,
+            patch(
+                "lambda_src.account_purge_handler.index.current_deadline",
+                return_value=Deadline(0),
+            ),
+        ):
+            get_client.return_value = (MagicMock(), USERS_TABLE, SEARCHES_TABLE)
+            get_s3.return_value = (MagicMock(), BUCKET)
+            result = handler(purge_event({"userId": "a"}, {"userId": "b"}), lambda_context)
+
+        assert result == {"batchItemFailures": [{"itemIdentifier": "m0"}, {"itemIdentifier": "m1"}]}
+        get_client.return_value[0].get_item.assert_not_called()
+
+    def test_foreign_avatar_url_ignored(
+        self, mock_dynamodb: None, lambda_context: MagicMock
+    ) -> None:
+        """Test that an avatarUrl pointing at another user's folder deletes nothing there."""
+        client = create_resources()
+        create_user(client, "mallory", 1, AVATAR_URL, "us-west-1:mallory-identity")
+        s3 = boto3.client("s3")
+        for key in (f"avatars/{IDENTITY_ID}/me.png", "avatars/us-west-1:mallory-identity/m.png"):
+            s3.put_object(Bucket=BUCKET, Key=key, Body=b"png")
+
+        with (
+            patch.dict(os.environ, ENV),
+            patch("lambda_src.account_purge_handler.index.get_purge_queue", return_value=None),
+        ):
+            result = handler(purge_event({"userId": "mallory"}), lambda_context)
+
+        assert result == {"batchItemFailures": []}
+        assert avatar_keys() == [f"avatars/{IDENTITY_ID}/me.png"]
+
+    @pytest.mark.parametrize("body", [{}, {"userId": ""}, {"userId": "../x"}, {"userId": 7}])
+    def test_invalid_message(self, body: Dict[str, Any], lambda_context: MagicMock) -> None:
+        """Test that a message naming no usable user deletes nothing."""
+        with (
+            patch("lambda_src.account_purge_handler.index.get_ddb_client") as get_client,
+            patch("lambda_src.account_purge_handler.index.get_s3_client") as get_s3,
+        ):
+            get_client.return_value = (MagicMock(), USERS_TABLE, SEARCHES_TABLE)
+            get_s3.return_value = (MagicMock(), BUCKET)
+            result = handler(purge_event(body), lambda_context)
+
+        assert result == {"batchItemFailures": [{"itemIdentifier": "m0"}]}
+        get_client.return_value[0].get_item.assert_not_called()
+
+
+class TestDeleteBatch:
+    """Test BatchWriteItem deletes with unprocessed items."""
+
+    def test_unprocessed_items_retried(self) -> None:
+        """Test that only the unprocessed deletes are sent again."""
+        keys = [{"userId": {"S": "u"}, "createdAt": {"S": str(i)}} for i in range(25)]
+        ddb = MagicMock()
+        ddb.batch_write_item.side_effect = [
+            {"UnprocessedItems": {"t": [{"DeleteRequest": {"Key": keys[3]}}]}},
+            {"UnprocessedItems": {}},
+        ]
+
+        with patch("lambda_src.account_purge_handler.index.time.sleep"):
+            assert delete_batch(ddb, "t", keys) == 0
+
+        first, second = (
+            call[1]["RequestItems"]["t"] for call in ddb.batch_write_item.call_args_list
+        )
+        assert len(first) == 25 and second == [{"DeleteRequest": {"Key": keys[3]}}]
+
+    def test_items_left_after_retries(self) -> None:
+        """Test that deletes still unprocessed after the last retry are counted."""
+        keys = [{"userId": {"S": "u"}, "createdAt": {"S": str(i)}} for i in range(2)]
+        ddb = MagicMock()
+        ddb.batch_write_item.return_value = {
+            "UnprocessedItems": {"t": [{"DeleteRequest": {"Key": keys[0]}}]}
+        }
+
+        with patch("lambda_src.account_purge_handler.index.time.sleep") as sleep:
+            assert delete_batch(ddb, "t", keys) == 1
+
+        assert ddb.batch_write_item.call_count == 6 and sleep.call_count == 5
+
+
+class TestAvatarPrefixes:
+    """Test finding a user's avatar folders."""
+
+    def test_folders_from_recorded_identity(self) -> None:
+        """Test that only the sub folder and the recorded identity folder are emptied."""
+        assert avatar_prefixes("sub", IDENTITY_ID) == ["avatars/sub/", f"avatars/{IDENTITY_ID}/"]
+        for identity_id in ("", "sub", "a/b"):
+            assert avatar_prefixes("sub", identity_id) == ["avatars/sub/"], identity_id
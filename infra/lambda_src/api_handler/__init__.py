@@ -0,0 +1 @@
+# Consolidated API handler package
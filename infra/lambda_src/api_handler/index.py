@@ -0,0 +1,103 @@
+"""Consolidated Lambda handler serving every REST route from one function."""
+
+import os
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+# Add parent directory to path so the per-resource handler packages and common import
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common.log import logger  # noqa: E402
+from common.router import Request, Router, authenticate  # noqa: E402
+from common.utils import create_response, in_context  # noqa: E402
+from searches_handler.index import load_recent_searches  # noqa: E402
+from searches_handler.index import router as searches_router  # noqa: E402
+from tiles_handler.index import router as tiles_router  # noqa: E402
+from user_handler.index import load_user_profile  # noqa: E402
+from user_handler.index import router as user_router  # noqa: E402
+
+# One thread per /bootstrap section
+BOOTSTRAP_WORKERS = 2
+
+# Error returned for a section whose read failed
+BOOTSTRAP_ERRORS = {
+    "user": "Failed to retrieve user profile",
+    "searches": "Failed to retrieve search history",
+}
+
+# Each included router keeps its own middleware (e.g. authentication)
+router = Router()
+router.include(searches_router)
+router.include(tiles_router)
+router.include(user_router)
+
+# Routes that need more than one resource's code live only in this function
+composite_router = Router(middleware=[authenticate])
+
+
+@composite_router.route("GET", "/bootstrap")
+def get_bootstrap(request: Request) -> Dict[str, Any]:
+    """GET /bootstrap: everything the app needs on load, in one round trip."""
+    return handle_get_bootstrap(request.user_id, request.email)
+
+
+router.include(composite_router)
+
+# Entry point: routes on the event's resource template (or raw path locally)
+handler = router.lambda_handler()
+
+
+# Created on first use and reused by warm invocations
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the thread pool that runs the /bootstrap reads concurrently."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=BOOTSTRAP_WORKERS)
+    return _executor
+
+
+def handle_get_bootstrap(user_id: str, email: str) -> Dict[str, Any]:
+    """
+    Read the profile and the recent searches concurrently.
+
+    The response has one key per section. A section whose read failed is
+    null and its message is listed under ``errors``; the other section is
+    still returned. The status is 500 only if every section failed.
+
+    Args:
+        user_id: User's Cognito sub (UUID)
+        email: User's email from Cognito claims
+
+    Returns:
+        API Gateway response with ``user`` and ``searches``
+    """
+    pool = get_executor()
+    sections: Dict[str, "Future[Any]"] = {
+        "user": pool.submit(in_context(load_user_profile), user_id, email),
+        "searches": pool.submit(in_context(load_recent_searches), user_id),
+    }
+
+    body: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for name, future in sections.items():
+        try:
+            body[name] = future.result()
+        except (BotoCoreError, ClientError) as e:
+            error_code = (
+                e.response.get("Error", {}).get("Code", "Unknown")
+                if isinstance(e, ClientError)
+                else type(e).__name__
+            )
+            logger.error("Bootstrap section failed", section=name, error_code=error_code)
+            body[name] = None
+            errors[name] = BOOTSTRAP_ERRORS[name]
+
+    if errors:
+        body["errors"] = errors
+    status = 500 if len(errors) == len(sections) else 200
+    return create_response(status, body)
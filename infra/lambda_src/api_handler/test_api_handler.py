@@ -0,0 +1,177 @@
+"""Unit tests for the consolidated api_handler Lambda function."""
+
+import json
+import threading
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from .index import handle_get_bootstrap, handler, router
+
+
+class TestRouting:
+    """Test that REST routes are served by one function."""
+
+    def test_all_routes_registered(self) -> None:
+        """Test that searches, tiles, user and composite routes are all included."""
+        assert set(router.routes) == {
+            "/bootstrap",
+            "/searches",
+            "/searches/trending",
+            "/searches/nearby",
+            "/suggest",
+            "/tiles/{z}/{x}/{y}",
+            "/user",
+        }
+        assert set(router.routes["/searches"]) == {"GET", "POST"}
+        assert set(router.routes["/searches/trending"]) == {"GET"}
+        assert set(router.routes["/user"]) == {"DELETE", "GET", "PUT"}
+
+    def test_routes_searches_by_resource(
+        self,
+        api_gateway_event: Dict[str, Any],
+        lambda_context: MagicMock,
+        mock_env_vars: None,
+    ) -> None:
+        """Test that a /searches event reaches the searches route."""
+        api_gateway_event["resource"] = "/searches"
+        api_gateway_event["path"] = "/searches"
+
+        with patch("searches_handler.index.get_ddb_client") as mock_client:
+            mock_ddb = MagicMock()
+            mock_ddb.query.return_value = {"Items": [{"query": {"S": "pizza"}}]}
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            result = handler(api_gateway_event, lambda_context)
+
+        assert result["statusCode"] == 200
+        assert json.loads(result["body"]) == [{"query": "pizza"}]
+
+    def test_routes_user_by_path(
+        self,
+        api_gateway_event: Dict[str, Any],
+        lambda_context: MagicMock,
+        mock_env_vars: None,
+    ) -> None:
+        """Test that a /user event without a resource is matched on its path."""
+        with patch("user_handler.index.get_dynamodb_table") as mock_table:
+            mock_table.return_value.get_item.return_value = {}
+
+            result = handler(api_gateway_event, lambda_context)
+
+        assert result["statusCode"] == 200
+        assert json.loads(result["body"])["userId"] == "test-user-123"
+
+    def test_unknown_path_returns_404(
+        self, api_gateway_event: Dict[str, Any], lambda_context: MagicMock
+    ) -> None:
+        """Test that unregistered paths are rejected."""
+        api_gateway_event["path"] = "/nope"
+        assert handler(api_gateway_event, lambda_context)["statusCode"] == 404
+
+    def test_unknown_method_returns_405_with_allow(
+        self, api_gateway_event: Dict[str, Any], lambda_context: MagicMock
+    ) -> None:
+        """Test that 405 responses list the allowed methods."""
+        api_gateway_event["httpMethod"] = "PATCH"
+        result = handler(api_gateway_event, lambda_context)
+        assert result["statusCode"] == 405
+        assert result["headers"]["Allow"] == "DELETE,GET,PUT"
+
+    def test_authentication_applied_per_route(self, lambda_context: MagicMock) -> None:
+        """Test that included routes keep their authentication middleware."""
+        event = {"httpMethod": "GET", "path": "/searches", "requestContext": {}}
+        assert handler(event, lambda_context)["statusCode"] == 401
+
+
+class TestBootstrap:
+    """Test GET /bootstrap."""
+
+    def test_profile_and_searches_in_one_response(
+        self,
+        api_gateway_event: Dict[str, Any],
+        lambda_context: MagicMock,
+        mock_env_vars: None,
+    ) -> None:
+        """Test that both sections come back from one invocation."""
+        api_gateway_event["path"] = "/bootstrap"
+        with (
+            patch("user_handler.index.get_dynamodb_table") as mock_table,
+            patch("searches_handler.index.get_ddb_client") as mock_client,
+        ):
+            mock_table.return_value.get_item.return_value = {
+                "Item": {"userId": "test-user-123", "name": "Ada", "searchCount": 2}
+            }
+            mock_ddb = MagicMock()
+            mock_ddb.query.return_value = {"Items": [{"query": {"S": "pizza"}}]}
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            result = handler(api_gateway_event, lambda_context)
+
+        assert result["statusCode"] == 200
+        body = json.loads(result["body"])
+        assert body["user"]["name"] == "Ada"
+        assert body["user"]["searchCount"] == 2
+        assert body["searches"] == [{"query": "pizza"}]
+        assert "errors" not in body
+
+    def test_sections_read_concurrently(self) -> None:
+        """Test that neither read waits for the other to finish."""
+        barrier = threading.Barrier(2, timeout=5)
+        started: List[str] = []
+
+        def load(name: str, value: Any) -> Any:
+            started.append(name)
+            barrier.wait()
+            return value
+
+        with (
+            patch(
+                "lambda_src.api_handler.index.load_user_profile",
+                side_effect=lambda user_id, email: load("user", {"userId": user_id}),
+            ),
+            patch(
+                "lambda_src.api_handler.index.load_recent_searches",
+                side_effect=lambda user_id: load("searches", []),
+            ),
+        ):
+            result = handle_get_bootstrap("u1", "u1@example.com")
+
+        assert result["statusCode"] == 200
+        assert sorted(started) == ["searches", "user"]
+
+    def test_searches_failure_keeps_profile(self) -> None:
+        """Test that a failed section is reported without blanking the other."""
+        error = ClientError({"Error": {"Code": "ThrottlingException"}}, "Query")
+        with (
+            patch(
+                "lambda_src.api_handler.index.load_user_profile",
+                return_value={"userId": "u1", "name": "Ada"},
+            ),
+            patch("lambda_src.api_handler.index.load_recent_searches", side_effect=error),
+        ):
+            result = handle_get_bootstrap("u1", "u1@example.com")
+
+        assert result["statusCode"] == 200
+        body = json.loads(result["body"])
+        assert body["user"]["name"] == "Ada"
+        assert body["searches"] is None
+        assert body["errors"] == {"searches": "Failed to retrieve search history"}
+
+    def test_all_sections_failed(self) -> None:
+        """Test that a 500 is returned only when nothing could be read."""
+        with (
+            patch(
+                "lambda_src.api_handler.index.load_user_profile",
+                side_effect=EndpointConnectionError(endpoint_url="https://dynamodb"),
+            ),
+            patch(
+                "lambda_src.api_handler.index.load_recent_searches",
+                side_effect=ClientError({"Error": {"Code": "InternalError"}}, "Query"),
+            ),
+        ):
+            result = handle_get_bootstrap("u1", "u1@example.com")
+
+        assert result["statusCode"] == 500
+        assert set(json.loads(result["body"])["errors"]) == {"user", "searches"}
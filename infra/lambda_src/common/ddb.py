@@ -0,0 +1,196 @@
+"""DynamoDB call helper with consumed-capacity accounting."""
+
+import functools
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from .log import logger
+from .metrics import metrics, route_of
+from .resilience import get_resilience
+
+Handler = Callable[[Dict[str, Any], Any], Any]
+
+READ_OPERATIONS = frozenset(
+    {"get_item", "query", "scan", "batch_get_item", "transact_get_items", "execute_statement"}
+)
+
+# Reads that may be sent twice when slow (see common/resilience.py)
+HEDGED_OPERATIONS = frozenset({"get_item", "query"})
+
+
+def hash_user_id(user_id: str) -> str:
+    """
+    Pseudonymize a user ID for accounting records.
+
+    Args:
+        user_id: Cognito sub
+
+    Returns:
+        First 16 hex characters of SHA-256 over CAPACITY_HASH_SALT + user_id
+    """
+    if not user_id:
+        return ""
+    salt = os.environ.get("CAPACITY_HASH_SALT", "")
+    return hashlib.sha256(f"{salt}{user_id}".encode("utf-8")).hexdigest()[:16]
+
+
+class CapacityTracker:
+    """Aggregates consumed read and write capacity units for one invocation."""
+
+    def __init__(self) -> None:
+        """Create an empty tracker."""
+        self.route = "unknown"
+        self.user_hash = ""
+        self.calls = 0
+        self.read_units = 0.0
+        self.write_units = 0.0
+        self.tables: Dict[str, Dict[str, float]] = {}
+        # Fan-out handlers call DynamoDB from worker threads
+        self._lock = threading.Lock()
+
+    def start_invocation(self, route: str) -> None:
+        """
+        Reset totals for a new invocation.
+
+        Args:
+            route: Route the capacity is attributed to
+        """
+        self.route = route
+        self.user_hash = ""
+        self.calls = 0
+        self.read_units = 0.0
+        self.write_units = 0.0
+        self.tables = {}
+
+    def set_user(self, user_id: str) -> None:
+        """Attribute this invocation's capacity to a (hashed) user."""
+        self.user_hash = hash_user_id(user_id)
+
+    def record(self, operation: str, consumed: Any) -> None:
+        """
+        Add the ConsumedCapacity of one response.
+
+        Args:
+            operation: boto3 method name, used to classify reads vs. writes
+            consumed: ConsumedCapacity from the response (dict, or list for batch calls)
+        """
+        entries = consumed if isinstance(consumed, list) else [consumed]
+        is_read = operation in READ_OPERATIONS
+        with self._lock:
+            self.calls += 1
+            for entry in entries:
+                if not isinstance(entry, dict):
+                    continue
+                units = float(entry.get("CapacityUnits") or 0.0)
+                read = float(entry.get("ReadCapacityUnits") or (units if is_read else 0.0))
+                write = float(entry.get("WriteCapacityUnits") or (0.0 if is_read else units))
+                self.read_units += read
+                self.write_units += write
+                table = self.tables.setdefault(
+                    str(entry.get("TableName", "")), {"rcu": 0.0, "wcu": 0.0}
+                )
+                table["rcu"] += read
+                table["wcu"] += write
+
+    def flush(self, request_id: str) -> None:
+        """
+        Emit the invocation's totals as an accounting record and EMF metrics.
+
+        Args:
+            request_id: Lambda request ID
+        """
+        if not self.calls:
+            return
+        metrics.add("ConsumedReadCapacity", self.read_units, unit="Count")
+        metrics.add("ConsumedWriteCapacity", self.write_units, unit="Count")
+        logger.record(
+            "DynamoDB consumed capacity",
+            request_id=request_id,
+            route=self.route,
+            user_hash=self.user_hash,
+            calls=self.calls,
+            rcu=round(self.read_units, 3),
+            wcu=round(self.write_units, 3),
+            tables={
+                name: {k: round(v, 3) for k, v in t.items()} for name, t in self.tables.items()
+            },
+        )
+
+
+capacity = CapacityTracker()
+
+
+def ddb_call(target: Any, operation: str, **params: Any) -> Dict[str, Any]:
+    """
+    Call a DynamoDB client or Table method with capacity accounting.
+
+    Every DynamoDB call in the handlers goes through here so consumed capacity is
+    always requested and attributed to the current route and user, and so the
+    container's retry, circuit-breaker and hedging policy applies to it.
+
+    Args:
+        target: boto3 DynamoDB client or Table resource
+        operation: Method name, e.g. "query" or "put_item"
+        **params: Parameters passed to the method
+
+    Returns:
+        The method's response
+
+    Raises:
+        CircuitOpenError: If the table's circuit breaker is open
+        ClientError: If the call fails and is not retried, or retries run out
+    """
+    params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+    def call() -> Dict[str, Any]:
+        response: Dict[str, Any] = getattr(target, operation)(**params)
+        consumed: Optional[Any] = (
+            response.get("ConsumedCapacity") if isinstance(response, dict) else None
+        )
+        capacity.record(operation, consumed)
+        return response
+
+    # Table resources are not thread-safe, so only low-level clients are hedged
+    is_resource = hasattr(getattr(target, "meta", None), "client")
+    return get_resilience().call(
+        call,
+        operation,
+        table_of(target, params),
+        read=operation in READ_OPERATIONS,
+        hedge=operation in HEDGED_OPERATIONS and not is_resource,
+    )
+
+
+def table_of(target: Any, params: Dict[str, Any]) -> str:
+    """
+    Name the table a call goes to, for its circuit breaker.
+
+    Args:
+        target: boto3 DynamoDB client or Table resource
+        params: Call parameters
+
+    Returns:
+        TableName, the Table resource's name, or the tables of a batch call
+    """
+    if params.get("TableName"):
+        return str(params["TableName"])
+    if params.get("RequestItems"):
+        return ",".join(sorted(params["RequestItems"]))
+    name = getattr(target, "name", "")
+    return name if isinstance(name, str) else ""
+
+
+def account_capacity(func: Handler) -> Handler:
+    """Decorate a Lambda handler to emit its consumed capacity once per invocation."""
+
+    @functools.wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Any:
+        capacity.start_invocation(route_of(event))
+        try:
+            return func(event, context)
+        finally:
+            capacity.flush(context.aws_request_id if context else "unknown")
+
+    return wrapper
@@ -0,0 +1,165 @@
+"""
+Per-invocation deadlines derived from the Lambda context.
+
+``deadline_bound`` starts a deadline for each invocation. It is
+``context.get_remaining_time_in_millis()`` minus ``DEADLINE_RESERVE_MS``, the
+time kept back to build the response and flush logs and metrics. It lives in
+a context variable, so concurrent invocations in one process each see their
+own. Code anywhere in the invocation reads it with ``current_deadline()``;
+work handed to a thread pool is wrapped in ``in_context`` (``common/utils.py``)
+so it sees the same one:
+
+- ``ddb_call`` does not start a call once the deadline has passed
+  (``DeadlineExceededError``, a 504 through ``map_errors``), and the retry
+  policy does not back off past it.
+- ``ddb_client_config`` caps botocore's connect and read timeouts at the time
+  left.
+- Pagination and batch loops check ``expired()`` between pages or chunks and
+  hand back what they have. The rest comes back as a continuation token, or
+  as batch failures for the event source to redeliver.
+
+Invocations without a usable context, such as tests and local tools, get no
+deadline.
+"""
+
+import base64
+import contextvars
+import functools
+import json
+import math
+import time
+from typing import Any, Callable, Dict
+
+from botocore.exceptions import ClientError
+
+from .utils import env_int
+
+Handler = Callable[[Dict[str, Any], Any], Any]
+
+# Time kept back from the Lambda timeout for the response, log and metrics flush
+DEFAULT_RESERVE_MS = 500
+
+
+class DeadlineExceededError(ClientError):
+    """Raised instead of starting a DynamoDB call after the deadline."""
+
+    def __init__(self, operation: str) -> None:
+        """
+        Create the error.
+
+        Args:
+            operation: boto3 method that was not called
+        """
+        super().__init__(
+            {
+                "Error": {"Code": "DeadlineExceeded", "Message": "Invocation deadline passed"},
+                "ResponseMetadata": {"HTTPStatusCode": 504},
+            },
+            operation,
+        )
+
+
+class Deadline:
+    """A point in time an invocation's work must finish by."""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Create a deadline.
+
+        Args:
+            seconds: Time from now until the deadline; ``math.inf`` for none
+            clock: Monotonic time source
+        """
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    @classmethod
+    def from_context(cls, context: Any, reserve_seconds: float) -> "Deadline":
+        """
+        Derive a deadline from a Lambda context.
+
+        Args:
+            context: Lambda context object, or None
+            reserve_seconds: Time kept back before the Lambda timeout
+
+        Returns:
+            The deadline, or no deadline if the context cannot tell
+        """
+        remaining_ms = getattr(context, "get_remaining_time_in_millis", lambda: None)()
+        if not isinstance(remaining_ms, (int, float)) or isinstance(remaining_ms, bool):
+            return cls(math.inf)
+        return cls(max(0.0, remaining_ms / 1000.0 - reserve_seconds))
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return self.remaining() <= 0.0
+
+    def cap(self, seconds: float) -> float:
+        """Limit a timeout to the time left."""
+        return min(seconds, self.remaining())
+
+
+NO_DEADLINE = Deadline(math.inf)
+
+_current: contextvars.ContextVar[Deadline] = contextvars.ContextVar("deadline", default=NO_DEADLINE)
+
+
+def current_deadline() -> Deadline:
+    """Get the running invocation's deadline (``NO_DEADLINE`` outside one)."""
+    return _current.get()
+
+
+def deadline_bound(func: Handler) -> Handler:
+    """Decorate a Lambda handler to run each invocation under its deadline."""
+
+    @functools.wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Any:
+        reserve = env_int("DEADLINE_RESERVE_MS", DEFAULT_RESERVE_MS) / 1000.0
+        token = _current.set(Deadline.from_context(context, reserve))
+        try:
+            return func(event, context)
+        finally:
+            _current.reset(token)
+
+    return wrapper
+
+
+def encode_continuation(state: Any) -> str:
+    """
+    Encode where a partial result stopped as an opaque, URL-safe token.
+
+    Args:
+        state: JSON-serializable resume state
+
+    Returns:
+        Token to hand to the client
+    """
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_continuation(token: str) -> Any:
+    """
+    Decode a token made by ``encode_continuation``.
+
+    The caller must still check the state's shape, and that it belongs to
+    the requesting user.
+
+    Args:
+        token: Token from the client
+
+    Returns:
+        The resume state
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        return json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid continuation token") from e
@@ -0,0 +1,420 @@
+"""
+Response body encodings negotiated from the request's ``Accept`` header.
+
+JSON stays the default. A client that sends ``Accept: application/msgpack``
+gets a MessagePack body instead. API Gateway only passes binary bodies
+through base64, so the Lambda response carries the body base64-encoded with
+``isBase64Encoded`` set, and ``application/msgpack`` is registered as a binary
+media type on the REST API.
+
+Either encoding can also be asked for with ``layout=columnar``
+(``Accept: application/msgpack; layout=columnar``). Every array of records
+in the body is then sent with its keys once and its values in one array per
+key::
+
+    [{"query": "a", "createdAt": "1"}, {"query": "b", "createdAt": "2"}]
+    {"$columns": {"query": ["a", "b"], "createdAt": ["1", "2"]}}
+
+A key missing from some records is ``null`` in theirs. ``rows`` undoes the
+transform.
+
+The MessagePack codec is pure Python, so handlers have no new dependency.
+Clients can decode its output with any MessagePack library.
+
+``Router.dispatch`` binds the negotiated format for the request in a context
+variable, and ``create_response`` reads it with ``current_format()``, so route
+handlers do not change and concurrent dispatches in one process do not see
+each other's format.
+"""
+
+import base64
+import contextlib
+import contextvars
+import json
+import struct
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+# Media types accepted in Accept for each encoding
+MEDIA_TYPES = {
+    JSON: JSON,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/*": JSON,
+    "*/*": JSON,
+}
+COLUMNAR = "columnar"
+COLUMNS_KEY = "$columns"
+
+
+class ResponseFormat(NamedTuple):
+    """How a response body is encoded."""
+
+    media_type: str
+    columnar: bool = False
+
+    @property
+    def content_type(self) -> str:
+        """Content-Type header value."""
+        return f"{self.media_type}; layout={COLUMNAR}" if self.columnar else self.media_type
+
+
+JSON_FORMAT = ResponseFormat(JSON)
+
+
+def negotiate(accept: str) -> ResponseFormat:
+    """
+    Choose a response format from an Accept header.
+
+    The supported media range with the highest ``q`` wins, the earliest on a
+    tie. Wildcards and unsupported or missing headers get JSON.
+
+    Args:
+        accept: Accept header value
+
+    Returns:
+        The format to encode the response with
+    """
+    best, best_q = JSON_FORMAT, 0.0
+    for media_range in accept.split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        encoding = MEDIA_TYPES.get(media_type.lower())
+        if encoding is None:
+            continue
+        options = dict(_param(p) for p in params)
+        try:
+            q = float(options.get("q", "1"))
+        except ValueError:
+            continue
+        if q > best_q:
+            best = ResponseFormat(encoding, options.get("layout", "").lower() == COLUMNAR)
+            best_q = q
+    return best
+
+
+def _param(param: str) -> Tuple[str, str]:
+    name, _, value = param.partition("=")
+    return name.strip().lower(), value.strip().strip('"')
+
+
+_current: contextvars.ContextVar[ResponseFormat] = contextvars.ContextVar(
+    "response_format", default=JSON_FORMAT
+)
+
+
+def current_format() -> ResponseFormat:
+    """Get the format negotiated for the running request (JSON outside one)."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def negotiated(accept: str) -> Iterator[ResponseFormat]:
+    """Bind the format negotiated from ``accept`` for the duration of a request."""
+    response_format = negotiate(accept)
+    token = _current.set(response_format)
+    try:
+        yield response_format
+    finally:
+        _current.reset(token)
+
+
+def encode_body(body: Any, response_format: ResponseFormat) -> Tuple[str, bool]:
+    """
+    Serialize a response body.
+
+    Args:
+        body: JSON-serializable body
+        response_format: Negotiated format
+
+    Returns:
+        Tuple of (body string, whether it is base64-encoded)
+    """
+    if response_format.columnar:
+        body = columnar(body)
+    if response_format.media_type == MSGPACK:
+        return base64.b64encode(packb(body)).decode("ascii"), True
+    return json.dumps(body), False
+
+
+def decode_body(body: str, response_format: ResponseFormat, is_base64: bool = False) -> Any:
+    """
+    Undo ``encode_body``.
+
+    Args:
+        body: Body string of a response
+        response_format: Format it was encoded in (see ``negotiate`` for
+            reading one from a Content-Type header)
+        is_base64: Whether the body is base64-encoded
+
+    Returns:
+        The decoded body
+
+    Raises:
+        ValueError: If the body is not valid in that format
+    """
+    data = base64.b64decode(body) if is_base64 else body.encode("utf-8")
+    value = unpackb(data) if response_format.media_type == MSGPACK else json.loads(data)
+    return rows(value) if response_format.columnar else value
+
+
+def columnar(value: Any) -> Any:
+    """
+    Rewrite every array of records in a value to the columnar layout.
+
+    Args:
+        value: JSON-compatible value
+
+    Returns:
+        The value with each non-empty list of dicts as ``{"$columns": {...}}``
+    """
+    if isinstance(value, dict):
+        return {key: columnar(item) for key, item in value.items()}
+    if not isinstance(value, list):
+        return value
+    items = [columnar(item) for item in value]
+    if not items or not all(isinstance(item, dict) for item in items):
+        return items
+    keys: Dict[str, None] = {}
+    for item in items:
+        keys.update(dict.fromkeys(item))
+    if not keys:
+        return items
+    return {COLUMNS_KEY: {key: [item.get(key) for item in items] for key in keys}}
+
+
+def rows(value: Any) -> Any:
+    """
+    Undo ``columnar``.
+
+    Args:
+        value: Value in the columnar layout
+
+    Returns:
+        The value with record arrays restored; missing keys come back as None
+    """
+    if isinstance(value, list):
+        return [rows(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    columns = value.get(COLUMNS_KEY)
+    if len(value) == 1 and isinstance(columns, dict):
+        names = list(columns)
+        values = [rows(column) for column in columns.values()]
+        return [dict(zip(names, record, strict=True)) for record in zip(*values, strict=True)]
+    return {key: rows(item) for key, item in value.items()}
+
+
+def packb(value: Any) -> bytes:
+    """
+    Encode a JSON-compatible value as MessagePack.
+
+    Args:
+        value: None, bool, int, float, str, bytes, list/tuple or dict with str keys
+
+    Returns:
+        The encoded bytes
+
+    Raises:
+        TypeError: For values JSON could not encode either
+        OverflowError: For integers outside the 64-bit range
+    """
+    out: List[bytes] = []
+    _pack(value, out.append)
+    return b"".join(out)
+
+
+def _pack(value: Any, write: Callable[[bytes], Any]) -> None:
+    packer = _PACKERS.get(type(value))
+    if packer is None:
+        # Subclasses such as IntEnum or OrderedDict
+        packer = next((p for t, p in _PACKERS.items() if isinstance(value, t)), None)
+        if packer is None:
+            raise TypeError(
+                f"Object of type {type(value).__name__} is not MessagePack serializable"
+            )
+    packer(value, write)
+
+
+def _encode_str(value: str) -> bytes:
+    data = value.encode("utf-8")
+    size = len(data)
+    if size < 32:
+        return _FIXSTR[size] + data
+    if size < 0x100:
+        return bytes((0xD9, size)) + data
+    if size < 0x10000:
+        return struct.pack(">BH", 0xDA, size) + data
+    return struct.pack(">BI", 0xDB, size) + data
+
+
+def _pack_str(value: str, write: Callable[[bytes], Any]) -> None:
+    write(_encode_str(value))
+
+
+def _pack_map(value: Dict[Any, Any], write: Callable[[bytes], Any]) -> None:
+    _header(len(value), 0x80, 0xDE, write)
+    for key, item in value.items():
+        # Record keys repeat on every item, so their encodings are kept
+        encoded = _KEYS.get(key)
+        if encoded is None:
+            if not isinstance(key, str):
+                raise TypeError(f"keys must be str, not {type(key).__name__}")
+            encoded = _encode_str(key)
+            if len(_KEYS) < MAX_CACHED_KEYS:
+                _KEYS[key] = encoded
+        write(encoded)
+        _pack(item, write)
+
+
+def _pack_array(value: Any, write: Callable[[bytes], Any]) -> None:
+    _header(len(value), 0x90, 0xDC, write)
+    for item in value:
+        _pack(item, write)
+
+
+def _pack_bin(value: bytes, write: Callable[[bytes], Any]) -> None:
+    size = len(value)
+    write(struct.pack(">BI", 0xC6, size) if size >= 0x100 else bytes((0xC4, size)))
+    write(bytes(value))
+
+
+_FIXSTR = [bytes((0xA0 | size,)) for size in range(32)]
+_FLOAT = struct.Struct(">Bd")
+# Encoded map keys, shared by every response the container serves
+_KEYS: Dict[Any, bytes] = {}
+MAX_CACHED_KEYS = 1024
+
+# Exact-type lookup first; bool before int so isinstance fallbacks stay right
+_PACKERS: Dict[type, Callable[[Any, Callable[[bytes], Any]], None]] = {
+    str: _pack_str,
+    dict: _pack_map,
+    list: _pack_array,
+    tuple: _pack_array,
+    type(None): lambda value, write: write(b"\xc0"),
+    bool: lambda value, write: write(b"\xc3" if value else b"\xc2"),
+    int: lambda value, write: write(_pack_int(value)),
+    float: lambda value, write: write(_FLOAT.pack(0xCB, value)),
+    bytes: _pack_bin,
+    bytearray: _pack_bin,
+}
+
+
+def _header(size: int, fix: int, wide: int, write: Callable[[bytes], Any]) -> None:
+    # Arrays and maps: fix form up to 15 entries, then 16- or 32-bit lengths
+    if size < 16:
+        write(bytes((fix | size,)))
+    elif size < 0x10000:
+        write(struct.pack(">BH", wide, size))
+    else:
+        write(struct.pack(">BI", wide + 1, size))
+
+
+def _pack_int(value: int) -> bytes:
+    if 0 <= value < 0x80:
+        return bytes((value,))
+    if -32 <= value < 0:
+        return struct.pack(">b", value)
+    if value >= 0:
+        for code, fmt, limit in ((0xCC, ">BB", 8), (0xCD, ">BH", 16), (0xCE, ">BI", 32)):
+            if value < 1 << limit:
+                return struct.pack(fmt, code, value)
+        if value < 1 << 64:
+            return struct.pack(">BQ", 0xCF, value)
+    else:
+        for code, fmt, limit in ((0xD0, ">Bb", 7), (0xD1, ">Bh", 15), (0xD2, ">Bi", 31)):
+            if value >= -(1 << limit):
+                return struct.pack(fmt, code, value)
+        if value >= -(1 << 63):
+            return struct.pack(">Bq", 0xD3, value)
+    raise OverflowError(f"Integer {value} does not fit in 64 bits")
+
+
+# Fixed-size formats decoded by ``unpackb``: code -> (struct format, size)
+_FIXED = {
+    0xCA: (">f", 4),
+    0xCB: (">d", 8),
+    0xCC: (">B", 1),
+    0xCD: (">H", 2),
+    0xCE: (">I", 4),
+    0xCF: (">Q", 8),
+    0xD0: (">b", 1),
+    0xD1: (">h", 2),
+    0xD2: (">i", 4),
+    0xD3: (">q", 8),
+}
+# Length-prefixed formats: code -> (kind, length format, length size)
+_SIZED = {
+    0xC4: ("bin", ">B", 1),
+    0xC5: ("bin", ">H", 2),
+    0xC6: ("bin", ">I", 4),
+    0xD9: ("str", ">B", 1),
+    0xDA: ("str", ">H", 2),
+    0xDB: ("str", ">I", 4),
+    0xDC: ("array", ">H", 2),
+    0xDD: ("array", ">I", 4),
+    0xDE: ("map", ">H", 2),
+    0xDF: ("map", ">I", 4),
+}
+
+
+def unpackb(data: bytes) -> Any:
+    """
+    Decode MessagePack produced by ``packb`` (ext types are not supported).
+
+    Args:
+        data: Encoded bytes
+
+    Returns:
+        The decoded value
+
+    Raises:
+        ValueError: If the data is malformed or has trailing bytes
+    """
+    try:
+        value, end = _unpack(data, 0)
+    except (IndexError, struct.error) as e:
+        raise ValueError("Truncated MessagePack data") from e
+    if end != len(data):
+        raise ValueError("Trailing bytes after MessagePack value")
+    return value
+
+
+def _unpack(data: bytes, pos: int) -> Tuple[Any, int]:
+    code = data[pos]
+    pos += 1
+    if code < 0x80:
+        return code, pos
+    if code >= 0xE0:
+        return code - 0x100, pos
+    if 0xA0 <= code < 0xC0:
+        return _sized("str", code & 0x1F, data, pos)
+    if 0x90 <= code < 0xA0:
+        return _sized("array", code & 0x0F, data, pos)
+    if code < 0x90:
+        return _sized("map", code & 0x0F, data, pos)
+    if code in (0xC0, 0xC2, 0xC3):
+        return {0xC0: None, 0xC2: False, 0xC3: True}[code], pos
+    if code in _FIXED:
+        fmt, size = _FIXED[code]
+        return struct.unpack_from(fmt, data, pos)[0], pos + size
+    if code in _SIZED:
+        kind, fmt, size = _SIZED[code]
+        return _sized(kind, struct.unpack_from(fmt, data, pos)[0], data, pos + size)
+    raise ValueError(f"Unsupported MessagePack type 0x{code:02x}")
+
+
+def _sized(kind: str, size: int, data: bytes, pos: int) -> Tuple[Any, int]:
+    if kind in ("str", "bin"):
+        end = pos + size
+        if end > len(data):
+            raise ValueError("Truncated MessagePack data")
+        raw = bytes(data[pos:end])
+        return (raw.decode("utf-8") if kind == "str" else raw), end
+    items: List[Any] = []
+    for _ in range(size * 2 if kind == "map" else size):
+        item, pos = _unpack(data, pos)
+        items.append(item)
+    if kind == "map":
+        return dict(zip(items[::2], items[1::2], strict=True)), pos
+    return items, pos
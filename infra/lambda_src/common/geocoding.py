@@ -0,0 +1,470 @@
+"""
+Geocoding behind a pluggable provider and a two-level result cache.
+
+Providers implement ``geocode(query) -> Optional[Location]`` and raise
+``GeocoderError`` when the service fails (as opposed to finding nothing).
+``get_geocoder`` resolves the ``GEOCODER`` setting the same way
+``common.queue.get_queue`` resolves queue URLs:
+
+- ``location://<place-index>``: Amazon Location Service place index
+- ``local://``: in-memory gazetteer stand-in for tests and local tools
+- empty: geocoding disabled
+
+``GeocodingCache`` puts a per-container LRU in front of a DynamoDB table keyed
+by the normalized query, with TTL. Misses are cached too ("negative caching"),
+for a shorter time, so unknown queries do not hit the provider repeatedly.
+Concurrent misses for one query in a container share a single lookup.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+from .ddb import ddb_call
+from .deadline import DeadlineExceededError
+from .geohash import encode
+from .log import logger
+from .metrics import metrics
+from .utils import env_int
+
+LOCAL_GEOCODER_PREFIX = "local://"
+LOCATION_GEOCODER_PREFIX = "location://"
+
+DEFAULT_LRU_SIZE = 1024
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_NEGATIVE_TTL_SECONDS = 24 * 3600
+# The local tier re-checks the table after this long, so TTL changes and
+# deletions made elsewhere are picked up by warm containers
+DEFAULT_LRU_TTL_SECONDS = 15 * 60
+
+
+class GeocoderError(Exception):
+    """Raised when a provider fails; failures are never cached."""
+
+
+class Location:
+    """A geocoded point."""
+
+    def __init__(self, lat: float, lng: float, label: str = "") -> None:
+        """
+        Create a location.
+
+        Args:
+            lat: Latitude in degrees
+            lng: Longitude in degrees
+            label: Provider's display name for the place
+        """
+        self.lat = lat
+        self.lng = lng
+        self.label = label
+
+    def __eq__(self, other: object) -> bool:
+        """Compare by value."""
+        if not isinstance(other, Location):
+            return NotImplemented
+        return (self.lat, self.lng, self.label) == (other.lat, other.lng, other.label)
+
+    def __repr__(self) -> str:
+        """Debug representation."""
+        return f"Location({self.lat!r}, {self.lng!r}, {self.label!r})"
+
+
+def normalize_query(query: str) -> str:
+    """Fold a query into its cache key: lower case, whitespace collapsed."""
+    return " ".join(query.lower().split())
+
+
+class LocationServiceGeocoder:
+    """Geocoder backed by an Amazon Location Service place index."""
+
+    name = "location"
+
+    def __init__(self, index_name: str, client: Any = None) -> None:
+        """
+        Create the geocoder.
+
+        Args:
+            index_name: Place index name
+            client: Optional pre-built ``location`` client
+        """
+        self.index_name = index_name
+        self._client = client
+
+    @property
+    def client(self) -> Any:
+        """Lazily create the client so cold starts only pay for it when used."""
+        if self._client is None:
+            self._client = boto3.client("location")
+        return self._client
+
+    def geocode(self, query: str) -> Optional[Location]:
+        """
+        Resolve a query to its best match.
+
+        Raises:
+            GeocoderError: If the service call fails
+        """
+        try:
+            response = self.client.search_place_index_for_text(
+                IndexName=self.index_name, Text=query, MaxResults=1
+            )
+        except (BotoCoreError, ClientError) as e:
+            raise GeocoderError(str(e)) from e
+        results = response.get("Results") or []
+        if not results:
+            return None
+        place = results[0].get("Place", {})
+        lng, lat = place["Geometry"]["Point"]
+        return Location(float(lat), float(lng), str(place.get("Label", "")))
+
+
+# Small gazetteer for the local stand-in
+LOCAL_PLACES: Dict[str, Tuple[float, float]] = {
+    "san francisco": (37.7749, -122.4194),
+    "oakland": (37.8044, -122.2712),
+    "new york": (40.7128, -74.0060),
+    "london": (51.5074, -0.1278),
+    "paris": (48.8566, 2.3522),
+    "tokyo": (35.6762, 139.6503),
+    "sydney": (-33.8688, 151.2093),
+}
+
+
+class LocalGeocoder:
+    """
+    In-memory stand-in provider.
+
+    Resolves queries that mention a gazetteer place, optionally after a delay
+    to model provider latency, and counts calls so tests can assert on them.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        places: Optional[Dict[str, Tuple[float, float]]] = None,
+        delay_seconds: float = 0.0,
+    ) -> None:
+        """
+        Create the stand-in.
+
+        Args:
+            places: Place name -> (lat, lng); defaults to LOCAL_PLACES
+            delay_seconds: Sleep before answering each lookup
+        """
+        self.places = LOCAL_PLACES if places is None else places
+        self.delay_seconds = delay_seconds
+        self.calls = 0
+        self.fail = False
+        self._lock = threading.Lock()
+
+    def geocode(self, query: str) -> Optional[Location]:
+        """
+        Resolve a query containing a known place name.
+
+        Raises:
+            GeocoderError: If ``fail`` has been set
+        """
+        with self._lock:
+            self.calls += 1
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        if self.fail:
+            raise GeocoderError("local geocoder failure")
+        normalized = normalize_query(query)
+        for place, (lat, lng) in self.places.items():
+            if place in normalized:
+                return Location(lat, lng, place.title())
+        return None
+
+
+_local_geocoder: Optional[LocalGeocoder] = None
+
+
+def get_geocoder(setting: str) -> Optional[Any]:
+    """
+    Resolve a GEOCODER setting to a provider.
+
+    ``local://`` maps to one process-wide ``LocalGeocoder``, so tests can
+    inspect the instance a handler used.
+
+    Args:
+        setting: ``location://<index>``, ``local://`` or empty
+
+    Returns:
+        Provider, or None when geocoding is disabled
+
+    Raises:
+        ValueError: If the setting names an unknown provider
+    """
+    global _local_geocoder
+    if not setting:
+        return None
+    if setting.startswith(LOCAL_GEOCODER_PREFIX):
+        if _local_geocoder is None:
+            _local_geocoder = LocalGeocoder()
+        return _local_geocoder
+    if setting.startswith(LOCATION_GEOCODER_PREFIX):
+        return LocationServiceGeocoder(setting[len(LOCATION_GEOCODER_PREFIX) :])
+    raise ValueError(f"Unknown geocoder: {setting}")
+
+
+class LRUCache:
+    """Thread-safe least-recently-used map whose entries expire."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        """
+        Create an empty cache.
+
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            ttl_seconds: Lifetime of an entry
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Location]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of entries, expired or not."""
+        return len(self._entries)
+
+    def get(self, key: str) -> Tuple[bool, Optional[Location]]:
+        """
+        Look up a key.
+
+        Returns:
+            (found, value); value may be None for a cached negative result
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def put(self, key: str, value: Optional[Location], ttl_seconds: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        expires = time.monotonic() + min(ttl_seconds or self.ttl_seconds, self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class GeocodingCache:
+    """Memory LRU -> DynamoDB table -> provider, with negative caching and coalescing."""
+
+    def __init__(
+        self,
+        geocoder: Any,
+        ddb: Any,
+        table: str,
+        lru_size: int = DEFAULT_LRU_SIZE,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        negative_ttl_seconds: int = DEFAULT_NEGATIVE_TTL_SECONDS,
+        lru_ttl_seconds: int = DEFAULT_LRU_TTL_SECONDS,
+    ) -> None:
+        """
+        Create the cache.
+
+        Args:
+            geocoder: Provider with a ``geocode(query)`` method
+            ddb: DynamoDB client
+            table: Geocode cache table name; empty skips the table tier
+            lru_size: Entries kept in memory per container
+            ttl_seconds: Table lifetime of a found location
+            negative_ttl_seconds: Table lifetime of a "no match" result
+            lru_ttl_seconds: Longest time an entry is served from memory
+        """
+        self.geocoder = geocoder
+        self.ddb = ddb
+        self.table = table
+        self.setting = ""
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.lru = LRUCache(lru_size, lru_ttl_seconds)
+        self.stats: Dict[str, int] = {"memory": 0, "table": 0, "miss": 0, "coalesced": 0}
+        self._inflight: Dict[str, "Future[Optional[Location]]"] = {}
+        self._lock = threading.Lock()
+
+    def hit_rate(self) -> float:
+        """Share of lookups since container start answered without the provider."""
+        hits = self.stats["memory"] + self.stats["table"] + self.stats["coalesced"]
+        total = hits + self.stats["miss"]
+        return hits / total if total else 0.0
+
+    def geocode(self, query: str) -> Optional[Location]:
+        """
+        Resolve a query through the cache tiers.
+
+        Args:
+            query: Raw search query
+
+        Returns:
+            Location, or None if nothing matched or the provider failed
+
+        Raises:
+            DeadlineExceededError: If the deadline passed before the cache
+                table read, so the provider is not called either
+        """
+        key = normalize_query(query)
+        if not key:
+            return None
+
+        found, location = self.lru.get(key)
+        if found:
+            self._count("memory", "GeocodeMemoryHits")
+            return location
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                leader: "Future[Optional[Location]]" = Future()
+                self._inflight[key] = leader
+
+        if pending is not None:
+            # Another thread is already resolving this query
+            self._count("coalesced", "GeocodeCoalesced")
+            return pending.result()
+
+        try:
+            location = self._resolve(key)
+        except Exception as e:
+            leader.set_exception(e)
+            raise
+        else:
+            leader.set_result(location)
+            return location
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _resolve(self, key: str) -> Optional[Location]:
+        found, location = self._read_table(key)
+        if found:
+            self._count("table", "GeocodeTableHits")
+            self.lru.put(key, location)
+            return location
+
+        self._count("miss", "GeocodeMisses")
+        started = time.perf_counter()
+        try:
+            location = self.geocoder.geocode(key)
+        except GeocoderError as e:
+            metrics.add("GeocodeErrors", 1, unit="Count")
+            logger.warning("Geocoder failed", provider=self.geocoder.name, error=str(e))
+            return None
+        finally:
+            metrics.add("GeocodeProvider", (time.perf_counter() - started) * 1000.0)
+
+        ttl = self.ttl_seconds if location else self.negative_ttl_seconds
+        self.lru.put(key, location, ttl)
+        self._write_table(key, location, ttl)
+        return location
+
+    def _read_table(self, key: str) -> Tuple[bool, Optional[Location]]:
+        if not self.table:
+            return False, None
+        try:
+            item = ddb_call(
+                self.ddb, "get_item", TableName=self.table, Key={"query": {"S": key}}
+            ).get("Item")
+        except DeadlineExceededError:
+            # No time left for the provider either
+            raise
+        except (BotoCoreError, ClientError) as e:
+            logger.warning("Geocode cache read failed", error=str(e))
+            return False, None
+        # TTL deletion lags expiry, so check it here
+        if not item or int(item["expiresAt"]["N"]) <= int(time.time()):
+            return False, None
+        if not item["found"]["BOOL"]:
+            return True, None
+        return True, Location(
+            float(item["lat"]["N"]), float(item["lng"]["N"]), item.get("label", {}).get("S", "")
+        )
+
+    def _write_table(self, key: str, location: Optional[Location], ttl: int) -> None:
+        if not self.table:
+            return
+        item: Dict[str, Any] = {
+            "query": {"S": key},
+            "found": {"BOOL": location is not None},
+            "provider": {"S": self.geocoder.name},
+            "expiresAt": {"N": str(int(time.time()) + ttl)},
+        }
+        if location is not None:
+            item["lat"] = {"N": repr(location.lat)}
+            item["lng"] = {"N": repr(location.lng)}
+            item["label"] = {"S": location.label}
+        try:
+            ddb_call(self.ddb, "put_item", TableName=self.table, Item=item)
+        except (BotoCoreError, ClientError) as e:
+            logger.warning("Geocode cache write failed", error=str(e))
+
+    def _count(self, stat: str, metric: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+        metrics.add(metric, 1, unit="Count")
+
+
+_cache: Optional[GeocodingCache] = None
+
+
+def get_geocoding_cache(ddb: Any) -> Optional[GeocodingCache]:
+    """
+    Get the container's geocoding cache, configured from the environment.
+
+    Reads GEOCODER, GEOCODE_CACHE_TABLE, GEOCODE_LRU_SIZE, GEOCODE_TTL_SECONDS
+    and GEOCODE_NEGATIVE_TTL_SECONDS. The memory tier survives across warm
+    invocations; it is rebuilt only if the provider or table changes.
+
+    Args:
+        ddb: DynamoDB client for this invocation
+
+    Returns:
+        The cache, or None when GEOCODER is unset
+    """
+    global _cache
+    setting = os.environ.get("GEOCODER", "")
+    table = os.environ.get("GEOCODE_CACHE_TABLE", "")
+    if not setting:
+        return None
+    if _cache is None or (_cache.setting, _cache.table) != (setting, table):
+        _cache = GeocodingCache(
+            get_geocoder(setting),
+            ddb,
+            table,
+            lru_size=env_int("GEOCODE_LRU_SIZE", DEFAULT_LRU_SIZE),
+            ttl_seconds=env_int("GEOCODE_TTL_SECONDS", DEFAULT_TTL_SECONDS),
+            negative_ttl_seconds=env_int(
+                "GEOCODE_NEGATIVE_TTL_SECONDS", DEFAULT_NEGATIVE_TTL_SECONDS
+            ),
+        )
+        _cache.setting = setting
+    _cache.ddb = ddb
+    return _cache
+
+
+def apply_location(item: Dict[str, Any], location: Location) -> None:
+    """
+    Add coordinates and the geohash sort key to a searches table item.
+
+    Args:
+        item: Low-level DynamoDB item, modified in place
+        location: Where the search points
+    """
+    item["lat"] = {"N": repr(float(location.lat))}
+    item["lng"] = {"N": repr(float(location.lng))}
+    item["geohash"] = {"S": encode(location.lat, location.lng)}
@@ -0,0 +1,195 @@
+"""
+Geohash encoding and bounding-box covers for viewport queries.
+
+A geohash interleaves longitude and latitude bits into base32 characters, so
+points in the same cell share a prefix and the cells at one precision sort in
+Z-order. ``cover`` picks the finest precision at which a bounding box spans
+at most ``max_cells`` cells, then merges cells that are adjacent in that order
+into sort-key ranges. Each range is one ``BETWEEN`` key condition; what it
+returns outside the box is filtered out with ``BoundingBox.contains``.
+"""
+
+import math
+from typing import List, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+MAX_PRECISION = 9  # ~4.8 m x 4.8 m cells
+DEFAULT_MAX_CELLS = 32
+
+# Sorts after every base32 character, closing a prefix range
+RANGE_END = "~"
+
+# Largest offsets from (-90, -180) that still fall inside the grid
+EDGE_LAT = 180.0 - 1e-9
+EDGE_LNG = 360.0 - 1e-9
+
+
+class BoundingBox:
+    """A longitude/latitude rectangle; west > east crosses the antimeridian."""
+
+    def __init__(self, west: float, south: float, east: float, north: float) -> None:
+        """
+        Create a bounding box.
+
+        Args:
+            west: Western longitude
+            south: Southern latitude
+            east: Eastern longitude
+            north: Northern latitude
+
+        Raises:
+            ValueError: If a coordinate is out of range or south > north
+        """
+        for lng in (west, east):
+            if not -180.0 <= lng <= 180.0:
+                raise ValueError("longitude must be between -180 and 180")
+        for lat in (south, north):
+            if not -90.0 <= lat <= 90.0:
+                raise ValueError("latitude must be between -90 and 90")
+        if south > north:
+            raise ValueError("south must not exceed north")
+        self.west = west
+        self.south = south
+        self.east = east
+        self.north = north
+
+    @classmethod
+    def parse(cls, value: str) -> "BoundingBox":
+        """
+        Parse a ``west,south,east,north`` query parameter.
+
+        Raises:
+            ValueError: If the value is malformed or out of range
+        """
+        parts = value.split(",")
+        if len(parts) != 4:
+            raise ValueError("bbox must be west,south,east,north")
+        coords = [float(part) for part in parts]
+        if not all(math.isfinite(c) for c in coords):
+            raise ValueError("bbox coordinates must be finite")
+        return cls(*coords)
+
+    def contains(self, lat: float, lng: float) -> bool:
+        """Return whether a point lies inside the box (edges included)."""
+        if not self.south <= lat <= self.north:
+            return False
+        if self.west <= self.east:
+            return self.west <= lng <= self.east
+        return lng >= self.west or lng <= self.east
+
+    def parts(self) -> List[Tuple[float, float, float, float]]:
+        """Split at the antimeridian into (west, south, east, north) boxes."""
+        if self.west <= self.east:
+            return [(self.west, self.south, self.east, self.north)]
+        return [
+            (self.west, self.south, 180.0, self.north),
+            (-180.0, self.south, self.east, self.north),
+        ]
+
+
+def encode(lat: float, lng: float, precision: int = MAX_PRECISION) -> str:
+    """
+    Encode a point as a geohash.
+
+    Args:
+        lat: Latitude in degrees
+        lng: Longitude in degrees
+        precision: Number of base32 characters
+
+    Returns:
+        Geohash string
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars: List[str] = []
+    bits = 0
+    value = 0
+    even = True  # Longitude first
+    while len(chars) < precision:
+        interval, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Return the (latitude, longitude) extent in degrees of one cell."""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def _grid(box: Tuple[float, float, float, float], precision: int) -> Tuple[range, range]:
+    """Row and column indexes of the cells a box touches at one precision."""
+    west, south, east, north = box
+    lat_step, lng_step = cell_size(precision)
+    # The north and east edges at 90/180 belong to the last cell, not one past it
+    rows = range(int((south + 90.0) // lat_step), int(min(north + 90.0, EDGE_LAT) // lat_step) + 1)
+    cols = range(int((west + 180.0) // lng_step), int(min(east + 180.0, EDGE_LNG) // lng_step) + 1)
+    return rows, cols
+
+
+def _cells(box: Tuple[float, float, float, float], precision: int) -> List[str]:
+    rows, cols = _grid(box, precision)
+    lat_step, lng_step = cell_size(precision)
+    return [
+        encode(-90.0 + (row + 0.5) * lat_step, -180.0 + (col + 0.5) * lng_step, precision)
+        for row in rows
+        for col in cols
+    ]
+
+
+def _cell_count(boxes: List[Tuple[float, float, float, float]], precision: int) -> int:
+    total = 0
+    for box in boxes:
+        rows, cols = _grid(box, precision)
+        total += len(rows) * len(cols)
+    return total
+
+
+def _ordinal(cell: str) -> int:
+    value = 0
+    for char in cell:
+        value = value * 32 + BASE32.index(char)
+    return value
+
+
+def cover(bbox: BoundingBox, max_cells: int = DEFAULT_MAX_CELLS) -> List[Tuple[str, str]]:
+    """
+    Compute sort-key ranges whose union covers a bounding box.
+
+    Args:
+        bbox: Viewport to cover
+        max_cells: Most cells allowed at the chosen precision; fewer cells
+            means fewer ranges but more rows outside the box
+
+    Returns:
+        Sorted (low, high) pairs for ``geohash BETWEEN low AND high``
+    """
+    boxes = bbox.parts()
+    precision = next(
+        (p for p in range(MAX_PRECISION, 1, -1) if _cell_count(boxes, p) <= max_cells), 1
+    )
+
+    cells = sorted({cell for box in boxes for cell in _cells(box, precision)}, key=_ordinal)
+    ranges: List[Tuple[str, str]] = []
+    start = previous = cells[0]
+    for cell in cells[1:]:
+        if _ordinal(cell) != _ordinal(previous) + 1:
+            ranges.append((start, previous + RANGE_END))
+            start = cell
+        previous = cell
+    ranges.append((start, previous + RANGE_END))
+    return ranges
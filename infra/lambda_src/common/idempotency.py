@@ -0,0 +1,334 @@
+"""
+Idempotency-Key support for write routes.
+
+A client that retries a write sends the same ``Idempotency-Key`` header with
+each attempt. The ``idempotent`` middleware claims the key with a conditional
+put before the route runs. Once the route finishes, it stores the response
+on the record. Later requests with that key then get one of:
+
+- the stored response, marked ``Idempotent-Replayed: true``, without the
+  route running again. Its body is re-encoded in the format the retry's
+  ``Accept`` header negotiates, which need not match the first attempt's
+- a 409 while the first attempt is still running
+- a 422 if the key is reused for a different request (fingerprint mismatch)
+
+Idempotency table layout (string ``id`` hash key)::
+
+    <userId>#<method> <route>#<key>  status, fingerprint, claimToken, response, lockExpiresAt,
+                                     expiresAt
+
+Each claim writes a random ``claimToken``. The attempt that claimed the key
+stores its response or releases the key only while the record still carries
+its token. An attempt that outlived its lock, and whose key another attempt
+has since taken, therefore leaves the new owner's record alone.
+
+Keys are scoped per user and route, so clients only need them to be unique
+for themselves. Records expire through DynamoDB TTL after
+``IDEMPOTENCY_TTL_SECONDS``; expired ones still visible before deletion are
+treated as absent. Requests without the header, and every request when
+``IDEMPOTENCY_TABLE`` is unset, go straight to the route.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+from .ddb import ddb_call
+from .encoding import JSON, decode_body, negotiate
+from .log import logger
+from .metrics import metrics
+from .resilience import ddb_client_config
+from .router import Request, RouteHandler
+from .utils import create_response, env_int
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+# Longer than any function timeout, so a crashed attempt's claim lapses
+DEFAULT_LOCK_SECONDS = 60
+
+IN_PROGRESS = "IN_PROGRESS"
+COMPLETED = "COMPLETED"
+
+
+class IdempotencyStore:
+    """Claims, completes and releases idempotency records."""
+
+    def __init__(
+        self,
+        ddb: Any,
+        table: str,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        lock_seconds: int = DEFAULT_LOCK_SECONDS,
+    ) -> None:
+        """
+        Create a store.
+
+        Args:
+            ddb: DynamoDB client
+            table: Idempotency table name
+            ttl_seconds: How long completed responses are replayed
+            lock_seconds: How long an unfinished claim blocks other attempts
+        """
+        self.ddb = ddb
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+
+    def claim(self, record_id: str, fingerprint: str, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim a key for this attempt.
+
+        The put succeeds if the key is new, its record has expired, or an
+        earlier attempt's claim has lapsed without completing.
+
+        Args:
+            record_id: Scoped key
+            fingerprint: Hash of the request
+            token: Unique value identifying this attempt's claim
+
+        Returns:
+            None if this attempt owns the key, else the existing record
+
+        Raises:
+            ClientError: If the table cannot be read or written
+        """
+        now = int(time.time())
+        try:
+            ddb_call(
+                self.ddb,
+                "put_item",
+                TableName=self.table,
+                Item={
+                    "id": {"S": record_id},
+                    "status": {"S": IN_PROGRESS},
+                    "fingerprint": {"S": fingerprint},
+                    "claimToken": {"S": token},
+                    "lockExpiresAt": {"N": str(now + self.lock_seconds)},
+                    "expiresAt": {"N": str(now + self.ttl_seconds)},
+                },
+                ConditionExpression=(
+                    "attribute_not_exists(id) OR expiresAt < :now"
+                    " OR (#status = :in_progress AND lockExpiresAt < :now)"
+                ),
+                ExpressionAttributeNames={"#status": "status"},
+                ExpressionAttributeValues={
+                    ":now": {"N": str(now)},
+                    ":in_progress": {"S": IN_PROGRESS},
+                },
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+        except ClientError as e:
+            if not _condition_failed(e):
+                raise
+            # Without the record there was nothing to fail against; report it
+            # as in progress so the client retries
+            existing: Dict[str, Any] = e.response.get("Item") or {
+                "status": {"S": IN_PROGRESS},
+                "fingerprint": {"S": fingerprint},
+            }
+            return existing
+        return None
+
+    def complete(self, record_id: str, token: str, response: Dict[str, Any]) -> bool:
+        """
+        Store the response of the attempt that owns a key.
+
+        Args:
+            record_id: Scoped key
+            token: The token this attempt claimed the key with
+            response: API Gateway response to replay
+
+        Returns:
+            False if the claim had lapsed and another attempt had taken the key
+        """
+        try:
+            ddb_call(
+                self.ddb,
+                "update_item",
+                TableName=self.table,
+                Key={"id": {"S": record_id}},
+                UpdateExpression=(
+                    "SET #status = :completed, #response = :response REMOVE lockExpiresAt"
+                ),
+                ConditionExpression="claimToken = :token",
+                ExpressionAttributeNames={"#status": "status", "#response": "response"},
+                ExpressionAttributeValues={
+                    ":completed": {"S": COMPLETED},
+                    ":response": {"S": json.dumps(response, separators=(",", ":"))},
+                    ":token": {"S": token},
+                },
+            )
+        except ClientError as e:
+            if not _condition_failed(e):
+                raise
+            return False
+        return True
+
+    def release(self, record_id: str, token: str) -> bool:
+        """
+        Give up a claim so the key can be retried.
+
+        Args:
+            record_id: Scoped key
+            token: The token this attempt claimed the key with
+
+        Returns:
+            False if the claim had lapsed and another attempt had taken the key
+        """
+        try:
+            ddb_call(
+                self.ddb,
+                "delete_item",
+                TableName=self.table,
+                Key={"id": {"S": record_id}},
+                ConditionExpression="claimToken = :token",
+                ExpressionAttributeValues={":token": {"S": token}},
+            )
+        except ClientError as e:
+            if not _condition_failed(e):
+                raise
+            return False
+        return True
+
+
+def _condition_failed(error: ClientError) -> bool:
+    code: str = error.response.get("Error", {}).get("Code", "")
+    return code == "ConditionalCheckFailedException"
+
+
+def get_idempotency_store() -> Optional[IdempotencyStore]:
+    """
+    Build the store from IDEMPOTENCY_TABLE, IDEMPOTENCY_TTL_SECONDS and
+    IDEMPOTENCY_LOCK_SECONDS.
+
+    Returns:
+        The store, or None when idempotency is disabled
+    """
+    table = os.environ.get("IDEMPOTENCY_TABLE", "")
+    if not table:
+        return None
+    return IdempotencyStore(
+        boto3.client("dynamodb", config=ddb_client_config()),
+        table,
+        ttl_seconds=env_int("IDEMPOTENCY_TTL_SECONDS", DEFAULT_TTL_SECONDS),
+        lock_seconds=env_int("IDEMPOTENCY_LOCK_SECONDS", DEFAULT_LOCK_SECONDS),
+    )
+
+
+def fingerprint(request: Request) -> str:
+    """Hash the parts of a request that must match for a replay."""
+    digest = hashlib.sha256()
+    for part in (request.method, request.path, request.event.get("body") or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def replay(existing: Dict[str, Any], request_fingerprint: str) -> Dict[str, Any]:
+    """
+    Answer a request whose key is already claimed.
+
+    Args:
+        existing: The key's record
+        request_fingerprint: Fingerprint of this request
+
+    Returns:
+        The stored response, a 409 or a 422
+    """
+    if existing.get("fingerprint", {}).get("S") != request_fingerprint:
+        metrics.add("IdempotencyMismatches", 1, unit="Count")
+        logger.warning("Idempotency key reused for a different request")
+        return create_response(422, {"error": f"{HEADER} was already used for a different request"})
+
+    stored = existing.get("response", {}).get("S")
+    if existing.get("status", {}).get("S") != COMPLETED or not stored:
+        metrics.add("IdempotencyConflicts", 1, unit="Count")
+        logger.info("Idempotent request already in progress")
+        return create_response(
+            409,
+            {"error": f"A request with this {HEADER} is in progress"},
+            {"Retry-After": "1"},
+        )
+
+    metrics.add("IdempotentReplays", 1, unit="Count")
+    logger.info("Idempotent response replayed")
+    response: Dict[str, Any] = json.loads(stored)
+    headers = dict(response.get("headers", {}))
+    # Stored in the first attempt's format; re-encode for this request's Accept
+    stored_format = negotiate(headers.pop("Content-Type", JSON))
+    body = decode_body(response["body"], stored_format, bool(response.get("isBase64Encoded")))
+    return create_response(response["statusCode"], body, {**headers, REPLAYED_HEADER: "true"})
+
+
+def idempotent(next_handler: RouteHandler) -> RouteHandler:
+    """
+    Middleware: honor the Idempotency-Key header on a write route.
+
+    Must run after ``authenticate``, since keys are scoped per user. If the
+    table is unavailable the request runs without protection rather than
+    failing. 5xx responses and exceptions release the key, so a retry redoes
+    the write.
+    """
+
+    @functools.wraps(next_handler)
+    def wrapper(request: Request) -> Dict[str, Any]:
+        key = request.header(HEADER)
+        store = get_idempotency_store() if key else None
+        if store is None:
+            return next_handler(request)
+        if len(key) > MAX_KEY_LENGTH or not key.isprintable():
+            return create_response(
+                400, {"error": f"{HEADER} must be 1-{MAX_KEY_LENGTH} printable characters"}
+            )
+
+        route = request.template or request.path
+        record_id = f"{request.user_id}#{request.method} {route}#{key}"
+        request_fingerprint = fingerprint(request)
+        token = uuid.uuid4().hex
+        try:
+            with metrics.phase("idempotency"):
+                existing = store.claim(record_id, request_fingerprint, token)
+        except (BotoCoreError, ClientError) as e:
+            metrics.add("IdempotencyErrors", 1, unit="Count")
+            logger.warning("Idempotency table unavailable", error=str(e))
+            return next_handler(request)
+        if existing is not None:
+            return replay(existing, request_fingerprint)
+
+        try:
+            response = next_handler(request)
+        except Exception:
+            _finish(store.release, record_id, token)
+            raise
+
+        if int(response.get("statusCode", 500)) >= 500:
+            _finish(store.release, record_id, token)
+        else:
+            _finish(store.complete, record_id, token, response)
+        return response
+
+    return wrapper
+
+
+def _finish(action: Any, *args: Any) -> None:
+    # The write already happened; a failure here only weakens later retries
+    try:
+        with metrics.phase("idempotency"):
+            owned = action(*args)
+    except (BotoCoreError, ClientError) as e:
+        metrics.add("IdempotencyErrors", 1, unit="Count")
+        logger.warning("Idempotency record update failed", error=str(e))
+        return
+    if not owned:
+        metrics.add("IdempotencyOwnershipLost", 1, unit="Count")
+        logger.warning("Idempotency claim lapsed and was taken by another attempt")
@@ -0,0 +1,188 @@
+"""Level-gated, context-bound structured logger for Lambda handlers."""
+
+import functools
+import json
+import os
+import random
+import sys
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+LEVELS_BY_NAME = {name: level for level, name in LEVEL_NAMES.items()}
+
+# Records buffered before an early flush, bounding memory for chatty invocations
+MAX_BUFFERED_RECORDS = 200
+
+Handler = Callable[[Dict[str, Any], Any], Any]
+BufferedRecord = Tuple[int, str, Dict[str, Any]]
+
+
+class StructuredLogger:
+    """
+    JSON logger that buffers records per invocation.
+
+    Records below the configured level are dropped before any dict merging or
+    serialization happens. Within an invocation records are buffered unserialized;
+    ``flush`` writes them in one call. INFO records are sampled per invocation at
+    ``info_sample_rate``, but if anything at ERROR level was logged the whole
+    buffer is written so failures always come with their full context.
+    """
+
+    def __init__(
+        self,
+        level: Optional[str] = None,
+        info_sample_rate: Optional[float] = None,
+        stream: Optional[TextIO] = None,
+    ) -> None:
+        """
+        Create a logger.
+
+        Args:
+            level: Minimum level name; defaults to the LOG_LEVEL env var, then INFO
+            info_sample_rate: Fraction of invocations whose INFO records are kept;
+                defaults to the LOG_INFO_SAMPLE_RATE env var, then 1.0
+            stream: Output stream; defaults to the current ``sys.stdout``
+        """
+        self._stream = stream
+        self._context: Dict[str, Any] = {}
+        self._buffer: List[BufferedRecord] = []
+        self._active = False
+        self._errored = False
+        self._sampled = True
+        self.configure(level, info_sample_rate)
+
+    def configure(
+        self, level: Optional[str] = None, info_sample_rate: Optional[float] = None
+    ) -> None:
+        """
+        (Re)apply level and sampling configuration.
+
+        Args:
+            level: Minimum level name; defaults to the LOG_LEVEL env var, then INFO
+            info_sample_rate: INFO sampling rate; defaults to LOG_INFO_SAMPLE_RATE, then 1.0
+        """
+        level_name = (level or os.environ.get("LOG_LEVEL") or "INFO").upper()
+        self.level = LEVELS_BY_NAME.get(level_name, INFO)
+
+        if info_sample_rate is None:
+            try:
+                info_sample_rate = float(os.environ.get("LOG_INFO_SAMPLE_RATE") or 1.0)
+            except ValueError:
+                info_sample_rate = 1.0
+        self.info_sample_rate = min(max(info_sample_rate, 0.0), 1.0)
+
+    def is_enabled(self, level: int) -> bool:
+        """Return whether records at ``level`` pass the level gate."""
+        return level >= self.level
+
+    def start_invocation(self, **context: Any) -> None:
+        """
+        Begin buffering for a new invocation and bind its base context.
+
+        Args:
+            **context: Fields attached to every record, e.g. request_id
+        """
+        self._context = dict(context)
+        self._buffer = []
+        self._active = True
+        self._errored = False
+        self._sampled = random.random() < self.info_sample_rate
+
+    def bind(self, **fields: Any) -> None:
+        """Attach fields to every subsequent record in this invocation."""
+        self._context.update(fields)
+
+    def debug(self, message: str, **fields: Any) -> None:
+        """Log a DEBUG record."""
+        if self.level <= DEBUG:
+            self._log(DEBUG, message, fields)
+
+    def info(self, message: str, **fields: Any) -> None:
+        """Log an INFO record."""
+        if self.level <= INFO:
+            self._log(INFO, message, fields)
+
+    def warning(self, message: str, **fields: Any) -> None:
+        """Log a WARNING record."""
+        if self.level <= WARNING:
+            self._log(WARNING, message, fields)
+
+    def error(self, message: str, **fields: Any) -> None:
+        """Log an ERROR record; marks the invocation so the full buffer is flushed."""
+        self._errored = True
+        if self.level <= ERROR:
+            self._log(ERROR, message, fields)
+
+    def record(self, message: str, **fields: Any) -> None:
+        """
+        Write a record that bypasses level gating and sampling.
+
+        Intended for machine-consumed records (profiles, accounting) that must
+        never be dropped.
+        """
+        self._write([self._serialize(INFO, message, fields)])
+
+    def flush(self) -> None:
+        """Write the buffered records for the current invocation and end it."""
+        self._drain()
+        self._active = False
+        self._context = {}
+
+    def _log(self, level: int, message: str, fields: Dict[str, Any]) -> None:
+        if not self._active:
+            self._write([self._serialize(level, message, fields)])
+            return
+        self._buffer.append((level, message, fields))
+        if len(self._buffer) >= MAX_BUFFERED_RECORDS:
+            self._drain()
+
+    def _drain(self) -> None:
+        buffered, self._buffer = self._buffer, []
+        keep_info = self._sampled or self._errored
+        lines = [
+            self._serialize(level, message, fields)
+            for level, message, fields in buffered
+            if keep_info or level != INFO
+        ]
+        if lines:
+            self._write(lines)
+
+    def _serialize(self, level: int, message: str, fields: Dict[str, Any]) -> str:
+        return json.dumps(
+            {"level": LEVEL_NAMES[level], "message": message, **self._context, **fields},
+            default=str,
+        )
+
+    def _write(self, lines: List[str]) -> None:
+        stream = self._stream or sys.stdout
+        stream.write("\n".join(lines) + "\n")
+
+
+logger = StructuredLogger()
+
+
+def log_invocation(func: Handler) -> Handler:
+    """
+    Decorate a Lambda handler so each invocation gets its own log buffer.
+
+    Binds the request ID from the Lambda context, logs uncaught exceptions and
+    always flushes the buffer when the handler returns or raises.
+    """
+
+    @functools.wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Any:
+        logger.start_invocation(request_id=context.aws_request_id if context else "unknown")
+        try:
+            return func(event, context)
+        except Exception as e:
+            logger.error("Unhandled exception", error=str(e), error_type=type(e).__name__)
+            raise
+        finally:
+            logger.flush()
+
+    return wrapper
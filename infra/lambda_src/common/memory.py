@@ -0,0 +1,112 @@
+"""Sampled tracemalloc probe recording per-invocation memory use."""
+
+import functools
+import random
+import resource
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from .log import logger
+from .metrics import metrics, route_of
+from .utils import env_float, env_int
+
+Handler = Callable[[Dict[str, Any], Any], Any]
+
+DEFAULT_TOP_N = 10
+
+# Allocation sites inside these files are bookkeeping, not handler work
+IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<unknown>")
+
+
+def max_rss_kb() -> int:
+    """Return the process's peak resident set size in KiB (Linux reports KiB)."""
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, limit: int) -> List[Dict[str, Any]]:
+    """
+    Summarize a snapshot as the allocation sites holding the most memory.
+
+    Args:
+        snapshot: Snapshot taken at the end of the invocation
+        limit: Number of sites to return
+
+    Returns:
+        List of dicts with site ("dir/file.py:line"), size_kb and count
+    """
+    filtered = snapshot.filter_traces(
+        [tracemalloc.Filter(False, pattern) for pattern in IGNORED_FILES]
+    )
+    sites = []
+    for stat in filtered.statistics("lineno")[:limit]:
+        frame = stat.traceback[0]
+        parts = frame.filename.replace("\\", "/").split("/")
+        sites.append(
+            {
+                "site": f"{'/'.join(parts[-2:])}:{frame.lineno}",
+                "size_kb": round(stat.size / 1024.0, 1),
+                "count": stat.count,
+            }
+        )
+    return sites
+
+
+def memory_probed(func: Handler) -> Handler:
+    """
+    Decorate a Lambda handler to trace Python allocations on sampled invocations.
+
+    Configuration is read once, when the handler module is imported:
+
+    - MEMORY_PROFILE_SAMPLE_RATE: fraction of invocations to trace (default 0, disabled)
+    - MEMORY_PROFILE_TOP_N: number of allocation sites in the log record (default 10)
+
+    A traced invocation adds ``PeakPythonMemory`` and ``MaxRss`` (KiB) to the
+    EMF line and logs a ``Handler memory`` record with the route, the peak of
+    traced allocations, the container's peak RSS against its configured memory
+    size and the top allocation sites still live when the handler returns.
+    Peak RSS is a high-water mark for the container, not just this invocation.
+
+    When the sample rate is 0 the handler is returned unchanged.
+    """
+    sample_rate = env_float("MEMORY_PROFILE_SAMPLE_RATE", 0.0)
+    if sample_rate <= 0:
+        return func
+
+    top_n = env_int("MEMORY_PROFILE_TOP_N", DEFAULT_TOP_N)
+
+    @functools.wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Any:
+        if random.random() >= sample_rate:
+            return func(event, context)
+
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        try:
+            return func(event, context)
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracing_overhead = tracemalloc.get_tracemalloc_memory()
+            if started_here:
+                tracemalloc.stop()
+
+            rss_kb = max_rss_kb()
+            peak_kb = (peak - baseline) / 1024.0
+            metrics.add("PeakPythonMemory", peak_kb, unit="Kilobytes")
+            metrics.add("MaxRss", rss_kb, unit="Kilobytes")
+            logger.record(
+                "Handler memory",
+                request_id=context.aws_request_id if context else "unknown",
+                route=route_of(event),
+                peak_kb=round(peak_kb, 1),
+                retained_kb=round((current - baseline) / 1024.0, 1),
+                max_rss_kb=rss_kb,
+                tracing_overhead_kb=round(tracing_overhead / 1024.0, 1),
+                memory_limit_mb=getattr(context, "memory_limit_in_mb", None),
+                top_allocations=top_allocations(snapshot, top_n),
+            )
+
+    return wrapper
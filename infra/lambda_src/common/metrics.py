@@ -0,0 +1,218 @@
+"""Per-invocation latency metrics emitted in CloudWatch Embedded Metric Format."""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, TypeVar
+
+Handler = Callable[[Dict[str, Any], Any], Any]
+F = TypeVar("F", bound=Callable[..., Any])
+
+DEFAULT_NAMESPACE = "MapMe"
+
+# EMF dimension sets: the full set for drill-down, and one without Status so
+# alarms can watch p99 per route regardless of outcome
+DIMENSION_SETS = [["Function", "Route", "Status"], ["Function", "Route"]]
+
+_cold_start = True
+
+
+def route_of(event: Dict[str, Any]) -> str:
+    """
+    Derive a low-cardinality route name from a Lambda event.
+
+    Args:
+        event: API Gateway, SQS, DynamoDB stream, EventBridge schedule or Cognito
+            trigger event
+
+    Returns:
+        Route such as "GET /searches", "sqs", "schedule" or the Cognito trigger source
+    """
+    if "httpMethod" in event:
+        path = event.get("resource") or event.get("path") or ""
+        return f"{event.get('httpMethod', '')} {path}"
+    if "triggerSource" in event:
+        return str(event["triggerSource"])
+    if event.get("detail-type") == "Scheduled Event":
+        return "schedule"
+    records = event.get("Records") or []
+    if records:
+        source = records[0].get("eventSource") or records[0].get("EventSource") or ""
+        return str(source).split(":")[-1] or "records"
+    return "unknown"
+
+
+class MetricsRecorder:
+    """
+    Collects named timings for one invocation and writes a single EMF line.
+
+    Timings for the same name are summed, so a phase entered more than once
+    (e.g. two DynamoDB calls) reports its total time.
+    """
+
+    def __init__(self, namespace: Optional[str] = None, stream: Optional[TextIO] = None) -> None:
+        """
+        Create a recorder.
+
+        Args:
+            namespace: CloudWatch namespace; defaults to METRICS_NAMESPACE, then "MapMe"
+            stream: Output stream; defaults to the current ``sys.stdout``
+        """
+        self.namespace = namespace or os.environ.get("METRICS_NAMESPACE") or DEFAULT_NAMESPACE
+        self._stream = stream
+        self._dimensions: Dict[str, str] = {}
+        self._values: Dict[str, float] = {}
+        self._units: Dict[str, str] = {}
+        self._properties: Dict[str, Any] = {}
+        # Worker threads (fan-out reads, geocoding) add to the same totals
+        self._lock = threading.Lock()
+
+    def start_invocation(self, function: str, route: str = "unknown") -> None:
+        """
+        Reset state for a new invocation.
+
+        Args:
+            function: Lambda function name
+            route: Route dimension value
+        """
+        self._dimensions = {"Function": function, "Route": route, "Status": "unknown"}
+        self._values = {}
+        self._units = {}
+        self._properties = {}
+
+    def set_route(self, route: str) -> None:
+        """Override the Route dimension."""
+        self._dimensions["Route"] = route
+
+    def set_status(self, status: Any) -> None:
+        """Set the Status dimension, e.g. an HTTP status code."""
+        self._dimensions["Status"] = str(status)
+
+    def set_property(self, name: str, value: Any) -> None:
+        """Attach a non-metric property to the EMF record (searchable in Logs Insights)."""
+        self._properties[name] = value
+
+    def add(self, name: str, value: float, unit: str = "Milliseconds") -> None:
+        """
+        Add a value to a metric for this invocation.
+
+        Args:
+            name: Metric name
+            value: Value to add to the running total
+            unit: CloudWatch unit
+        """
+        with self._lock:
+            self._values[name] = self._values.get(name, 0.0) + value
+            self._units[name] = unit
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Time a named phase of request handling.
+
+        Args:
+            name: Phase name, e.g. "parse", "validate", "dynamodb", "serialize"
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - started) * 1000.0)
+
+    def timed(self, name: str) -> Callable[[F], F]:
+        """
+        Decorate a function so each call is timed as phase ``name``.
+
+        Args:
+            name: Phase name
+        """
+
+        def decorator(func: F) -> F:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.phase(name):
+                    return func(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorator
+
+    def to_emf(self, timestamp_ms: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Build the EMF document for the current invocation.
+
+        Args:
+            timestamp_ms: Metric timestamp; defaults to now
+
+        Returns:
+            EMF record as a dictionary
+        """
+        metric_defs: List[Dict[str, str]] = [
+            {"Name": name, "Unit": self._units[name]} for name in self._values
+        ]
+        return {
+            "_aws": {
+                "Timestamp": timestamp_ms if timestamp_ms is not None else int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": self.namespace,
+                        "Dimensions": DIMENSION_SETS,
+                        "Metrics": metric_defs,
+                    }
+                ],
+            },
+            **self._properties,
+            **self._dimensions,
+            **{name: round(value, 3) for name, value in self._values.items()},
+        }
+
+    def flush(self) -> None:
+        """Write the EMF line for this invocation."""
+        stream = self._stream or sys.stdout
+        stream.write(json.dumps(self.to_emf(), default=str) + "\n")
+
+
+metrics = MetricsRecorder()
+
+
+def record_metrics(func: Handler) -> Handler:
+    """
+    Decorate a Lambda handler to emit one EMF metrics line per invocation.
+
+    Records total duration, cold vs. warm start and the response status; phases
+    timed inside the handler with ``metrics.phase`` are included in the same line.
+    """
+
+    @functools.wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Any:
+        global _cold_start
+        cold_start, _cold_start = _cold_start, False
+
+        function = getattr(context, "function_name", None) or os.environ.get(
+            "AWS_LAMBDA_FUNCTION_NAME", "local"
+        )
+        metrics.start_invocation(str(function), route_of(event))
+        metrics.add("ColdStart", 1.0 if cold_start else 0.0, unit="Count")
+        metrics.set_property("cold_start", cold_start)
+
+        started = time.perf_counter()
+        try:
+            result = func(event, context)
+        except Exception:
+            metrics.set_status("error")
+            raise
+        else:
+            if isinstance(result, dict) and "statusCode" in result:
+                metrics.set_status(result["statusCode"])
+            else:
+                metrics.set_status("ok")
+            return result
+        finally:
+            metrics.add("Duration", (time.perf_counter() - started) * 1000.0)
+            metrics.flush()
+
+    return wrapper
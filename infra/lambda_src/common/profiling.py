@@ -0,0 +1,97 @@
+"""Sampled cProfile wrapper for Lambda handlers."""
+
+import cProfile
+import functools
+import os
+import pstats
+import random
+from typing import Any, Callable, Dict, List, Optional
+
+from .log import logger
+from .utils import env_float, env_int
+
+Handler = Callable[[Dict[str, Any], Any], Any]
+
+DEFAULT_TOP_N = 20
+
+
+def _short_path(path: str) -> str:
+    """Keep the last two path components so records stay small but unambiguous."""
+    parts = path.replace("\\", "/").split("/")
+    return "/".join(parts[-2:])
+
+
+def top_functions(profiler: cProfile.Profile, limit: int) -> List[Dict[str, Any]]:
+    """
+    Summarize a profile as the top functions by cumulative time.
+
+    Args:
+        profiler: A disabled profiler
+        limit: Number of functions to return
+
+    Returns:
+        List of dicts with function, calls, total_ms and cumulative_ms
+    """
+    stats = pstats.Stats(profiler)
+    # pstats keeps raw entries as {(file, line, name): (cc, nc, tt, ct, callers)}
+    entries = sorted(
+        stats.stats.items(),  # type: ignore[attr-defined]
+        key=lambda entry: entry[1][3],
+        reverse=True,
+    )
+    return [
+        {
+            "function": f"{_short_path(file)}:{line}({name})",
+            "calls": calls,
+            "total_ms": round(total * 1000.0, 3),
+            "cumulative_ms": round(cumulative * 1000.0, 3),
+        }
+        for (file, line, name), (_, calls, total, cumulative, _) in entries[:limit]
+    ]
+
+
+def profiled(func: Handler) -> Handler:
+    """
+    Decorate a Lambda handler to profile a sampled fraction of invocations.
+
+    Configuration is read once, when the handler module is imported:
+
+    - PROFILE_SAMPLE_RATE: fraction of invocations to profile (default 0, disabled)
+    - PROFILE_TOP_N: number of functions in the log record (default 20)
+    - PROFILE_DUMP_DIR: if set (e.g. /tmp), raw pstats files are written there
+
+    When the sample rate is 0 the handler is returned unchanged, so leaving the
+    decorator deployed costs nothing.
+    """
+    sample_rate = env_float("PROFILE_SAMPLE_RATE", 0.0)
+    if sample_rate <= 0:
+        return func
+
+    top_n = env_int("PROFILE_TOP_N", DEFAULT_TOP_N)
+    dump_dir = os.environ.get("PROFILE_DUMP_DIR", "")
+
+    @functools.wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Any:
+        if random.random() >= sample_rate:
+            return func(event, context)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return func(event, context)
+        finally:
+            profiler.disable()
+            request_id = context.aws_request_id if context else "unknown"
+            dump_path: Optional[str] = None
+            if dump_dir:
+                dump_path = os.path.join(dump_dir, f"profile-{request_id}.pstats")
+                profiler.dump_stats(dump_path)
+            logger.record(
+                "Handler profile",
+                request_id=request_id,
+                handler=func.__module__,
+                top_cumulative=top_functions(profiler, top_n),
+                dump_path=dump_path,
+            )
+
+    return wrapper
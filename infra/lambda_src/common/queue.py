@@ -0,0 +1,155 @@
+"""Message queue helpers for asynchronous ingest."""
+
+import json
+import threading
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import boto3
+
+LOCAL_QUEUE_PREFIX = "local://"
+
+
+class SqsQueue:
+    """Thin wrapper around an SQS queue URL."""
+
+    def __init__(self, queue_url: str, client: Any = None) -> None:
+        """
+        Create a queue wrapper.
+
+        Args:
+            queue_url: URL of the SQS queue
+            client: Optional pre-built SQS client
+        """
+        self.queue_url = queue_url
+        self._client = client
+
+    @property
+    def client(self) -> Any:
+        """Lazily create the SQS client so cold starts only pay for it when used."""
+        if self._client is None:
+            self._client = boto3.client("sqs")
+        return self._client
+
+    def send(self, body: Dict[str, Any], delay_seconds: int = 0) -> str:
+        """
+        Send a JSON message to the queue.
+
+        Args:
+            body: Message payload
+            delay_seconds: Seconds before the message can be received (at most 900)
+
+        Returns:
+            The SQS message ID
+        """
+        params: Dict[str, Any] = {"QueueUrl": self.queue_url, "MessageBody": json.dumps(body)}
+        if delay_seconds:
+            params["DelaySeconds"] = delay_seconds
+        response = self.client.send_message(**params)
+        return str(response.get("MessageId", ""))
+
+
+class LocalQueue:
+    """
+    In-memory stand-in for SQS.
+
+    Messages are stored in FIFO order and handed out as SQS Lambda events, so the
+    producer and the batch consumer can be exercised end to end without AWS.
+    """
+
+    def __init__(self, name: str = "local") -> None:
+        """
+        Create an empty local queue.
+
+        Args:
+            name: Queue name, used to build the fake event source ARN
+        """
+        self.name = name
+        self._messages: Deque[Tuple[str, str]] = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of messages waiting in the queue."""
+        return len(self._messages)
+
+    def send(self, body: Dict[str, Any], delay_seconds: int = 0) -> str:
+        """
+        Enqueue a JSON message.
+
+        Args:
+            body: Message payload
+            delay_seconds: Ignored; local messages are available at once
+
+        Returns:
+            A generated message ID
+        """
+        message_id = str(uuid.uuid4())
+        with self._lock:
+            self._messages.append((message_id, json.dumps(body)))
+        return message_id
+
+    def receive_event(self, max_messages: int = 10) -> Dict[str, Any]:
+        """
+        Pop up to ``max_messages`` messages as an SQS Lambda event.
+
+        Args:
+            max_messages: Maximum number of records in the event
+
+        Returns:
+            Event in the shape Lambda delivers for an SQS event source mapping
+        """
+        records: List[Dict[str, Any]] = []
+        with self._lock:
+            while self._messages and len(records) < max_messages:
+                message_id, body = self._messages.popleft()
+                records.append(
+                    {
+                        "messageId": message_id,
+                        "receiptHandle": message_id,
+                        "body": body,
+                        "eventSource": "aws:sqs",
+                        "eventSourceARN": f"arn:aws:sqs:local:000000000000:{self.name}",
+                    }
+                )
+        return {"Records": records}
+
+    def requeue(self, event: Dict[str, Any], failed_ids: List[str]) -> None:
+        """
+        Put failed records back on the queue, as SQS does after the visibility timeout.
+
+        Args:
+            event: Event previously returned by ``receive_event``
+            failed_ids: Message IDs reported as batch item failures
+        """
+        failed = set(failed_ids)
+        with self._lock:
+            for record in event.get("Records", []):
+                if record["messageId"] in failed:
+                    self._messages.append((record["messageId"], record["body"]))
+
+
+_local_queues: Dict[str, LocalQueue] = {}
+
+
+def get_queue(queue_url: str) -> Optional[Any]:
+    """
+    Resolve a queue URL to a queue object.
+
+    URLs of the form ``local://<name>`` map to a process-wide ``LocalQueue`` so a
+    producer and consumer running in the same process share messages.
+
+    Args:
+        queue_url: SQS queue URL or ``local://`` name
+
+    Returns:
+        Queue object, or None if no URL is configured
+    """
+    if not queue_url:
+        return None
+    if queue_url.startswith(LOCAL_QUEUE_PREFIX):
+        name = queue_url[len(LOCAL_QUEUE_PREFIX) :]
+        if name not in _local_queues:
+            _local_queues[name] = LocalQueue(name)
+        return _local_queues[name]
+    return SqsQueue(queue_url)
@@ -0,0 +1,345 @@
+"""
+Per-user, per-route token-bucket rate limiting for write routes.
+
+Each (user, route) pair has a bucket of ``RATE_LIMIT_BURST`` tokens that
+refills at ``RATE_LIMIT_PER_MINUTE``. A request takes one token, and a
+request that finds the bucket empty gets a 429 with ``Retry-After``.
+
+The bucket is kept in the limits table as a theoretical arrival time
+(``tat``, epoch milliseconds), the moment the bucket would be full again.
+Taking ``n`` tokens moves ``tat`` forward by ``n`` refill intervals, and is
+allowed while ``tat`` stays within one burst of now. That makes each take a
+single conditional UpdateItem:
+
+- an idle bucket (``tat`` in the past) is reset to ``now + n`` intervals
+- a part-used bucket is moved forward on condition it stays within the burst
+- a failed condition returns the stored ``tat``, which gives ``Retry-After``
+
+Limits table layout (string ``id`` hash key)::
+
+    <userId>#<method> <route>  tat, expiresAt
+
+Local fast path: while a take would leave at least half the bucket, the
+container takes ``RATE_LIMIT_LOCAL_LEASE`` extra tokens on the same call.
+It then serves that many requests from memory, for up to
+``LEASE_SECONDS``, without calling DynamoDB. A user well under the limit
+therefore costs one write per few requests, and leases never let a user
+exceed the limit, only spend their tokens early. Lease tokens that expire
+unused are lost, which costs at most one lease per container per
+``LEASE_SECONDS``. A refused lease take returns the stored ``tat``. That
+decides the single-token take without the idle-branch write, and the
+container asks for no new lease until ``tat`` has drained back below half
+the bucket.
+
+The limiter fails open. If the limits table cannot be reached, the request
+is let through and ``RateLimitErrors`` is counted.
+"""
+
+import functools
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+from .ddb import ddb_call
+from .log import logger
+from .metrics import metrics
+from .resilience import ddb_client_config
+from .router import Request, RouteHandler
+from .utils import create_response, env_int
+
+DEFAULT_PER_MINUTE = 60
+DEFAULT_BURST = 20
+DEFAULT_LOCAL_LEASE = 4
+# Local tokens are only trusted this long, so other containers see a fair bucket
+LEASE_SECONDS = 2.0
+# Buckets kept in memory per container; the least recently used are dropped
+MAX_LOCAL_BUCKETS = 4096
+# Attempts when a bucket refills between the two conditional updates
+MAX_TAKE_ATTEMPTS = 3
+# Items outlive the moment their bucket is full again by this much
+EXPIRY_SLACK_SECONDS = 60
+
+
+class LimitsTable:
+    """Conditional updates of bucket items in the limits table."""
+
+    def __init__(self, client_factory: Callable[[], Any], table: str) -> None:
+        """
+        Create the table wrapper.
+
+        Args:
+            client_factory: Makes a DynamoDB client; only called when needed
+            table: Limits table name
+        """
+        self.client_factory = client_factory
+        self.table = table
+
+    def take(
+        self, key: str, cost: int, interval_ms: int, room: int, now_ms: int, busy: bool = False
+    ) -> Tuple[bool, int]:
+        """
+        Take tokens from a bucket.
+
+        Args:
+            key: Bucket ID
+            cost: Tokens to take
+            interval_ms: Refill interval of one token
+            room: Most tokens that may be in use after the take; the bucket
+                size, or less to take only while well under the limit
+            now_ms: Current time, epoch milliseconds
+            busy: The caller has just seen the bucket part-used, so the
+                idle-bucket update is skipped unless the bucket has refilled
+
+        Returns:
+            Tuple of (taken, tat after the take or the stored tat if refused)
+
+        Raises:
+            ClientError: If the table cannot be updated
+        """
+        ddb = self.client_factory()
+        limit = now_ms + (room - cost) * interval_ms
+        expires = now_ms // 1000 + room * interval_ms // 1000 + EXPIRY_SLACK_SECONDS
+        for attempt in range(MAX_TAKE_ATTEMPTS):
+            if not (busy and attempt == 0):
+                taken, tat = self._update(
+                    ddb,
+                    key,
+                    "SET tat = :fresh, expiresAt = :expires",
+                    "attribute_not_exists(tat) OR tat <= :now",
+                    {":fresh": now_ms + cost * interval_ms, ":now": now_ms, ":expires": expires},
+                )
+                if taken:
+                    return True, tat
+            taken, tat = self._update(
+                ddb,
+                key,
+                "SET tat = tat + :cost, expiresAt = :expires",
+                "tat > :now AND tat <= :limit",
+                {":cost": cost * interval_ms, ":now": now_ms, ":limit": limit, ":expires": expires},
+            )
+            if taken or tat > limit:
+                return taken, tat
+            # Refilled between the two updates; try the idle branch again
+        return False, limit + interval_ms
+
+    def _update(
+        self, ddb: Any, key: str, update: str, condition: str, values: Dict[str, int]
+    ) -> Tuple[bool, int]:
+        try:
+            response = ddb_call(
+                ddb,
+                "update_item",
+                TableName=self.table,
+                Key={"id": {"S": key}},
+                UpdateExpression=update,
+                ConditionExpression=condition,
+                ExpressionAttributeValues={name: {"N": str(v)} for name, v in values.items()},
+                ReturnValues="UPDATED_NEW",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+            item = e.response.get("Item") or {}
+            return False, int(item.get("tat", {}).get("N", "0"))
+        return True, int(response["Attributes"]["tat"]["N"])
+
+
+class Lease:
+    """Tokens a container has taken ahead of time for one bucket."""
+
+    def __init__(self, tokens: int, expires_at: float, retry_at_ms: int = 0) -> None:
+        """
+        Create a lease.
+
+        Args:
+            tokens: Requests the lease can still serve
+            expires_at: Monotonic time after which it is discarded
+            retry_at_ms: Wall-clock time (epoch ms) before which a new lease
+                would be refused
+        """
+        self.tokens = tokens
+        self.expires_at = expires_at
+        self.retry_at_ms = retry_at_ms
+
+
+class RateLimiter:
+    """Token buckets with a per-container lease cache in front of the table."""
+
+    def __init__(
+        self,
+        table: LimitsTable,
+        per_minute: int = DEFAULT_PER_MINUTE,
+        burst: int = DEFAULT_BURST,
+        local_lease: int = DEFAULT_LOCAL_LEASE,
+        clock: Callable[[], float] = time.time,
+        monotonic: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Create a limiter.
+
+        Args:
+            table: Where buckets are kept
+            per_minute: Refill rate, in requests per minute
+            burst: Bucket size
+            local_lease: Extra tokens taken for the local fast path; 0 disables it
+            clock: Wall-clock time source, shared with other containers
+            monotonic: Time source for lease expiry
+        """
+        self.table = table
+        self.per_minute = max(1, per_minute)
+        self.burst = max(1, burst)
+        self.local_lease = max(0, local_lease)
+        self.interval_ms = max(1, 60_000 // self.per_minute)
+        self.clock = clock
+        self.monotonic = monotonic
+        self.leases: "OrderedDict[str, Lease]" = OrderedDict()
+        self.settings: Tuple[Any, ...] = ()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> Tuple[bool, float]:
+        """
+        Take one token for a request.
+
+        Args:
+            key: Bucket ID
+
+        Returns:
+            Tuple of (allowed, seconds until a token is available if not)
+
+        Raises:
+            ClientError: If the table cannot be updated
+        """
+        if self._take_local(key):
+            metrics.add("RateLimitLocalHits", 1, unit="Count")
+            return True, 0.0
+
+        now_ms = int(self.clock() * 1000)
+        limit = now_ms + (self.burst - 1) * self.interval_ms
+        with metrics.phase("ratelimit"):
+            taken, tat = self._take_leased(key, now_ms)
+            if not taken and tat <= limit:
+                # A refused lease means the bucket is part-used, not idle, so
+                # only the part-used update can succeed
+                taken, tat = self.table.take(
+                    key, 1, self.interval_ms, self.burst, now_ms, busy=tat > now_ms
+                )
+
+        if not taken:
+            return False, max(0, tat - limit) / 1000.0
+        return True, 0.0
+
+    def _take_leased(self, key: str, now_ms: int) -> Tuple[bool, int]:
+        # Lease only while the take leaves at least half the bucket. Returns the
+        # stored tat, a lower bound on it, or 0 when nothing is known
+        cost = 1 + self.local_lease
+        room = self.burst // 2
+        if not self.local_lease or room < cost:
+            return False, 0
+        retry_at_ms = self._lease_retry_at(key)
+        if now_ms < retry_at_ms:
+            return False, retry_at_ms + (room - cost) * self.interval_ms
+        taken, tat = self.table.take(key, cost, self.interval_ms, room, now_ms)
+        if taken:
+            self._store_lease(key, Lease(self.local_lease, self.monotonic() + LEASE_SECONDS))
+        else:
+            # tat only drains with time, so no lease is possible before this
+            retry_at_ms = tat - (room - cost) * self.interval_ms
+            self._store_lease(key, Lease(0, 0.0, retry_at_ms))
+        return taken, tat
+
+    def _lease_retry_at(self, key: str) -> int:
+        with self._lock:
+            lease = self.leases.get(key)
+            return 0 if lease is None else lease.retry_at_ms
+
+    def _take_local(self, key: str) -> bool:
+        with self._lock:
+            lease = self.leases.get(key)
+            if lease is None or lease.tokens <= 0 or lease.expires_at <= self.monotonic():
+                return False
+            lease.tokens -= 1
+            self.leases.move_to_end(key)
+            return True
+
+    def _store_lease(self, key: str, lease: Lease) -> None:
+        with self._lock:
+            self.leases[key] = lease
+            self.leases.move_to_end(key)
+            while len(self.leases) > MAX_LOCAL_BUCKETS:
+                self.leases.popitem(last=False)
+
+
+_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Get the container's limiter, configured from the environment.
+
+    Reads RATE_LIMIT_TABLE, RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST and
+    RATE_LIMIT_LOCAL_LEASE. Leases survive across warm invocations; the
+    limiter is rebuilt only if the settings change.
+
+    Returns:
+        The limiter, or None when RATE_LIMIT_TABLE is unset
+    """
+    global _limiter
+    table = os.environ.get("RATE_LIMIT_TABLE", "")
+    if not table:
+        return None
+    settings = (
+        table,
+        env_int("RATE_LIMIT_PER_MINUTE", DEFAULT_PER_MINUTE),
+        env_int("RATE_LIMIT_BURST", DEFAULT_BURST),
+        env_int("RATE_LIMIT_LOCAL_LEASE", DEFAULT_LOCAL_LEASE),
+    )
+    if _limiter is None or _limiter.settings != settings:
+        _limiter = RateLimiter(
+            LimitsTable(lambda: boto3.client("dynamodb", config=ddb_client_config()), table),
+            per_minute=settings[1],
+            burst=settings[2],
+            local_lease=settings[3],
+        )
+        _limiter.settings = settings
+    return _limiter
+
+
+def rate_limited(next_handler: RouteHandler) -> RouteHandler:
+    """
+    Middleware: limit how often each user may call a route.
+
+    Must run after ``authenticate``, since buckets are kept per user.
+    """
+
+    @functools.wraps(next_handler)
+    def wrapper(request: Request) -> Dict[str, Any]:
+        limiter = get_rate_limiter()
+        if limiter is None:
+            return next_handler(request)
+
+        key = f"{request.user_id}#{request.method} {request.template or request.path}"
+        try:
+            allowed, retry_after = limiter.acquire(key)
+        except (BotoCoreError, ClientError) as e:
+            metrics.add("RateLimitErrors", 1, unit="Count")
+            logger.warning("Rate limit table unavailable", error=str(e))
+            return next_handler(request)
+
+        if not allowed:
+            metrics.add("RateLimited", 1, unit="Count")
+            logger.info("Rate limited", retry_after=retry_after)
+            return create_response(
+                429,
+                {"error": "Too many requests"},
+                {"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+        return next_handler(request)
+
+    return wrapper
@@ -0,0 +1,442 @@
+"""
+Retries, circuit breaking and hedged reads for DynamoDB calls.
+
+``ddb_call`` sends every call through the container's ``Resilience`` policy:
+
+- Throttling errors are retried with full-jitter exponential backoff. Server
+  errors and connection failures are retried only for reads, since a write
+  that failed that way may still have been applied.
+- Retries are paid for from a ``RetryBudget``. Each call adds a fraction of a
+  token and each retry spends a whole one, so during an outage retries add at
+  most that fraction to the load instead of multiplying it.
+- A ``CircuitBreaker`` per table opens after consecutive throttling or server
+  failures. While it is open, calls fail at once with ``CircuitOpenError``
+  (a 503 through ``map_errors``). After a cooldown one probe call is let
+  through, and its outcome closes or re-opens the breaker.
+- With ``DDB_HEDGE_AFTER_MS`` set, a ``get_item`` or ``query`` still running
+  after that long is sent a second time, and the first answer wins. Hedges
+  are paid for from the retry budget too.
+
+No call is started, and no retry backs off, past the invocation's deadline
+(``common/deadline.py``). botocore's own retries are turned off and its
+timeouts are capped at the deadline (see ``ddb_client_config``), so they do
+not multiply with these. Each decision is counted in the invocation's metrics.
+The budget and breakers live for the container, so warm invocations share
+what earlier ones learned.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from .deadline import Deadline, DeadlineExceededError, current_deadline
+from .log import logger
+from .metrics import metrics
+from .utils import env_float, env_int, in_context
+
+# Base of ddb_client_config: only this module retries
+DDB_CLIENT_CONFIG = Config(retries={"total_max_attempts": 1, "mode": "standard"})
+
+# botocore defaults to 60 s for each, far beyond the functions' timeouts
+DEFAULT_CONNECT_TIMEOUT_MS = 1000
+DEFAULT_READ_TIMEOUT_MS = 3000
+# Lowest timeout handed to botocore, so a client made just before the deadline still works
+MIN_TIMEOUT_SECONDS = 0.05
+
+THROTTLING_CODES = frozenset(
+    {"ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded"}
+)
+SERVER_ERROR_CODES = frozenset(
+    {"InternalServerError", "InternalFailure", "InternalError", "ServiceUnavailable"}
+)
+
+# Outcome classes of a failed call
+THROTTLED = "throttled"
+SERVER_ERROR = "server_error"
+REJECTED = "rejected"
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BASE_MS = 25
+DEFAULT_RETRY_CAP_MS = 500
+DEFAULT_BUDGET_RATIO = 0.1
+DEFAULT_BUDGET_RESERVE = 10
+DEFAULT_BREAKER_FAILURES = 5
+DEFAULT_BREAKER_COOLDOWN_MS = 2000
+# Hedged reads run on this many threads per container
+HEDGE_WORKERS = 8
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def ddb_client_config() -> Config:
+    """
+    Get the botocore config for a DynamoDB client made during an invocation.
+
+    Retries are left to ``Resilience``. The connect and read timeouts,
+    DDB_CONNECT_TIMEOUT_MS and DDB_READ_TIMEOUT_MS, are capped at the time
+    left before the invocation's deadline. Clients are made per invocation,
+    so each gets its own cap.
+
+    Returns:
+        Config to pass to ``boto3.client/resource("dynamodb")``
+    """
+    deadline = current_deadline()
+    connect = env_int("DDB_CONNECT_TIMEOUT_MS", DEFAULT_CONNECT_TIMEOUT_MS) / 1000.0
+    read = env_int("DDB_READ_TIMEOUT_MS", DEFAULT_READ_TIMEOUT_MS) / 1000.0
+    return DDB_CLIENT_CONFIG.merge(
+        Config(
+            connect_timeout=max(MIN_TIMEOUT_SECONDS, deadline.cap(connect)),
+            read_timeout=max(MIN_TIMEOUT_SECONDS, deadline.cap(read)),
+        )
+    )
+
+
+class CircuitOpenError(ClientError):
+    """Raised instead of calling DynamoDB while a table's breaker is open."""
+
+    def __init__(self, operation: str, table: str) -> None:
+        """
+        Create the error.
+
+        Args:
+            operation: boto3 method that was not called
+            table: Table whose breaker is open
+        """
+        super().__init__(
+            {
+                "Error": {"Code": "CircuitOpen", "Message": f"Circuit open for {table}"},
+                "ResponseMetadata": {"HTTPStatusCode": 503},
+            },
+            operation,
+        )
+
+
+def classify(error: Exception) -> str:
+    """
+    Classify a failed call.
+
+    Args:
+        error: Exception raised by the call
+
+    Returns:
+        THROTTLED, SERVER_ERROR (including connection failures and timeouts),
+        or REJECTED for errors about the request itself, such as a failed
+        condition, which say nothing bad about DynamoDB's health
+    """
+    if isinstance(error, BotoCoreError):
+        return SERVER_ERROR
+    if not isinstance(error, ClientError):
+        return REJECTED
+    code = error.response.get("Error", {}).get("Code", "")
+    if code in THROTTLING_CODES:
+        return THROTTLED
+    status = int(error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0)
+    if code in SERVER_ERROR_CODES or status >= 500:
+        return SERVER_ERROR
+    return REJECTED
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Full-jitter backoff: uniform between zero and the capped exponential delay.
+
+    Args:
+        attempt: Retry number, from 0
+        base: Delay ceiling of the first retry, in seconds
+        cap: Largest delay ceiling, in seconds
+
+    Returns:
+        Seconds to sleep
+    """
+    return random.uniform(0.0, min(cap, base * (2**attempt)))
+
+
+class RetryBudget:
+    """Token bucket that limits retries and hedges to a fraction of calls."""
+
+    def __init__(
+        self, ratio: float = DEFAULT_BUDGET_RATIO, reserve: int = DEFAULT_BUDGET_RESERVE
+    ) -> None:
+        """
+        Create a full budget.
+
+        Args:
+            ratio: Tokens added per call
+            reserve: Bucket size, so a quiet container can still retry a burst
+        """
+        self.ratio = ratio
+        self.reserve = float(reserve)
+        self.tokens = float(reserve)
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        """Credit one call."""
+        with self._lock:
+            self.tokens = min(self.reserve, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """
+        Pay for one retry or hedge.
+
+        Returns:
+            False if the budget is spent
+        """
+        with self._lock:
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+            return True
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one table."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_BREAKER_FAILURES,
+        cooldown_seconds: float = DEFAULT_BREAKER_COOLDOWN_MS / 1000.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Create a closed breaker.
+
+        Args:
+            name: Table name, for logs
+            failure_threshold: Consecutive failures that open the breaker
+            cooldown_seconds: How long it stays open before a probe
+            clock: Monotonic time source
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Decide whether a call may go to DynamoDB.
+
+        Returns:
+            True while closed, and for one probe per cooldown once open
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = self.clock()
+            if now < self.retry_at:
+                return False
+            # Re-arm first, so a probe that never reports back only blocks one cooldown
+            self.state = HALF_OPEN
+            self.retry_at = now + self.cooldown_seconds
+            return True
+
+    def record_success(self) -> None:
+        """Record a call that DynamoDB answered."""
+        with self._lock:
+            self.failures = 0
+            if self.state == CLOSED:
+                return
+            self.state = CLOSED
+        metrics.add("DynamoDBCircuitClosed", 1, unit="Count")
+        logger.info("DynamoDB circuit closed", table=self.name)
+
+    def record_failure(self) -> None:
+        """Record a throttled or failed call."""
+        with self._lock:
+            self.failures += 1
+            if self.state == OPEN:
+                return
+            if self.state == CLOSED and self.failures < self.failure_threshold:
+                return
+            self.state = OPEN
+            self.retry_at = self.clock() + self.cooldown_seconds
+        metrics.add("DynamoDBCircuitOpened", 1, unit="Count")
+        logger.warning("DynamoDB circuit opened", table=self.name, failures=self.failures)
+
+
+class Resilience:
+    """The container's retry budget, breakers and hedging settings."""
+
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        retry_base_seconds: float = DEFAULT_RETRY_BASE_MS / 1000.0,
+        retry_cap_seconds: float = DEFAULT_RETRY_CAP_MS / 1000.0,
+        budget: Optional[RetryBudget] = None,
+        breaker_failures: int = DEFAULT_BREAKER_FAILURES,
+        breaker_cooldown_seconds: float = DEFAULT_BREAKER_COOLDOWN_MS / 1000.0,
+        hedge_after_seconds: float = 0.0,
+    ) -> None:
+        """
+        Create a policy.
+
+        Args:
+            max_retries: Retries per call after the first attempt
+            retry_base_seconds: Backoff ceiling of the first retry
+            retry_cap_seconds: Largest backoff ceiling
+            budget: Shared retry budget; a default one if omitted
+            breaker_failures: Consecutive failures that open a table's breaker
+            breaker_cooldown_seconds: How long a breaker stays open before a probe
+            hedge_after_seconds: Hedge reads slower than this; 0 disables hedging
+        """
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_cap_seconds = retry_cap_seconds
+        self.budget = budget or RetryBudget()
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown_seconds = breaker_cooldown_seconds
+        self.hedge_after_seconds = hedge_after_seconds
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def breaker(self, table: str) -> CircuitBreaker:
+        """Get the breaker for a table, creating it closed."""
+        with self._lock:
+            if table not in self.breakers:
+                self.breakers[table] = CircuitBreaker(
+                    table, self.breaker_failures, self.breaker_cooldown_seconds
+                )
+            return self.breakers[table]
+
+    def call(
+        self,
+        fn: Callable[[], Dict[str, Any]],
+        operation: str,
+        table: str,
+        read: bool = False,
+        hedge: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Make a DynamoDB call under the policy.
+
+        Args:
+            fn: Makes the call once
+            operation: boto3 method name, for errors
+            table: Table the breaker is kept for
+            read: Whether the call is safe to repeat after a server error
+            hedge: Whether the call may be hedged
+
+        Returns:
+            The call's response
+
+        Raises:
+            DeadlineExceededError: If the invocation's deadline has passed
+            CircuitOpenError: If the table's breaker is open
+            ClientError: The last error, once retries, budget or time run out
+            BotoCoreError: The last connection error, likewise
+        """
+        breaker = self.breaker(table)
+        deadline = current_deadline()
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            if deadline.expired():
+                metrics.add("DeadlineExceeded", 1, unit="Count")
+                raise DeadlineExceededError(operation)
+            if not breaker.allow():
+                metrics.add("DynamoDBCircuitRejected", 1, unit="Count")
+                raise CircuitOpenError(operation, table)
+            try:
+                response = self._attempt(fn, hedge)
+            except (BotoCoreError, ClientError) as e:
+                outcome = classify(e)
+                if outcome == REJECTED:
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                delay = backoff_delay(attempt, self.retry_base_seconds, self.retry_cap_seconds)
+                if not self._should_retry(attempt, outcome, read, delay, deadline):
+                    raise
+            else:
+                breaker.record_success()
+                return response
+            metrics.add("DynamoDBRetries", 1, unit="Count")
+            time.sleep(delay)
+            attempt += 1
+
+    def _should_retry(
+        self, attempt: int, outcome: str, read: bool, delay: float, deadline: Deadline
+    ) -> bool:
+        if attempt >= self.max_retries or (outcome == SERVER_ERROR and not read):
+            return False
+        if delay >= deadline.remaining():
+            metrics.add("DynamoDBRetryPastDeadline", 1, unit="Count")
+            return False
+        if not self.budget.withdraw():
+            metrics.add("DynamoDBRetryBudgetExhausted", 1, unit="Count")
+            return False
+        return True
+
+    def _attempt(self, fn: Callable[[], Dict[str, Any]], hedge: bool) -> Dict[str, Any]:
+        if not hedge or self.hedge_after_seconds <= 0:
+            return fn()
+
+        pool = self._hedge_pool()
+        fn = in_context(fn)
+        primary = pool.submit(fn)
+        done, _ = wait([primary], timeout=self.hedge_after_seconds)
+        if done or not self.budget.withdraw():
+            return primary.result()
+
+        metrics.add("DynamoDBHedges", 1, unit="Count")
+        hedged = pool.submit(fn)
+        errors: List[BaseException] = []
+        for future in as_completed([primary, hedged]):
+            error = future.exception()
+            if error is None:
+                if future is hedged:
+                    metrics.add("DynamoDBHedgeWins", 1, unit="Count")
+                return future.result()
+            errors.append(error)
+        raise errors[0]
+
+    def _hedge_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS)
+            return self._executor
+
+
+_policy: Optional[Resilience] = None
+
+
+def get_resilience() -> Resilience:
+    """
+    Get the container's policy, configured from the environment on first use.
+
+    Reads DDB_MAX_RETRIES, DDB_RETRY_BASE_MS, DDB_RETRY_CAP_MS,
+    DDB_RETRY_BUDGET_RATIO, DDB_RETRY_BUDGET_RESERVE, DDB_BREAKER_FAILURES,
+    DDB_BREAKER_COOLDOWN_MS and DDB_HEDGE_AFTER_MS.
+
+    Returns:
+        The policy
+    """
+    global _policy
+    if _policy is None:
+        _policy = Resilience(
+            max_retries=env_int("DDB_MAX_RETRIES", DEFAULT_MAX_RETRIES),
+            retry_base_seconds=env_int("DDB_RETRY_BASE_MS", DEFAULT_RETRY_BASE_MS) / 1000.0,
+            retry_cap_seconds=env_int("DDB_RETRY_CAP_MS", DEFAULT_RETRY_CAP_MS) / 1000.0,
+            budget=RetryBudget(
+                ratio=env_float("DDB_RETRY_BUDGET_RATIO", DEFAULT_BUDGET_RATIO),
+                reserve=env_int("DDB_RETRY_BUDGET_RESERVE", DEFAULT_BUDGET_RESERVE),
+            ),
+            breaker_failures=env_int("DDB_BREAKER_FAILURES", DEFAULT_BREAKER_FAILURES),
+            breaker_cooldown_seconds=(
+                env_int("DDB_BREAKER_COOLDOWN_MS", DEFAULT_BREAKER_COOLDOWN_MS) / 1000.0
+            ),
+            hedge_after_seconds=env_int("DDB_HEDGE_AFTER_MS", 0) / 1000.0,
+        )
+    return _policy
@@ -0,0 +1,384 @@
+"""
+Method/path router and middleware pipeline for API Gateway handlers.
+
+Routes are registered per handler module::
+
+    router = Router(middleware=[authenticate])
+
+    @router.route("GET", "/searches")
+    def get_searches(request: Request) -> Dict[str, Any]:
+        ...
+
+    handler = router.lambda_handler(path="/searches")
+
+A middleware takes the next route handler and returns a wrapped one. Router
+middleware runs outermost, then the route's own middleware, in the order given.
+Chains are composed once at registration, not per request.
+
+``Router.include`` merges another module's routes, so the REST routes can be
+served either by one Lambda per resource or by a single consolidated function
+(see ``api_handler``).
+"""
+
+import functools
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from botocore.exceptions import BotoCoreError, ClientError, ConnectTimeoutError, ReadTimeoutError
+
+from .ddb import account_capacity, capacity
+from .deadline import DeadlineExceededError, deadline_bound
+from .encoding import negotiated
+from .log import log_invocation, logger
+from .memory import memory_probed
+from .metrics import metrics, record_metrics
+from .profiling import profiled
+from .resilience import CircuitOpenError
+from .schema import RequestValidationError, Schema
+from .utils import create_response, extract_user_claims
+
+Handler = Callable[[Dict[str, Any], Any], Any]
+F = TypeVar("F", bound=Callable[..., Dict[str, Any]])
+
+
+class Request:
+    """An API Gateway proxy request as seen by route handlers."""
+
+    def __init__(self, event: Dict[str, Any], context: Any) -> None:
+        """
+        Wrap a Lambda invocation.
+
+        Args:
+            event: API Gateway proxy event
+            context: Lambda context object
+        """
+        self.event = event
+        self.context = context
+        self.method: str = event.get("httpMethod", "")
+        self.path: str = event.get("path") or ""
+        self.request_id: str = context.aws_request_id if context else "unknown"
+        self.path_params: Dict[str, str] = dict(event.get("pathParameters") or {})
+        self.query: Dict[str, str] = dict(event.get("queryStringParameters") or {})
+        # Route template being served, e.g. "/tiles/{z}/{x}/{y}"; set by dispatch
+        self.template = ""
+        # Filled in by middleware
+        self.user_id = ""
+        self.email = ""
+        self.body: Dict[str, Any] = {}
+
+    def header(self, name: str, default: str = "") -> str:
+        """Return a request header, matched case-insensitively."""
+        wanted = name.lower()
+        for key, value in (self.event.get("headers") or {}).items():
+            if key.lower() == wanted:
+                return str(value)
+        return default
+
+
+RouteHandler = Callable[[Request], Dict[str, Any]]
+Middleware = Callable[[RouteHandler], RouteHandler]
+
+
+def chain(handler: RouteHandler, middleware: Iterable[Middleware]) -> RouteHandler:
+    """
+    Wrap a route handler in middleware.
+
+    Args:
+        handler: Innermost route handler
+        middleware: Middleware, outermost first
+
+    Returns:
+        The composed handler
+    """
+    for wrap in reversed(list(middleware)):
+        handler = wrap(handler)
+    return handler
+
+
+def authenticate(next_handler: RouteHandler) -> RouteHandler:
+    """Middleware: require Cognito claims and attribute the request to the user."""
+
+    @functools.wraps(next_handler)
+    def wrapper(request: Request) -> Dict[str, Any]:
+        claims = extract_user_claims(request.event)
+        if not claims.get("user_id"):
+            logger.warning("Missing user ID in claims")
+            return create_response(401, {"error": "Unauthorized"})
+
+        request.user_id = claims["user_id"]
+        request.email = claims.get("email", "")
+        logger.bind(user_id=request.user_id)
+        capacity.set_user(request.user_id)
+        return next_handler(request)
+
+    return wrapper
+
+
+def bad_request(error: RequestValidationError) -> Dict[str, Any]:
+    """Log a rejected request body and build its 400 response."""
+    if error.details:
+        logger.warning("Validation failed", errors=error.details)
+    else:
+        logger.warning("Invalid request body", error=error.error)
+    return create_response(400, error.to_body())
+
+
+def json_body(schema: Schema) -> Middleware:
+    """
+    Middleware: parse the request body into ``request.body``.
+
+    Args:
+        schema: Schema the body must satisfy
+
+    Returns:
+        Middleware responding 400 on invalid bodies
+    """
+
+    def middleware(next_handler: RouteHandler) -> RouteHandler:
+        @functools.wraps(next_handler)
+        def wrapper(request: Request) -> Dict[str, Any]:
+            try:
+                request.body = schema.load(request.event.get("body"))
+            except RequestValidationError as e:
+                return bad_request(e)
+            return next_handler(request)
+
+        return wrapper
+
+    return middleware
+
+
+def map_errors(message: str) -> Callable[[F], F]:
+    """
+    Map request and DynamoDB errors to API responses.
+
+    ``RequestValidationError`` becomes a 400 with its error body,
+    ``CircuitOpenError`` a 503 with ``message`` (the breaker already logged
+    why), ``DeadlineExceededError`` a 504 with ``message`` instead of a
+    Lambda timeout, and any other ``ClientError`` is logged and becomes a 500 with
+    ``message``. A ``BotoCoreError`` (the request never got an answer) is
+    logged and becomes a 504 with ``message`` for connect and read timeouts,
+    else a 503. Works on route
+    handlers (as middleware) and on plain functions returning a response.
+
+    Args:
+        message: Error returned to the client on a ClientError or BotoCoreError
+
+    Returns:
+        Decorator
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+            try:
+                return func(*args, **kwargs)
+            except RequestValidationError as e:
+                return bad_request(e)
+            except CircuitOpenError:
+                return create_response(503, {"error": message}, {"Retry-After": "1"})
+            except DeadlineExceededError:
+                logger.warning("Deadline exceeded")
+                return create_response(504, {"error": message})
+            except ClientError as e:
+                logger.error(
+                    "DynamoDB error",
+                    error=str(e),
+                    error_code=e.response.get("Error", {}).get("Code", "Unknown"),
+                )
+                return create_response(500, {"error": message})
+            except BotoCoreError as e:
+                timed_out = isinstance(e, (ConnectTimeoutError, ReadTimeoutError))
+                logger.error("DynamoDB unreachable", error=str(e), error_type=type(e).__name__)
+                if timed_out:
+                    return create_response(504, {"error": message})
+                return create_response(503, {"error": message}, {"Retry-After": "1"})
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def timed(phase: str) -> Middleware:
+    """
+    Middleware: record the wrapped handler's time as a metrics phase.
+
+    Args:
+        phase: Phase name in the invocation's EMF line
+
+    Returns:
+        Middleware
+    """
+
+    def middleware(next_handler: RouteHandler) -> RouteHandler:
+        return metrics.timed(phase)(next_handler)
+
+    return middleware
+
+
+def _segments(path: str) -> Tuple[str, ...]:
+    return tuple(part for part in path.split("/") if part)
+
+
+class Router:
+    """Dispatches API Gateway events to route handlers by method and path."""
+
+    def __init__(self, middleware: Iterable[Middleware] = ()) -> None:
+        """
+        Create a router.
+
+        Args:
+            middleware: Middleware applied to every route, outermost first
+        """
+        self.middleware: List[Middleware] = list(middleware)
+        # path template -> method -> composed handler
+        self.routes: Dict[str, Dict[str, RouteHandler]] = {}
+        self._templates: List[Tuple[str, Tuple[str, ...]]] = []
+
+    def add(self, method: str, path: str, handler: RouteHandler, *middleware: Middleware) -> None:
+        """
+        Register a route.
+
+        Args:
+            method: HTTP method
+            path: Path template, e.g. "/tiles/{z}/{x}/{y}"
+            handler: Route handler
+            *middleware: Route-specific middleware, applied inside the router's
+        """
+        composed = chain(handler, [*self.middleware, *middleware])
+        self._register(method.upper(), path, composed)
+
+    def route(self, method: str, path: str, *middleware: Middleware) -> Callable[[F], F]:
+        """
+        Register the decorated function as a route handler.
+
+        Args:
+            method: HTTP method
+            path: Path template
+            *middleware: Route-specific middleware
+
+        Returns:
+            Decorator returning the function unchanged
+        """
+
+        def decorator(func: F) -> F:
+            self.add(method, path, func, *middleware)
+            return func
+
+        return decorator
+
+    def include(self, other: "Router") -> None:
+        """
+        Add another router's routes, keeping that router's middleware.
+
+        Args:
+            other: Router whose routes are merged into this one
+        """
+        for path, methods in other.routes.items():
+            for method, handler in methods.items():
+                self._register(method, path, handler)
+
+    def _register(self, method: str, path: str, handler: RouteHandler) -> None:
+        if path not in self.routes:
+            self.routes[path] = {}
+            self._templates.append((path, _segments(path)))
+        self.routes[path][method] = handler
+
+    def match(self, event: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, str]]:
+        """
+        Find the path template for an event.
+
+        API Gateway proxy events carry the matched template as ``resource``; raw
+        paths (local tools, tests) are matched segment by segment.
+
+        Args:
+            event: API Gateway proxy event
+
+        Returns:
+            Tuple of (template or None, path parameters)
+        """
+        resource = event.get("resource")
+        if resource in self.routes:
+            return resource, dict(event.get("pathParameters") or {})
+
+        parts = _segments(event.get("path") or "")
+        for template, pattern in self._templates:
+            if len(pattern) != len(parts):
+                continue
+            params: Dict[str, str] = {}
+            for expected, actual in zip(pattern, parts, strict=True):
+                if expected.startswith("{") and expected.endswith("}"):
+                    params[expected[1:-1]] = actual
+                elif expected != actual:
+                    break
+            else:
+                return template, params
+        return None, {}
+
+    def dispatch(
+        self, event: Dict[str, Any], context: Any, path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Route one event.
+
+        Args:
+            event: API Gateway proxy event
+            context: Lambda context object
+            path: Template to serve when the event matches no route (used by
+                per-resource functions, where API Gateway already routed)
+
+        Returns:
+            API Gateway response, encoded as the Accept header asks; 404 for
+            unknown paths, 405 for unknown methods
+        """
+        request = Request(event, context)
+        logger.bind(http_method=request.method)
+        logger.debug("Processing request")
+
+        with negotiated(request.header("Accept")):
+            return self._route(request, event, path)
+
+    def _route(
+        self, request: Request, event: Dict[str, Any], path: Optional[str]
+    ) -> Dict[str, Any]:
+        template, params = self.match(event)
+        if template is not None:
+            path = template
+            request.path_params = params
+        elif path is None:
+            logger.warning("No route", path=request.path)
+            return create_response(404, {"error": "Not Found"})
+
+        request.template = path
+        methods = self.routes.get(path, {})
+        route_handler = methods.get(request.method)
+        if route_handler is None:
+            logger.warning("Method not allowed", method=request.method)
+            return create_response(
+                405,
+                {"error": "Method Not Allowed"},
+                {"Allow": ",".join(sorted(methods))},
+            )
+        return route_handler(request)
+
+    def lambda_handler(self, path: Optional[str] = None) -> Handler:
+        """
+        Build a Lambda entry point with the standard invocation middleware.
+
+        Every invocation is profiled and memory-traced (when sampled), emits one
+        metrics line, flushes its capacity record, gets its own log buffer and
+        runs under a deadline taken from the context.
+
+        Args:
+            path: Fallback path template for events matching no route
+                (per-resource functions)
+
+        Returns:
+            Lambda handler function
+        """
+
+        def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            return self.dispatch(event, context, path)
+
+        return profiled(
+            record_metrics(memory_probed(account_capacity(log_invocation(deadline_bound(handler)))))
+        )
@@ -0,0 +1,328 @@
+"""
+Global query suggestions from a top-k-per-prefix index built offline.
+
+The suggest indexer (``suggest_indexer_handler``) scans every user's searches,
+counts each normalized query once per user, and drops queries fewer than
+``SUGGEST_MIN_USERS`` users searched, so one person's searches are never
+suggested to anyone else. For every prefix up to ``MAX_PREFIX_LENGTH``
+characters the index keeps the ``SUGGEST_TOP_K`` queries most users searched.
+
+Most long prefixes have the same list as their parent, filtered to the longer
+prefix; those are left out and looked up through the nearest stored ancestor.
+Queries are stored once, ranked by popularity, and prefix lists hold ranks.
+
+The index lives in the trending table as zlib-compressed chunks of one
+version, plus a pointer written after every chunk is in place::
+
+    suggest#<version>  <chunk, zero padded>  data (binary), expiresAt
+    suggest#latest     pointer               version, chunks, queries, prefixes, generatedAt
+
+A container loads a version once and serves ``GET /suggest`` from memory. It
+re-reads the pointer at most every ``SUGGEST_REFRESH_SECONDS`` and loads
+chunks only when the version changed. Old versions expire through TTL.
+"""
+
+import json
+import math
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from .ddb import ddb_call
+from .log import logger
+from .trending import normalize_query
+
+DEFAULT_TOP_K = 8
+DEFAULT_MIN_USERS = 3
+DEFAULT_REFRESH_SECONDS = 300
+MAX_PREFIX_LENGTH = 20
+# DynamoDB items are at most 400 KB
+CHUNK_BYTES = 350_000
+
+LATEST = "latest"
+POINTER_SORT_KEY = "pointer"
+
+
+def index_key(version: str) -> str:
+    """Partition key of one index version's chunks (``latest`` for the pointer)."""
+    return f"suggest#{version}"
+
+
+def normalize_prefix(prefix: str) -> str:
+    """
+    Fold a typed prefix the way queries were folded when indexed.
+
+    A trailing space is kept, so ``"new "`` does not suggest ``"newark"``.
+    """
+    normalized = normalize_query(prefix)
+    if normalized and prefix[-1:].isspace():
+        normalized += " "
+    return normalized
+
+
+def build_index(
+    counts: Mapping[str, int],
+    k: int = DEFAULT_TOP_K,
+    min_users: int = DEFAULT_MIN_USERS,
+    max_prefix: int = MAX_PREFIX_LENGTH,
+) -> Dict[str, Any]:
+    """
+    Build the top-k-per-prefix index from per-query user counts.
+
+    Args:
+        counts: Normalized query -> number of users who searched it
+        k: Queries kept per prefix
+        min_users: Queries searched by fewer users are left out
+        max_prefix: Longest prefix indexed
+
+    Returns:
+        ``{"k", "maxPrefix", "queries": [[query, users], ...], "prefixes":
+        {prefix: [rank, ...]}}``, queries ordered by popularity
+    """
+    ranked = sorted(
+        ((query, users) for query, users in counts.items() if users >= min_users and query),
+        key=lambda entry: (-entry[1], entry[0]),
+    )
+
+    # Walking queries in rank order fills each prefix with its top k directly
+    full: Dict[str, List[int]] = {}
+    for rank, (query, _) in enumerate(ranked):
+        for length in range(1, min(len(query), max_prefix) + 1):
+            top = full.setdefault(query[:length], [])
+            if len(top) < k:
+                top.append(rank)
+
+    # A prefix whose list is its parent's, filtered, is found through the parent
+    stored = {
+        prefix: top
+        for prefix, top in full.items()
+        if len(prefix) == 1
+        or top != [rank for rank in full[prefix[:-1]] if ranked[rank][0].startswith(prefix)]
+    }
+
+    used = sorted({rank for top in stored.values() for rank in top})
+    renumber = {rank: i for i, rank in enumerate(used)}
+    return {
+        "k": k,
+        "maxPrefix": max_prefix,
+        "queries": [list(ranked[rank]) for rank in used],
+        "prefixes": {prefix: [renumber[rank] for rank in top] for prefix, top in stored.items()},
+    }
+
+
+class SuggestIndex:
+    """An index version loaded into memory."""
+
+    def __init__(self, payload: Dict[str, Any], version: str = "") -> None:
+        """
+        Wrap an index built by ``build_index``.
+
+        Args:
+            payload: The built index
+            version: Version it was stored under
+        """
+        self.version = version
+        self.k: int = payload["k"]
+        self.max_prefix: int = payload["maxPrefix"]
+        self.queries: List[Tuple[str, int]] = [
+            (query, users) for query, users in payload["queries"]
+        ]
+        self.prefixes: Dict[str, Tuple[int, ...]] = {
+            prefix: tuple(top) for prefix, top in payload["prefixes"].items()
+        }
+
+    def lookup(self, prefix: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return the most searched queries starting with a normalized prefix.
+
+        Prefixes longer than the index's longest are answered from that
+        prefix's list, so they may get fewer than ``k`` suggestions.
+
+        Args:
+            prefix: Output of ``normalize_prefix``
+            limit: Most suggestions to return; at most ``k``
+
+        Returns:
+            Entries of {"query", "users"}, most users first
+        """
+        stored = prefix[: self.max_prefix]
+        while stored and stored not in self.prefixes:
+            stored = stored[:-1]
+        if not stored:
+            return []
+        matches = [
+            {"query": query, "users": users}
+            for query, users in (self.queries[rank] for rank in self.prefixes[stored])
+            if query.startswith(prefix)
+        ]
+        return matches[: limit or self.k]
+
+
+def pack_index(payload: Dict[str, Any]) -> List[bytes]:
+    """Compress a built index and split it into item-sized chunks."""
+    data = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), 9)
+    return [data[i : i + CHUNK_BYTES] for i in range(0, len(data), CHUNK_BYTES)] or [data]
+
+
+def unpack_index(chunks: List[bytes], version: str = "") -> SuggestIndex:
+    """Reassemble chunks written by ``pack_index``."""
+    return SuggestIndex(json.loads(zlib.decompress(b"".join(chunks))), version)
+
+
+def write_index(
+    ddb: Any, table: str, payload: Dict[str, Any], generated_at: int, expires_at: int
+) -> Dict[str, Any]:
+    """
+    Store a built index as a new version and point ``latest`` at it.
+
+    Args:
+        ddb: DynamoDB client
+        table: Trending table name
+        payload: Output of ``build_index``
+        generated_at: Epoch seconds of the build; also the version
+        expires_at: TTL of the chunks in epoch seconds
+
+    Returns:
+        The pointer's attributes: version, chunks, queries, prefixes, bytes
+    """
+    version = str(generated_at)
+    chunks = pack_index(payload)
+    for number, chunk in enumerate(chunks):
+        ddb_call(
+            ddb,
+            "put_item",
+            TableName=table,
+            Item={
+                "pk": {"S": index_key(version)},
+                "sk": {"S": f"{number:05d}"},
+                "data": {"B": chunk},
+                "expiresAt": {"N": str(expires_at)},
+            },
+        )
+
+    summary = {
+        "version": version,
+        "chunks": len(chunks),
+        "queries": len(payload["queries"]),
+        "prefixes": len(payload["prefixes"]),
+        "bytes": sum(len(chunk) for chunk in chunks),
+    }
+    # Written last: readers never see a version with chunks still missing
+    ddb_call(
+        ddb,
+        "put_item",
+        TableName=table,
+        Item={
+            "pk": {"S": index_key(LATEST)},
+            "sk": {"S": POINTER_SORT_KEY},
+            "version": {"S": version},
+            "chunks": {"N": str(len(chunks))},
+            "queries": {"N": str(summary["queries"])},
+            "prefixes": {"N": str(summary["prefixes"])},
+            "generatedAt": {"N": str(generated_at)},
+        },
+    )
+    return summary
+
+
+def read_pointer(ddb: Any, table: str) -> Optional[Dict[str, Any]]:
+    """
+    Read which index version is current.
+
+    Returns:
+        {"version", "chunks"}, or None before the first build
+    """
+    response = ddb_call(
+        ddb,
+        "get_item",
+        TableName=table,
+        Key={"pk": {"S": index_key(LATEST)}, "sk": {"S": POINTER_SORT_KEY}},
+    )
+    item = response.get("Item")
+    if not item:
+        return None
+    return {"version": item["version"]["S"], "chunks": int(item["chunks"]["N"])}
+
+
+def read_index(ddb: Any, table: str, pointer: Dict[str, Any]) -> Optional[SuggestIndex]:
+    """
+    Load the index version a pointer names.
+
+    Args:
+        ddb: DynamoDB client
+        table: Trending table name
+        pointer: Output of ``read_pointer``
+
+    Returns:
+        The index, or None if its chunks have expired or are incomplete
+    """
+    params: Dict[str, Any] = {
+        "TableName": table,
+        "KeyConditionExpression": "pk = :pk",
+        "ExpressionAttributeValues": {":pk": {"S": index_key(pointer["version"])}},
+        "ProjectionExpression": "#data",
+        "ExpressionAttributeNames": {"#data": "data"},
+    }
+    chunks: List[bytes] = []
+    while True:
+        response = ddb_call(ddb, "query", **params)
+        chunks.extend(item["data"]["B"] for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    if len(chunks) != pointer["chunks"]:
+        logger.warning(
+            "Suggest index incomplete",
+            version=pointer["version"],
+            chunks=len(chunks),
+            expected=pointer["chunks"],
+        )
+        return None
+    return unpack_index(chunks, pointer["version"])
+
+
+# Loaded on first use and kept by warm invocations
+_loaded: Optional[SuggestIndex] = None
+_checked_at = -math.inf
+
+
+def get_suggest_index(
+    client_factory: Callable[[], Any],
+    table: str,
+    refresh_seconds: float = DEFAULT_REFRESH_SECONDS,
+    clock: Callable[[], float] = time.monotonic,
+) -> Optional[SuggestIndex]:
+    """
+    Get the container's index, checking for a new version now and then.
+
+    A failed check keeps serving the index already loaded.
+
+    Args:
+        client_factory: Makes a DynamoDB client; only called when checking
+        table: Trending table name
+        refresh_seconds: Least time between pointer reads
+        clock: Monotonic time source
+
+    Returns:
+        The current index, or None before the first build
+    """
+    global _loaded, _checked_at
+    now = clock()
+    if now - _checked_at < refresh_seconds:
+        return _loaded
+    _checked_at = now
+
+    try:
+        ddb = client_factory()
+        pointer = read_pointer(ddb, table)
+        if pointer is not None and (_loaded is None or pointer["version"] != _loaded.version):
+            index = read_index(ddb, table, pointer)
+            if index is not None:
+                _loaded = index
+                logger.info("Suggest index loaded", version=index.version)
+    except (BotoCoreError, ClientError) as e:
+        logger.warning("Suggest index refresh failed", error=str(e))
+    return _loaded
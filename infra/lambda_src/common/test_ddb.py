@@ -0,0 +1,120 @@
+"""Unit tests for the DynamoDB call helper and capacity accounting."""
+
+import json
+import os
+from typing import Any, Dict
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from .ddb import CapacityTracker, account_capacity, capacity, ddb_call, hash_user_id
+
+
+class TestDdbCall:
+    """Test the DynamoDB call wrapper."""
+
+    def test_requests_consumed_capacity(self) -> None:
+        """Test that ReturnConsumedCapacity is added and the response passed through."""
+        client = MagicMock()
+        client.query.return_value = {
+            "Items": [],
+            "ConsumedCapacity": {"TableName": "searches", "CapacityUnits": 0.5},
+        }
+        capacity.start_invocation("GET /searches")
+
+        response = ddb_call(client, "query", TableName="searches", Limit=20)
+
+        assert response["Items"] == []
+        assert client.query.call_args[1]["ReturnConsumedCapacity"] == "TOTAL"
+        assert client.query.call_args[1]["Limit"] == 20
+        assert capacity.read_units == 0.5
+        assert capacity.write_units == 0.0
+
+    def test_explicit_return_consumed_capacity_kept(self) -> None:
+        """Test that callers can ask for a more detailed mode."""
+        table = MagicMock()
+        table.get_item.return_value = {}
+
+        ddb_call(table, "get_item", Key={"userId": "u"}, ReturnConsumedCapacity="INDEXES")
+
+        assert table.get_item.call_args[1]["ReturnConsumedCapacity"] == "INDEXES"
+
+
+class TestCapacityTracker:
+    """Test capacity aggregation."""
+
+    def test_reads_and_writes_classified(self) -> None:
+        """Test that units are split by operation type and table."""
+        tracker = CapacityTracker()
+        tracker.start_invocation("PUT /user")
+        tracker.record("get_item", {"TableName": "users", "CapacityUnits": 0.5})
+        tracker.record("put_item", {"TableName": "users", "CapacityUnits": 1.0})
+        tracker.record(
+            "batch_write_item",
+            [
+                {"TableName": "searches", "CapacityUnits": 3.0},
+                {"TableName": "users", "CapacityUnits": 1.0},
+            ],
+        )
+
+        assert tracker.read_units == 0.5
+        assert tracker.write_units == 5.0
+        assert tracker.tables["users"] == {"rcu": 0.5, "wcu": 2.0}
+        assert tracker.calls == 3
+
+    def test_missing_capacity_tolerated(self) -> None:
+        """Test that responses without ConsumedCapacity are counted as calls only."""
+        tracker = CapacityTracker()
+        tracker.record("query", None)
+        tracker.record("query", MagicMock())
+        assert tracker.calls == 2
+        assert tracker.read_units == 0.0
+
+    def test_flush_skipped_without_calls(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that invocations without DynamoDB calls emit nothing."""
+        tracker = CapacityTracker()
+        tracker.start_invocation("GET /x")
+        tracker.flush("req-1")
+        assert capsys.readouterr().out == ""
+
+
+class TestHashUserId:
+    """Test user ID pseudonymization."""
+
+    def test_hash_is_stable_and_salted(self) -> None:
+        """Test that the hash is deterministic and depends on the salt."""
+        with patch.dict(os.environ, {"CAPACITY_HASH_SALT": "a"}):
+            first = hash_user_id("user-1")
+            assert first == hash_user_id("user-1")
+            assert len(first) == 16
+        with patch.dict(os.environ, {"CAPACITY_HASH_SALT": "b"}):
+            assert hash_user_id("user-1") != first
+        assert hash_user_id("") == ""
+
+
+class TestAccountCapacity:
+    """Test the handler decorator."""
+
+    def test_emits_record_with_route_and_user(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that one accounting record is written per invocation."""
+
+        @account_capacity
+        def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            capacity.set_user("user-1")
+            table = MagicMock()
+            table.put_item.return_value = {
+                "ConsumedCapacity": {"TableName": "users", "CapacityUnits": 1.0}
+            }
+            ddb_call(table, "put_item", Item={})
+            return {"statusCode": 200}
+
+        context = MagicMock()
+        context.aws_request_id = "req-9"
+        handler({"httpMethod": "PUT", "path": "/user"}, context)
+
+        record = json.loads(capsys.readouterr().out.splitlines()[-1])
+        assert record["message"] == "DynamoDB consumed capacity"
+        assert record["route"] == "PUT /user"
+        assert record["user_hash"] == hash_user_id("user-1")
+        assert record["wcu"] == 1.0
+        assert record["request_id"] == "req-9"
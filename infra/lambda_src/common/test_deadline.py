@@ -0,0 +1,147 @@
+"""Unit tests for per-invocation deadlines."""
+
+import contextlib
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from . import deadline as deadline_module
+from .deadline import (
+    NO_DEADLINE,
+    Deadline,
+    DeadlineExceededError,
+    current_deadline,
+    deadline_bound,
+    decode_continuation,
+    encode_continuation,
+)
+from .resilience import Resilience, ddb_client_config
+from .router import map_errors
+from .utils import in_context
+
+
+@contextlib.contextmanager
+def bound(deadline: Deadline) -> Iterator[None]:
+    """Run the block under ``deadline``."""
+    token = deadline_module._current.set(deadline)
+    try:
+        yield
+    finally:
+        deadline_module._current.reset(token)
+
+
+def context(remaining_ms: Any) -> MagicMock:
+    """Build a Lambda context with a fixed remaining time."""
+    ctx = MagicMock()
+    ctx.get_remaining_time_in_millis.return_value = remaining_ms
+    return ctx
+
+
+class TestDeadline:
+    """Test deadline arithmetic and the per-invocation binding."""
+
+    def test_from_context_keeps_reserve(self) -> None:
+        """Test that the reserve is taken off the time Lambda reports."""
+        deadline = Deadline.from_context(context(10_000), reserve_seconds=0.5)
+        assert 9.0 < deadline.remaining() <= 9.5
+        assert deadline.cap(2.0) == 2.0
+        assert not deadline.expired()
+
+        assert Deadline.from_context(context(300), reserve_seconds=0.5).expired()
+
+    @pytest.mark.parametrize("ctx", [None, MagicMock(), context(True)])
+    def test_no_usable_context(self, ctx: Any) -> None:
+        """Test that tests and tools without a real context get no deadline."""
+        assert Deadline.from_context(ctx, 0.5).remaining() == math.inf
+
+    def test_bound_per_invocation(self) -> None:
+        """Test that the deadline is visible during the invocation only."""
+        seen: Dict[str, float] = {}
+
+        @deadline_bound
+        def handler(event: Dict[str, Any], ctx: Any) -> None:
+            seen["remaining"] = current_deadline().remaining()
+
+        with patch.dict(os.environ, {"DEADLINE_RESERVE_MS": "1000"}):
+            handler({}, context(3000))
+
+        assert 1.9 < seen["remaining"] <= 2.0
+        assert current_deadline() is NO_DEADLINE
+
+    def test_continuation_round_trip(self) -> None:
+        """Test that tokens are URL-safe and decode to the same state."""
+        state = [["9q8y", "9q8z", {"userId": {"S": "u/1+2"}}]]
+        token = encode_continuation(state)
+        assert "=" not in token and "+" not in token and "/" not in token
+        assert decode_continuation(token) == state
+
+        with pytest.raises(ValueError):
+            decode_continuation("not*a*token")
+
+
+class TestDeadlinePropagation:
+    """Test that DynamoDB calls respect the deadline."""
+
+    def test_calls_refused_after_deadline(self) -> None:
+        """Test that no call starts once the deadline has passed."""
+        fn = MagicMock()
+        with bound(Deadline(0)):
+            with pytest.raises(DeadlineExceededError):
+                Resilience().call(fn, "query", "t")
+        fn.assert_not_called()
+
+    def test_no_backoff_past_deadline(self) -> None:
+        """Test that a retry that could not finish in time is not attempted."""
+        throttled = ClientError({"Error": {"Code": "ThrottlingException"}}, "PutItem")
+        fn = MagicMock(side_effect=[throttled, {}])
+        policy = Resilience(retry_base_seconds=1.0, retry_cap_seconds=1.0)
+
+        with (
+            bound(Deadline(0.5)),
+            patch("random.uniform", return_value=0.9),
+        ):
+            with pytest.raises(ClientError):
+                policy.call(fn, "put_item", "t")
+        assert fn.call_count == 1
+
+    def test_pool_threads_see_deadline(self) -> None:
+        """Test that work submitted through in_context runs under the invocation's deadline."""
+
+        @deadline_bound
+        def handler(event: Dict[str, Any], ctx: Any) -> Any:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                return (
+                    current_deadline(),
+                    pool.submit(in_context(current_deadline)).result(),
+                    pool.submit(current_deadline).result(),
+                )
+
+        with patch.dict(os.environ, {"DEADLINE_RESERVE_MS": "0"}):
+            deadline, in_pool, unbound = handler({}, context(5000))
+
+        assert in_pool is deadline and deadline is not NO_DEADLINE
+        assert unbound is NO_DEADLINE
+
+    def test_client_timeouts_capped(self) -> None:
+        """Test that botocore timeouts never outlast the invocation."""
+        assert ddb_client_config().read_timeout == 3.0
+        assert ddb_client_config().retries == {"total_max_attempts": 1, "mode": "standard"}
+
+        with bound(Deadline(0.8)):
+            config = ddb_client_config()
+        assert config.connect_timeout <= 0.8
+        assert config.read_timeout <= 0.8
+
+    def test_deadline_maps_to_504(self) -> None:
+        """Test that routes answer 504 rather than hitting the Lambda timeout."""
+
+        @map_errors("Failed")
+        def handle() -> Dict[str, Any]:
+            raise DeadlineExceededError("query")
+
+        assert handle()["statusCode"] == 504
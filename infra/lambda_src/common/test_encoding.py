@@ -0,0 +1,195 @@
+"""Unit tests for negotiated response encodings."""
+
+import base64
+import json
+import math
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+import pytest
+
+from .encoding import (
+    JSON,
+    JSON_FORMAT,
+    MSGPACK,
+    ResponseFormat,
+    columnar,
+    current_format,
+    decode_body,
+    encode_body,
+    negotiate,
+    negotiated,
+    packb,
+    rows,
+    unpackb,
+)
+from .router import Request, Router
+from .utils import create_response
+
+HISTORY = [
+    {"userId": "u1", "createdAt": "1700000600", "query": "coffee", "lat": "47.6", "lng": "-122.3"},
+    {"userId": "u1", "createdAt": "1700000000", "query": "tea"},
+]
+
+
+class TestNegotiate:
+    """Test choosing a format from Accept."""
+
+    @pytest.mark.parametrize(
+        "accept, expected",
+        [
+            ("", JSON_FORMAT),
+            ("*/*", JSON_FORMAT),
+            ("text/html", JSON_FORMAT),
+            ("application/msgpack", ResponseFormat(MSGPACK)),
+            ("application/x-msgpack", ResponseFormat(MSGPACK)),
+            ("application/msgpack; layout=columnar", ResponseFormat(MSGPACK, columnar=True)),
+            ("application/json;layout=columnar", ResponseFormat(JSON, columnar=True)),
+            ("application/json;q=0.5, application/msgpack", ResponseFormat(MSGPACK)),
+            ("application/msgpack;q=0.2, application/json", JSON_FORMAT),
+            ("application/msgpack;q=oops", JSON_FORMAT),
+        ],
+    )
+    def test_accept(self, accept: str, expected: ResponseFormat) -> None:
+        """Test supported, weighted, wildcard and malformed media ranges."""
+        assert negotiate(accept) == expected
+
+    def test_bound_per_request(self) -> None:
+        """Test that the format applies during the request only."""
+        with negotiated("application/msgpack") as response_format:
+            assert current_format() is response_format
+        assert current_format() == JSON_FORMAT
+
+    def test_concurrent_requests_isolated(self) -> None:
+        """Test that overlapping requests on different threads keep their own format."""
+        barrier = threading.Barrier(2)
+
+        def request(accept: str) -> ResponseFormat:
+            with negotiated(accept):
+                barrier.wait(timeout=5)
+                return current_format()
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            formats = list(pool.map(request, ["application/msgpack", "application/json"]))
+
+        assert formats == [ResponseFormat(MSGPACK), JSON_FORMAT]
+
+
+class TestColumnar:
+    """Test the columnar layout."""
+
+    def test_keys_once(self) -> None:
+        """Test that record arrays become one array per key, nested ones too."""
+        body = {"items": HISTORY, "truncated": False, "tags": ["a", "b"]}
+        encoded = columnar(body)
+
+        assert encoded["items"] == {
+            "$columns": {
+                "userId": ["u1", "u1"],
+                "createdAt": ["1700000600", "1700000000"],
+                "query": ["coffee", "tea"],
+                "lat": ["47.6", None],
+                "lng": ["-122.3", None],
+            }
+        }
+        assert encoded["tags"] == ["a", "b"]
+        assert columnar([{"a": [{"b": 1}]}]) == {"$columns": {"a": [{"$columns": {"b": [1]}}]}}
+
+    def test_round_trip(self) -> None:
+        """Test that rows restores records, with missing keys as None."""
+        restored = rows(columnar(HISTORY))
+        assert restored[0] == HISTORY[0]
+        assert restored[1] == {**HISTORY[1], "lat": None, "lng": None}
+        assert rows(columnar([])) == [] and rows(columnar([{}, {}])) == [{}, {}]
+
+
+class TestMessagePack:
+    """Test the codec against the MessagePack spec."""
+
+    @pytest.mark.parametrize(
+        "value, encoded",
+        [
+            (None, b"\xc0"),
+            (True, b"\xc3"),
+            (5, b"\x05"),
+            (-3, b"\xfd"),
+            (200, b"\xcc\xc8"),
+            (-200, b"\xd1\xff\x38"),
+            (1 << 40, b"\xcf" + struct.pack(">Q", 1 << 40)),
+            ("ab", b"\xa2ab"),
+            ("x" * 40, b"\xd9\x28" + b"x" * 40),
+            ([1, 2], b"\x92\x01\x02"),
+            ({"a": 1}, b"\x81\xa1a\x01"),
+            (1.5, b"\xcb" + struct.pack(">d", 1.5)),
+        ],
+    )
+    def test_wire_format(self, value: Any, encoded: bytes) -> None:
+        """Test the smallest representation of each type."""
+        assert packb(value) == encoded
+        assert unpackb(encoded) == value
+
+    def test_round_trip(self) -> None:
+        """Test larger containers, strings and integer edges."""
+        value: Dict[str, Any] = {
+            "items": [dict(item) for item in HISTORY] * 10,
+            "long": "é" * 40_000,
+            "ints": [127, 128, -32, -33, 1 << 31, -(1 << 31) - 1, (1 << 64) - 1, -(1 << 63)],
+            "map": {str(i): i for i in range(20)},
+            "inf": math.inf,
+        }
+        assert unpackb(packb(value)) == value
+
+    def test_rejects_what_json_would(self) -> None:
+        """Test unsupported values and malformed input."""
+        with pytest.raises(TypeError):
+            packb({"when": object()})
+        with pytest.raises(TypeError):
+            packb({1: "a"})
+        with pytest.raises(OverflowError):
+            packb(1 << 64)
+        with pytest.raises(ValueError):
+            unpackb(b"\xa5ab")
+        with pytest.raises(ValueError):
+            unpackb(b"\x01\x02")
+
+
+class TestNegotiatedResponses:
+    """Test create_response and dispatch under negotiation."""
+
+    def test_json_by_default(self) -> None:
+        """Test that responses without negotiation are unchanged JSON."""
+        response = create_response(200, HISTORY)
+        assert json.loads(response["body"]) == HISTORY
+        assert response["headers"]["Content-Type"] == JSON
+        assert response["headers"]["Vary"] == "Accept"
+        assert "isBase64Encoded" not in response
+
+    def test_msgpack_through_dispatch(self) -> None:
+        """Test a base64 MessagePack body for a client that asks for it."""
+        router = Router()
+
+        @router.route("GET", "/searches")
+        def get(request: Request) -> Dict[str, Any]:
+            return create_response(200, HISTORY)
+
+        event = {
+            "httpMethod": "GET",
+            "path": "/searches",
+            "headers": {"accept": "application/msgpack; layout=columnar"},
+        }
+        response = router.dispatch(event, None)
+
+        assert response["isBase64Encoded"] is True
+        assert response["headers"]["Content-Type"] == "application/msgpack; layout=columnar"
+        assert rows(unpackb(base64.b64decode(response["body"])))[0] == HISTORY[0]
+        assert current_format() == JSON_FORMAT
+
+    @pytest.mark.parametrize(
+        "response_format", [JSON_FORMAT, ResponseFormat(MSGPACK), ResponseFormat(MSGPACK, True)]
+    )
+    def test_decode_body_round_trip(self, response_format: ResponseFormat) -> None:
+        """Test that decode_body undoes encode_body in every format."""
+        body, is_base64 = encode_body({"items": HISTORY[:1]}, response_format)
+        assert decode_body(body, response_format, is_base64) == {"items": HISTORY[:1]}
@@ -0,0 +1,249 @@
+"""Unit tests for the geocoding providers and two-level cache."""
+
+import os
+import threading
+import time
+from typing import Any, List, Optional
+from unittest.mock import MagicMock, patch
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+from . import deadline as deadline_module
+from .deadline import Deadline, DeadlineExceededError
+from .geocoding import (
+    GeocoderError,
+    GeocodingCache,
+    LocalGeocoder,
+    Location,
+    LocationServiceGeocoder,
+    LRUCache,
+    apply_location,
+    get_geocoder,
+    get_geocoding_cache,
+)
+
+TABLE = "test-geocode-cache"
+
+
+def create_cache_table() -> Any:
+    """Create the geocode cache table as dynamodb.tf does and return a client."""
+    client = boto3.client("dynamodb")
+    client.create_table(
+        TableName=TABLE,
+        KeySchema=[{"AttributeName": "query", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "query", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return client
+
+
+class TestLRUCache:
+    """Test the per-container tier."""
+
+    def test_evicts_least_recently_used(self) -> None:
+        """Test that reading an entry protects it from eviction."""
+        lru = LRUCache(max_entries=2, ttl_seconds=60)
+        lru.put("a", Location(1, 1))
+        lru.put("b", Location(2, 2))
+        assert lru.get("a") == (True, Location(1, 1))
+        lru.put("c", Location(3, 3))
+
+        assert lru.get("b") == (False, None)
+        assert lru.get("a")[0] and lru.get("c")[0]
+
+    def test_entries_expire(self) -> None:
+        """Test that expired entries read as missing."""
+        lru = LRUCache(max_entries=2, ttl_seconds=60)
+        lru.put("a", None, ttl_seconds=0.01)
+        assert lru.get("a") == (True, None)
+        time.sleep(0.02)
+        assert lru.get("a") == (False, None)
+        assert len(lru) == 0
+
+
+class TestGeocodingCache:
+    """Test the memory -> table -> provider lookup path against moto."""
+
+    def test_tiers(self, mock_dynamodb: None) -> None:
+        """Test a miss, a memory hit, then a table hit from a fresh container."""
+        client = create_cache_table()
+        provider = LocalGeocoder()
+        cache = GeocodingCache(provider, client, TABLE)
+
+        first = cache.geocode("Coffee in  San Francisco")
+        assert first == Location(37.7749, -122.4194, "San Francisco")
+        assert cache.geocode("coffee in san francisco") == first
+        assert provider.calls == 1
+        assert cache.stats == {"memory": 1, "table": 0, "miss": 1, "coalesced": 0}
+
+        cold = GeocodingCache(provider, client, TABLE)
+        assert cold.geocode("COFFEE IN SAN FRANCISCO") == first
+        assert provider.calls == 1
+        assert cold.stats["table"] == 1
+        assert cache.hit_rate() == 0.5
+
+    def test_negative_results_cached_briefly(self, mock_dynamodb: None) -> None:
+        """Test that no-match results are stored with the shorter TTL."""
+        client = create_cache_table()
+        provider = LocalGeocoder()
+        cache = GeocodingCache(provider, client, TABLE, negative_ttl_seconds=60)
+
+        assert cache.geocode("somewhere nobody knows") is None
+        assert GeocodingCache(provider, client, TABLE).geocode("somewhere nobody knows") is None
+        assert provider.calls == 1
+
+        item = client.get_item(TableName=TABLE, Key={"query": {"S": "somewhere nobody knows"}})
+        assert item["Item"]["found"] == {"BOOL": False}
+        assert int(item["Item"]["expiresAt"]["N"]) <= int(time.time()) + 60
+
+    def test_expired_table_item_ignored(self, mock_dynamodb: None) -> None:
+        """Test that items past expiresAt are treated as misses before TTL deletes them."""
+        client = create_cache_table()
+        client.put_item(
+            TableName=TABLE,
+            Item={
+                "query": {"S": "paris"},
+                "found": {"BOOL": False},
+                "provider": {"S": "local"},
+                "expiresAt": {"N": str(int(time.time()) - 1)},
+            },
+        )
+        provider = LocalGeocoder()
+
+        assert GeocodingCache(provider, client, TABLE).geocode("Paris") is not None
+        assert provider.calls == 1
+
+    def test_provider_failures_not_cached(self) -> None:
+        """Test that a failing provider yields None and is retried next time."""
+        provider = LocalGeocoder()
+        provider.fail = True
+        cache = GeocodingCache(provider, MagicMock(), "")
+
+        assert cache.geocode("london") is None
+        provider.fail = False
+        assert cache.geocode("london") is not None
+        assert provider.calls == 2
+
+    def test_table_errors_fall_through_to_provider(self) -> None:
+        """Test that a throttled cache table does not fail the lookup."""
+        client = MagicMock()
+        error = ClientError({"Error": {"Code": "ThrottlingException"}}, "GetItem")
+        client.get_item.side_effect = error
+        client.put_item.side_effect = error
+
+        assert GeocodingCache(LocalGeocoder(), client, TABLE).geocode("tokyo") is not None
+
+    def test_table_timeouts_fall_through_to_provider(self) -> None:
+        """Test that cache table timeouts do not fail the lookup either."""
+        client = MagicMock()
+        client.get_item.side_effect = ReadTimeoutError(endpoint_url="https://dynamodb")
+        client.put_item.side_effect = ReadTimeoutError(endpoint_url="https://dynamodb")
+        provider = LocalGeocoder()
+
+        assert GeocodingCache(provider, client, TABLE).geocode("paris") is not None
+        assert provider.calls == 1
+
+    def test_provider_not_called_past_deadline(self) -> None:
+        """Test that a lookup past the deadline raises instead of calling the provider."""
+        client = MagicMock()
+        provider = LocalGeocoder()
+        token = deadline_module._current.set(Deadline(0))
+        try:
+            with pytest.raises(DeadlineExceededError):
+                GeocodingCache(provider, client, TABLE).geocode("paris")
+        finally:
+            deadline_module._current.reset(token)
+
+        client.get_item.assert_not_called()
+        assert provider.calls == 0
+
+    def test_concurrent_misses_coalesced(self) -> None:
+        """Test that simultaneous misses for one query make one provider call."""
+        provider = LocalGeocoder(delay_seconds=0.2)
+        cache = GeocodingCache(provider, MagicMock(), "")
+        barrier = threading.Barrier(6)
+        results: List[Optional[Location]] = []
+
+        def lookup() -> None:
+            barrier.wait()
+            results.append(cache.geocode("sushi sydney"))
+
+        threads = [threading.Thread(target=lookup) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert provider.calls == 1
+        assert cache.stats["miss"] == 1
+        assert cache.stats["coalesced"] == 5
+        assert len({repr(r) for r in results}) == 1
+
+
+class TestProviders:
+    """Test provider resolution and the Location Service adapter."""
+
+    def test_get_geocoder(self) -> None:
+        """Test the supported settings."""
+        assert get_geocoder("") is None
+        assert get_geocoder("local://") is get_geocoder("local://")
+        location = get_geocoder("location://mapme-dev-places")
+        assert isinstance(location, LocationServiceGeocoder)
+        assert location.index_name == "mapme-dev-places"
+        with pytest.raises(ValueError):
+            get_geocoder("carrier-pigeon://")
+
+    def test_location_service_result(self) -> None:
+        """Test that the [lng, lat] point is unpacked."""
+        client = MagicMock()
+        client.search_place_index_for_text.return_value = {
+            "Results": [{"Place": {"Label": "Oakland, CA", "Geometry": {"Point": [-122.27, 37.8]}}}]
+        }
+        geocoder = LocationServiceGeocoder("places", client)
+
+        assert geocoder.geocode("oakland") == Location(37.8, -122.27, "Oakland, CA")
+        client.search_place_index_for_text.assert_called_with(
+            IndexName="places", Text="oakland", MaxResults=1
+        )
+
+    def test_location_service_errors(self) -> None:
+        """Test no-match and failure handling."""
+        client = MagicMock()
+        client.search_place_index_for_text.return_value = {"Results": []}
+        assert LocationServiceGeocoder("places", client).geocode("nowhere") is None
+
+        client.search_place_index_for_text.side_effect = ClientError(
+            {"Error": {"Code": "ThrottlingException"}}, "SearchPlaceIndexForText"
+        )
+        with pytest.raises(GeocoderError):
+            LocationServiceGeocoder("places", client).geocode("oakland")
+
+
+class TestContainerCache:
+    """Test the environment-configured cache."""
+
+    def test_disabled_without_geocoder(self) -> None:
+        """Test that no GEOCODER means no cache."""
+        with patch.dict(os.environ, {"GEOCODER": ""}):
+            assert get_geocoding_cache(MagicMock()) is None
+
+    def test_reused_until_settings_change(self) -> None:
+        """Test that warm invocations keep the memory tier."""
+        ddb = MagicMock()
+        with patch.dict(os.environ, {"GEOCODER": "local://", "GEOCODE_CACHE_TABLE": "a"}):
+            cache = get_geocoding_cache(ddb)
+            assert cache is not None
+            assert get_geocoding_cache(ddb) is cache
+        with patch.dict(os.environ, {"GEOCODER": "local://", "GEOCODE_CACHE_TABLE": "b"}):
+            rebuilt = get_geocoding_cache(ddb)
+        assert rebuilt is not cache
+        assert rebuilt is not None and rebuilt.table == "b"
+
+    def test_apply_location(self) -> None:
+        """Test the attributes added to a search item."""
+        item = {"query": {"S": "coffee"}}
+        apply_location(item, Location(37.7749, -122.4194))
+        assert item["geohash"] == {"S": "9q8yyk8yt"}
+        assert item["lat"] == {"N": "37.7749"}
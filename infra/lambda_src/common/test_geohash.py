@@ -0,0 +1,83 @@
+"""Unit tests for geohash encoding and viewport covers."""
+
+import random
+
+import pytest
+
+from .geohash import BoundingBox, cover, encode
+
+
+def covered(geohash: str, ranges: list) -> bool:
+    """Return whether a full-precision geohash falls in one of the ranges."""
+    return any(low <= geohash <= high for low, high in ranges)
+
+
+class TestEncode:
+    """Test geohash encoding."""
+
+    def test_known_points(self) -> None:
+        """Test against published geohashes."""
+        assert encode(37.7749, -122.4194) == "9q8yyk8yt"
+        assert encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+        assert encode(-90.0, -180.0, 3) == "000"
+
+
+class TestBoundingBox:
+    """Test bbox parsing and containment."""
+
+    def test_parse(self) -> None:
+        """Test the west,south,east,north order."""
+        box = BoundingBox.parse("-122.5,37.7,-122.3,37.8")
+        assert (box.west, box.south, box.east, box.north) == (-122.5, 37.7, -122.3, 37.8)
+
+    @pytest.mark.parametrize(
+        "value", ["1,2,3", "a,b,c,d", "0,10,1,5", "0,0,200,1", "nan,0,1,1", "0,-91,1,1"]
+    )
+    def test_parse_rejects(self, value: str) -> None:
+        """Test malformed and out-of-range boxes."""
+        with pytest.raises(ValueError):
+            BoundingBox.parse(value)
+
+    def test_contains_across_antimeridian(self) -> None:
+        """Test a box with west > east."""
+        box = BoundingBox(170.0, -10.0, -170.0, 10.0)
+        assert box.contains(0.0, 175.0)
+        assert box.contains(0.0, -175.0)
+        assert not box.contains(0.0, 0.0)
+
+
+class TestCover:
+    """Test viewport covers."""
+
+    def test_city_viewport_uses_few_ranges(self) -> None:
+        """Test that a city-sized viewport needs a handful of narrow ranges."""
+        ranges = cover(BoundingBox(-122.45, 37.76, -122.40, 37.79))
+        assert 1 <= len(ranges) <= 8
+        assert all(len(low) >= 5 for low, _ in ranges)
+
+    def test_whole_world_is_one_range(self) -> None:
+        """Test that adjacent cells merge into a single range."""
+        assert cover(BoundingBox(-180.0, -90.0, 180.0, 90.0)) == [("0", "z~")]
+
+    @pytest.mark.parametrize(
+        "box",
+        [
+            BoundingBox(-122.45, 37.76, -122.40, 37.79),
+            BoundingBox(-0.5, 51.3, 0.3, 51.7),
+            BoundingBox(179.5, -1.0, -179.5, 1.0),
+            BoundingBox(10.0, -45.0, 60.0, 5.0),
+        ],
+    )
+    def test_every_point_inside_is_covered(self, box: BoundingBox) -> None:
+        """Test that no point in the box falls outside the ranges."""
+        ranges = cover(box)
+        rng = random.Random(7)
+        for _ in range(500):
+            lat = rng.uniform(box.south, box.north)
+            if box.west <= box.east:
+                lng = rng.uniform(box.west, box.east)
+            else:
+                lng = rng.choice([rng.uniform(box.west, 180.0), rng.uniform(-180.0, box.east)])
+            assert covered(encode(lat, lng), ranges), (lat, lng)
+        for corner in [(box.south, box.west), (box.north, box.east)]:
+            assert covered(encode(*corner), ranges)
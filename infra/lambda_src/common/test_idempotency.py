@@ -0,0 +1,217 @@
+"""Unit tests for Idempotency-Key handling."""
+
+import base64
+import json
+import os
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+import boto3
+from botocore.exceptions import ClientError
+
+from .encoding import rows, unpackb
+from .idempotency import REPLAYED_HEADER, IdempotencyStore, fingerprint, idempotent
+from .router import Request, Router, authenticate
+from .utils import create_response
+
+TABLE = "test-idempotency"
+CLAIMS = {"authorizer": {"claims": {"sub": "user-1", "email": "u@example.com"}}}
+
+
+def create_idempotency_table() -> Any:
+    """Create the idempotency table as dynamodb.tf does and return a client."""
+    client = boto3.client("dynamodb")
+    client.create_table(
+        TableName=TABLE,
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return client
+
+
+def make_event(body: Any, key: str = "key-1") -> Dict[str, Any]:
+    """Build a POST /searches event carrying an Idempotency-Key."""
+    return {
+        "httpMethod": "POST",
+        "path": "/searches",
+        "headers": {"idempotency-key": key} if key else {},
+        "requestContext": CLAIMS,
+        "body": json.dumps(body),
+    }
+
+
+def make_router(responses: List[Dict[str, Any]]) -> Router:
+    """Build a router whose POST /searches returns ``responses`` in turn."""
+    router = Router(middleware=[authenticate])
+
+    @router.route("POST", "/searches", idempotent)
+    def post(request: Request) -> Dict[str, Any]:
+        return responses.pop(0)
+
+    return router
+
+
+def context() -> MagicMock:
+    """Build a Lambda context."""
+    ctx = MagicMock()
+    ctx.aws_request_id = "req-1"
+    return ctx
+
+
+class TestIdempotent:
+    """Test the middleware against moto."""
+
+    def test_retry_replays_stored_response(self, mock_dynamodb: None) -> None:
+        """Test that a retry gets the first response without running the route."""
+        create_idempotency_table()
+        responses = [create_response(201, {"ok": True, "timestamp": 1})]
+        router = make_router(responses)
+
+        with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": TABLE}):
+            first = router.dispatch(make_event({"query": "q"}), context())
+            second = router.dispatch(make_event({"query": "q"}), context())
+
+        assert first["statusCode"] == second["statusCode"] == 201
+        assert json.loads(second["body"]) == {"ok": True, "timestamp": 1}
+        assert second["headers"][REPLAYED_HEADER] == "true"
+        assert REPLAYED_HEADER not in first["headers"]
+        assert responses == []
+
+    def test_replay_encoded_for_retry_accept(self, mock_dynamodb: None) -> None:
+        """Test that a retry asking for another format gets the stored body in that format."""
+        create_idempotency_table()
+        router = Router(middleware=[authenticate])
+
+        @router.route("POST", "/searches", idempotent)
+        def post(request: Request) -> Dict[str, Any]:
+            return create_response(201, {"items": [{"query": "q"}]})
+
+        first_event = make_event({"query": "q"})
+        first_event["headers"]["Accept"] = "application/msgpack; layout=columnar"
+        with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": TABLE}):
+            first = router.dispatch(first_event, context())
+            second = router.dispatch(make_event({"query": "q"}), context())
+
+        assert first["isBase64Encoded"] is True
+        assert rows(unpackb(base64.b64decode(first["body"]))) == {"items": [{"query": "q"}]}
+        assert second["statusCode"] == 201 and "isBase64Encoded" not in second
+        assert second["headers"]["Content-Type"] == "application/json"
+        assert json.loads(second["body"]) == {"items": [{"query": "q"}]}
+        assert second["headers"][REPLAYED_HEADER] == "true"
+
+    def test_keys_scoped_per_user(self, mock_dynamodb: None) -> None:
+        """Test that two users may send the same key."""
+        create_idempotency_table()
+        router = make_router([create_response(201, {"n": 1}), create_response(201, {"n": 2})])
+        other = make_event({"query": "q"})
+        other["requestContext"] = {"authorizer": {"claims": {"sub": "user-2"}}}
+
+        with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": TABLE}):
+            router.dispatch(make_event({"query": "q"}), context())
+            result = router.dispatch(other, context())
+
+        assert json.loads(result["body"]) == {"n": 2}
+
+    def test_in_progress_conflicts(self, mock_dynamodb: None) -> None:
+        """Test that a duplicate of a running request gets a 409."""
+        client = create_idempotency_table()
+        event = make_event({"query": "q"})
+        store = IdempotencyStore(client, TABLE)
+        assert (
+            store.claim(
+                "user-1#POST /searches#key-1", fingerprint(Request(event, context())), "token-1"
+            )
+            is None
+        )
+
+        with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": TABLE}):
+            result = make_router([]).dispatch(event, context())
+
+        assert result["statusCode"] == 409
+        assert result["headers"]["Retry-After"] == "1"
+
+    def test_lapsed_claim_can_be_retaken(self, mock_dynamodb: None) -> None:
+        """Test that a crashed attempt's claim stops blocking once its lock expires."""
+        client = create_idempotency_table()
+        event = make_event({"query": "q"})
+        IdempotencyStore(client, TABLE, lock_seconds=-1).claim(
+            "user-1#POST /searches#key-1", fingerprint(Request(event, context())), "token-1"
+        )
+
+        with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": TABLE}):
+            result = make_router([create_response(201, {"ok": True})]).dispatch(event, context())
+
+        assert result["statusCode"] == 201
+
+    def test_lapsed_owner_cannot_overwrite_new_claim(self, mock_dynamodb: None) -> None:
+        """Test that an attempt whose claim was retaken neither completes nor releases the key."""
+        client = create_idempotency_table()
+        record_id = "user-1#POST /searches#key-1"
+        lapsed = IdempotencyStore(client, TABLE, lock_seconds=-1)
+        store = IdempotencyStore(client, TABLE)
+        assert lapsed.claim(record_id, "fp", "old") is None
+        assert store.claim(record_id, "fp", "new") is None
+
+        assert lapsed.complete(record_id, "old", create_response(201, {"n": 1})) is False
+        assert lapsed.release(record_id, "old") is False
+        existing = store.claim(record_id, "fp", "third")
+        assert existing is not None and existing["claimToken"] == {"S": "new"}
+        assert existing["status"] == {"S": "IN_PROGRESS"}
+
+        assert store.complete(record_id, "new", create_response(201, {"n": 2})) is True
+        stored = client.get_item(TableName=TABLE, Key={"id": {"S": record_id}})["Item"]
+        assert json.loads(json.loads(stored["response"]["S"])["body"]) == {"n": 2}
+
+    def test_key_reused_for_different_body(self, mock_dynamodb: None) -> None:
+        """Test that reusing a key for another request is rejected."""
+        create_idempotency_table()
+        router = make_router([create_response(201, {"ok": True})])
+
+        with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": TABLE}):
+            router.dispatch(make_event({"query": "a"}), context())
+            result = router.dispatch(make_event({"query": "b"}), context())
+
+        assert result["statusCode"] == 422
+
+    def test_server_error_releases_key(self, mock_dynamodb: None) -> None:
+        """Test that a 5xx is not replayed, so the retry redoes the write."""
+        create_idempotency_table()
+        responses = [create_response(500, {"error": "x"}), create_response(201, {"ok": True})]
+        router = make_router(responses)
+
+        with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": TABLE}):
+            assert router.dispatch(make_event({"query": "q"}), context())["statusCode"] == 500
+            retry = router.dispatch(make_event({"query": "q"}), context())
+
+        assert retry["statusCode"] == 201
+        assert REPLAYED_HEADER not in retry["headers"]
+
+    def test_table_errors_fail_open(self, mock_dynamodb: None) -> None:
+        """Test that the route still runs when the table cannot be reached."""
+        router = make_router([create_response(201, {"ok": True})])
+        error = ClientError({"Error": {"Code": "ResourceNotFoundException"}}, "PutItem")
+
+        with (
+            patch.dict(os.environ, {"IDEMPOTENCY_TABLE": TABLE}),
+            patch.object(IdempotencyStore, "claim", side_effect=error),
+        ):
+            result = router.dispatch(make_event({"query": "q"}), context())
+
+        assert result["statusCode"] == 201
+
+    def test_without_header_or_table(self) -> None:
+        """Test that the middleware is a pass-through when not in use."""
+        router = make_router([create_response(201, {"n": 1}), create_response(201, {"n": 2})])
+
+        with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": TABLE}):
+            assert router.dispatch(make_event({}, key=""), context())["statusCode"] == 201
+        with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": ""}):
+            assert router.dispatch(make_event({}), context())["statusCode"] == 201
+
+    def test_invalid_key(self, aws_credentials: None) -> None:
+        """Test that overlong keys are rejected before any table call."""
+        with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": TABLE}):
+            result = make_router([]).dispatch(make_event({}, key="k" * 256), context())
+
+        assert result["statusCode"] == 400
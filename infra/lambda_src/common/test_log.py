@@ -0,0 +1,164 @@
+"""Unit tests for the structured logger."""
+
+import io
+import json
+import os
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from .log import StructuredLogger, log_invocation
+
+
+def lines(stream: io.StringIO) -> List[Dict[str, Any]]:
+    """Decode the JSON records written to a stream."""
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class TestLevelGating:
+    """Test LOG_LEVEL handling."""
+
+    def test_level_from_env(self) -> None:
+        """Test that LOG_LEVEL configures the threshold."""
+        with patch.dict(os.environ, {"LOG_LEVEL": "warning"}):
+            logger = StructuredLogger()
+        assert logger.is_enabled(30)
+        assert not logger.is_enabled(20)
+
+    def test_disabled_level_skips_serialization(self) -> None:
+        """Test that records below the threshold are never serialized."""
+        stream = io.StringIO()
+        logger = StructuredLogger(level="WARNING", stream=stream)
+
+        with patch("lambda_src.common.log.json.dumps") as mock_dumps:
+            logger.info("dropped", value=1)
+            logger.debug("dropped")
+            mock_dumps.assert_not_called()
+
+        assert stream.getvalue() == ""
+
+    def test_unknown_level_defaults_to_info(self) -> None:
+        """Test that an invalid LOG_LEVEL falls back to INFO."""
+        logger = StructuredLogger(level="LOUD")
+        assert logger.is_enabled(20)
+        assert not logger.is_enabled(10)
+
+
+class TestInvocationBuffering:
+    """Test per-invocation context, buffering and sampling."""
+
+    def test_context_bound_once(self) -> None:
+        """Test that bound fields are attached to every record."""
+        stream = io.StringIO()
+        logger = StructuredLogger(stream=stream)
+
+        logger.start_invocation(request_id="req-1")
+        logger.bind(user_id="user-1")
+        logger.info("first")
+        logger.warning("second", extra=True)
+        assert stream.getvalue() == ""
+        logger.flush()
+
+        records = lines(stream)
+        assert [r["message"] for r in records] == ["first", "second"]
+        assert all(r["request_id"] == "req-1" and r["user_id"] == "user-1" for r in records)
+        assert records[1]["level"] == "WARNING"
+        assert records[1]["extra"] is True
+
+    def test_context_cleared_between_invocations(self) -> None:
+        """Test that context does not leak into the next invocation."""
+        stream = io.StringIO()
+        logger = StructuredLogger(stream=stream)
+
+        logger.start_invocation(request_id="req-1")
+        logger.bind(user_id="user-1")
+        logger.flush()
+        logger.start_invocation(request_id="req-2")
+        logger.info("next")
+        logger.flush()
+
+        record = lines(stream)[0]
+        assert record["request_id"] == "req-2"
+        assert "user_id" not in record
+
+    def test_unsampled_info_dropped(self) -> None:
+        """Test that INFO records are dropped for unsampled invocations."""
+        stream = io.StringIO()
+        logger = StructuredLogger(info_sample_rate=0.0, stream=stream)
+
+        logger.start_invocation(request_id="req-1")
+        logger.info("sampled out")
+        logger.warning("kept")
+        logger.flush()
+
+        assert [r["message"] for r in lines(stream)] == ["kept"]
+
+    def test_error_flushes_unsampled_info(self) -> None:
+        """Test that an error keeps the full buffer, including unsampled INFO."""
+        stream = io.StringIO()
+        logger = StructuredLogger(info_sample_rate=0.0, stream=stream)
+
+        logger.start_invocation(request_id="req-1")
+        logger.info("context")
+        logger.error("boom")
+        logger.flush()
+
+        assert [r["message"] for r in lines(stream)] == ["context", "boom"]
+
+    def test_record_bypasses_level_and_sampling(self) -> None:
+        """Test that record() is always written immediately."""
+        stream = io.StringIO()
+        logger = StructuredLogger(level="ERROR", info_sample_rate=0.0, stream=stream)
+
+        logger.start_invocation(request_id="req-1")
+        logger.record("accounting", units=3)
+
+        record = lines(stream)[0]
+        assert record["message"] == "accounting"
+        assert record["request_id"] == "req-1"
+
+    def test_outside_invocation_writes_immediately(self) -> None:
+        """Test that records logged outside an invocation are not buffered."""
+        stream = io.StringIO()
+        logger = StructuredLogger(stream=stream)
+
+        logger.info("cold start")
+
+        assert lines(stream)[0]["message"] == "cold start"
+
+
+class TestLogInvocation:
+    """Test the handler decorator."""
+
+    def test_flushes_and_binds_request_id(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that the decorator binds the request ID and flushes on return."""
+        from .log import logger
+
+        @log_invocation
+        def handler(event: Dict[str, Any], context: Any) -> str:
+            logger.info("inside")
+            return "ok"
+
+        context = MagicMock()
+        context.aws_request_id = "req-42"
+        assert handler({}, context) == "ok"
+
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert records[-1]["message"] == "inside"
+        assert records[-1]["request_id"] == "req-42"
+
+    def test_logs_and_reraises_exceptions(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that uncaught exceptions are logged before propagating."""
+
+        @log_invocation
+        def handler(event: Dict[str, Any], context: Any) -> str:
+            raise RuntimeError("kaboom")
+
+        with pytest.raises(RuntimeError):
+            handler({}, None)
+
+        record = json.loads(capsys.readouterr().out.splitlines()[-1])
+        assert record["level"] == "ERROR"
+        assert record["error_type"] == "RuntimeError"
+        assert record["request_id"] == "unknown"
@@ -0,0 +1,61 @@
+"""Unit tests for the sampled memory probe."""
+
+import json
+import os
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from .memory import memory_probed
+
+RETAINED: List[bytes] = []
+
+
+def allocating_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Allocate some memory, keeping part of it alive."""
+    scratch = [bytes(1024) for _ in range(200)]
+    RETAINED.append(bytes(64 * 1024))
+    return {"statusCode": 200, "body": str(len(scratch))}
+
+
+class TestMemoryProbed:
+    """Test the memory probe decorator."""
+
+    def test_disabled_returns_handler_unchanged(self) -> None:
+        """Test that the default configuration adds no wrapper."""
+        with patch.dict(os.environ, {"MEMORY_PROFILE_SAMPLE_RATE": ""}):
+            assert memory_probed(allocating_handler) is allocating_handler
+
+    def test_sampled_out_invocation_not_traced(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that invocations outside the sample write nothing."""
+        with patch.dict(os.environ, {"MEMORY_PROFILE_SAMPLE_RATE": "0.5"}):
+            wrapped = memory_probed(allocating_handler)
+
+        with patch("lambda_src.common.memory.random.random", return_value=0.9):
+            assert wrapped({}, None)["statusCode"] == 200
+
+        assert capsys.readouterr().out == ""
+
+    def test_memory_record_written(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that a sampled invocation logs peak memory and allocation sites."""
+        env = {"MEMORY_PROFILE_SAMPLE_RATE": "1", "MEMORY_PROFILE_TOP_N": "3"}
+        with patch.dict(os.environ, env):
+            wrapped = memory_probed(allocating_handler)
+
+        context = MagicMock()
+        context.aws_request_id = "req-1"
+        context.memory_limit_in_mb = 128
+        event = {"httpMethod": "GET", "path": "/searches"}
+        assert wrapped(event, context)["statusCode"] == 200
+
+        record = json.loads(capsys.readouterr().out.splitlines()[-1])
+        assert record["message"] == "Handler memory"
+        assert record["request_id"] == "req-1"
+        assert record["route"] == "GET /searches"
+        assert record["memory_limit_mb"] == 128
+        assert record["peak_kb"] >= 200
+        assert record["retained_kb"] >= 64
+        assert record["max_rss_kb"] > 0
+        assert len(record["top_allocations"]) == 3
+        assert "test_memory.py" in record["top_allocations"][0]["site"]
@@ -0,0 +1,136 @@
+"""Unit tests for EMF metrics."""
+
+import io
+import json
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from . import metrics as metrics_module
+from .metrics import MetricsRecorder, record_metrics, route_of
+
+
+def emf_lines(output: str) -> List[Dict[str, Any]]:
+    """Return the EMF records in captured output."""
+    records = [json.loads(line) for line in output.splitlines() if line.startswith("{")]
+    return [record for record in records if "_aws" in record]
+
+
+class TestRouteOf:
+    """Test route derivation from events."""
+
+    def test_api_gateway_route_prefers_resource(self) -> None:
+        """Test that the resource template is used when present."""
+        event = {"httpMethod": "GET", "resource": "/tiles/{z}", "path": "/tiles/3"}
+        assert route_of(event) == "GET /tiles/{z}"
+
+    def test_api_gateway_route_falls_back_to_path(self) -> None:
+        """Test that the path is used without a resource."""
+        assert route_of({"httpMethod": "POST", "path": "/searches"}) == "POST /searches"
+
+    def test_other_event_sources(self) -> None:
+        """Test Cognito, SQS, scheduled and unknown events."""
+        assert route_of({"triggerSource": "PostConfirmation_ConfirmSignUp"}) == (
+            "PostConfirmation_ConfirmSignUp"
+        )
+        assert route_of({"Records": [{"eventSource": "aws:sqs"}]}) == "sqs"
+        assert route_of({"detail-type": "Scheduled Event"}) == "schedule"
+        assert route_of({}) == "unknown"
+
+
+class TestMetricsRecorder:
+    """Test phase timing and EMF output."""
+
+    def test_phase_accumulates(self) -> None:
+        """Test that repeated phases are summed."""
+        recorder = MetricsRecorder(namespace="Test")
+        recorder.start_invocation("fn", "GET /x")
+
+        with patch("lambda_src.common.metrics.time.perf_counter", side_effect=[0.0, 0.002]):
+            with recorder.phase("dynamodb"):
+                pass
+        with patch("lambda_src.common.metrics.time.perf_counter", side_effect=[0.0, 0.003]):
+            with recorder.phase("dynamodb"):
+                pass
+
+        assert recorder.to_emf()["dynamodb"] == pytest.approx(5.0)
+
+    def test_timed_decorator(self) -> None:
+        """Test that timed() records a phase per call."""
+        recorder = MetricsRecorder()
+        recorder.start_invocation("fn")
+
+        @recorder.timed("work")
+        def work(x: int) -> int:
+            return x * 2
+
+        assert work(2) == 4
+        assert "work" in recorder.to_emf()
+
+    def test_emf_document_shape(self) -> None:
+        """Test the EMF envelope, dimensions and metric definitions."""
+        stream = io.StringIO()
+        recorder = MetricsRecorder(namespace="Test", stream=stream)
+        recorder.start_invocation("fn", "POST /searches")
+        recorder.set_status(201)
+        recorder.add("validate", 1.5)
+        recorder.add("ColdStart", 1, unit="Count")
+        recorder.flush()
+
+        record = json.loads(stream.getvalue())
+        directive = record["_aws"]["CloudWatchMetrics"][0]
+        assert directive["Namespace"] == "Test"
+        assert ["Function", "Route", "Status"] in directive["Dimensions"]
+        assert {"Name": "validate", "Unit": "Milliseconds"} in directive["Metrics"]
+        assert {"Name": "ColdStart", "Unit": "Count"} in directive["Metrics"]
+        assert record["Function"] == "fn"
+        assert record["Route"] == "POST /searches"
+        assert record["Status"] == "201"
+        assert record["validate"] == 1.5
+
+
+class TestRecordMetrics:
+    """Test the handler decorator."""
+
+    def test_one_line_per_invocation_with_cold_start(
+        self, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Test that the first invocation is cold and later ones are warm."""
+
+        @record_metrics
+        def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            with metrics_module.metrics.phase("dynamodb"):
+                pass
+            return {"statusCode": 200}
+
+        context = MagicMock()
+        context.function_name = "mapme-dev-searches"
+        event = {"httpMethod": "GET", "path": "/searches"}
+
+        with patch.object(metrics_module, "_cold_start", True):
+            handler(event, context)
+            handler(event, context)
+
+        first, second = emf_lines(capsys.readouterr().out)
+        assert first["ColdStart"] == 1.0
+        assert second["ColdStart"] == 0.0
+        assert first["Function"] == "mapme-dev-searches"
+        assert first["Route"] == "GET /searches"
+        assert first["Status"] == "200"
+        assert "dynamodb" in first
+        assert "Duration" in first
+
+    def test_exception_sets_error_status(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that an uncaught exception still emits metrics."""
+
+        @record_metrics
+        def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            handler({}, None)
+
+        record = emf_lines(capsys.readouterr().out)[0]
+        assert record["Status"] == "error"
+        assert record["Function"] == "local"
@@ -0,0 +1,68 @@
+"""Unit tests for the sampled handler profiler."""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from .profiling import profiled
+
+
+def busy_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Do a little work so the profile has entries."""
+    total = sum(i * i for i in range(1000))
+    return {"statusCode": 200, "body": str(total)}
+
+
+class TestProfiled:
+    """Test the profiling decorator."""
+
+    def test_disabled_returns_handler_unchanged(self) -> None:
+        """Test that the default configuration adds no wrapper at all."""
+        with patch.dict(os.environ, {"PROFILE_SAMPLE_RATE": ""}):
+            assert profiled(busy_handler) is busy_handler
+
+    def test_sampled_out_invocation_not_profiled(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that invocations outside the sample are not profiled."""
+        with patch.dict(os.environ, {"PROFILE_SAMPLE_RATE": "0.5"}):
+            wrapped = profiled(busy_handler)
+
+        with patch("lambda_src.common.profiling.random.random", return_value=0.9):
+            assert wrapped({}, None)["statusCode"] == 200
+
+        assert capsys.readouterr().out == ""
+
+    def test_profile_record_written(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that a sampled invocation logs the top cumulative functions."""
+        env = {"PROFILE_SAMPLE_RATE": "1", "PROFILE_TOP_N": "5", "PROFILE_DUMP_DIR": ""}
+        with patch.dict(os.environ, env):
+            wrapped = profiled(busy_handler)
+
+        context = MagicMock()
+        context.aws_request_id = "req-1"
+        assert wrapped({}, context)["statusCode"] == 200
+
+        record = json.loads(capsys.readouterr().out.splitlines()[-1])
+        assert record["message"] == "Handler profile"
+        assert record["request_id"] == "req-1"
+        assert 0 < len(record["top_cumulative"]) <= 5
+        assert any("busy_handler" in entry["function"] for entry in record["top_cumulative"])
+        assert record["dump_path"] is None
+
+    def test_raw_stats_dumped(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that raw pstats are written when a dump directory is configured."""
+        env = {"PROFILE_SAMPLE_RATE": "1", "PROFILE_DUMP_DIR": str(tmp_path)}
+        with patch.dict(os.environ, env):
+            wrapped = profiled(busy_handler)
+
+        context = MagicMock()
+        context.aws_request_id = "req-2"
+        wrapped({}, context)
+
+        dump = tmp_path / "profile-req-2.pstats"
+        assert dump.exists()
+        record = json.loads(capsys.readouterr().out.splitlines()[-1])
+        assert record["dump_path"] == str(dump)
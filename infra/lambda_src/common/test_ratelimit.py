@@ -0,0 +1,202 @@
+"""Unit tests for per-user, per-route rate limiting."""
+
+import json
+import os
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+import boto3
+from botocore.exceptions import ClientError
+
+from . import ratelimit as ratelimit_module
+from .ratelimit import LimitsTable, RateLimiter, rate_limited
+from .router import Request, Router, authenticate
+from .utils import create_response
+
+TABLE = "test-rate-limits"
+
+
+def create_limits_table() -> Any:
+    """Create the limits table as dynamodb.tf does and return a client."""
+    client = boto3.client("dynamodb")
+    client.create_table(
+        TableName=TABLE,
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return client
+
+
+class FakeClock:
+    """Clock moved by hand, usable as both wall and monotonic time."""
+
+    def __init__(self, now: float = 1_700_000_000.0) -> None:
+        """Start at ``now``."""
+        self.now = now
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+def make_limiter(client: Any, clock: FakeClock, **kwargs: Any) -> RateLimiter:
+    """Build a limiter over the moto table."""
+    factory = MagicMock(return_value=client)
+    return RateLimiter(LimitsTable(factory, TABLE), clock=clock, monotonic=clock, **kwargs)
+
+
+def make_event(sub: str = "user-1") -> Dict[str, Any]:
+    """Build a POST /searches event."""
+    return {
+        "httpMethod": "POST",
+        "path": "/searches",
+        "headers": {},
+        "requestContext": {"authorizer": {"claims": {"sub": sub, "email": "u@example.com"}}},
+        "body": json.dumps({"query": "q"}),
+    }
+
+
+def make_router(calls: List[str]) -> Router:
+    """Build a router whose POST /searches records each call that gets through."""
+    router = Router(middleware=[authenticate])
+
+    @router.route("POST", "/searches", rate_limited)
+    def post(request: Request) -> Dict[str, Any]:
+        calls.append(request.user_id)
+        return create_response(201, {"ok": True})
+
+    return router
+
+
+class TestRateLimiter:
+    """Test the token bucket against moto."""
+
+    def test_burst_then_refill(self, mock_dynamodb: None) -> None:
+        """Test that a full bucket allows a burst, then one request per interval."""
+        clock = FakeClock()
+        limiter = make_limiter(create_limits_table(), clock, per_minute=60, burst=3, local_lease=0)
+
+        assert [limiter.acquire("u#POST /searches")[0] for _ in range(3)] == [True] * 3
+        allowed, retry_after = limiter.acquire("u#POST /searches")
+        assert not allowed
+        assert retry_after == 1.0
+
+        clock.now += 1.0
+        assert limiter.acquire("u#POST /searches")[0]
+        assert not limiter.acquire("u#POST /searches")[0]
+
+    def test_buckets_per_key(self, mock_dynamodb: None) -> None:
+        """Test that one user's bucket does not limit another user or route."""
+        limiter = make_limiter(
+            create_limits_table(), FakeClock(), per_minute=60, burst=1, local_lease=0
+        )
+
+        assert limiter.acquire("a#POST /searches")[0]
+        assert not limiter.acquire("a#POST /searches")[0]
+        assert limiter.acquire("b#POST /searches")[0]
+        assert limiter.acquire("a#PUT /user")[0]
+
+    def test_local_lease_skips_table(self, mock_dynamodb: None) -> None:
+        """Test that a user well under the limit is served from the container."""
+        client = create_limits_table()
+        clock = FakeClock()
+        factory = MagicMock(return_value=client)
+        limiter = RateLimiter(
+            LimitsTable(factory, TABLE),
+            per_minute=60,
+            burst=20,
+            local_lease=4,
+            clock=clock,
+            monotonic=clock,
+        )
+
+        with patch.object(ratelimit_module.metrics, "add") as add:
+            assert all(limiter.acquire("u#POST /searches")[0] for _ in range(5))
+        assert factory.call_count == 1
+        hits = [c for c in add.call_args_list if c.args[0] == "RateLimitLocalHits"]
+        assert len(hits) == 4
+
+        item = client.get_item(TableName=TABLE, Key={"id": {"S": "u#POST /searches"}})["Item"]
+        assert int(item["tat"]["N"]) == int(clock.now * 1000) + 5 * 1000
+
+        # A lease is short-lived, so other containers see a fair bucket
+        clock.now += ratelimit_module.LEASE_SECONDS
+        limiter.acquire("u#POST /searches")
+        assert factory.call_count == 2
+
+    def test_no_lease_near_limit(self, mock_dynamodb: None) -> None:
+        """Test that leases never let a user exceed the limit."""
+        limiter = make_limiter(
+            create_limits_table(), FakeClock(), per_minute=60, burst=12, local_lease=4
+        )
+
+        allowed = [limiter.acquire("u#POST /searches")[0] for _ in range(20)]
+        assert allowed.count(True) == 12
+        assert allowed[12:] == [False] * 8
+
+    def test_refused_lease_costs_no_extra_writes(self, mock_dynamodb: None) -> None:
+        """Test that a refused lease decides the take and stops further lease attempts."""
+        client = create_limits_table()
+        clock = FakeClock()
+        limiter = make_limiter(client, clock, per_minute=60, burst=12, local_lease=4)
+        key = "u#POST /searches"
+        assert all(limiter.acquire(key)[0] for _ in range(5))
+
+        with patch.object(client, "update_item", wraps=client.update_item) as update:
+            # Lease refused (both branches), then only the part-used take
+            assert limiter.acquire(key)[0]
+            assert update.call_count == 3
+            # No lease until the bucket drains below half; one write per take
+            assert all(limiter.acquire(key)[0] for _ in range(6))
+            assert update.call_count == 9
+            # Over the limit: the remembered tat is only a lower bound, so one
+            # failed part-used write answers the request
+            assert not limiter.acquire(key)[0]
+            assert update.call_count == 10
+
+        # Drained below half: leases resume
+        clock.now += 12
+        with patch.object(client, "update_item", wraps=client.update_item) as update:
+            assert all(limiter.acquire(key)[0] for _ in range(5))
+            assert update.call_count == 1
+
+
+class TestRateLimited:
+    """Test the middleware."""
+
+    def test_429_with_retry_after(self, mock_dynamodb: None) -> None:
+        """Test that the route is not run once the user is over the limit."""
+        create_limits_table()
+        calls: List[str] = []
+        router = make_router(calls)
+        env = {"RATE_LIMIT_TABLE": TABLE, "RATE_LIMIT_PER_MINUTE": "6", "RATE_LIMIT_BURST": "2"}
+
+        with patch.dict(os.environ, env):
+            responses = [router.dispatch(make_event(), MagicMock()) for _ in range(3)]
+            other = router.dispatch(make_event("user-2"), MagicMock())
+
+        assert [r["statusCode"] for r in responses] == [201, 201, 429]
+        assert responses[2]["headers"]["Retry-After"] == "10"
+        assert other["statusCode"] == 201
+        assert calls == ["user-1", "user-1", "user-2"]
+
+    def test_disabled_without_table(self) -> None:
+        """Test that routes are not limited when RATE_LIMIT_TABLE is unset."""
+        calls: List[str] = []
+        with patch.dict(os.environ, {"RATE_LIMIT_TABLE": ""}):
+            response = make_router(calls).dispatch(make_event(), MagicMock())
+        assert response["statusCode"] == 201
+
+    def test_fails_open(self) -> None:
+        """Test that an unavailable limits table does not fail the request."""
+        limiter = MagicMock()
+        limiter.acquire.side_effect = ClientError(
+            {"Error": {"Code": "ResourceNotFoundException"}}, "UpdateItem"
+        )
+        calls: List[str] = []
+
+        with patch.object(ratelimit_module, "get_rate_limiter", return_value=limiter):
+            response = make_router(calls).dispatch(make_event(), MagicMock())
+        assert response["statusCode"] == 201
+        assert calls == ["user-1"]
@@ -0,0 +1,286 @@
+"""Unit tests for DynamoDB retries, circuit breaking and hedged reads."""
+
+import threading
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from .ddb import ddb_call, table_of
+from .metrics import metrics
+from .resilience import (
+    REJECTED,
+    SERVER_ERROR,
+    THROTTLED,
+    CircuitBreaker,
+    CircuitOpenError,
+    Resilience,
+    RetryBudget,
+    backoff_delay,
+    classify,
+)
+from .router import map_errors
+
+
+def error(code: str, status: int = 400) -> ClientError:
+    """Build a ClientError as botocore raises it."""
+    return ClientError(
+        {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "GetItem"
+    )
+
+
+def calls(*outcomes: Any) -> MagicMock:
+    """Build a call that raises or returns each outcome in turn."""
+    return MagicMock(side_effect=list(outcomes))
+
+
+class FakeClock:
+    """Monotonic clock moved by hand."""
+
+    def __init__(self) -> None:
+        """Start at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+def counted() -> Any:
+    """Record the metrics added during a test, by name."""
+    added: Dict[str, float] = {}
+
+    def add(name: str, value: float, unit: str = "Milliseconds") -> None:
+        added[name] = added.get(name, 0.0) + value
+
+    with patch.object(metrics, "add", side_effect=add), patch("time.sleep"):
+        yield added
+
+
+class TestClassify:
+    """Test which errors are retried and which count against a breaker."""
+
+    def test_outcomes(self) -> None:
+        """Test throttling, server, connection and request errors."""
+        assert classify(error("ProvisionedThroughputExceededException")) == THROTTLED
+        assert classify(error("ThrottlingException")) == THROTTLED
+        assert classify(error("InternalServerError", 500)) == SERVER_ERROR
+        assert classify(error("Unknown", 503)) == SERVER_ERROR
+        assert classify(EndpointConnectionError(endpoint_url="http://x")) == SERVER_ERROR
+        assert classify(error("ConditionalCheckFailedException")) == REJECTED
+        assert classify(error("ValidationException")) == REJECTED
+
+    def test_full_jitter(self) -> None:
+        """Test that delays are uniform below a capped exponential ceiling."""
+        with patch("random.uniform", side_effect=lambda low, high: high):
+            assert [backoff_delay(n, 0.025, 0.1) for n in range(4)] == [0.025, 0.05, 0.1, 0.1]
+        assert 0.0 <= backoff_delay(10, 0.025, 0.1) <= 0.1
+
+
+class TestRetryBudget:
+    """Test the token bucket."""
+
+    def test_spent_then_refilled_by_calls(self) -> None:
+        """Test that retries stop when the reserve is spent and resume with traffic."""
+        budget = RetryBudget(ratio=0.5, reserve=2)
+        assert budget.withdraw() and budget.withdraw()
+        assert not budget.withdraw()
+
+        budget.deposit()
+        budget.deposit()
+        assert budget.withdraw()
+        assert not budget.withdraw()
+
+    def test_reserve_is_the_cap(self) -> None:
+        """Test that a quiet period does not bank unlimited retries."""
+        budget = RetryBudget(ratio=1.0, reserve=1)
+        for _ in range(5):
+            budget.deposit()
+        assert budget.withdraw()
+        assert not budget.withdraw()
+
+
+class TestCircuitBreaker:
+    """Test breaker state changes."""
+
+    def test_opens_probes_and_closes(self, counted: Dict[str, float]) -> None:
+        """Test the closed -> open -> half-open -> closed cycle."""
+        clock = FakeClock()
+        breaker = CircuitBreaker("t", failure_threshold=2, cooldown_seconds=1.0, clock=clock)
+
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        clock.now = 1.0
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.allow()
+        assert counted == {"DynamoDBCircuitOpened": 1, "DynamoDBCircuitClosed": 1}
+
+    def test_failed_probe_reopens(self, counted: Dict[str, float]) -> None:
+        """Test that one failure while half-open opens the breaker again."""
+        clock = FakeClock()
+        breaker = CircuitBreaker("t", failure_threshold=1, cooldown_seconds=1.0, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 1.0
+        assert breaker.allow()
+        breaker.record_failure()
+        assert not breaker.allow()
+        assert counted["DynamoDBCircuitOpened"] == 2
+
+    def test_success_resets_failures(self) -> None:
+        """Test that only consecutive failures open the breaker."""
+        breaker = CircuitBreaker("t", failure_threshold=2)
+        for _ in range(3):
+            breaker.record_failure()
+            breaker.record_success()
+        assert breaker.allow()
+
+
+class TestResilience:
+    """Test the retry loop."""
+
+    def test_throttling_retried(self, counted: Dict[str, float]) -> None:
+        """Test that a throttled write is retried until it succeeds."""
+        fn = calls(error("ThrottlingException"), error("ThrottlingException"), {"ok": 1})
+
+        assert Resilience().call(fn, "put_item", "t") == {"ok": 1}
+        assert fn.call_count == 3
+        assert counted["DynamoDBRetries"] == 2
+
+    def test_retries_limited(self, counted: Dict[str, float]) -> None:
+        """Test that the last error is raised once retries run out."""
+        fn = calls(*[error("ThrottlingException")] * 3)
+
+        with pytest.raises(ClientError):
+            Resilience(max_retries=2).call(fn, "put_item", "t")
+        assert fn.call_count == 3
+
+    def test_server_errors_retried_for_reads_only(self, counted: Dict[str, float]) -> None:
+        """Test that a write that may have been applied is not repeated."""
+        failed = error("InternalServerError", 500)
+
+        with pytest.raises(ClientError):
+            Resilience().call(calls(failed, {}), "update_item", "t")
+        assert Resilience().call(calls(failed, {"Item": {}}), "get_item", "t", read=True) == {
+            "Item": {}
+        }
+
+    def test_request_errors_not_retried(self, counted: Dict[str, float]) -> None:
+        """Test that a failed condition is raised at once and keeps the breaker closed."""
+        policy = Resilience(breaker_failures=1)
+        for _ in range(3):
+            with pytest.raises(ClientError):
+                policy.call(calls(error("ConditionalCheckFailedException")), "put_item", "t")
+        assert policy.breaker("t").allow()
+        assert "DynamoDBRetries" not in counted
+
+    def test_budget_exhausted(self, counted: Dict[str, float]) -> None:
+        """Test that retries stop once the container's budget is spent."""
+        policy = Resilience(budget=RetryBudget(ratio=0.0, reserve=1))
+        fn = calls(*[error("ThrottlingException")] * 4)
+
+        with pytest.raises(ClientError):
+            policy.call(fn, "put_item", "t")
+        assert fn.call_count == 2
+        assert counted["DynamoDBRetryBudgetExhausted"] == 1
+
+    def test_open_circuit_fails_fast(self, counted: Dict[str, float]) -> None:
+        """Test that calls to an unhealthy table are not made."""
+        policy = Resilience(max_retries=0, breaker_failures=2)
+        for _ in range(2):
+            with pytest.raises(ClientError):
+                policy.call(calls(error("ThrottlingException")), "query", "t")
+
+        fn = MagicMock()
+        with pytest.raises(CircuitOpenError):
+            policy.call(fn, "query", "t")
+        fn.assert_not_called()
+        assert policy.call(calls({"Items": []}), "query", "other") == {"Items": []}
+        assert counted["DynamoDBCircuitRejected"] == 1
+
+    def test_open_circuit_maps_to_503(self) -> None:
+        """Test that handlers answer 503 with Retry-After while the circuit is open."""
+
+        @map_errors("Failed")
+        def handle() -> Dict[str, Any]:
+            raise CircuitOpenError("query", "t")
+
+        response = handle()
+        assert response["statusCode"] == 503
+        assert response["headers"]["Retry-After"] == "1"
+
+
+class TestHedging:
+    """Test hedged reads."""
+
+    def test_slow_read_hedged(self, counted: Dict[str, float]) -> None:
+        """Test that a second copy of a slow read wins."""
+        release = threading.Event()
+        answers: List[str] = []
+
+        def fn() -> Dict[str, Any]:
+            first = not answers
+            answers.append("call")
+            if first:
+                release.wait(1.0)
+                return {"from": "primary"}
+            return {"from": "hedge"}
+
+        policy = Resilience(hedge_after_seconds=0.01)
+        try:
+            assert policy.call(fn, "get_item", "t", read=True, hedge=True) == {"from": "hedge"}
+        finally:
+            release.set()
+        assert counted["DynamoDBHedges"] == 1
+        assert counted["DynamoDBHedgeWins"] == 1
+
+    def test_fast_read_not_hedged(self, counted: Dict[str, float]) -> None:
+        """Test that reads under the threshold are sent once."""
+        fn = calls({"Items": []})
+
+        Resilience(hedge_after_seconds=1.0).call(fn, "query", "t", read=True, hedge=True)
+        assert fn.call_count == 1
+        assert "DynamoDBHedges" not in counted
+
+    def test_hedge_error_falls_back_to_primary(self, counted: Dict[str, float]) -> None:
+        """Test that a failed hedge does not hide a slow but successful primary."""
+        answers: List[str] = []
+
+        def fn() -> Dict[str, Any]:
+            answers.append("call")
+            if len(answers) == 2:
+                raise error("InternalServerError", 500)
+            threading.Event().wait(0.05)
+            return {"from": "primary"}
+
+        policy = Resilience(hedge_after_seconds=0.01)
+        assert policy.call(fn, "get_item", "t", read=True, hedge=True) == {"from": "primary"}
+        assert "DynamoDBHedgeWins" not in counted
+
+
+class TestDdbCall:
+    """Test that ddb_call goes through the policy."""
+
+    def test_retries_through_ddb_call(self, counted: Dict[str, float]) -> None:
+        """Test a throttled client call retried under the container policy."""
+        client = MagicMock()
+        client.put_item.side_effect = [error("ProvisionedThroughputExceededException"), {}]
+
+        with patch.dict("os.environ", {"DDB_MAX_RETRIES": "3"}):
+            ddb_call(client, "put_item", TableName="t", Item={})
+        assert client.put_item.call_count == 2
+
+    def test_table_of(self) -> None:
+        """Test naming the breaker's table for each call shape."""
+        table = MagicMock()
+        table.name = "users"
+        assert table_of(MagicMock(), {"TableName": "searches"}) == "searches"
+        assert table_of(table, {"Key": {}}) == "users"
+        assert table_of(MagicMock(), {"RequestItems": {"b": [], "a": []}}) == "a,b"
@@ -0,0 +1,163 @@
+"""Unit tests for the router and middleware pipeline."""
+
+import json
+from typing import Any, Dict, List
+from unittest.mock import MagicMock
+
+from botocore.exceptions import ClientError, EndpointConnectionError, ReadTimeoutError
+
+from .router import (
+    Request,
+    RouteHandler,
+    Router,
+    authenticate,
+    chain,
+    json_body,
+    map_errors,
+)
+from .schema import Schema, string
+from .utils import create_response
+
+CLAIMS = {"authorizer": {"claims": {"sub": "user-1", "email": "u@example.com"}}}
+
+
+def make_event(method: str, path: str, body: Any = None) -> Dict[str, Any]:
+    """Build a minimal API Gateway proxy event."""
+    return {
+        "httpMethod": method,
+        "path": path,
+        "requestContext": CLAIMS,
+        "body": json.dumps(body) if body is not None else None,
+    }
+
+
+def context() -> MagicMock:
+    """Build a Lambda context."""
+    ctx = MagicMock()
+    ctx.aws_request_id = "req-1"
+    return ctx
+
+
+class TestRouter:
+    """Test route matching and dispatch."""
+
+    def test_path_parameters(self) -> None:
+        """Test that templated segments become path parameters."""
+        router = Router()
+
+        @router.route("GET", "/tiles/{z}/{x}/{y}")
+        def tile(request: Request) -> Dict[str, Any]:
+            return create_response(200, request.path_params)
+
+        result = router.dispatch(make_event("GET", "/tiles/3/1/2"), context())
+        assert json.loads(result["body"]) == {"z": "3", "x": "1", "y": "2"}
+
+    def test_static_route_before_template(self) -> None:
+        """Test that routes are tried in registration order."""
+        router = Router()
+        router.add("GET", "/searches/trending", lambda r: create_response(200, "trending"))
+        router.add("GET", "/searches/{id}", lambda r: create_response(200, "item"))
+
+        result = router.dispatch(make_event("GET", "/searches/trending"), context())
+        assert json.loads(result["body"]) == "trending"
+
+    def test_pinned_path_serves_unmatched_events(self) -> None:
+        """Test per-resource dispatch of paths the router does not know."""
+        router = Router()
+        router.add("GET", "/user", lambda r: create_response(200, "user"))
+
+        result = router.dispatch(make_event("GET", "/elsewhere"), context(), path="/user")
+        assert result["statusCode"] == 200
+
+    def test_pinned_path_keeps_matched_routes(self) -> None:
+        """Test that a per-resource function still serves its sub-resources."""
+        router = Router()
+        router.add("GET", "/searches", lambda r: create_response(200, "list"))
+        router.add("GET", "/searches/trending", lambda r: create_response(200, "trending"))
+
+        event = make_event("GET", "/searches/trending")
+        result = router.dispatch(event, context(), path="/searches")
+        assert json.loads(result["body"]) == "trending"
+
+    def test_lambda_handler_emits_metrics(self, capsys: Any) -> None:
+        """Test that the entry point wraps dispatch in the invocation middleware."""
+        router = Router()
+        router.add("GET", "/x", lambda r: create_response(204, None))
+
+        assert router.lambda_handler()(make_event("GET", "/x"), context())["statusCode"] == 204
+        emf = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert any(record.get("Status") == "204" for record in emf)
+
+
+class TestMiddleware:
+    """Test the built-in middleware."""
+
+    def test_chain_order(self) -> None:
+        """Test that the first middleware is outermost."""
+        calls: List[str] = []
+
+        def tag(name: str) -> Any:
+            def middleware(next_handler: RouteHandler) -> RouteHandler:
+                def wrapper(request: Request) -> Dict[str, Any]:
+                    calls.append(name)
+                    return next_handler(request)
+
+                return wrapper
+
+            return middleware
+
+        handler = chain(lambda r: create_response(200, None), [tag("outer"), tag("inner")])
+        handler(Request(make_event("GET", "/"), context()))
+        assert calls == ["outer", "inner"]
+
+    def test_authenticate_sets_user(self) -> None:
+        """Test that claims are copied onto the request."""
+        handler = authenticate(lambda r: create_response(200, [r.user_id, r.email]))
+        result = handler(Request(make_event("GET", "/"), context()))
+        assert json.loads(result["body"]) == ["user-1", "u@example.com"]
+
+    def test_authenticate_rejects_missing_claims(self) -> None:
+        """Test the 401 response."""
+        handler = authenticate(lambda r: create_response(200, None))
+        result = handler(Request({"httpMethod": "GET"}, context()))
+        assert result["statusCode"] == 401
+
+    def test_json_body(self) -> None:
+        """Test that valid bodies are parsed and invalid ones get a 400."""
+        schema = Schema({"query": string(required=True)})
+        handler = json_body(schema)(lambda r: create_response(200, r.body))
+
+        ok = handler(Request(make_event("POST", "/", {"query": "q"}), context()))
+        assert json.loads(ok["body"]) == {"query": "q"}
+
+        bad = handler(Request(make_event("POST", "/", {}), context()))
+        assert bad["statusCode"] == 400
+        assert json.loads(bad["body"])["details"] == ["query is required"]
+
+    def test_map_errors(self) -> None:
+        """Test that ClientError becomes a 500 with the given message."""
+
+        @map_errors("Failed to do it")
+        def failing() -> Dict[str, Any]:
+            raise ClientError({"Error": {"Code": "Boom"}}, "PutItem")
+
+        result = failing()
+        assert result["statusCode"] == 500
+        assert json.loads(result["body"]) == {"error": "Failed to do it"}
+
+    def test_map_errors_botocore(self) -> None:
+        """Test that client timeouts become a 504 and other transport errors a 503."""
+        errors = [
+            ReadTimeoutError(endpoint_url="https://dynamodb"),
+            EndpointConnectionError(endpoint_url="https://dynamodb"),
+        ]
+
+        @map_errors("Failed to do it")
+        def failing() -> Dict[str, Any]:
+            raise errors.pop(0)
+
+        timed_out, unreachable = failing(), failing()
+        assert timed_out["statusCode"] == 504
+        assert json.loads(timed_out["body"]) == {"error": "Failed to do it"}
+        assert unreachable["statusCode"] == 503
+        assert unreachable["headers"]["Retry-After"] == "1"
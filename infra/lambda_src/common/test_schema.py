@@ -0,0 +1,109 @@
+"""Unit tests for compiled request schemas."""
+
+import json
+
+import pytest
+
+from .schema import RequestValidationError, Schema, number, string, url
+from .utils import validate_string, validate_url
+
+SCHEMA = Schema(
+    {"name": string(max_length=5, required=True), "avatarUrl": url()},
+    max_body_bytes=64,
+)
+
+
+class TestFieldChecks:
+    """Test that compiled checks match the legacy validators."""
+
+    @pytest.mark.parametrize("value", [None, "", "abc", "abcdef", 12, ["x"]])
+    def test_string_matches_validate_string(self, value: object) -> None:
+        """Test string() against validate_string for the same options."""
+        check = string(max_length=5, required=True)("name")
+        _, expected = validate_string(value, "name", max_length=5, required=True)
+        assert check(value) == expected
+
+    @pytest.mark.parametrize(
+        "value", [None, "", "https://x.io/a.png", "ftp://x", "http://" + "a" * 2048, 5]
+    )
+    def test_url_matches_validate_url(self, value: object) -> None:
+        """Test url() against validate_url for the same options."""
+        check = url()("avatarUrl")
+        _, expected = validate_url(value, "avatarUrl")
+        assert check(value) == expected
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            (None, None),
+            (0, None),
+            (-90.0, None),
+            (12.5, None),
+            (90.5, "lat must be between -90 and 90"),
+            ("12", "lat must be a number"),
+            (True, "lat must be a number"),
+        ],
+    )
+    def test_number(self, value: object, expected: object) -> None:
+        """Test number() type and range checks; booleans are not numbers."""
+        assert number(minimum=-90, maximum=90)("lat")(value) == expected
+
+    def test_required_number(self) -> None:
+        """Test that a required number must be present."""
+        assert number(required=True)("lng")(None) == "lng is required"
+
+
+class TestSchemaValidate:
+    """Test whole-body validation."""
+
+    def test_valid_body(self) -> None:
+        """Test that a valid body has no errors."""
+        assert SCHEMA.validate({"name": "Ann", "avatarUrl": "https://x.io/a.png"}) == []
+
+    def test_collects_all_errors(self) -> None:
+        """Test that every failing field is reported."""
+        errors = SCHEMA.validate({"name": "toolong", "avatarUrl": "nope"})
+        assert len(errors) == 2
+
+    def test_rejects_unknown_fields(self) -> None:
+        """Test that fields outside the schema are rejected by name."""
+        errors = SCHEMA.validate({"name": "Ann", "isAdmin": True, "extra": 1})
+        assert errors == ["extra is not an allowed field", "isAdmin is not an allowed field"]
+
+    def test_allow_unknown(self) -> None:
+        """Test that unknown fields can be explicitly allowed."""
+        schema = Schema({"name": string()}, allow_unknown=True)
+        assert schema.validate({"other": 1}) == []
+
+    def test_non_object_body(self) -> None:
+        """Test that a JSON array or scalar is rejected."""
+        assert SCHEMA.validate(["name"]) == ["request body must be a JSON object"]
+
+
+class TestSchemaDecode:
+    """Test raw body decoding."""
+
+    def test_empty_body_is_empty_object(self) -> None:
+        """Test that a missing body decodes to {}."""
+        assert SCHEMA.decode(None) == {}
+        assert SCHEMA.decode("") == {}
+
+    def test_invalid_json(self) -> None:
+        """Test that malformed JSON raises a validation error."""
+        with pytest.raises(RequestValidationError) as exc:
+            SCHEMA.decode("{bad")
+        assert exc.value.to_body() == {"error": "Invalid JSON in request body"}
+
+    def test_oversized_body_rejected_before_parsing(self) -> None:
+        """Test that the size limit applies to UTF-8 bytes before json.loads."""
+        with pytest.raises(RequestValidationError) as exc:
+            SCHEMA.decode(json.dumps({"name": "é" * 40}, ensure_ascii=False))
+        assert "exceeds 64 bytes" in exc.value.error
+
+    def test_load_raises_with_details(self) -> None:
+        """Test that load() reports field errors as details."""
+        with pytest.raises(RequestValidationError) as exc:
+            SCHEMA.load(json.dumps({"avatarUrl": "nope"}))
+        body = exc.value.to_body()
+        assert body["error"] == "Validation failed"
+        assert "name is required" in body["details"]
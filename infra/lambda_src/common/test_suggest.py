@@ -0,0 +1,182 @@
+"""Unit tests for the global suggest index."""
+
+import math
+import random
+from collections import Counter
+from typing import Any, Dict, Iterator, List
+from unittest.mock import patch
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+
+from . import suggest
+from .suggest import (
+    SuggestIndex,
+    build_index,
+    get_suggest_index,
+    normalize_prefix,
+    pack_index,
+    read_index,
+    read_pointer,
+    unpack_index,
+    write_index,
+)
+
+TABLE = "test-trending-table"
+
+COUNTS = {
+    "coffee": 9,
+    "coffee shop": 7,
+    "cocktail bar": 5,
+    "cod": 3,
+    "pizza": 8,
+    "pizza near me": 4,
+    "my home address": 1,
+}
+
+
+class FakeClock:
+    """Monotonic clock moved by hand."""
+
+    def __init__(self) -> None:
+        """Start at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def fresh_container() -> Iterator[None]:
+    """Start each test without a loaded index."""
+    suggest._loaded, suggest._checked_at = None, -math.inf
+    yield
+    suggest._loaded, suggest._checked_at = None, -math.inf
+
+
+def create_trending_table() -> Any:
+    """Create the trending table and return a client."""
+    client = boto3.client("dynamodb")
+    client.create_table(
+        TableName=TABLE,
+        KeySchema=[
+            {"AttributeName": "pk", "KeyType": "HASH"},
+            {"AttributeName": "sk", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "pk", "AttributeType": "S"},
+            {"AttributeName": "sk", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return client
+
+
+def brute_force(counts: Dict[str, int], prefix: str, k: int, min_users: int) -> List[str]:
+    """The true top k for a prefix."""
+    matches = [(q, n) for q, n in counts.items() if q.startswith(prefix) and n >= min_users]
+    return [q for q, _ in sorted(matches, key=lambda entry: (-entry[1], entry[0]))[:k]]
+
+
+class TestBuildIndex:
+    """Test building and querying the index in memory."""
+
+    def test_lookup(self) -> None:
+        """Test ranking, prefix filtering, limits and the user threshold."""
+        index = SuggestIndex(build_index(COUNTS, k=3, min_users=2))
+
+        assert index.lookup("co") == [
+            {"query": "coffee", "users": 9},
+            {"query": "coffee shop", "users": 7},
+            {"query": "cocktail bar", "users": 5},
+        ]
+        assert [s["query"] for s in index.lookup("coffee ")] == ["coffee shop"]
+        assert [s["query"] for s in index.lookup("p", limit=1)] == ["pizza"]
+        assert index.lookup("my") == [] and index.lookup("zz") == []
+
+    def test_pruned_prefixes_match_brute_force(self) -> None:
+        """Test that leaving out derivable prefixes never changes an answer."""
+        rng = random.Random(3)
+        words = ["coffee", "cafe", "car", "cart", "park", "pizza", "pier", "museum", "mall"]
+        counts = Counter(" ".join(rng.sample(words, rng.randint(1, 3))) for _ in range(3000))
+        payload = build_index(counts, k=5, min_users=2)
+        index = SuggestIndex(payload)
+
+        full_prefixes = {q[:n] for q in counts for n in range(1, min(len(q), 20) + 1)}
+        assert len(payload["prefixes"]) < len(full_prefixes) / 2
+        for prefix in full_prefixes:
+            expected = brute_force(counts, prefix, 5, 2)
+            assert [s["query"] for s in index.lookup(prefix)] == expected, prefix
+
+    def test_normalize_prefix(self) -> None:
+        """Test case, whitespace and a meaningful trailing space."""
+        assert normalize_prefix("  Coffee   SH") == "coffee sh"
+        assert normalize_prefix("new ") == "new "
+        assert normalize_prefix("   ") == ""
+
+    def test_pack_in_chunks(self) -> None:
+        """Test that a large index is split and reassembled."""
+        payload = build_index({f"query {i}": 3 for i in range(2000)})
+        with patch.object(suggest, "CHUNK_BYTES", 1000):
+            chunks = pack_index(payload)
+        assert len(chunks) > 1
+        assert unpack_index(chunks, "v").lookup("query 1") == SuggestIndex(payload).lookup(
+            "query 1"
+        )
+
+
+class TestStoredIndex:
+    """Test writing versions and loading them in a container."""
+
+    def test_write_and_read(self, mock_dynamodb: None) -> None:
+        """Test that the pointer names a version whose chunks load back."""
+        client = create_trending_table()
+        with patch.object(suggest, "CHUNK_BYTES", 100):
+            summary = write_index(client, TABLE, build_index(COUNTS), 1_700_000_000, 1_700_086_400)
+
+        assert summary["version"] == "1700000000" and summary["chunks"] > 1
+        pointer = read_pointer(client, TABLE)
+        assert pointer == {"version": "1700000000", "chunks": summary["chunks"]}
+        index = read_index(client, TABLE, pointer)
+        assert index is not None and index.lookup("pi")[0]["query"] == "pizza"
+
+        # A version whose chunks are gone is not loaded
+        assert read_index(client, TABLE, {"version": "1", "chunks": 1}) is None
+
+    def test_loaded_once_and_refreshed(self, mock_dynamodb: None) -> None:
+        """Test that warm lookups skip DynamoDB until the refresh interval passes."""
+        client = create_trending_table()
+        clock = FakeClock()
+        assert get_suggest_index(lambda: client, TABLE, 300, clock) is None
+
+        write_index(client, TABLE, build_index(COUNTS), 100, 200)
+        clock.now = 10
+        assert get_suggest_index(lambda: client, TABLE, 300, clock) is None
+
+        clock.now = 400
+        first = get_suggest_index(lambda: client, TABLE, 300, clock)
+        assert first is not None and first.version == "100"
+
+        write_index(client, TABLE, build_index({"tea": 5}), 101, 201)
+        with patch.object(client, "get_item", side_effect=AssertionError("no read")):
+            clock.now = 500
+            assert get_suggest_index(lambda: client, TABLE, 300, clock) is first
+
+        clock.now = 800
+        second = get_suggest_index(lambda: client, TABLE, 300, clock)
+        assert second is not None and second.version == "101"
+
+    def test_failed_refresh_keeps_index(self, mock_dynamodb: None) -> None:
+        """Test that an unreadable pointer leaves the loaded index in service."""
+        client = create_trending_table()
+        clock = FakeClock()
+        write_index(client, TABLE, build_index(COUNTS), 100, 200)
+        loaded = get_suggest_index(lambda: client, TABLE, 300, clock)
+        assert loaded is not None
+
+        clock.now = 400
+        error = ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "Get")
+        with patch.object(client, "get_item", side_effect=error):
+            assert get_suggest_index(lambda: client, TABLE, 300, clock) is loaded
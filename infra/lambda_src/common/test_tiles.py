@@ -0,0 +1,86 @@
+"""Unit tests for heatmap tile math and counters."""
+
+import os
+from collections import Counter
+from unittest.mock import patch
+
+import boto3
+
+from .tiles import (
+    CELL_COUNT,
+    GRID_SIZE,
+    increment_tile,
+    locate,
+    pack_counts,
+    quadkey,
+    read_tile,
+    tile_key,
+    tile_zooms,
+    unpack_counts,
+)
+
+TABLE = "test-tiles-table"
+
+
+class TestTileMath:
+    """Test Web Mercator tile and cell lookup."""
+
+    def test_locate(self) -> None:
+        """Test a known tile, and that cells subdivide the next zoom levels."""
+        x, y, cell = locate(37.7749, -122.4194, 12)
+        assert (x, y) == (655, 1583)
+
+        # The cell grid is the tile GRID_SIZE levels of zoom further in
+        fine_x, fine_y, _ = locate(37.7749, -122.4194, 16)
+        assert (x * GRID_SIZE + cell % GRID_SIZE, y * GRID_SIZE + cell // GRID_SIZE) == (
+            fine_x,
+            fine_y,
+        )
+
+    def test_locate_edges(self) -> None:
+        """Test that points on or past the map edges land in edge cells."""
+        assert locate(90.0, 180.0, 2) == (3, 0, GRID_SIZE - 1)
+        assert locate(-90.0, -180.0, 2) == (0, 3, CELL_COUNT - GRID_SIZE)
+        assert locate(0.0, 0.0, 0)[:2] == (0, 0)
+
+    def test_quadkey(self) -> None:
+        """Test the quadkey digits and the zoom 0 key."""
+        assert quadkey(3, 3, 5) == "213"
+        assert quadkey(1, 1, 1) == "3"
+        assert tile_key(0, 0, 0) == "tile#"
+        assert tile_key(3, 3, 5) == "tile#213"
+
+    def test_tile_zooms(self) -> None:
+        """Test defaults and that invalid levels are ignored."""
+        with patch.dict(os.environ, {"TILE_ZOOMS": ""}):
+            assert tile_zooms() == [4, 8, 12]
+        with patch.dict(os.environ, {"TILE_ZOOMS": "10, 2,x,21,2"}):
+            assert tile_zooms() == [2, 10]
+
+
+class TestCounters:
+    """Test counter storage and packing."""
+
+    def test_pack_round_trip(self) -> None:
+        """Test that counts land at their cell index and stay within 32 bits."""
+        counts = unpack_counts(pack_counts({0: 3, 255: 2**40, 999: 1}))
+        assert len(counts) == CELL_COUNT
+        assert counts[0] == 3
+        assert counts[255] == 2**32 - 1
+        assert sum(counts[1:255]) == 0
+
+    def test_increment_and_read(self, mock_dynamodb: None) -> None:
+        """Test that increments for one tile accumulate in one item."""
+        client = boto3.client("dynamodb")
+        client.create_table(
+            TableName=TABLE,
+            KeySchema=[{"AttributeName": "tile", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "tile", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        increment_tile(client, TABLE, "tile#0", Counter({5: 2, 17: 1}))
+        increment_tile(client, TABLE, "tile#0", Counter({5: 1}))
+
+        assert read_tile(client, TABLE, "tile#0") == {5: 3, 17: 1}
+        assert read_tile(client, TABLE, "tile#1") == {}
@@ -0,0 +1,131 @@
+"""Unit tests for the trending counters."""
+
+import os
+from collections import Counter
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import boto3
+from botocore.exceptions import ClientError
+
+from .trending import (
+    bucket_name,
+    bucket_start,
+    counter_key,
+    normalize_query,
+    read_bucket_counts,
+    read_top,
+    record_searches,
+    top_k,
+    write_top,
+)
+
+TABLE = "test-trending-table"
+NOW = 1_700_000_000  # 2023-11-14T22:13:20Z
+
+
+def create_trending_table() -> Any:
+    """Create the trending table as dynamodb.tf does and return a client."""
+    client = boto3.client("dynamodb")
+    client.create_table(
+        TableName=TABLE,
+        KeySchema=[
+            {"AttributeName": "pk", "KeyType": "HASH"},
+            {"AttributeName": "sk", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "pk", "AttributeType": "S"},
+            {"AttributeName": "sk", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return client
+
+
+class TestBuckets:
+    """Test bucket and query normalization helpers."""
+
+    def test_bucket_named_after_utc_start(self) -> None:
+        """Test that timestamps fall into the bucket starting on the hour."""
+        start = bucket_start(NOW, 3600)
+        assert start == 1_699_999_200
+        assert bucket_name(start) == "20231114T2200"
+
+    def test_normalize_query(self) -> None:
+        """Test case and whitespace folding and truncation."""
+        assert normalize_query("  Coffee   NEAR me ") == "coffee near me"
+        assert len(normalize_query("a" * 500)) == 100
+
+    def test_top_k_orders_by_count_then_query(self) -> None:
+        """Test that ties are broken alphabetically."""
+        counts = Counter({"tacos": 3, "pizza": 5, "coffee": 3, "gym": 1})
+        assert top_k(counts, 3) == [
+            {"query": "pizza", "count": 5},
+            {"query": "coffee", "count": 3},
+            {"query": "tacos", "count": 3},
+        ]
+
+
+class TestCounters:
+    """Test counter increments and shard merging against moto."""
+
+    def test_increments_folded_and_merged_across_shards(self, mock_dynamodb: None) -> None:
+        """Test that each query updates one counter and shards sum back up."""
+        client = create_trending_table()
+        searches = [(NOW, "Pizza"), (NOW + 1, "pizza "), (NOW, "coffee"), (NOW - 3600, "pizza")]
+
+        with patch.dict(os.environ, {"TRENDING_SHARDS": "4"}):
+            assert record_searches(client, TABLE, searches) == 3
+            # A second batch lands on random shards
+            record_searches(client, TABLE, [(NOW, "pizza")] * 5)
+
+        counts = read_bucket_counts(client, TABLE, "20231114T2200", 4)
+        assert counts == Counter({"pizza": 7, "coffee": 1})
+        assert read_bucket_counts(client, TABLE, "20231114T2100", 4) == Counter({"pizza": 1})
+
+    def test_shard_reads_paginate(self) -> None:
+        """Test that every page of every shard is read."""
+        client = MagicMock()
+        client.query.side_effect = [
+            {"Items": [{"sk": {"S": "a"}, "count": {"N": "2"}}], "LastEvaluatedKey": {"k": 1}},
+            {"Items": [{"sk": {"S": "a"}, "count": {"N": "1"}}]},
+            {"Items": [{"sk": {"S": "b"}, "count": {"N": "4"}}]},
+        ]
+
+        assert read_bucket_counts(client, TABLE, "b", 2) == Counter({"a": 3, "b": 4})
+        pks = [c[1]["ExpressionAttributeValues"][":pk"]["S"] for c in client.query.call_args_list]
+        assert pks == [counter_key("b", 0), counter_key("b", 0), counter_key("b", 1)]
+        assert client.query.call_args_list[1][1]["ExclusiveStartKey"] == {"k": 1}
+
+    def test_disabled_without_table(self) -> None:
+        """Test that no table means no calls."""
+        client = MagicMock()
+        assert record_searches(client, "", [(NOW, "pizza")]) == 0
+        client.update_item.assert_not_called()
+
+    def test_update_errors_not_raised(self) -> None:
+        """Test that a throttled counter update does not fail the caller."""
+        client = MagicMock()
+        client.update_item.side_effect = ClientError(
+            {"Error": {"Code": "ProvisionedThroughputExceededException"}}, "UpdateItem"
+        )
+        assert record_searches(client, TABLE, [(NOW, "pizza"), (NOW, "tacos")]) == 0
+        assert client.update_item.call_count == 2
+
+
+class TestTopItems:
+    """Test storing and reading precomputed lists."""
+
+    def test_round_trip(self, mock_dynamodb: None) -> None:
+        """Test that a written list reads back in one call."""
+        client = create_trending_table()
+        items = [{"query": "pizza", "count": 7}]
+
+        assert read_top(client, TABLE) is None
+        write_top(client, TABLE, "latest", "20231114T2100", items, NOW, NOW + 60)
+
+        assert read_top(client, TABLE) == {
+            "bucket": "20231114T2100",
+            "generatedAt": NOW,
+            "items": items,
+        }
@@ -0,0 +1,164 @@
+"""
+Web Mercator tile counters behind the search-density heatmap.
+
+The tiles stream consumer maps every new located search to one tile per zoom
+level in ``TILE_ZOOMS`` and to a cell of that tile's ``GRID_SIZE`` x
+``GRID_SIZE`` grid. It then increments the cell counter. A tile is a single
+item, so ``GET /tiles/{z}/{x}/{y}`` is one GetItem, and a stream batch needs
+one UpdateItem per tile touched.
+
+Tiles table layout (string ``tile`` hash key)::
+
+    tile#<quadkey>  c<cell>...  one number attribute per non-empty cell
+
+Cells are numbered row-major from the tile's north-west corner, so a tile's
+counts pack into the ``GRID_SIZE * GRID_SIZE`` array served to clients.
+"""
+
+import base64
+import math
+import os
+import struct
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from .ddb import ddb_call
+
+DEFAULT_ZOOMS = (4, 8, 12)
+MAX_ZOOM = 20
+GRID_SIZE = 16
+CELL_COUNT = GRID_SIZE * GRID_SIZE
+
+# Web Mercator stops here; the square world map ends at these latitudes
+MAX_LATITUDE = 85.05112878
+
+TILE_PREFIX = "tile#"
+CELL_PREFIX = "c"
+
+# Counts are packed as little-endian unsigned 32-bit integers
+PACK_FORMAT = f"<{CELL_COUNT}I"
+MAX_PACKED_COUNT = 0xFFFFFFFF
+
+
+def tile_zooms() -> List[int]:
+    """
+    Zoom levels that are counted and served (TILE_ZOOMS, e.g. "4,8,12").
+
+    Entries that are not integers between 0 and 20 are ignored.
+    """
+    raw = os.environ.get("TILE_ZOOMS", "")
+    if not raw.strip():
+        return list(DEFAULT_ZOOMS)
+    zooms = set()
+    for part in raw.split(","):
+        part = part.strip()
+        if part.isdigit() and int(part) <= MAX_ZOOM:
+            zooms.add(int(part))
+    return sorted(zooms)
+
+
+def locate(lat: float, lng: float, zoom: int) -> Tuple[int, int, int]:
+    """
+    Find the tile and cell containing a point.
+
+    Args:
+        lat: Latitude in degrees; clamped to the Web Mercator range
+        lng: Longitude in degrees
+        zoom: Tile zoom level
+
+    Returns:
+        Tuple of (tile x, tile y, cell index)
+    """
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    pixels = GRID_SIZE << zoom
+    fx = (lng + 180.0) / 360.0
+    fy = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0
+    # The east and south edges belong to the last cell, not one past it
+    px = min(max(int(fx * pixels), 0), pixels - 1)
+    py = min(max(int(fy * pixels), 0), pixels - 1)
+    return px // GRID_SIZE, py // GRID_SIZE, (py % GRID_SIZE) * GRID_SIZE + px % GRID_SIZE
+
+
+def quadkey(zoom: int, x: int, y: int) -> str:
+    """Encode a tile as a quadkey; a tile's key prefixes its children's."""
+    digits = []
+    for level in range(zoom, 0, -1):
+        mask = 1 << (level - 1)
+        digits.append(str((1 if x & mask else 0) + (2 if y & mask else 0)))
+    return "".join(digits)
+
+
+def tile_key(zoom: int, x: int, y: int) -> str:
+    """Hash key of a tile's counter item (``tile#`` alone for zoom 0)."""
+    return TILE_PREFIX + quadkey(zoom, x, y)
+
+
+def increment_tile(ddb: Any, table: str, key: str, cells: Counter[int]) -> None:
+    """
+    Add a batch of cell increments to one tile with a single UpdateItem.
+
+    Args:
+        ddb: DynamoDB client
+        table: Tiles table name
+        key: Output of ``tile_key``
+        cells: Cell index -> increment
+
+    Raises:
+        ClientError: If the update fails
+    """
+    actions = []
+    values: Dict[str, Any] = {}
+    for i, (cell, count) in enumerate(sorted(cells.items())):
+        actions.append(f"{CELL_PREFIX}{cell} :v{i}")
+        values[f":v{i}"] = {"N": str(count)}
+    ddb_call(
+        ddb,
+        "update_item",
+        TableName=table,
+        Key={"tile": {"S": key}},
+        UpdateExpression="ADD " + ", ".join(actions),
+        ExpressionAttributeValues=values,
+    )
+
+
+def read_tile(ddb: Any, table: str, key: str) -> Dict[int, int]:
+    """
+    Read a tile's non-empty cells.
+
+    Args:
+        ddb: DynamoDB client
+        table: Tiles table name
+        key: Output of ``tile_key``
+
+    Returns:
+        Cell index -> count; empty if nothing was counted in the tile
+    """
+    response = ddb_call(ddb, "get_item", TableName=table, Key={"tile": {"S": key}})
+    cells: Dict[int, int] = {}
+    for name, value in response.get("Item", {}).items():
+        if name.startswith(CELL_PREFIX) and name[1:].isdigit() and "N" in value:
+            cells[int(name[1:])] = int(value["N"])
+    return cells
+
+
+def pack_counts(cells: Dict[int, int]) -> str:
+    """
+    Pack cell counts into the array served to clients.
+
+    Args:
+        cells: Cell index -> count
+
+    Returns:
+        Base64 of ``GRID_SIZE * GRID_SIZE`` little-endian uint32 counts,
+        row-major from the north-west corner
+    """
+    counts = [0] * CELL_COUNT
+    for cell, count in cells.items():
+        if 0 <= cell < CELL_COUNT:
+            counts[cell] = min(count, MAX_PACKED_COUNT)
+    return base64.b64encode(struct.pack(PACK_FORMAT, *counts)).decode("ascii")
+
+
+def unpack_counts(packed: str) -> List[int]:
+    """Inverse of ``pack_counts``."""
+    return list(struct.unpack(PACK_FORMAT, base64.b64decode(packed)))
@@ -0,0 +1,253 @@
+"""
+Sharded, time-bucketed search counters behind the trending panel.
+
+Searches live in per-user partitions, so counting across users would need a
+table scan. Instead every recorded search increments a counter for its
+normalized query in the current time bucket. Counters are spread over
+``TRENDING_SHARDS`` partitions per bucket so a busy bucket is not a hot key;
+the trending aggregator merges the shards into one precomputed top-K item,
+which ``GET /searches/trending`` reads with a single GetItem.
+
+Trending table layout (string ``pk``/``sk``)::
+
+    counts#<bucket>#<shard>  <query>  count, expiresAt
+    top#<bucket>             top      bucket, items, generatedAt, expiresAt
+    top#latest               top      the most recent window, same attributes
+
+Buckets are named after their UTC start, e.g. ``20240101T1300``.
+"""
+
+import heapq
+import json
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from .ddb import ddb_call
+from .log import logger
+from .utils import env_int
+
+DEFAULT_SHARDS = 8
+DEFAULT_BUCKET_SECONDS = 3600
+DEFAULT_TOP_K = 20
+DEFAULT_RETENTION_SECONDS = 2 * 24 * 3600
+MAX_QUERY_LENGTH = 100
+
+LATEST = "latest"
+TOP_SORT_KEY = "top"
+
+
+def shard_count() -> int:
+    """Number of counter partitions per bucket (TRENDING_SHARDS)."""
+    return max(1, env_int("TRENDING_SHARDS", DEFAULT_SHARDS))
+
+
+def bucket_seconds() -> int:
+    """Bucket width in seconds (TRENDING_BUCKET_SECONDS)."""
+    return max(60, env_int("TRENDING_BUCKET_SECONDS", DEFAULT_BUCKET_SECONDS))
+
+
+def bucket_start(epoch_seconds: int, width: Optional[int] = None) -> int:
+    """Return the start of the bucket containing a timestamp."""
+    width = width or bucket_seconds()
+    return epoch_seconds - epoch_seconds % width
+
+
+def bucket_name(start: int) -> str:
+    """Name a bucket after its UTC start time."""
+    return time.strftime("%Y%m%dT%H%M", time.gmtime(start))
+
+
+def normalize_query(query: str) -> str:
+    """
+    Fold a query into its counter key.
+
+    Args:
+        query: Raw search query
+
+    Returns:
+        Lower-cased query with whitespace collapsed, at most 100 characters
+    """
+    return " ".join(query.lower().split())[:MAX_QUERY_LENGTH]
+
+
+def counter_key(bucket: str, shard: int) -> str:
+    """Partition key of one counter shard."""
+    return f"counts#{bucket}#{shard}"
+
+
+def top_key(bucket: str) -> str:
+    """Partition key of a bucket's top-K item (``latest`` for the newest window)."""
+    return f"top#{bucket}"
+
+
+def record_searches(ddb: Any, table: str, searches: Iterable[Tuple[int, str]]) -> int:
+    """
+    Increment the trending counters for a set of searches.
+
+    Searches for the same query in the same bucket are folded into one
+    UpdateItem. Each update goes to a random shard. Failures are logged, not
+    raised: trending counts are best effort and must never fail the write
+    that produced them.
+
+    Args:
+        ddb: DynamoDB client
+        table: Trending table name; empty disables counting
+        searches: (epoch seconds, raw query) pairs
+
+    Returns:
+        Number of counters updated
+    """
+    if not table:
+        return 0
+
+    width = bucket_seconds()
+    retention = env_int("TRENDING_RETENTION_SECONDS", DEFAULT_RETENTION_SECONDS)
+    increments: Counter[Tuple[int, str]] = Counter()
+    for created_at, query in searches:
+        normalized = normalize_query(query)
+        if normalized:
+            increments[(bucket_start(created_at, width), normalized)] += 1
+
+    shards = shard_count()
+    updated = 0
+    for (start, query), count in increments.items():
+        try:
+            ddb_call(
+                ddb,
+                "update_item",
+                TableName=table,
+                Key={
+                    "pk": {"S": counter_key(bucket_name(start), random.randrange(shards))},
+                    "sk": {"S": query},
+                },
+                UpdateExpression="ADD #count :n SET expiresAt = if_not_exists(expiresAt, :exp)",
+                ExpressionAttributeNames={"#count": "count"},
+                ExpressionAttributeValues={
+                    ":n": {"N": str(count)},
+                    ":exp": {"N": str(start + retention)},
+                },
+            )
+        except ClientError as e:
+            logger.warning(
+                "Trending update failed",
+                error_code=e.response.get("Error", {}).get("Code", "Unknown"),
+            )
+            continue
+        updated += 1
+    return updated
+
+
+def read_bucket_counts(ddb: Any, table: str, bucket: str, shards: int) -> Counter[str]:
+    """
+    Merge every shard of a bucket into per-query totals.
+
+    Args:
+        ddb: DynamoDB client
+        table: Trending table name
+        bucket: Bucket name
+        shards: Number of shards to read
+
+    Returns:
+        Query -> total count
+    """
+    totals: Counter[str] = Counter()
+    for shard in range(shards):
+        params: Dict[str, Any] = {
+            "TableName": table,
+            "KeyConditionExpression": "pk = :pk",
+            "ExpressionAttributeValues": {":pk": {"S": counter_key(bucket, shard)}},
+            "ProjectionExpression": "sk, #count",
+            "ExpressionAttributeNames": {"#count": "count"},
+        }
+        while True:
+            response = ddb_call(ddb, "query", **params)
+            for item in response.get("Items", []):
+                totals[item["sk"]["S"]] += int(item["count"]["N"])
+            if "LastEvaluatedKey" not in response:
+                break
+            params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return totals
+
+
+def top_k(counts: Counter[str], k: int) -> List[Dict[str, Any]]:
+    """
+    Select the k most searched queries.
+
+    Args:
+        counts: Query -> count
+        k: Number of entries to keep
+
+    Returns:
+        Entries of {"query", "count"}, highest count first, ties by query
+    """
+    best = heapq.nsmallest(k, counts.items(), key=lambda entry: (-entry[1], entry[0]))
+    return [{"query": query, "count": count} for query, count in best]
+
+
+def write_top(
+    ddb: Any,
+    table: str,
+    key: str,
+    bucket: str,
+    items: List[Dict[str, Any]],
+    generated_at: int,
+    expires_at: int,
+) -> None:
+    """
+    Store a precomputed top-K list.
+
+    Args:
+        ddb: DynamoDB client
+        table: Trending table name
+        key: Bucket name, or ``latest``
+        bucket: Bucket (or window start) the list covers
+        items: Output of ``top_k``
+        generated_at: Epoch seconds of the aggregation
+        expires_at: TTL in epoch seconds
+    """
+    ddb_call(
+        ddb,
+        "put_item",
+        TableName=table,
+        Item={
+            "pk": {"S": top_key(key)},
+            "sk": {"S": TOP_SORT_KEY},
+            "bucket": {"S": bucket},
+            # One attribute keeps the read a single small item
+            "items": {"S": json.dumps(items, separators=(",", ":"))},
+            "generatedAt": {"N": str(generated_at)},
+            "expiresAt": {"N": str(expires_at)},
+        },
+    )
+
+
+def read_top(ddb: Any, table: str, key: str = LATEST) -> Optional[Dict[str, Any]]:
+    """
+    Read a precomputed top-K list.
+
+    Args:
+        ddb: DynamoDB client
+        table: Trending table name
+        key: Bucket name, or ``latest`` for the newest window
+
+    Returns:
+        {"bucket", "generatedAt", "items"}, or None if not aggregated yet
+    """
+    response = ddb_call(
+        ddb,
+        "get_item",
+        TableName=table,
+        Key={"pk": {"S": top_key(key)}, "sk": {"S": TOP_SORT_KEY}},
+    )
+    item = response.get("Item")
+    if not item:
+        return None
+    return {
+        "bucket": item["bucket"]["S"],
+        "generatedAt": int(item["generatedAt"]["N"]),
+        "items": json.loads(item["items"]["S"]),
+    }
@@ -1,37 +1,89 @@
 """Common utilities for Lambda functions."""
 
-import json
-import logging
-import sys
-from typing import Any, Dict, Optional, Tuple
+import contextvars
+import functools
+import os
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
 
-# Configure structured logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from .encoding import current_format, encode_body
+from .metrics import metrics
 
-# Ensure we have a handler
-if not logger.handlers:
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(logging.Formatter("%(message)s"))
-    logger.addHandler(handler)
+T = TypeVar("T")
 
 
-def log_info(message: str, **kwargs: Any) -> None:
-    """Log info message with structured data."""
-    log_data = {"level": "INFO", "message": message, **kwargs}
-    logger.info(json.dumps(log_data))
+def env_flag(name: str, default: bool = False) -> bool:
+    """
+    Read a boolean feature flag from the environment.
+
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is unset or empty
+
+    Returns:
+        True for "1", "true", "yes" or "on" (case-insensitive)
+    """
+    value = os.environ.get(name, "").strip().lower()
+    if not value:
+        return default
+    return value in ("1", "true", "yes", "on")
+
+
+def env_float(name: str, default: float) -> float:
+    """
+    Read a float setting from the environment.
+
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is unset, empty or malformed
+
+    Returns:
+        The parsed value
+    """
+    try:
+        return float(os.environ.get(name) or default)
+    except ValueError:
+        return default
+
+
+def env_int(name: str, default: int) -> int:
+    """
+    Read an integer setting from the environment.
+
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is unset, empty or malformed
+
+    Returns:
+        The parsed value
+    """
+    try:
+        return int(os.environ.get(name) or default)
+    except ValueError:
+        return default
+
+
+def in_context(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Bind a function to the caller's context variables, to run in a thread pool.
+
+    Pool threads start with an empty context, so work submitted without this
+    sees no invocation deadline and the default response format. Each call
+    runs in its own copy of the context, so pool threads can call the result
+    concurrently.
 
+    Args:
+        func: Function to run on a pool thread
 
-def log_error(message: str, **kwargs: Any) -> None:
-    """Log error message with structured data."""
-    log_data = {"level": "ERROR", "message": message, **kwargs}
-    logger.error(json.dumps(log_data))
+    Returns:
+        A function that calls ``func`` in a copy of the current context
+    """
+    context = contextvars.copy_context()
 
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        return context.copy().run(func, *args, **kwargs)
 
-def log_warning(message: str, **kwargs: Any) -> None:
-    """Log warning message with structured data."""
-    log_data = {"level": "WARNING", "message": message, **kwargs}
-    logger.warning(json.dumps(log_data))
+    return wrapper
 
 
 def validate_string(
@@ -99,6 +151,9 @@ def create_response(
     """
     Create a standardized API Gateway response.
 
+    The body is encoded in the format negotiated for the running request
+    (JSON by default; see ``common/encoding.py``).
+
     Args:
         status_code: HTTP status code
         body: Response body as dictionary
@@ -107,19 +162,27 @@ def create_response(
     Returns:
         API Gateway response dictionary
     """
+    response_format = current_format()
     headers = {
-        "Content-Type": "application/json",
+        "Content-Type": response_format.content_type,
         "Access-Control-Allow-Origin": "*",
+        "Vary": "Accept",
     }
 
     if additional_headers:
         headers.update(additional_headers)
 
-    return {
+    with metrics.phase("serialize"):
+        serialized, is_base64 = encode_body(body, response_format)
+
+    response = {
         "statusCode": status_code,
         "headers": headers,
-        "body": json.dumps(body),
+        "body": serialized,
     }
+    if is_base64:
+        response["isBase64Encoded"] = True
+    return response
 
 
 def extract_user_claims(event: Dict[str, Any]) -> Dict[str, str]:
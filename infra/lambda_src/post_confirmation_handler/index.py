@@ -10,16 +10,28 @@ from botocore.exceptions import ClientError
 
 # Add parent directory to path for common imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from common.utils import log_error, log_info  # noqa: E402
+from common.ddb import account_capacity, capacity, ddb_call  # noqa: E402
+from common.deadline import deadline_bound  # noqa: E402
+from common.log import log_invocation, logger  # noqa: E402
+from common.memory import memory_probed  # noqa: E402
+from common.metrics import metrics, record_metrics  # noqa: E402
+from common.profiling import profiled  # noqa: E402
+from common.resilience import ddb_client_config  # noqa: E402
 
 
 def get_dynamodb_table() -> Any:
     """Get DynamoDB table resource."""
-    dynamodb = boto3.resource("dynamodb")
+    dynamodb = boto3.resource("dynamodb", config=ddb_client_config())
     table_name = os.environ.get("USERS_TABLE_NAME", "")
     return dynamodb.Table(table_name)
 
 
+@profiled
+@record_metrics
+@memory_probed
+@account_capacity
+@log_invocation
+@deadline_bound
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Handle Cognito post-confirmation trigger.
@@ -34,13 +46,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Returns:
         The event unchanged (required by Cognito triggers)
     """
-    request_id = context.aws_request_id if context else "unknown"
-
-    log_info(
-        "Processing post-confirmation trigger",
-        request_id=request_id,
-        trigger_source=event.get("triggerSource", ""),
-    )
+    logger.bind(trigger_source=event.get("triggerSource", ""))
+    logger.debug("Processing post-confirmation trigger")
 
     try:
         # Extract user attributes from Cognito event
@@ -49,27 +56,18 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         email = user_attributes.get("email", "")
 
         if not user_id:
-            log_error(
-                "Missing user ID in Cognito event",
-                request_id=request_id,
-            )
+            logger.error("Missing user ID in Cognito event")
             # Still return event to not block user confirmation
             return event
 
         if not email:
-            log_error(
-                "Missing email in Cognito event",
-                request_id=request_id,
-                user_id=user_id,
-            )
+            logger.error("Missing email in Cognito event", user_id=user_id)
             # Still return event to not block user confirmation
             return event
 
-        log_info(
-            "Creating default user record",
-            request_id=request_id,
-            user_id=user_id,
-        )
+        logger.bind(user_id=user_id)
+        capacity.set_user(user_id)
+        logger.debug("Creating default user record")
 
         # Get DynamoDB table
         table = get_dynamodb_table()
@@ -88,18 +86,14 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
 
         # Save to DynamoDB
-        table.put_item(Item=user_data)
+        with metrics.phase("dynamodb"):
+            ddb_call(table, "put_item", Item=user_data)
 
-        log_info(
-            "User record created successfully",
-            request_id=request_id,
-            user_id=user_id,
-        )
+        logger.info("User record created successfully")
 
     except ClientError as e:
-        log_error(
+        logger.error(
             "DynamoDB error during post-confirmation",
-            request_id=request_id,
             error=str(e),
             error_code=e.response.get("Error", {}).get("Code", "Unknown"),
         )
@@ -107,11 +101,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # The user can still be created via PUT /user endpoint later
 
     except Exception as e:
-        log_error(
-            "Unexpected error during post-confirmation",
-            request_id=request_id,
-            error=str(e),
-        )
+        logger.error("Unexpected error during post-confirmation", error=str(e))
         # Don't raise exception - we don't want to block user confirmation
 
     # IMPORTANT: Must return the event unchanged for Cognito triggers
@@ -1,75 +1,144 @@
 """Lambda handler for searches endpoint."""
 
-import json
 import os
+import re
 import sys
 import time
-from typing import Any, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 import boto3
-from botocore.exceptions import ClientError
 
 # Add parent directory to path for common imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from common.utils import (  # noqa: E402
-    create_response,
-    extract_user_claims,
-    log_error,
-    log_info,
-    log_warning,
-    validate_string,
+from common.ddb import ddb_call  # noqa: E402
+from common.deadline import current_deadline, decode_continuation, encode_continuation  # noqa: E402
+from common.geocoding import Location, apply_location, get_geocoding_cache  # noqa: E402
+from common.geohash import BoundingBox, cover  # noqa: E402
+from common.idempotency import idempotent  # noqa: E402
+from common.log import logger  # noqa: E402
+from common.metrics import metrics  # noqa: E402
+from common.queue import get_queue  # noqa: E402
+from common.ratelimit import rate_limited  # noqa: E402
+from common.resilience import ddb_client_config  # noqa: E402
+from common.router import Request, Router, authenticate, map_errors  # noqa: E402
+from common.schema import RequestValidationError, Schema, number, string  # noqa: E402
+from common.suggest import (  # noqa: E402
+    DEFAULT_REFRESH_SECONDS,
+    DEFAULT_TOP_K,
+    get_suggest_index,
+    normalize_prefix,
 )
+from common.trending import LATEST, read_top, record_searches  # noqa: E402
+from common.utils import create_response, env_flag, env_int, in_context  # noqa: E402
+
+# Compiled once per container; see common/schema.py
+SEARCH_SCHEMA = Schema(
+    {
+        "query": string(max_length=500, required=True),
+        "lat": number(minimum=-90, maximum=90),
+        "lng": number(minimum=-180, maximum=180),
+    },
+    max_body_bytes=4096,
+)
+
+# Sparse GSI (userId, geohash): only searches with coordinates are indexed
+GEOHASH_INDEX = "SearchesByGeohash"
+DEFAULT_NEARBY_LIMIT = 100
+MAX_NEARBY_LIMIT = 500
+# Range queries per viewport run in parallel on this many threads
+NEARBY_WORKERS = 8
+
+# (low geohash, high geohash, key to resume the range from or None)
+GeohashRange = Tuple[str, str, Optional[Dict[str, Any]]]
+
+# Bucket names written by common/trending.py, e.g. 20240101T1300
+BUCKET_PATTERN = re.compile(r"^\d{8}T\d{4}$")
+
+# The aggregator refreshes the trending list every few minutes
+TRENDING_CACHE_CONTROL = "public, max-age=60"
+
+# The suggest index is rebuilt every few hours and is the same for every user
+SUGGEST_CACHE_CONTROL = "public, max-age=300"
 
 
 def get_ddb_client() -> Tuple[Any, str]:
     """Get DynamoDB client and table name."""
-    ddb = boto3.client("dynamodb")
+    ddb = boto3.client("dynamodb", config=ddb_client_config())
     table = os.environ.get("SEARCHES_TABLE", "")
     return ddb, table
 
 
-def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    """
-    Handle GET and POST requests for /searches endpoint.
+def get_trending_table() -> str:
+    """Get the trending counters table name; empty disables trending."""
+    return os.environ.get("TRENDING_TABLE", "")
 
-    GET: Returns user's search history (up to 20 most recent searches)
-    POST: Creates a new search entry
 
-    Args:
-        event: API Gateway event containing HTTP method and user claims
-        context: Lambda context object
+def get_ingest_queue() -> Any:
+    """
+    Get the ingest queue used by asynchronous POST /searches.
 
     Returns:
-        API Gateway response with search data or success confirmation
+        Queue object, or None when async ingest is disabled or unconfigured
     """
-    request_id = context.aws_request_id if context else "unknown"
-    method = event.get("httpMethod", "")
+    if not env_flag("SEARCHES_ASYNC_INGEST"):
+        return None
+    return get_queue(os.environ.get("SEARCHES_QUEUE_URL", ""))
 
-    log_info(
-        "Processing searches request",
-        request_id=request_id,
-        http_method=method,
-    )
 
-    # Extract user ID from Cognito claims
-    claims = extract_user_claims(event)
-    user_id = claims.get("user_id", "")
+# Created on first use and reused by warm invocations
+_executor: Optional[ThreadPoolExecutor] = None
 
-    if not user_id:
-        log_error("Missing user ID in claims", request_id=request_id)
-        return create_response(401, {"error": "Unauthorized"})
 
-    if method == "GET":
-        return handle_get_searches(user_id, request_id)
-    elif method == "POST":
-        return handle_post_search(event, user_id, request_id)
-    else:
-        log_warning(
-            "Method not allowed",
-            request_id=request_id,
-            method=method,
-        )
-        return create_response(405, {"error": "Method Not Allowed"})
+def get_executor() -> ThreadPoolExecutor:
+    """Get the thread pool used to run viewport range queries concurrently."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=NEARBY_WORKERS, thread_name_prefix="nearby")
+    return _executor
+
+
+router = Router(middleware=[authenticate])
+
+
+@router.route("GET", "/searches")
+def get_searches(request: Request) -> Dict[str, Any]:
+    """GET /searches: the user's 20 most recent searches."""
+    return handle_get_searches(request.user_id, request.request_id)
+
+
+@router.route("POST", "/searches", rate_limited, idempotent)
+def post_search(request: Request) -> Dict[str, Any]:
+    """POST /searches: record a new search."""
+    return handle_post_search(request.event, request.user_id, request.request_id)
+
+
+@router.route("GET", "/searches/trending")
+def get_trending(request: Request) -> Dict[str, Any]:
+    """GET /searches/trending: the precomputed top searches across all users."""
+    return handle_get_trending(request.query.get("bucket", LATEST))
+
+
+@router.route("GET", "/suggest")
+def get_suggest(request: Request) -> Dict[str, Any]:
+    """GET /suggest?q=prefix: popular queries across all users starting with a prefix."""
+    return handle_get_suggest(request.query.get("q", ""), request.query.get("limit"))
+
+
+@router.route("GET", "/searches/nearby")
+def get_nearby(request: Request) -> Dict[str, Any]:
+    """GET /searches/nearby?bbox=west,south,east,north: the user's searches in a viewport."""
+    return handle_get_nearby(
+        request.user_id,
+        request.query.get("bbox", ""),
+        request.query.get("limit"),
+        request.query.get("next"),
+    )
+
+
+# Entry point for the dedicated searches function; events whose path matches
+# no route (API Gateway has already routed them) are served as /searches
+handler = router.lambda_handler(path="/searches")
 
 
 def validate_search_input(body: Dict[str, Any]) -> Tuple[bool, List[str]]:
@@ -82,21 +151,11 @@ def validate_search_input(body: Dict[str, Any]) -> Tuple[bool, List[str]]:
     Returns:
         Tuple of (is_valid, list of error messages)
     """
-    errors = []
-
-    # Validate query field
-    is_valid, error = validate_string(
-        body.get("query"),
-        "query",
-        max_length=500,
-        required=True,
-    )
-    if not is_valid and error:
-        errors.append(error)
-
+    errors = SEARCH_SCHEMA.validate(body)
     return len(errors) == 0, errors
 
 
+@map_errors("Failed to retrieve search history")
 def handle_get_searches(user_id: str, request_id: str) -> Dict[str, Any]:
     """
     Retrieve user's search history from DynamoDB.
@@ -108,15 +167,29 @@ def handle_get_searches(user_id: str, request_id: str) -> Dict[str, Any]:
     Returns:
         API Gateway response with list of searches
     """
-    try:
-        log_info(
-            "Fetching search history",
-            request_id=request_id,
-            user_id=user_id,
-        )
+    return create_response(200, load_recent_searches(user_id))
 
-        ddb, table = get_ddb_client()
-        response = ddb.query(
+
+def load_recent_searches(user_id: str) -> List[Dict[str, str]]:
+    """
+    Read a user's 20 most recent searches.
+
+    Args:
+        user_id: The authenticated user's ID
+
+    Returns:
+        Searches as plain dicts, newest first
+
+    Raises:
+        ClientError: If the query fails
+    """
+    logger.debug("Fetching search history")
+
+    ddb, table = get_ddb_client()
+    with metrics.phase("dynamodb"):
+        response = ddb_call(
+            ddb,
+            "query",
             TableName=table,
             KeyConditions={
                 "userId": {
@@ -128,32 +201,18 @@ def handle_get_searches(user_id: str, request_id: str) -> Dict[str, Any]:
             ScanIndexForward=False,  # Return most recent first
         )
 
-        # Transform DynamoDB format to simpler dict
-        items: List[Dict[str, str]] = [
-            {key: list(value.values())[0] for key, value in item.items()}
-            for item in response.get("Items", [])
-        ]
-
-        log_info(
-            "Search history retrieved",
-            request_id=request_id,
-            user_id=user_id,
-            count=len(items),
-        )
+    # Transform DynamoDB format to simpler dict
+    items: List[Dict[str, str]] = [
+        {key: list(value.values())[0] for key, value in item.items()}
+        for item in response.get("Items", [])
+    ]
 
-        return create_response(200, items)
+    logger.info("Search history retrieved", count=len(items))
 
-    except ClientError as e:
-        log_error(
-            "DynamoDB error",
-            request_id=request_id,
-            user_id=user_id,
-            error=str(e),
-            error_code=e.response.get("Error", {}).get("Code", "Unknown"),
-        )
-        return create_response(500, {"error": "Failed to retrieve search history"})
+    return items
 
 
+@map_errors("Failed to create search entry")
 def handle_post_search(
     event: Dict[str, Any],
     user_id: str,
@@ -162,79 +221,336 @@ def handle_post_search(
     """
     Create a new search entry in DynamoDB.
 
+    When SEARCHES_ASYNC_INGEST is enabled the validated item is enqueued
+    instead and a 202 is returned; the ingest consumer performs the write.
+
     Args:
         event: API Gateway event containing request body
         user_id: The authenticated user's ID
         request_id: Request ID for logging
 
     Returns:
-        API Gateway response confirming creation
+        API Gateway response confirming creation (201) or acceptance (202)
+    """
+    body = SEARCH_SCHEMA.load(event.get("body"))
+
+    query = body.get("query", "")
+    lat, lng = body.get("lat"), body.get("lng")
+    if (lat is None) != (lng is None):
+        raise RequestValidationError("Validation failed", ["lat and lng must be sent together"])
+
+    logger.debug("Creating search entry", query_length=len(query), located=lat is not None)
+
+    # Create timestamp
+    timestamp = str(int(time.time()))
+
+    # Build DynamoDB item
+    item: Dict[str, Dict[str, str]] = {
+        "userId": {"S": user_id},
+        "createdAt": {"S": timestamp},
+        "query": {"S": query},
+    }
+    location = Location(lat, lng) if lat is not None and lng is not None else None
+
+    queue = get_ingest_queue()
+    if queue is None and location is None:
+        # Async mode leaves geocoding to the ingest consumer
+        location = geocode_query(query)
+    if location is not None:
+        apply_location(item, location)
+
+    if queue is not None:
+        # Async mode: the ingest consumer batches the write to DynamoDB
+        with metrics.phase("queue"):
+            message_id = queue.send({"item": item})
+
+        logger.info("Search entry queued", timestamp=timestamp, message_id=message_id)
+
+        return create_response(202, {"ok": True, "timestamp": timestamp, "queued": True})
+
+    ddb, table = get_ddb_client()
+    with metrics.phase("dynamodb"):
+        ddb_call(ddb, "put_item", TableName=table, Item=item)
+
+    with metrics.phase("trending"):
+        record_searches(ddb, get_trending_table(), [(int(timestamp), query)])
+
+    logger.info("Search entry created successfully", timestamp=timestamp)
+
+    return create_response(201, {"ok": True, "timestamp": timestamp})
+
+
+@map_errors("Failed to retrieve trending searches")
+def handle_get_trending(bucket: str) -> Dict[str, Any]:
+    """
+    Serve a precomputed top-K list with one read.
+
+    Args:
+        bucket: Bucket name, or "latest" for the current window
+
+    Returns:
+        API Gateway response with the bucket, generation time and top queries
+    """
+    if bucket != LATEST and not BUCKET_PATTERN.match(bucket):
+        return create_response(400, {"error": "bucket must look like 20240101T1300"})
+
+    table = get_trending_table()
+    top = None
+    if table:
+        ddb, _ = get_ddb_client()
+        with metrics.phase("dynamodb"):
+            top = read_top(ddb, table, bucket)
+
+    if top is None:
+        # Not aggregated yet; an empty list keeps the panel simple
+        top = {"bucket": bucket, "generatedAt": None, "items": []}
+
+    logger.info("Trending searches retrieved", bucket=top["bucket"], count=len(top["items"]))
+
+    return create_response(200, top, {"Cache-Control": TRENDING_CACHE_CONTROL})
+
+
+@map_errors("Failed to retrieve suggestions")
+def handle_get_suggest(prefix: str, limit: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Suggest queries from the container's copy of the global suggest index.
+
+    The index is loaded once per container and re-checked every
+    SUGGEST_REFRESH_SECONDS, so warm requests neither create a client nor
+    make a DynamoDB call.
+
+    Args:
+        prefix: What the user has typed so far
+        limit: Most suggestions to return, up to SUGGEST_TOP_K
+
+    Returns:
+        API Gateway response with the normalized prefix, the index version and
+        the suggestions
     """
+    normalized = normalize_prefix(prefix)
+    top_k = env_int("SUGGEST_TOP_K", DEFAULT_TOP_K)
     try:
-        # Parse request body
-        try:
-            body = json.loads(event.get("body") or "{}")
-        except json.JSONDecodeError as e:
-            log_error(
-                "Invalid JSON in request body",
-                request_id=request_id,
-                error=str(e),
-            )
-            return create_response(400, {"error": "Invalid JSON in request body"})
-
-        # Validate input
-        is_valid, errors = validate_search_input(body)
-        if not is_valid:
-            log_error(
-                "Validation failed",
-                request_id=request_id,
-                errors=errors,
-            )
-            return create_response(
-                400,
-                {
-                    "error": "Validation failed",
-                    "details": errors,
-                },
-            )
+        if not normalized:
+            raise ValueError("q is required")
+        max_items = int(limit) if limit else top_k
+        if not 1 <= max_items <= top_k:
+            raise ValueError(f"limit must be between 1 and {top_k}")
+    except ValueError as e:
+        return create_response(400, {"error": str(e)})
 
-        query = body.get("query", "")
+    table = get_trending_table()
+    index = None
+    if table:
+        refresh = env_int("SUGGEST_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS)
+        with metrics.phase("suggest"):
+            index = get_suggest_index(lambda: get_ddb_client()[0], table, refresh)
 
-        log_info(
-            "Creating search entry",
-            request_id=request_id,
-            user_id=user_id,
-            query_length=len(query),
-        )
+    items = index.lookup(normalized, max_items) if index is not None else []
+
+    logger.info("Suggestions retrieved", prefix_length=len(normalized), count=len(items))
+
+    body = {"prefix": normalized, "version": index.version if index else None, "items": items}
+    return create_response(200, body, {"Cache-Control": SUGGEST_CACHE_CONTROL})
+
+
+def geocode_query(query: str) -> Optional[Location]:
+    """
+    Geocode a search query through the container's cache.
 
-        # Create timestamp
-        timestamp = str(int(time.time()))
+    Args:
+        query: Raw search query
+
+    Returns:
+        Location, or None when geocoding is disabled or nothing matched
+    """
+    ddb, _ = get_ddb_client()
+    cache = get_geocoding_cache(ddb)
+    if cache is None:
+        return None
+    with metrics.phase("geocode"):
+        return cache.geocode(query)
 
-        # Build DynamoDB item
-        item: Dict[str, Dict[str, str]] = {
-            "userId": {"S": user_id},
-            "createdAt": {"S": timestamp},
-            "query": {"S": query},
-        }
 
-        ddb, table = get_ddb_client()
-        ddb.put_item(TableName=table, Item=item)
+def parse_limit(value: Optional[str]) -> int:
+    """
+    Parse the nearby ``limit`` query parameter.
+
+    Raises:
+        ValueError: If the value is not an integer in 1..MAX_NEARBY_LIMIT
+    """
+    if value is None or value == "":
+        return DEFAULT_NEARBY_LIMIT
+    limit = int(value)
+    if not 1 <= limit <= MAX_NEARBY_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_NEARBY_LIMIT}")
+    return limit
+
 
-        log_info(
-            "Search entry created successfully",
-            request_id=request_id,
-            user_id=user_id,
-            timestamp=timestamp,
+def parse_nearby_token(token: str, user_id: str) -> List[GeohashRange]:
+    """
+    Decode the ranges a partial nearby response left unread.
+
+    Raises:
+        ValueError: If the token is malformed or was issued to another user
+    """
+    state = decode_continuation(token)
+    ranges: List[GeohashRange] = []
+    for entry in state if isinstance(state, list) else [None]:
+        if not (
+            isinstance(entry, list)
+            and len(entry) == 3
+            and isinstance(entry[0], str)
+            and isinstance(entry[1], str)
+            and isinstance(entry[2], dict)
+            and entry[2].get("userId") == {"S": user_id}
+        ):
+            raise ValueError("Invalid continuation token")
+        ranges.append((entry[0], entry[1], entry[2]))
+    return ranges
+
+
+def query_geohash_range(
+    ddb: Any,
+    table: str,
+    user_id: str,
+    low: str,
+    high: str,
+    start_key: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Read the indexed searches of a user within one geohash range.
+
+    Pages are read until the range is done or the invocation's deadline
+    passes, whichever comes first.
+
+    Args:
+        ddb: DynamoDB client
+        table: Searches table name
+        user_id: The authenticated user's ID
+        low: Lowest geohash in the range
+        high: Highest geohash in the range
+        start_key: Key to resume from, from an earlier partial read
+
+    Returns:
+        Tuple of (raw DynamoDB items, key to resume from or None when the
+        range was read to the end)
+    """
+    params: Dict[str, Any] = {
+        "TableName": table,
+        "IndexName": GEOHASH_INDEX,
+        "KeyConditionExpression": "userId = :user AND geohash BETWEEN :low AND :high",
+        "ExpressionAttributeValues": {
+            ":user": {"S": user_id},
+            ":low": {"S": low},
+            ":high": {"S": high},
+        },
+    }
+    if start_key:
+        params["ExclusiveStartKey"] = start_key
+    items: List[Dict[str, Any]] = []
+    while True:
+        response = ddb_call(ddb, "query", **params)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items, None
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        if current_deadline().expired():
+            return items, params["ExclusiveStartKey"]
+
+
+def read_ranges(
+    ddb: Any, table: str, user_id: str, ranges: List[GeohashRange]
+) -> Tuple[List[List[Dict[str, Any]]], List[GeohashRange]]:
+    """
+    Query geohash ranges, concurrently when there is more than one.
+
+    Returns:
+        Tuple of (items per range, ranges left unfinished at the deadline)
+    """
+    if len(ranges) == 1:
+        results = [query_geohash_range(ddb, table, user_id, *ranges[0])]
+    else:
+        results = list(
+            get_executor().map(
+                in_context(lambda r: query_geohash_range(ddb, table, user_id, *r)), ranges
+            )
         )
+    unfinished: List[GeohashRange] = [
+        (low, high, resume)
+        for (low, high, _), (_, resume) in zip(ranges, results, strict=True)
+        if resume is not None
+    ]
+    return [items for items, _ in results], unfinished
+
+
+@map_errors("Failed to retrieve nearby searches")
+def handle_get_nearby(
+    user_id: str, bbox: str, limit: Optional[str] = None, next_token: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Retrieve the user's searches inside a map viewport.
 
-        return create_response(201, {"ok": True, "timestamp": timestamp})
+    The viewport is covered by a few geohash prefix ranges on the
+    SearchesByGeohash index, which are queried concurrently; rows in the
+    ranges but outside the viewport are dropped in memory.
 
-    except ClientError as e:
-        log_error(
-            "DynamoDB error",
-            request_id=request_id,
-            user_id=user_id,
-            error=str(e),
-            error_code=e.response.get("Error", {}).get("Code", "Unknown"),
+    If the invocation's deadline passes before every range is read, the
+    searches found so far are returned with a ``nextToken``. Repeating the
+    request with ``next=<token>`` reads only what was left.
+
+    Args:
+        user_id: The authenticated user's ID
+        bbox: Viewport as "west,south,east,north"
+        limit: Most searches to return, newest first
+        next_token: Continuation token from a partial response
+
+    Returns:
+        API Gateway response with the searches, whether the list was truncated
+        and, for a partial response, the token to continue from
+    """
+    try:
+        box = BoundingBox.parse(bbox)
+        max_items = parse_limit(limit)
+        ranges = (
+            parse_nearby_token(next_token, user_id)
+            if next_token
+            else [(low, high, None) for low, high in cover(box)]
         )
-        return create_response(500, {"error": "Failed to create search entry"})
+    except ValueError as e:
+        return create_response(400, {"error": str(e)})
+
+    ddb, table = get_ddb_client()
+    with metrics.phase("dynamodb"):
+        pages, unfinished = read_ranges(ddb, table, user_id, ranges)
+
+    scanned = 0
+    matches: List[Dict[str, Any]] = []
+    for page in pages:
+        scanned += len(page)
+        for item in page:
+            lat, lng = float(item["lat"]["N"]), float(item["lng"]["N"])
+            if box.contains(lat, lng):
+                matches.append(
+                    {
+                        "createdAt": item["createdAt"]["S"],
+                        "query": item["query"]["S"],
+                        "lat": lat,
+                        "lng": lng,
+                    }
+                )
+
+    matches.sort(key=lambda entry: int(entry["createdAt"]), reverse=True)
+
+    logger.info(
+        "Nearby searches retrieved",
+        ranges=len(ranges),
+        scanned=scanned,
+        count=min(len(matches), max_items),
+    )
+
+    body: Dict[str, Any] = {"items": matches[:max_items], "truncated": len(matches) > max_items}
+    if unfinished:
+        metrics.add("DeadlinePartialResults", 1, unit="Count")
+        logger.warning("Nearby read stopped at deadline", unfinished=len(unfinished))
+        body["nextToken"] = encode_continuation([list(r) for r in unfinished])
+    return create_response(200, body)
@@ -1,16 +1,27 @@
 """Unit tests for searches_handler Lambda function."""
 
 import json
+import math
 import os
-from typing import Any, Dict
+import sys
+from typing import Any, Dict, Iterator
 from unittest.mock import MagicMock, patch
 
+import boto3
 import pytest
-from botocore.exceptions import ClientError
+from botocore.exceptions import ClientError, ReadTimeoutError
 
+from ..common.deadline import Deadline
+from ..common.geocoding import GeocodingCache, LocalGeocoder
+from ..common.queue import LocalQueue
+from ..common.suggest import build_index, write_index
 from .index import (
     get_ddb_client,
+    get_ingest_queue,
+    handle_get_nearby,
     handle_get_searches,
+    handle_get_suggest,
+    handle_get_trending,
     handle_post_search,
     handler,
     validate_search_input,
@@ -217,6 +228,21 @@ class TestGetSearches:
             body = json.loads(result["body"])
             assert "error" in body
 
+    def test_handle_get_searches_read_timeout(
+        self,
+        mock_env_vars: None,
+    ) -> None:
+        """Test that a DynamoDB read timeout is a 504, not an unhandled error."""
+        with patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client:
+            mock_ddb = MagicMock()
+            mock_ddb.query.side_effect = ReadTimeoutError(endpoint_url="https://dynamodb")
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            result = handle_get_searches("test-123", "req-123")
+
+        assert result["statusCode"] == 504
+        assert json.loads(result["body"]) == {"error": "Failed to retrieve search history"}
+
 
 class TestPostSearch:
     """Test POST search handler."""
@@ -308,6 +334,20 @@ class TestPostSearch:
         assert "Validation failed" in body["error"]
         assert "details" in body
 
+    def test_handle_post_search_body_too_large(
+        self,
+        api_gateway_event: Dict[str, Any],
+        mock_env_vars: None,
+    ) -> None:
+        """Test that oversized bodies are rejected before parsing."""
+        event = api_gateway_event.copy()
+        event["body"] = json.dumps({"query": "a" * 5000})
+
+        result = handle_post_search(event, "test-123", "req-123")
+
+        assert result["statusCode"] == 400
+        assert "exceeds" in json.loads(result["body"])["error"]
+
     def test_handle_post_search_dynamodb_error(
         self,
         api_gateway_post_event: Dict[str, Any],
@@ -328,6 +368,539 @@ class TestPostSearch:
             assert "error" in body
 
 
+class TestTrending:
+    """Test trending counters on POST and GET /searches/trending."""
+
+    def test_post_increments_trending_counter(
+        self,
+        api_gateway_post_event: Dict[str, Any],
+        mock_env_vars: None,
+    ) -> None:
+        """Test that a stored search bumps its query's counter."""
+        with (
+            patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client,
+            patch.dict(os.environ, {"TRENDING_TABLE": "test-trending-table"}),
+        ):
+            mock_ddb = MagicMock()
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            result = handle_post_search(api_gateway_post_event, "test-123", "req-123")
+
+        assert result["statusCode"] == 201
+        update = mock_ddb.update_item.call_args[1]
+        assert update["TableName"] == "test-trending-table"
+        assert update["Key"]["sk"] == {"S": "test search query"}
+        assert update["Key"]["pk"]["S"].startswith("counts#")
+
+    def test_trending_failure_does_not_fail_post(
+        self,
+        api_gateway_post_event: Dict[str, Any],
+        mock_env_vars: None,
+    ) -> None:
+        """Test that the search is still created when the counter update fails."""
+        with (
+            patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client,
+            patch.dict(os.environ, {"TRENDING_TABLE": "test-trending-table"}),
+        ):
+            mock_ddb = MagicMock()
+            mock_ddb.update_item.side_effect = ClientError(
+                {"Error": {"Code": "ThrottlingException"}}, "UpdateItem"
+            )
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            result = handle_post_search(api_gateway_post_event, "test-123", "req-123")
+
+        assert result["statusCode"] == 201
+
+    def test_get_trending_routed_with_one_read(
+        self,
+        api_gateway_event: Dict[str, Any],
+        lambda_context: MagicMock,
+        mock_env_vars: None,
+    ) -> None:
+        """Test that the route serves the latest precomputed list."""
+        api_gateway_event["path"] = "/searches/trending"
+        with (
+            patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client,
+            patch.dict(os.environ, {"TRENDING_TABLE": "test-trending-table"}),
+        ):
+            mock_ddb = MagicMock()
+            mock_ddb.get_item.return_value = {
+                "Item": {
+                    "bucket": {"S": "20240101T1200"},
+                    "items": {"S": '[{"query":"pizza","count":3}]'},
+                    "generatedAt": {"N": "1704111000"},
+                }
+            }
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            result = handler(api_gateway_event, lambda_context)
+
+        assert result["statusCode"] == 200
+        assert result["headers"]["Cache-Control"] == "public, max-age=60"
+        assert json.loads(result["body"])["items"] == [{"query": "pizza", "count": 3}]
+        assert mock_ddb.get_item.call_count == 1
+        assert mock_ddb.get_item.call_args[1]["Key"]["pk"] == {"S": "top#latest"}
+        mock_ddb.query.assert_not_called()
+
+    def test_get_trending_before_first_aggregation(self, mock_env_vars: None) -> None:
+        """Test an empty list when nothing has been aggregated yet."""
+        with (
+            patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client,
+            patch.dict(os.environ, {"TRENDING_TABLE": "test-trending-table"}),
+        ):
+            mock_ddb = MagicMock()
+            mock_ddb.get_item.return_value = {}
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            result = handle_get_trending("20240101T1200")
+
+        assert result["statusCode"] == 200
+        assert json.loads(result["body"]) == {
+            "bucket": "20240101T1200",
+            "generatedAt": None,
+            "items": [],
+        }
+
+    def test_get_trending_invalid_bucket(self) -> None:
+        """Test that malformed bucket names are rejected."""
+        assert handle_get_trending("yesterday")["statusCode"] == 400
+
+
+class TestSuggest:
+    """Test GET /suggest served from the container's suggest index."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_container(self) -> Iterator[None]:
+        """Start each test without a loaded index."""
+
+        def reset() -> None:
+            # Handlers import common as a top-level package, tests as lambda_src.common
+            for name in ("common.suggest", "lambda_src.common.suggest"):
+                module = sys.modules.get(name)
+                if module is not None:
+                    module._loaded = None  # type: ignore[attr-defined]
+                    module._checked_at = -math.inf  # type: ignore[attr-defined]
+
+        reset()
+        yield
+        reset()
+
+    def test_warm_requests_served_from_memory(
+        self,
+        api_gateway_event: Dict[str, Any],
+        lambda_context: MagicMock,
+        mock_dynamodb: None,
+        mock_env_vars: None,
+    ) -> None:
+        """Test that the index is read once and later requests make no DynamoDB call."""
+        client = boto3.client("dynamodb")
+        client.create_table(
+            TableName="test-trending-table",
+            KeySchema=[
+                {"AttributeName": "pk", "KeyType": "HASH"},
+                {"AttributeName": "sk", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "pk", "AttributeType": "S"},
+                {"AttributeName": "sk", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        counts = {"coffee": 9, "coffee shop": 4, "cocktails": 3, "pizza": 5}
+        write_index(client, "test-trending-table", build_index(counts), 1_700_000_000, 0)
+
+        api_gateway_event["path"] = "/suggest"
+        api_gateway_event["queryStringParameters"] = {"q": "  Coff", "limit": "5"}
+        with patch.dict(os.environ, {"TRENDING_TABLE": "test-trending-table"}):
+            first = handler(api_gateway_event, lambda_context)
+            with patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client:
+                second = handler(api_gateway_event, lambda_context)
+            mock_client.assert_not_called()
+
+        assert first["statusCode"] == 200
+        assert first["headers"]["Cache-Control"] == "public, max-age=300"
+        assert json.loads(first["body"]) == {
+            "prefix": "coff",
+            "version": "1700000000",
+            "items": [{"query": "coffee", "users": 9}, {"query": "coffee shop", "users": 4}],
+        }
+        assert second["body"] == first["body"]
+
+    def test_before_first_build(self, mock_env_vars: None) -> None:
+        """Test an empty list when no index has been built yet."""
+        with (
+            patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client,
+            patch.dict(os.environ, {"TRENDING_TABLE": "test-trending-table"}),
+        ):
+            mock_ddb = MagicMock()
+            mock_ddb.get_item.return_value = {}
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            result = handle_get_suggest("pi")
+
+        assert result["statusCode"] == 200
+        assert json.loads(result["body"]) == {"prefix": "pi", "version": None, "items": []}
+
+    @pytest.mark.parametrize("prefix, limit", [("", None), ("   ", None), ("pi", "0"), ("pi", "x")])
+    def test_invalid_parameters(self, prefix: str, limit: Any) -> None:
+        """Test that a missing prefix or bad limit is rejected."""
+        assert handle_get_suggest(prefix, limit)["statusCode"] == 400
+
+
+def create_searches_table() -> None:
+    """Create the searches table with its geohash index, as dynamodb.tf does."""
+    boto3.client("dynamodb").create_table(
+        TableName="test-searches-table",
+        KeySchema=[
+            {"AttributeName": "userId", "KeyType": "HASH"},
+            {"AttributeName": "createdAt", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "userId", "AttributeType": "S"},
+            {"AttributeName": "createdAt", "AttributeType": "S"},
+            {"AttributeName": "geohash", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "SearchesByGeohash",
+                "KeySchema": [
+                    {"AttributeName": "userId", "KeyType": "HASH"},
+                    {"AttributeName": "geohash", "KeyType": "RANGE"},
+                ],
+                "Projection": {
+                    "ProjectionType": "INCLUDE",
+                    "NonKeyAttributes": ["query", "lat", "lng"],
+                },
+            }
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+class TestNearby:
+    """Test located searches and GET /searches/nearby."""
+
+    def post(self, query: str, lat: Any = None, lng: Any = None, at: int = 1700000000) -> Any:
+        """POST a search at a fixed time."""
+        body: Dict[str, Any] = {"query": query}
+        if lat is not None:
+            body["lat"] = lat
+        if lng is not None:
+            body["lng"] = lng
+        with patch("lambda_src.searches_handler.index.time.time", return_value=at):
+            return handle_post_search({"body": json.dumps(body)}, "test-user-123", "req")
+
+    def test_post_stores_coordinates_and_geohash(self, mock_env_vars: None) -> None:
+        """Test that a located search carries lat, lng and a geohash."""
+        with patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client:
+            mock_ddb = MagicMock()
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            assert self.post("coffee", 37.7749, -122.4194)["statusCode"] == 201
+
+        item = mock_ddb.put_item.call_args[1]["Item"]
+        assert item["geohash"] == {"S": "9q8yyk8yt"}
+        assert item["lat"] == {"N": "37.7749"}
+        assert item["lng"] == {"N": "-122.4194"}
+
+    @pytest.mark.parametrize(
+        "lat, lng", [(37.7, None), (None, -122.4), (91, 0), (0, "east"), (True, 1)]
+    )
+    def test_post_rejects_bad_coordinates(self, mock_env_vars: None, lat: Any, lng: Any) -> None:
+        """Test half-specified, out-of-range and non-numeric coordinates."""
+        with patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client:
+            mock_client.return_value = (MagicMock(), "test-searches-table")
+            assert self.post("coffee", lat, lng)["statusCode"] == 400
+
+    def test_viewport_query(
+        self,
+        mock_dynamodb: None,
+        mock_env_vars: None,
+    ) -> None:
+        """Test that only the user's searches inside the box come back, newest first."""
+        create_searches_table()
+        self.post("mission tacos", 37.7599, -122.4148, at=1700000001)
+        self.post("ferry building", 37.7955, -122.3937, at=1700000002)
+        self.post("dolores park", 37.7596, -122.4269, at=1700000003)
+        self.post("oakland", 37.8044, -122.2712, at=1700000004)
+        self.post("no location", at=1700000005)
+        # Same place, other user
+        with patch("lambda_src.searches_handler.index.time.time", return_value=1700000006):
+            handle_post_search(
+                {"body": json.dumps({"query": "theirs", "lat": 37.76, "lng": -122.42})},
+                "someone-else",
+                "req",
+            )
+
+        result = handle_get_nearby("test-user-123", "-122.45,37.75,-122.40,37.77")
+
+        assert result["statusCode"] == 200
+        body = json.loads(result["body"])
+        assert [entry["query"] for entry in body["items"]] == ["dolores park", "mission tacos"]
+        assert body["items"][0]["lat"] == 37.7596
+        assert body["truncated"] is False
+
+        limited = json.loads(handle_get_nearby("test-user-123", "-123,37,-122,38", "2")["body"])
+        assert [entry["query"] for entry in limited["items"]] == ["oakland", "dolores park"]
+        assert limited["truncated"] is True
+
+    def test_ranges_queried_concurrently_on_the_index(self, mock_env_vars: None) -> None:
+        """Test one paginated index query per geohash range."""
+        with patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client:
+            mock_ddb = MagicMock()
+            mock_ddb.query.return_value = {"Items": []}
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            # Straddles the prime meridian, so it needs several ranges
+            result = handle_get_nearby("test-user-123", "-0.5,51.3,0.3,51.7")
+
+        assert result["statusCode"] == 200
+        calls = mock_ddb.query.call_args_list
+        assert len(calls) > 1
+        assert {c[1]["IndexName"] for c in calls} == {"SearchesByGeohash"}
+        lows = [c[1]["ExpressionAttributeValues"][":low"]["S"] for c in calls]
+        assert len(set(lows)) == len(calls)
+
+    def test_partial_results_at_deadline(self, mock_env_vars: None) -> None:
+        """Test that ranges left unread at the deadline come back as a token."""
+        resume_key = {
+            "userId": {"S": "test-user-123"},
+            "createdAt": {"S": "1700000001"},
+            "geohash": {"S": "9q8yy"},
+        }
+        first_page = {
+            "Items": [
+                {
+                    "createdAt": {"S": "1700000001"},
+                    "query": {"S": "mission tacos"},
+                    "lat": {"N": "37.7599"},
+                    "lng": {"N": "-122.4148"},
+                }
+            ],
+            "LastEvaluatedKey": resume_key,
+        }
+        bbox = "-122.45,37.75,-122.40,37.77"
+        with (
+            patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client,
+            patch("lambda_src.searches_handler.index.current_deadline", return_value=Deadline(0)),
+        ):
+            mock_ddb = MagicMock()
+            mock_ddb.query.return_value = first_page
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            partial = json.loads(handle_get_nearby("test-user-123", bbox)["body"])
+            ranges = mock_ddb.query.call_count
+            mock_ddb.query.reset_mock()
+            mock_ddb.query.return_value = {"Items": []}
+            resumed = json.loads(
+                handle_get_nearby("test-user-123", bbox, None, partial["nextToken"])["body"]
+            )
+            stolen = handle_get_nearby("someone-else", bbox, None, partial["nextToken"])
+
+        assert "mission tacos" in [entry["query"] for entry in partial["items"]]
+        assert mock_ddb.query.call_count == ranges
+        assert all(c[1]["ExclusiveStartKey"] == resume_key for c in mock_ddb.query.call_args_list)
+        assert resumed == {"items": [], "truncated": False}
+        assert stolen["statusCode"] == 400
+
+    @pytest.mark.parametrize(
+        "bbox, limit", [("", None), ("1,2,3", None), ("0,0,1,1", "0"), ("0,0,1,1", "x")]
+    )
+    def test_invalid_parameters(self, bbox: str, limit: Any) -> None:
+        """Test that malformed boxes and limits are rejected before any read."""
+        with patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client:
+            result = handle_get_nearby("test-user-123", bbox, limit)
+        assert result["statusCode"] == 400
+        mock_client.assert_not_called()
+
+    def test_route(
+        self,
+        api_gateway_event: Dict[str, Any],
+        lambda_context: MagicMock,
+        mock_env_vars: None,
+    ) -> None:
+        """Test that GET /searches/nearby reaches the viewport handler."""
+        api_gateway_event["path"] = "/searches/nearby"
+        api_gateway_event["queryStringParameters"] = {"bbox": "-122.45,37.75,-122.40,37.77"}
+        with patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client:
+            mock_ddb = MagicMock()
+            mock_ddb.query.return_value = {"Items": []}
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            result = handler(api_gateway_event, lambda_context)
+
+        assert result["statusCode"] == 200
+        assert json.loads(result["body"]) == {"items": [], "truncated": False}
+
+
+class TestGeocoding:
+    """Test geocoding of searches posted without coordinates."""
+
+    def post(self, body: Dict[str, Any], cache: Any) -> Any:
+        """POST a search with the geocoding cache patched in."""
+        with (
+            patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client,
+            patch("lambda_src.searches_handler.index.get_geocoding_cache", return_value=cache),
+        ):
+            self.mock_ddb = MagicMock()
+            mock_client.return_value = (self.mock_ddb, "test-searches-table")
+            return handle_post_search({"body": json.dumps(body)}, "test-user-123", "req")
+
+    def test_query_geocoded_when_coordinates_missing(self, mock_env_vars: None) -> None:
+        """Test that a place name in the query gives the search a location."""
+        geocoder = LocalGeocoder()
+        cache = GeocodingCache(geocoder, MagicMock(), "")
+
+        assert self.post({"query": "ramen in Tokyo"}, cache)["statusCode"] == 201
+        assert self.post({"query": "ramen  in tokyo"}, cache)["statusCode"] == 201
+
+        item = self.mock_ddb.put_item.call_args[1]["Item"]
+        assert item["geohash"]["S"].startswith("xn7")
+        assert geocoder.calls == 1
+
+    def test_client_coordinates_skip_geocoding(self, mock_env_vars: None) -> None:
+        """Test that coordinates from the client are never overridden."""
+        geocoder = LocalGeocoder()
+        cache = GeocodingCache(geocoder, MagicMock(), "")
+
+        self.post({"query": "ramen in tokyo", "lat": 37.7749, "lng": -122.4194}, cache)
+
+        assert self.mock_ddb.put_item.call_args[1]["Item"]["geohash"] == {"S": "9q8yyk8yt"}
+        assert geocoder.calls == 0
+
+    def test_unresolved_query_stored_without_location(self, mock_env_vars: None) -> None:
+        """Test that geocoding misses and failures never fail the write."""
+        geocoder = LocalGeocoder()
+        geocoder.fail = True
+        cache = GeocodingCache(geocoder, MagicMock(), "")
+
+        assert self.post({"query": "ramen in tokyo"}, cache)["statusCode"] == 201
+        assert "geohash" not in self.mock_ddb.put_item.call_args[1]["Item"]
+
+
+class TestIdempotency:
+    """Test Idempotency-Key handling on POST /searches."""
+
+    def test_retried_post_writes_once(
+        self,
+        api_gateway_post_event: Dict[str, Any],
+        lambda_context: MagicMock,
+        mock_env_vars: None,
+        mock_dynamodb: None,
+    ) -> None:
+        """Test that a retried POST replays the first response without a second write."""
+        boto3.client("dynamodb").create_table(
+            TableName="test-idempotency",
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        event = {
+            **api_gateway_post_event,
+            "headers": {**api_gateway_post_event["headers"], "Idempotency-Key": "retry-1"},
+        }
+
+        with (
+            patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client,
+            patch.dict(os.environ, {"IDEMPOTENCY_TABLE": "test-idempotency"}),
+        ):
+            mock_ddb = MagicMock()
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+            first = handler(event, lambda_context)
+            second = handler(event, lambda_context)
+
+        assert first["statusCode"] == second["statusCode"] == 201
+        assert second["body"] == first["body"]
+        assert second["headers"]["Idempotent-Replayed"] == "true"
+        assert mock_ddb.put_item.call_count == 1
+
+
+class TestAsyncIngest:
+    """Test opt-in queue-buffered POST handling."""
+
+    def test_async_post_enqueues_and_returns_202(
+        self,
+        api_gateway_post_event: Dict[str, Any],
+        mock_env_vars: None,
+    ) -> None:
+        """Test that async mode enqueues the item instead of writing it."""
+        queue = LocalQueue()
+        with (
+            patch("lambda_src.searches_handler.index.get_ingest_queue", return_value=queue),
+            patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client,
+        ):
+            result = handle_post_search(api_gateway_post_event, "test-123", "req-123")
+
+            mock_client.assert_not_called()
+
+        assert result["statusCode"] == 202
+        body = json.loads(result["body"])
+        assert body["ok"] is True
+        assert body["queued"] is True
+
+        record = queue.receive_event()["Records"][0]
+        item = json.loads(record["body"])["item"]
+        assert item["userId"]["S"] == "test-123"
+        assert item["createdAt"]["S"] == body["timestamp"]
+        assert item["query"]["S"] == "test search query"
+
+    def test_async_post_invalid_input_not_enqueued(
+        self,
+        api_gateway_event: Dict[str, Any],
+        mock_env_vars: None,
+    ) -> None:
+        """Test that validation still happens before enqueueing."""
+        event = api_gateway_event.copy()
+        event["body"] = json.dumps({"query": ""})
+        queue = LocalQueue()
+
+        with patch("lambda_src.searches_handler.index.get_ingest_queue", return_value=queue):
+            result = handle_post_search(event, "test-123", "req-123")
+
+        assert result["statusCode"] == 400
+        assert len(queue) == 0
+
+    def test_get_ingest_queue_disabled_by_default(self) -> None:
+        """Test that async ingest is off unless explicitly enabled."""
+        with patch.dict(os.environ, {"SEARCHES_QUEUE_URL": "local://q"}, clear=False):
+            os.environ.pop("SEARCHES_ASYNC_INGEST", None)
+            assert get_ingest_queue() is None
+
+        env = {"SEARCHES_ASYNC_INGEST": "true", "SEARCHES_QUEUE_URL": "local://q"}
+        with patch.dict(os.environ, env):
+            assert get_ingest_queue() is not None
+
+
+class TestMetrics:
+    """Test per-phase EMF metrics emitted by the handler."""
+
+    def test_post_emits_phase_timings(
+        self,
+        api_gateway_post_event: Dict[str, Any],
+        lambda_context: MagicMock,
+        mock_env_vars: None,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Test that a POST emits one EMF line with each handling phase."""
+        api_gateway_post_event["path"] = "/searches"
+
+        with patch("lambda_src.searches_handler.index.get_ddb_client") as mock_client:
+            mock_ddb = MagicMock()
+            mock_ddb.put_item.return_value = {}
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            handler(api_gateway_post_event, lambda_context)
+
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        emf = [record for record in records if "_aws" in record]
+        assert len(emf) == 1
+        assert emf[0]["Route"] == "POST /searches"
+        assert emf[0]["Status"] == "201"
+        for phase in ("parse", "validate", "dynamodb", "serialize", "Duration"):
+            assert phase in emf[0]
+
+
 class TestResponseFormat:
     """Test response format and headers."""
 
@@ -0,0 +1 @@
+"""Searches ingest queue consumer Lambda handler package."""
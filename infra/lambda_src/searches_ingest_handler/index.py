@@ -0,0 +1,257 @@
+"""Lambda handler that drains the searches ingest queue into DynamoDB."""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+# Add parent directory to path for common imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common.ddb import account_capacity, ddb_call  # noqa: E402
+from common.deadline import DeadlineExceededError, current_deadline, deadline_bound  # noqa: E402
+from common.geocoding import Location, apply_location, get_geocoding_cache  # noqa: E402
+from common.log import log_invocation, logger  # noqa: E402
+from common.memory import memory_probed  # noqa: E402
+from common.metrics import metrics, record_metrics  # noqa: E402
+from common.profiling import profiled  # noqa: E402
+from common.resilience import ddb_client_config  # noqa: E402
+from common.trending import record_searches  # noqa: E402
+from common.utils import in_context  # noqa: E402
+
+# BatchWriteItem accepts at most 25 put requests per call
+BATCH_SIZE = 25
+MAX_UNPROCESSED_RETRIES = 3
+RETRY_BASE_DELAY_SECONDS = 0.05
+# Provider lookups for a batch run on this many threads
+GEOCODE_WORKERS = 8
+
+
+def get_ddb_client() -> Tuple[Any, str]:
+    """Get DynamoDB client and table name."""
+    ddb = boto3.client("dynamodb", config=ddb_client_config())
+    table = os.environ.get("SEARCHES_TABLE", "")
+    return ddb, table
+
+
+def get_trending_table() -> str:
+    """Get the trending counters table name; empty disables trending."""
+    return os.environ.get("TRENDING_TABLE", "")
+
+
+@profiled
+@record_metrics
+@memory_probed
+@account_capacity
+@log_invocation
+@deadline_bound
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle an SQS batch of queued search entries.
+
+    Records are written with BatchWriteItem in groups of 25. Messages whose
+    items could not be written are reported back as partial batch failures so
+    SQS redelivers only those. Groups not started before the invocation's
+    deadline are reported the same way, instead of running into the timeout.
+    Searches queued without coordinates are geocoded first, and written
+    searches are then counted towards trending, one counter update per query
+    for the whole batch.
+
+    Args:
+        event: SQS event containing queued search items
+        context: Lambda context object
+
+    Returns:
+        Partial batch response with the IDs of failed messages
+    """
+    records = event.get("Records", [])
+
+    logger.debug("Processing search ingest batch", record_count=len(records))
+
+    with metrics.phase("parse"):
+        pending, failures = parse_records(records)
+
+    ddb, table = get_ddb_client()
+    with metrics.phase("geocode"):
+        geocode_items(ddb, [item for _, item in pending])
+
+    for start in range(0, len(pending), BATCH_SIZE):
+        chunk = pending[start : start + BATCH_SIZE]
+        if current_deadline().expired():
+            metrics.add("DeadlinePartialResults", 1, unit="Count")
+            logger.warning("Ingest batch cut short at deadline", unwritten=len(pending) - start)
+            failures.extend(message_id for message_id, _ in pending[start:])
+            break
+        failures.extend(write_batch(ddb, table, chunk))
+
+    failed = set(failures)
+    with metrics.phase("trending"):
+        record_searches(
+            ddb,
+            get_trending_table(),
+            trending_entries(item for message_id, item in pending if message_id not in failed),
+        )
+
+    logger.info(
+        "Search ingest batch complete",
+        written=sum(1 for message_id, _ in pending if message_id not in failed),
+        failed=len(failures),
+    )
+
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in failures]}
+
+
+def parse_records(
+    records: List[Dict[str, Any]]
+) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[str]]:
+    """
+    Decode queued messages into DynamoDB items.
+
+    Args:
+        records: SQS records from the event
+
+    Returns:
+        Tuple of (list of (message_id, item), list of message IDs that failed to parse)
+    """
+    pending: List[Tuple[str, Dict[str, Any]]] = []
+    failures: List[str] = []
+
+    for record in records:
+        message_id = record.get("messageId", "")
+        try:
+            item = json.loads(record.get("body") or "{}")["item"]
+            if not isinstance(item, dict):
+                raise ValueError("item must be an object")
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error("Invalid ingest message", message_id=message_id, error=str(e))
+            failures.append(message_id)
+            continue
+        pending.append((message_id, item))
+
+    return pending, failures
+
+
+def geocode_items(ddb: Any, items: List[Dict[str, Any]]) -> int:
+    """
+    Geocode queued searches that carry no coordinates, in place.
+
+    Lookups run concurrently; repeated queries in a batch are coalesced by the
+    cache, so each distinct query reaches the provider at most once.
+
+    Args:
+        ddb: DynamoDB client for the geocode cache table
+        items: Search items to be written
+
+    Returns:
+        Number of items that gained a location
+    """
+    cache = get_geocoding_cache(ddb)
+    unlocated = [item for item in items if "geohash" not in item and item.get("query")]
+    if cache is None or not unlocated:
+        return 0
+
+    def locate(query: str) -> Optional[Location]:
+        # Past the deadline the write loop reports the batch for redelivery
+        try:
+            return cache.geocode(query)
+        except DeadlineExceededError:
+            return None
+
+    queries = [item["query"].get("S", "") for item in unlocated]
+    with ThreadPoolExecutor(max_workers=min(GEOCODE_WORKERS, len(queries))) as pool:
+        locations = list(pool.map(in_context(locate), queries))
+
+    located = 0
+    for item, location in zip(unlocated, locations, strict=True):
+        if location is not None:
+            apply_location(item, location)
+            located += 1
+    return located
+
+
+def trending_entries(items: Iterable[Dict[str, Any]]) -> List[Tuple[int, str]]:
+    """
+    Extract (createdAt, query) pairs for the trending counters.
+
+    Args:
+        items: Written search items
+
+    Returns:
+        Pairs for items with a numeric createdAt and a query
+    """
+    entries: List[Tuple[int, str]] = []
+    for item in items:
+        created_at = item.get("createdAt", {}).get("S", "")
+        query = item.get("query", {}).get("S", "")
+        if created_at.isdigit() and query:
+            entries.append((int(created_at), query))
+    return entries
+
+
+def item_key(item: Dict[str, Any]) -> Tuple[str, str]:
+    """Return the (userId, createdAt) primary key of a search item."""
+    return (
+        item.get("userId", {}).get("S", ""),
+        item.get("createdAt", {}).get("S", ""),
+    )
+
+
+def write_batch(
+    ddb: Any,
+    table: str,
+    chunk: List[Tuple[str, Dict[str, Any]]],
+) -> List[str]:
+    """
+    Write up to 25 items with BatchWriteItem, retrying unprocessed items.
+
+    BatchWriteItem rejects requests containing the same key twice, so items with a
+    duplicate key are collapsed to the last one, matching the overwrite semantics
+    of the synchronous put_item path.
+
+    Args:
+        ddb: DynamoDB client
+        table: Searches table name
+        chunk: List of (message_id, item) pairs
+
+    Returns:
+        Message IDs whose items were not written
+    """
+    # Map each key to the messages carrying it; the last item for a key wins
+    owners: Dict[Tuple[str, str], List[str]] = {}
+    latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for message_id, item in chunk:
+        key = item_key(item)
+        owners.setdefault(key, []).append(message_id)
+        latest[key] = item
+
+    requests = [{"PutRequest": {"Item": item}} for item in latest.values()]
+
+    try:
+        for attempt in range(MAX_UNPROCESSED_RETRIES + 1):
+            with metrics.phase("dynamodb"):
+                response = ddb_call(ddb, "batch_write_item", RequestItems={table: requests})
+            requests = response.get("UnprocessedItems", {}).get(table, [])
+            if not requests:
+                return []
+            delay = RETRY_BASE_DELAY_SECONDS * (2**attempt)
+            if attempt < MAX_UNPROCESSED_RETRIES and delay < current_deadline().remaining():
+                time.sleep(delay)
+            else:
+                break
+    except ClientError as e:
+        logger.error(
+            "DynamoDB error",
+            error=str(e),
+            error_code=e.response.get("Error", {}).get("Code", "Unknown"),
+        )
+        return [message_id for message_id, _ in chunk]
+
+    logger.warning("Unprocessed items after retries", unprocessed=len(requests))
+    failed: List[str] = []
+    for request in requests:
+        failed.extend(owners.get(item_key(request["PutRequest"]["Item"]), []))
+    return failed
@@ -0,0 +1,352 @@
+"""Unit tests for searches_ingest_handler Lambda function."""
+
+import json
+import os
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+import boto3
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+from ..common.geocoding import GeocodingCache, LocalGeocoder
+from ..common.queue import LocalQueue, get_queue
+from ..searches_handler.index import get_ingest_queue
+from ..searches_handler.index import handler as searches_handler
+from . import index as ingest
+from .index import (
+    BATCH_SIZE,
+    geocode_items,
+    handler,
+    parse_records,
+    trending_entries,
+    write_batch,
+)
+
+
+def make_item(user_id: str, created_at: str, query: str = "pizza") -> Dict[str, Any]:
+    """Build a low-level DynamoDB search item."""
+    return {
+        "userId": {"S": user_id},
+        "createdAt": {"S": created_at},
+        "query": {"S": query},
+    }
+
+
+def make_event(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build an SQS event carrying the given items."""
+    queue = LocalQueue("test")
+    for item in items:
+        queue.send({"item": item})
+    return queue.receive_event(max_messages=len(items))
+
+
+class TestLocalQueue:
+    """Test the in-memory queue stand-in."""
+
+    def test_receive_event_respects_max_messages(self) -> None:
+        """Test that receive_event pops at most max_messages records in order."""
+        queue = LocalQueue()
+        for i in range(5):
+            queue.send({"n": i})
+
+        event = queue.receive_event(max_messages=3)
+
+        assert [json.loads(r["body"])["n"] for r in event["Records"]] == [0, 1, 2]
+        assert len(queue) == 2
+
+    def test_requeue_returns_failed_records(self) -> None:
+        """Test that failed records go back on the queue."""
+        queue = LocalQueue()
+        queue.send({"n": 1})
+        queue.send({"n": 2})
+        event = queue.receive_event()
+
+        queue.requeue(event, [event["Records"][1]["messageId"]])
+
+        assert len(queue) == 1
+        assert json.loads(queue.receive_event()["Records"][0]["body"]) == {"n": 2}
+
+    def test_get_queue_shares_local_queues(self) -> None:
+        """Test that local:// URLs resolve to the same queue instance."""
+        assert get_queue("local://shared") is get_queue("local://shared")
+        assert get_queue("") is None
+
+
+class TestParseRecords:
+    """Test decoding of queued messages."""
+
+    def test_invalid_body_reported_as_failure(self) -> None:
+        """Test that malformed messages are reported as failures."""
+        records = [
+            {"messageId": "ok", "body": json.dumps({"item": make_item("u1", "1")})},
+            {"messageId": "bad-json", "body": "not json"},
+            {"messageId": "no-item", "body": json.dumps({"other": 1})},
+        ]
+
+        pending, failures = parse_records(records)
+
+        assert [message_id for message_id, _ in pending] == ["ok"]
+        assert failures == ["bad-json", "no-item"]
+
+
+class TestWriteBatch:
+    """Test BatchWriteItem handling."""
+
+    def test_write_batch_success(self) -> None:
+        """Test a fully processed batch reports no failures."""
+        mock_ddb = MagicMock()
+        mock_ddb.batch_write_item.return_value = {"UnprocessedItems": {}}
+        chunk = [("m1", make_item("u1", "1")), ("m2", make_item("u2", "1"))]
+
+        assert write_batch(mock_ddb, "table", chunk) == []
+        requests = mock_ddb.batch_write_item.call_args[1]["RequestItems"]["table"]
+        assert len(requests) == 2
+
+    def test_write_batch_collapses_duplicate_keys(self) -> None:
+        """Test that duplicate keys in one batch are collapsed to the last item."""
+        mock_ddb = MagicMock()
+        mock_ddb.batch_write_item.return_value = {"UnprocessedItems": {}}
+        chunk = [("m1", make_item("u1", "1", "first")), ("m2", make_item("u1", "1", "second"))]
+
+        write_batch(mock_ddb, "table", chunk)
+
+        requests = mock_ddb.batch_write_item.call_args[1]["RequestItems"]["table"]
+        assert len(requests) == 1
+        assert requests[0]["PutRequest"]["Item"]["query"]["S"] == "second"
+
+    @patch("lambda_src.searches_ingest_handler.index.time.sleep")
+    def test_write_batch_retries_unprocessed(self, mock_sleep: MagicMock) -> None:
+        """Test that unprocessed items are retried and then reported."""
+        item = make_item("u2", "1")
+        mock_ddb = MagicMock()
+        mock_ddb.batch_write_item.return_value = {
+            "UnprocessedItems": {"table": [{"PutRequest": {"Item": item}}]}
+        }
+        chunk = [("m1", make_item("u1", "1")), ("m2", item)]
+
+        failed = write_batch(mock_ddb, "table", chunk)
+
+        assert failed == ["m2"]
+        assert mock_ddb.batch_write_item.call_count == 4
+
+    def test_write_batch_client_error_fails_chunk(self) -> None:
+        """Test that a DynamoDB error fails every message in the chunk."""
+        mock_ddb = MagicMock()
+        mock_ddb.batch_write_item.side_effect = ClientError(
+            {"Error": {"Code": "ProvisionedThroughputExceededException"}}, "BatchWriteItem"
+        )
+        chunk = [("m1", make_item("u1", "1")), ("m2", make_item("u2", "1"))]
+
+        assert write_batch(mock_ddb, "table", chunk) == ["m1", "m2"]
+
+
+class TestHandler:
+    """Test the SQS batch handler."""
+
+    def test_handler_groups_into_batches(
+        self,
+        lambda_context: MagicMock,
+        mock_env_vars: None,
+    ) -> None:
+        """Test that records are written in groups of 25."""
+        event = make_event([make_item(f"u{i}", "1") for i in range(BATCH_SIZE + 5)])
+
+        with patch("lambda_src.searches_ingest_handler.index.get_ddb_client") as mock_client:
+            mock_ddb = MagicMock()
+            mock_ddb.batch_write_item.return_value = {"UnprocessedItems": {}}
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            result = handler(event, lambda_context)
+
+        assert result == {"batchItemFailures": []}
+        assert mock_ddb.batch_write_item.call_count == 2
+
+    def test_handler_reports_partial_failures(
+        self,
+        lambda_context: MagicMock,
+        mock_env_vars: None,
+    ) -> None:
+        """Test that only failed messages are reported."""
+        event = make_event([make_item("u1", "1")])
+        event["Records"].append({"messageId": "broken", "body": "{"})
+
+        with (
+            patch("lambda_src.searches_ingest_handler.index.get_ddb_client") as mock_client,
+            patch("lambda_src.searches_ingest_handler.index.logger") as mock_logger,
+        ):
+            mock_ddb = MagicMock()
+            mock_ddb.batch_write_item.return_value = {"UnprocessedItems": {}}
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            result = handler(event, lambda_context)
+
+        assert result == {"batchItemFailures": [{"itemIdentifier": "broken"}]}
+        # Messages that never parsed are failures but were not pending writes
+        mock_logger.info.assert_called_with("Search ingest batch complete", written=1, failed=1)
+
+    def test_handler_stops_at_deadline(
+        self,
+        lambda_context: MagicMock,
+        mock_env_vars: None,
+    ) -> None:
+        """Test that groups not started by the deadline are left for SQS to redeliver."""
+        event = make_event([make_item(f"u{i}", "1") for i in range(BATCH_SIZE + 5)])
+        late = [record["messageId"] for record in event["Records"][BATCH_SIZE:]]
+        deadline = MagicMock()
+        deadline.expired.side_effect = [False, True]
+
+        with (
+            patch("lambda_src.searches_ingest_handler.index.get_ddb_client") as mock_client,
+            patch(
+                "lambda_src.searches_ingest_handler.index.current_deadline", return_value=deadline
+            ),
+        ):
+            mock_ddb = MagicMock()
+            mock_ddb.batch_write_item.return_value = {"UnprocessedItems": {}}
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            result = handler(event, lambda_context)
+
+        assert result == {"batchItemFailures": [{"itemIdentifier": m} for m in late]}
+        assert mock_ddb.batch_write_item.call_count == 1
+
+
+class TestTrending:
+    """Test trending counters for ingested searches."""
+
+    def test_trending_entries_skip_malformed_items(self) -> None:
+        """Test that only items with a numeric createdAt and a query are counted."""
+        items = [make_item("u1", "100"), make_item("u2", "later"), make_item("u3", "7", "")]
+        assert trending_entries(items) == [(100, "pizza")]
+
+    def test_written_searches_counted_once_per_query(
+        self,
+        lambda_context: MagicMock,
+        mock_env_vars: None,
+    ) -> None:
+        """Test that a batch updates one counter per query and skips failed messages."""
+        event = make_event([make_item(f"u{i}", "1700000000") for i in range(3)])
+        event["Records"].append({"messageId": "broken", "body": "{"})
+
+        with (
+            patch("lambda_src.searches_ingest_handler.index.get_ddb_client") as mock_client,
+            patch.dict(os.environ, {"TRENDING_TABLE": "test-trending-table"}),
+        ):
+            mock_ddb = MagicMock()
+            mock_ddb.batch_write_item.return_value = {"UnprocessedItems": {}}
+            mock_client.return_value = (mock_ddb, "test-searches-table")
+
+            handler(event, lambda_context)
+
+        assert mock_ddb.update_item.call_count == 1
+        update = mock_ddb.update_item.call_args[1]
+        assert update["Key"]["sk"] == {"S": "pizza"}
+        assert update["ExpressionAttributeValues"][":n"] == {"N": "3"}
+
+
+class TestGeocoding:
+    """Test geocoding of queued searches."""
+
+    def test_each_distinct_query_geocoded_once(self) -> None:
+        """Test that repeated queries in a batch reach the provider once."""
+        geocoder = LocalGeocoder(delay_seconds=0.05)
+        cache = GeocodingCache(geocoder, MagicMock(), "")
+        items = [make_item(f"u{i}", str(i), "pizza in paris") for i in range(6)]
+        items.append(make_item("u9", "9", "pizza nowhere"))
+        located = make_item("u10", "10", "pizza in paris")
+        located["geohash"] = {"S": "9q8yyk8yt"}
+        items.append(located)
+
+        with patch(
+            "lambda_src.searches_ingest_handler.index.get_geocoding_cache", return_value=cache
+        ):
+            assert geocode_items(MagicMock(), items) == 6
+
+        assert geocoder.calls == 2
+        assert items[0]["geohash"]["S"].startswith("u09")
+        assert "geohash" not in items[6]
+        assert located["geohash"] == {"S": "9q8yyk8yt"}
+
+    def test_cache_table_timeout_still_geocodes(self) -> None:
+        """Test that a cache table timeout leaves the batch to the provider, not failing it."""
+        table = MagicMock()
+        table.get_item.side_effect = ReadTimeoutError(endpoint_url="https://dynamodb")
+        table.put_item.side_effect = ReadTimeoutError(endpoint_url="https://dynamodb")
+        cache = GeocodingCache(LocalGeocoder(), table, "geo")
+        items = [make_item("u1", "1", "pizza in paris")]
+
+        with patch(
+            "lambda_src.searches_ingest_handler.index.get_geocoding_cache", return_value=cache
+        ):
+            assert geocode_items(MagicMock(), items) == 1
+
+    def test_past_deadline_left_unlocated(self) -> None:
+        """Test that lookups past the deadline leave items for the write loop to fail."""
+        geocoder = LocalGeocoder()
+        cache = GeocodingCache(geocoder, MagicMock(), "geo")
+        items = [make_item("u1", "1", "pizza in paris")]
+
+        with (
+            patch(
+                "lambda_src.searches_ingest_handler.index.get_geocoding_cache", return_value=cache
+            ),
+            # The handler's own import of common, not lambda_src.common
+            patch.object(
+                cache, "_read_table", side_effect=ingest.DeadlineExceededError("get_item")
+            ),
+        ):
+            assert geocode_items(MagicMock(), items) == 0
+
+        assert geocoder.calls == 0 and "geohash" not in items[0]
+
+    def test_disabled_without_geocoder(self) -> None:
+        """Test that items pass through untouched when no geocoder is configured."""
+        items = [make_item("u1", "1")]
+        with patch(
+            "lambda_src.searches_ingest_handler.index.get_geocoding_cache", return_value=None
+        ):
+            assert geocode_items(MagicMock(), items) == 0
+        assert "geohash" not in items[0]
+
+
+class TestEndToEnd:
+    """Test POST /searches through the local queue into DynamoDB."""
+
+    def test_async_post_is_drained_into_table(
+        self,
+        mock_dynamodb: None,
+        mock_env_vars: None,
+        api_gateway_event: Dict[str, Any],
+        api_gateway_post_event: Dict[str, Any],
+        lambda_context: MagicMock,
+    ) -> None:
+        """Test that a queued search is visible via GET after the consumer runs."""
+        boto3.client("dynamodb").create_table(
+            TableName="test-searches-table",
+            KeySchema=[
+                {"AttributeName": "userId", "KeyType": "HASH"},
+                {"AttributeName": "createdAt", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "userId", "AttributeType": "S"},
+                {"AttributeName": "createdAt", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        env = {"SEARCHES_ASYNC_INGEST": "true", "SEARCHES_QUEUE_URL": "local://e2e"}
+        with patch.dict(os.environ, env):
+            result = searches_handler(api_gateway_post_event, lambda_context)
+            assert result["statusCode"] == 202
+            assert json.loads(result["body"])["queued"] is True
+
+            queue = get_ingest_queue()
+            assert queue is not None
+            drained = handler(queue.receive_event(), lambda_context)
+            assert drained == {"batchItemFailures": []}
+
+            api_gateway_event["httpMethod"] = "GET"
+            result = searches_handler(api_gateway_event, lambda_context)
+
+        body = json.loads(result["body"])
+        assert [entry["query"] for entry in body] == ["test search query"]
@@ -0,0 +1 @@
+"""Suggest index builder Lambda handler package."""
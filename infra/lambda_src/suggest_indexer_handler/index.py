@@ -0,0 +1,264 @@
+"""Lambda handler that builds the global query suggestion index from every user's searches."""
+
+import math
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import boto3
+
+# Add parent directory to path for common imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common.ddb import account_capacity, ddb_call  # noqa: E402
+from common.deadline import current_deadline, deadline_bound  # noqa: E402
+from common.log import log_invocation, logger  # noqa: E402
+from common.memory import memory_probed  # noqa: E402
+from common.metrics import metrics, record_metrics  # noqa: E402
+from common.profiling import profiled  # noqa: E402
+from common.resilience import ddb_client_config  # noqa: E402
+from common.suggest import DEFAULT_MIN_USERS, DEFAULT_TOP_K, build_index, write_index  # noqa: E402
+from common.trending import normalize_query  # noqa: E402
+from common.utils import env_int  # noqa: E402
+
+DEFAULT_SCAN_SEGMENTS = 8
+# Versions are rebuilt every few hours; older ones only need to outlive readers
+DEFAULT_RETENTION_SECONDS = 2 * 24 * 3600
+# Time a worker gets past the deadline to send back what it scanned
+WORKER_GRACE_SECONDS = 1.0
+
+# (users per normalized query, items scanned, whether every page was read)
+SegmentResult = Tuple[Counter[str], int, bool]
+
+
+def get_ddb_client() -> Tuple[Any, str]:
+    """Get DynamoDB client and searches table name."""
+    ddb = boto3.client("dynamodb", config=ddb_client_config())
+    table = os.environ.get("SEARCHES_TABLE", "")
+    return ddb, table
+
+
+def get_trending_table() -> str:
+    """Get the trending table name, where the index is stored."""
+    return os.environ.get("TRENDING_TABLE", "")
+
+
+def scan_segment(ddb: Any, table: str, segment: int, total: int) -> SegmentResult:
+    """
+    Count how many users searched each query in one scan segment.
+
+    Scan segments split the table by partition, and a partition's items come
+    back together, so each user is seen in one segment, in one run. A query a
+    user searched many times counts once.
+
+    Args:
+        ddb: DynamoDB client
+        table: Searches table name
+        segment: Segment to read
+        total: Number of segments the table is split into
+
+    Returns:
+        Users per normalized query, items scanned, and False if the deadline
+        stopped the scan early
+    """
+    params: Dict[str, Any] = {
+        "TableName": table,
+        "Segment": segment,
+        "TotalSegments": total,
+        "ProjectionExpression": "userId, #query",
+        "ExpressionAttributeNames": {"#query": "query"},
+    }
+    users: Counter[str] = Counter()
+    scanned = 0
+    user = ""
+    seen: Set[str] = set()
+    while True:
+        response = ddb_call(ddb, "scan", **params)
+        for item in response.get("Items", []):
+            scanned += 1
+            if item["userId"]["S"] != user:
+                user, seen = item["userId"]["S"], set()
+            query = normalize_query(item.get("query", {}).get("S", ""))
+            if query and query not in seen:
+                seen.add(query)
+                users[query] += 1
+        if "LastEvaluatedKey" not in response:
+            return users, scanned, True
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        if current_deadline().expired():
+            return users, scanned, False
+
+
+def count_segments(table: str, segments: List[int], total: int) -> SegmentResult:
+    """
+    Scan several segments in turn, stopping at the deadline.
+
+    Args:
+        table: Searches table name
+        segments: Segments to read
+        total: Number of segments the table is split into
+
+    Returns:
+        The segments' merged result
+    """
+    ddb, _ = get_ddb_client()
+    users: Counter[str] = Counter()
+    scanned = 0
+    for segment in segments:
+        counts, read, complete = scan_segment(ddb, table, segment, total)
+        users.update(counts)
+        scanned += read
+        if not complete:
+            return users, scanned, False
+    return users, scanned, True
+
+
+def _worker(table: str, segments: List[int], total: int, conn: Connection) -> None:
+    """
+    Run ``count_segments`` in a worker process and send the result back.
+
+    A failure is sent back as its message for the parent to log; records
+    logged here would sit in the worker's copy of the log buffer.
+    """
+    result: Union[SegmentResult, str]
+    try:
+        result = count_segments(table, segments, total)
+    except Exception as e:
+        result = f"{type(e).__name__}: {e}"
+    conn.send(result)
+    conn.close()
+
+
+def _receive(reader: Connection) -> Optional[SegmentResult]:
+    """Read a worker's result; None if it failed or died."""
+    try:
+        result = reader.recv()
+    except EOFError:
+        logger.error("Suggest scan worker exited without a result")
+        return None
+    if isinstance(result, str):
+        logger.error("Suggest scan worker failed", error=result)
+        return None
+    counts, scanned, complete = result
+    return counts, scanned, complete
+
+
+def count_queries(table: str, total: int, workers: int) -> SegmentResult:
+    """
+    Scan the whole table, spreading the segments over worker processes.
+
+    Normalizing and counting is CPU work, so it runs in separate processes
+    rather than threads. Workers are forked processes with pipes, not a
+    ``multiprocessing.Pool``, which needs shared memory Lambda does not have.
+    Each worker builds its own client; DynamoDB calls made in workers are not
+    in the invocation's capacity record.
+
+    Args:
+        table: Searches table name
+        total: Number of scan segments
+        workers: Worker processes; 1 scans in this process
+
+    Returns:
+        Merged result; incomplete if a worker failed or the deadline passed
+    """
+    if workers <= 1:
+        return count_segments(table, list(range(total)), total)
+
+    context = multiprocessing.get_context("fork")
+    readers: List[Connection] = []
+    processes = []
+    for worker in range(min(workers, total)):
+        reader, writer = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_worker,
+            args=(table, list(range(worker, total, workers)), total, writer),
+            daemon=True,
+        )
+        process.start()
+        writer.close()
+        readers.append(reader)
+        processes.append(process)
+
+    users: Counter[str] = Counter()
+    scanned, complete = 0, True
+    pending = list(readers)
+    while pending:
+        remaining = current_deadline().remaining() + WORKER_GRACE_SECONDS
+        # Typed for sockets too; only pipe ends are waited on here
+        ready: List[Any] = wait(pending, timeout=None if math.isinf(remaining) else remaining)
+        if not ready:
+            complete = False
+            break
+        for done in ready:
+            pending.remove(done)
+            result = _receive(done)
+            if result is None:
+                complete = False
+                continue
+            users.update(result[0])
+            scanned += result[1]
+            complete = complete and result[2]
+
+    for process in processes:
+        process.join(timeout=WORKER_GRACE_SECONDS)
+        if process.is_alive():
+            process.terminate()
+    return users, scanned, complete
+
+
+@profiled
+@record_metrics
+@memory_probed
+@account_capacity
+@log_invocation
+@deadline_bound
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Rebuild the suggestion index on an EventBridge schedule.
+
+    The searches table is read with a parallel segmented scan, projected to
+    ``userId`` and ``query``. The counts become a top-k-per-prefix index (see
+    ``common/suggest.py``), written to the trending table as a new version
+    that warm containers pick up on their next refresh.
+
+    If the scan does not finish before the deadline, nothing is written: a
+    partial count would skew the index, so the previous version keeps being
+    served until a run finishes.
+
+    Args:
+        event: EventBridge scheduled event
+        context: Lambda context object
+
+    Returns:
+        Items scanned, whether the scan finished and, if so, the new version's
+        size
+    """
+    ddb, searches_table = get_ddb_client()
+    total = max(1, env_int("SUGGEST_SCAN_SEGMENTS", DEFAULT_SCAN_SEGMENTS))
+    workers = max(1, env_int("SUGGEST_WORKERS", os.cpu_count() or 1))
+
+    with metrics.phase("scan"):
+        counts, scanned, complete = count_queries(searches_table, total, workers)
+    if not complete:
+        metrics.add("DeadlinePartialResults", 1, unit="Count")
+        logger.warning("Suggest index not rebuilt: scan incomplete", scanned=scanned)
+        return {"scanned": scanned, "complete": False}
+
+    with metrics.phase("build"):
+        payload = build_index(
+            counts,
+            k=env_int("SUGGEST_TOP_K", DEFAULT_TOP_K),
+            min_users=env_int("SUGGEST_MIN_USERS", DEFAULT_MIN_USERS),
+        )
+
+    now = int(time.time())
+    retention = env_int("SUGGEST_RETENTION_SECONDS", DEFAULT_RETENTION_SECONDS)
+    with metrics.phase("dynamodb"):
+        summary = write_index(ddb, get_trending_table(), payload, now, now + retention)
+
+    logger.info("Suggest index built", scanned=scanned, distinct=len(counts), **summary)
+
+    return {"scanned": scanned, "complete": True, **summary}
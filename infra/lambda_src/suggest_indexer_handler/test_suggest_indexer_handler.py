@@ -0,0 +1,156 @@
+"""Unit tests for suggest_indexer_handler Lambda function."""
+
+import os
+from collections import Counter
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import boto3
+
+from ..common.suggest import read_index, read_pointer
+from .index import SegmentResult, count_queries, handler
+
+SEARCHES_TABLE = "test-searches-table"
+TRENDING_TABLE = "test-trending-table"
+NOW = 1_700_000_000
+
+SCHEDULED_EVENT = {"source": "aws.events", "detail-type": "Scheduled Event", "detail": {}}
+
+
+def create_tables() -> Any:
+    """Create the searches and trending tables and return a client."""
+    client = boto3.client("dynamodb")
+    client.create_table(
+        TableName=SEARCHES_TABLE,
+        KeySchema=[
+            {"AttributeName": "userId", "KeyType": "HASH"},
+            {"AttributeName": "createdAt", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "userId", "AttributeType": "S"},
+            {"AttributeName": "createdAt", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    client.create_table(
+        TableName=TRENDING_TABLE,
+        KeySchema=[
+            {"AttributeName": "pk", "KeyType": "HASH"},
+            {"AttributeName": "sk", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "pk", "AttributeType": "S"},
+            {"AttributeName": "sk", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return client
+
+
+def put_searches(client: Any, user_id: str, *queries: str) -> None:
+    """Store searches for one user."""
+    for i, query in enumerate(queries):
+        client.put_item(
+            TableName=SEARCHES_TABLE,
+            Item={
+                "userId": {"S": user_id},
+                "createdAt": {"S": str(NOW + i)},
+                "query": {"S": query},
+            },
+        )
+
+
+def fake_scan(ddb: Any, table: str, segment: int, total: int) -> SegmentResult:
+    """Pretend each segment holds one user who searched ``q<segment>``."""
+    if segment == 99:
+        raise RuntimeError("boom")
+    return Counter({f"q{segment}": 1, "shared": 1}), 10, True
+
+
+class TestHandler:
+    """Test index builds against moto."""
+
+    def test_index_built_from_all_users(
+        self, mock_dynamodb: None, lambda_context: MagicMock
+    ) -> None:
+        """Test per-user counting, the user threshold and the stored version."""
+        client = create_tables()
+        put_searches(client, "alice", "Coffee", "coffee", "coffee  shop", "my street 12")
+        put_searches(client, "bob", "coffee", "Coffee Shop")
+        put_searches(client, "carol", "coffee", "cocktails")
+        env = {
+            "SEARCHES_TABLE": SEARCHES_TABLE,
+            "TRENDING_TABLE": TRENDING_TABLE,
+            "SUGGEST_SCAN_SEGMENTS": "1",
+            "SUGGEST_WORKERS": "1",
+            "SUGGEST_MIN_USERS": "2",
+        }
+        with (
+            patch.dict(os.environ, env),
+            patch("lambda_src.suggest_indexer_handler.index.time.time", return_value=NOW),
+        ):
+            result = handler(SCHEDULED_EVENT, lambda_context)
+
+        assert result["scanned"] == 8 and result["complete"]
+        assert result["version"] == str(NOW) and result["queries"] == 2
+
+        pointer = read_pointer(client, TRENDING_TABLE)
+        assert pointer is not None
+        index = read_index(client, TRENDING_TABLE, pointer)
+        assert index is not None
+        assert index.lookup("co") == [
+            {"query": "coffee", "users": 3},
+            {"query": "coffee shop", "users": 2},
+        ]
+        assert index.lookup("my") == []
+
+    def test_incomplete_scan_not_published(
+        self, mock_dynamodb: None, lambda_context: MagicMock
+    ) -> None:
+        """Test that the previous version stays when the deadline cuts the scan short."""
+        client = create_tables()
+        put_searches(client, "alice", "coffee")
+        env = {
+            "SEARCHES_TABLE": SEARCHES_TABLE,
+            "TRENDING_TABLE": TRENDING_TABLE,
+            "SUGGEST_WORKERS": "1",
+        }
+        with (
+            patch.dict(os.environ, env),
+            patch(
+                "lambda_src.suggest_indexer_handler.index.count_segments",
+                return_value=(Counter({"coffee": 5}), 1, False),
+            ),
+        ):
+            result = handler(SCHEDULED_EVENT, lambda_context)
+
+        assert result == {"scanned": 1, "complete": False}
+        assert read_pointer(client, TRENDING_TABLE) is None
+
+
+class TestWorkers:
+    """Test spreading segments over worker processes."""
+
+    def test_segments_spread_and_merged(self, aws_credentials: None) -> None:
+        """Test that every segment is scanned once and the counts are summed."""
+        with patch("lambda_src.suggest_indexer_handler.index.scan_segment", fake_scan):
+            users, scanned, complete = count_queries("t", total=5, workers=2)
+
+        assert complete and scanned == 50
+        assert users == Counter({"q0": 1, "q1": 1, "q2": 1, "q3": 1, "q4": 1, "shared": 5})
+
+    def test_failed_worker_makes_scan_incomplete(self) -> None:
+        """Test that an exception in a worker is reported, not lost."""
+        with (
+            patch(
+                "lambda_src.suggest_indexer_handler.index.count_segments",
+                side_effect=lambda table, segments, total: (
+                    fake_scan(None, table, 99, total) if 1 in segments else (Counter(), 0, True)
+                ),
+            ),
+            patch("lambda_src.suggest_indexer_handler.index.logger") as logger,
+        ):
+            _, _, complete = count_queries("t", total=2, workers=2)
+
+        assert not complete
+        assert logger.error.call_args[1]["error"] == "RuntimeError: boom"
@@ -0,0 +1 @@
+"""Heatmap tiles Lambda handler package."""
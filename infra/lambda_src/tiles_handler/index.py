@@ -0,0 +1,106 @@
+"""Lambda handler for heatmap tiles endpoint."""
+
+import os
+import sys
+from typing import Any, Dict, Tuple
+
+import boto3
+
+# Add parent directory to path for common imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common.log import logger  # noqa: E402
+from common.metrics import metrics  # noqa: E402
+from common.resilience import ddb_client_config  # noqa: E402
+from common.router import Request, Router, authenticate, map_errors  # noqa: E402
+from common.schema import RequestValidationError  # noqa: E402
+from common.tiles import GRID_SIZE, pack_counts, read_tile, tile_key, tile_zooms  # noqa: E402
+from common.utils import create_response, env_int  # noqa: E402
+
+# Counts only grow, so a slightly stale tile is fine and most are read many
+# times; clients and CDNs may keep a tile for an hour by default
+DEFAULT_TILE_CACHE_SECONDS = 3600
+
+
+def get_ddb_client() -> Tuple[Any, str]:
+    """Get DynamoDB client and tiles table name."""
+    ddb = boto3.client("dynamodb", config=ddb_client_config())
+    table = os.environ.get("TILES_TABLE", "")
+    return ddb, table
+
+
+router = Router(middleware=[authenticate])
+
+
+@router.route("GET", "/tiles/{z}/{x}/{y}")
+def get_tile(request: Request) -> Dict[str, Any]:
+    """GET /tiles/{z}/{x}/{y}: one heatmap tile."""
+    params = request.path_params
+    return handle_get_tile(params.get("z", ""), params.get("x", ""), params.get("y", ""))
+
+
+# Entry point for the dedicated tiles function
+handler = router.lambda_handler(path="/tiles/{z}/{x}/{y}")
+
+
+def parse_tile(z: str, x: str, y: str) -> Tuple[int, int, int]:
+    """
+    Validate tile coordinates from the path.
+
+    Args:
+        z: Zoom level
+        x: Tile column
+        y: Tile row
+
+    Returns:
+        Tuple of (zoom, x, y)
+
+    Raises:
+        RequestValidationError: If a coordinate is not an integer in range
+    """
+    if not (z.isdigit() and x.isdigit() and y.isdigit()):
+        raise RequestValidationError("Tile coordinates must be non-negative integers")
+    zoom, col, row = int(z), int(x), int(y)
+    if zoom not in tile_zooms():
+        raise RequestValidationError(
+            "Zoom level not available", [f"z must be one of {tile_zooms()}"]
+        )
+    if col >= 1 << zoom or row >= 1 << zoom:
+        raise RequestValidationError("Tile out of range", [f"x and y must be below {1 << zoom}"])
+    return zoom, col, row
+
+
+@map_errors("Failed to retrieve tile")
+def handle_get_tile(z: str, x: str, y: str) -> Dict[str, Any]:
+    """
+    Serve one tile's cell counts as a packed array.
+
+    Args:
+        z: Zoom level from the path
+        x: Tile column from the path
+        y: Tile row from the path
+
+    Returns:
+        API Gateway response with the tile's ``size`` x ``size`` counts
+        base64-packed as little-endian uint32, row-major from the north-west
+    """
+    zoom, col, row = parse_tile(z, x, y)
+
+    ddb, table = get_ddb_client()
+    with metrics.phase("dynamodb"):
+        cells = read_tile(ddb, table, tile_key(zoom, col, row))
+
+    logger.info("Tile retrieved", zoom=zoom, cells=len(cells))
+
+    cache_seconds = env_int("TILE_CACHE_SECONDS", DEFAULT_TILE_CACHE_SECONDS)
+    return create_response(
+        200,
+        {
+            "z": zoom,
+            "x": col,
+            "y": row,
+            "size": GRID_SIZE,
+            "total": sum(cells.values()),
+            "counts": pack_counts(cells),
+        },
+        {"Cache-Control": f"public, max-age={cache_seconds}"},
+    )
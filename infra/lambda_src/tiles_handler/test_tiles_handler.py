@@ -0,0 +1,81 @@
+"""Unit tests for tiles_handler Lambda function."""
+
+import json
+import os
+from collections import Counter
+from typing import Any, Dict
+from unittest.mock import MagicMock, patch
+
+import boto3
+import pytest
+
+from ..common.tiles import GRID_SIZE, increment_tile, tile_key, unpack_counts
+from .index import handle_get_tile, handler
+
+TABLE = "test-tiles-table"
+
+
+@pytest.fixture
+def tiles_table(mock_dynamodb: None) -> Any:
+    """Create the tiles table with a counted tile and point the handler at it."""
+    client = boto3.client("dynamodb")
+    client.create_table(
+        TableName=TABLE,
+        KeySchema=[{"AttributeName": "tile", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "tile", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    increment_tile(client, TABLE, tile_key(4, 2, 6), Counter({0: 4, GRID_SIZE + 1: 1}))
+    with patch.dict(os.environ, {"TILES_TABLE": TABLE, "TILE_ZOOMS": "4,8"}):
+        yield client
+
+
+class TestGetTile:
+    """Test GET /tiles/{z}/{x}/{y}."""
+
+    def test_packed_counts(self, tiles_table: Any) -> None:
+        """Test that the counts come back as a packed row-major array."""
+        result = handle_get_tile("4", "2", "6")
+
+        assert result["statusCode"] == 200
+        assert result["headers"]["Cache-Control"] == "public, max-age=3600"
+        body = json.loads(result["body"])
+        assert (body["z"], body["x"], body["y"], body["size"], body["total"]) == (4, 2, 6, 16, 5)
+        counts = unpack_counts(body["counts"])
+        assert counts[0] == 4
+        assert counts[GRID_SIZE + 1] == 1
+
+    def test_empty_tile(self, tiles_table: Any) -> None:
+        """Test that a tile without searches is all zeros, not a 404."""
+        body = json.loads(handle_get_tile("8", "0", "0")["body"])
+        assert body["total"] == 0
+        assert set(unpack_counts(body["counts"])) == {0}
+
+    @pytest.mark.parametrize(
+        "z, x, y", [("5", "0", "0"), ("4", "16", "0"), ("4", "0", "-1"), ("four", "0", "0")]
+    )
+    def test_invalid_tiles(self, z: str, x: str, y: str) -> None:
+        """Test that unserved zooms and out-of-range tiles are rejected before any read."""
+        with (
+            patch("lambda_src.tiles_handler.index.get_ddb_client") as mock_client,
+            patch.dict(os.environ, {"TILE_ZOOMS": "4,8"}),
+        ):
+            result = handle_get_tile(z, x, y)
+        assert result["statusCode"] == 400
+        mock_client.assert_not_called()
+
+    def test_route(
+        self,
+        tiles_table: Any,
+        api_gateway_event: Dict[str, Any],
+        lambda_context: MagicMock,
+    ) -> None:
+        """Test that the path parameters reach the handler."""
+        api_gateway_event["resource"] = "/tiles/{z}/{x}/{y}"
+        api_gateway_event["path"] = "/tiles/4/2/6"
+        api_gateway_event["pathParameters"] = {"z": "4", "x": "2", "y": "6"}
+
+        result = handler(api_gateway_event, lambda_context)
+
+        assert result["statusCode"] == 200
+        assert json.loads(result["body"])["total"] == 5
@@ -0,0 +1 @@
+"""Heatmap tile counters stream consumer Lambda handler package."""
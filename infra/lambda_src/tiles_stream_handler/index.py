@@ -0,0 +1,168 @@
+"""Lambda handler that folds new located searches into heatmap tile counters."""
+
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+# Add parent directory to path for common imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common.ddb import account_capacity  # noqa: E402
+from common.deadline import deadline_bound  # noqa: E402
+from common.log import log_invocation, logger  # noqa: E402
+from common.memory import memory_probed  # noqa: E402
+from common.metrics import metrics, record_metrics  # noqa: E402
+from common.profiling import profiled  # noqa: E402
+from common.resilience import ddb_client_config  # noqa: E402
+from common.tiles import increment_tile, locate, tile_key, tile_zooms  # noqa: E402
+from common.utils import in_context  # noqa: E402
+
+# Tile updates for a batch run on this many threads
+TILE_WRITE_WORKERS = 8
+
+
+def get_ddb_client() -> Tuple[Any, str]:
+    """Get DynamoDB client and tiles table name."""
+    ddb = boto3.client("dynamodb", config=ddb_client_config())
+    table = os.environ.get("TILES_TABLE", "")
+    return ddb, table
+
+
+@profiled
+@record_metrics
+@memory_probed
+@account_capacity
+@log_invocation
+@deadline_bound
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle a DynamoDB stream batch from the searches table.
+
+    Every inserted search with coordinates adds one to a cell of its tile at
+    each zoom level in ``TILE_ZOOMS``. Increments are folded per tile first,
+    so a batch costs one UpdateItem per tile it touches.
+
+    If a tile update fails, the batch is reported as failed from the earliest
+    record that fed it, and Lambda retries from there. Tiles that were
+    already updated are counted again on the retry, which a density heatmap
+    tolerates.
+
+    Args:
+        event: DynamoDB stream event (NEW_IMAGE records)
+        context: Lambda context object
+
+    Returns:
+        Partial batch response with the sequence number to retry from
+    """
+    records = event.get("Records", [])
+
+    with metrics.phase("parse"):
+        increments, first_sequence = tile_increments(records)
+
+    ddb, table = get_ddb_client()
+    failed: List[str] = []
+    if increments:
+        with (
+            metrics.phase("dynamodb"),
+            ThreadPoolExecutor(max_workers=min(TILE_WRITE_WORKERS, len(increments))) as pool,
+        ):
+            errors = list(
+                pool.map(
+                    in_context(lambda key: update_tile(ddb, table, key, increments[key])),
+                    list(increments),
+                )
+            )
+        for key, error_code in zip(increments, errors, strict=True):
+            if error_code is not None:
+                logger.warning("Tile update failed", tile=key, error_code=error_code)
+                failed.append(first_sequence[key])
+
+    metrics.add("TilesUpdated", len(increments) - len(failed), unit="Count")
+    logger.info(
+        "Tile batch complete",
+        records=len(records),
+        tiles=len(increments),
+        failed=len(failed),
+    )
+
+    if not failed:
+        return {"batchItemFailures": []}
+    return {"batchItemFailures": [{"itemIdentifier": min(failed, key=int)}]}
+
+
+def parse_point(image: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """
+    Read a search's coordinates from a stream image.
+
+    Args:
+        image: DynamoDB-typed item from the stream record
+
+    Returns:
+        (lat, lng), or None if the search has no valid location
+    """
+    try:
+        lat = float(image["lat"]["N"])
+        lng = float(image["lng"]["N"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        return None
+    return lat, lng
+
+
+def tile_increments(
+    records: List[Dict[str, Any]]
+) -> Tuple[Dict[str, Counter[int]], Dict[str, str]]:
+    """
+    Fold stream records into per-tile cell increments.
+
+    Only inserts count: a search is immutable once written, so a MODIFY is a
+    re-post of the same key and a REMOVE must not make the heatmap negative.
+
+    Args:
+        records: DynamoDB stream records, in shard order
+
+    Returns:
+        Tuple of (tile key -> cell increments, tile key -> sequence number of
+        the first record that touched it)
+    """
+    zooms = tile_zooms()
+    increments: Dict[str, Counter[int]] = {}
+    first_sequence: Dict[str, str] = {}
+    for record in records:
+        if record.get("eventName") != "INSERT":
+            continue
+        change = record.get("dynamodb") or {}
+        point = parse_point(change.get("NewImage") or {})
+        if point is None:
+            continue
+        for zoom in zooms:
+            x, y, cell = locate(point[0], point[1], zoom)
+            key = tile_key(zoom, x, y)
+            increments.setdefault(key, Counter())[cell] += 1
+            first_sequence.setdefault(key, change.get("SequenceNumber", "0"))
+    return increments, first_sequence
+
+
+def update_tile(ddb: Any, table: str, key: str, cells: Counter[int]) -> Optional[str]:
+    """
+    Apply one tile's increments on a worker thread.
+
+    Args:
+        ddb: DynamoDB client
+        table: Tiles table name
+        key: Tile key
+        cells: Cell increments
+
+    Returns:
+        None on success, else the DynamoDB error code (logged by the caller)
+    """
+    try:
+        increment_tile(ddb, table, key, cells)
+    except ClientError as e:
+        return str(e.response.get("Error", {}).get("Code", "Unknown"))
+    return None
@@ -0,0 +1,118 @@
+"""Unit tests for tiles_stream_handler Lambda function."""
+
+import os
+from typing import Any, Dict, Optional
+from unittest.mock import MagicMock, patch
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ..common.tiles import locate, read_tile, tile_key
+from .index import handler, tile_increments
+
+TABLE = "test-tiles-table"
+
+SF = (37.7749, -122.4194)
+
+
+def make_record(
+    sequence: int,
+    lat: Optional[float] = SF[0],
+    lng: Optional[float] = SF[1],
+    event_name: str = "INSERT",
+) -> Dict[str, Any]:
+    """Build a searches table stream record."""
+    image: Dict[str, Any] = {"userId": {"S": "u1"}, "createdAt": {"S": str(sequence)}}
+    if lat is not None and lng is not None:
+        image["lat"] = {"N": str(lat)}
+        image["lng"] = {"N": str(lng)}
+    return {
+        "eventName": event_name,
+        "eventSource": "aws:dynamodb",
+        "dynamodb": {"SequenceNumber": str(sequence), "NewImage": image},
+    }
+
+
+def create_tiles_table() -> Any:
+    """Create the tiles table and return a client."""
+    client = boto3.client("dynamodb")
+    client.create_table(
+        TableName=TABLE,
+        KeySchema=[{"AttributeName": "tile", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "tile", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return client
+
+
+class TestTileIncrements:
+    """Test folding stream records into tile increments."""
+
+    def test_only_located_inserts_counted(self) -> None:
+        """Test that modifies, removes and searches without coordinates are skipped."""
+        records = [
+            make_record(100),
+            make_record(101, event_name="MODIFY"),
+            make_record(102, event_name="REMOVE"),
+            make_record(103, None, None),
+            make_record(104, 95.0, 0.0),
+            make_record(105),
+        ]
+        with patch.dict(os.environ, {"TILE_ZOOMS": "4,12"}):
+            increments, first = tile_increments(records)
+
+        x, y, cell = locate(*SF, 12)
+        assert len(increments) == 2
+        assert increments[tile_key(12, x, y)] == {cell: 2}
+        assert set(first.values()) == {"100"}
+
+
+class TestHandler:
+    """Test the stream consumer against moto."""
+
+    def test_batch_updates_each_tile_once(
+        self, mock_dynamodb: None, lambda_context: MagicMock
+    ) -> None:
+        """Test that counts accumulate per tile across records and batches."""
+        client = create_tiles_table()
+        oakland = make_record(3, 37.8044, -122.2712)
+        env = {"TILES_TABLE": TABLE, "TILE_ZOOMS": "4,8"}
+        with patch.dict(os.environ, env):
+            first = handler({"Records": [make_record(1), make_record(2), oakland]}, lambda_context)
+            handler({"Records": [make_record(4)]}, lambda_context)
+
+        assert first == {"batchItemFailures": []}
+        x, y, cell = locate(*SF, 8)
+        assert read_tile(client, TABLE, tile_key(8, x, y))[cell] == 3
+        x, y, _ = locate(*SF, 4)
+        assert sum(read_tile(client, TABLE, tile_key(4, x, y)).values()) == 4
+
+    def test_failed_tile_retried_from_its_first_record(self, lambda_context: MagicMock) -> None:
+        """Test that a failed update reports the earliest record feeding it."""
+        mock_ddb = MagicMock()
+
+        def update_item(**kwargs: Any) -> Dict[str, Any]:
+            if kwargs["Key"]["tile"]["S"] == tile_key(4, *locate(-33.87, 151.21, 4)[:2]):
+                raise ClientError({"Error": {"Code": "ThrottlingException"}}, "UpdateItem")
+            return {}
+
+        mock_ddb.update_item.side_effect = update_item
+        records = [make_record(10), make_record(11, -33.87, 151.21), make_record(12, -33.87, 151.2)]
+        with (
+            patch("lambda_src.tiles_stream_handler.index.get_ddb_client") as mock_client,
+            patch.dict(os.environ, {"TILE_ZOOMS": "4"}),
+        ):
+            mock_client.return_value = (mock_ddb, TABLE)
+            result = handler({"Records": records}, lambda_context)
+
+        assert mock_ddb.update_item.call_count == 2
+        assert result == {"batchItemFailures": [{"itemIdentifier": "11"}]}
+
+    def test_empty_batch(self, lambda_context: MagicMock) -> None:
+        """Test that a batch without located searches makes no writes."""
+        with patch("lambda_src.tiles_stream_handler.index.get_ddb_client") as mock_client:
+            mock_client.return_value = (MagicMock(), TABLE)
+            result = handler({"Records": [make_record(1, None, None)]}, lambda_context)
+
+        assert result == {"batchItemFailures": []}
+        mock_client.return_value[0].update_item.assert_not_called()
@@ -0,0 +1 @@
+"""Offline developer tools for the Lambda handlers (not deployed)."""
@@ -0,0 +1,157 @@
+"""
+Benchmark response encodings: JSON vs. MessagePack, row vs. columnar layout.
+
+Builds realistic list bodies: ``GET /searches`` history pages (with and
+without geocoded locations), a ``GET /searches/nearby`` page and a
+``GET /bootstrap`` body. Each body is encoded with every format
+``common/encoding.py`` can negotiate. The report shows the encoded size, the
+size of the Lambda response body (base64 for MessagePack), the gzipped size
+and the encode time.
+
+Usage (from infra/):
+    python -m lambda_src.tools.bench_encoding --number 2000
+    python -m lambda_src.tools.bench_encoding --json
+"""
+
+import argparse
+import base64
+import functools
+import gzip
+import json
+import random
+import sys
+import timeit
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+from lambda_src.common.encoding import JSON, MSGPACK, ResponseFormat, encode_body
+from lambda_src.common.geohash import encode
+from lambda_src.tools.local_dynamodb import QUERY_WORDS
+
+FORMATS: Dict[str, ResponseFormat] = {
+    "json": ResponseFormat(JSON),
+    "json_columnar": ResponseFormat(JSON, columnar=True),
+    "msgpack": ResponseFormat(MSGPACK),
+    "msgpack_columnar": ResponseFormat(MSGPACK, columnar=True),
+}
+
+
+def history_item(rng: random.Random, user_id: str, created_at: int, located: bool) -> Any:
+    """Build one search as ``load_recent_searches`` returns it."""
+    item = {
+        "userId": user_id,
+        "createdAt": str(created_at),
+        "query": " ".join(rng.sample(QUERY_WORDS, rng.randint(1, 3))),
+    }
+    if located:
+        lat, lng = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        item.update(
+            {"lat": repr(lat), "lng": repr(lng), "geohash": encode(lat, lng), "label": "Place"}
+        )
+    return item
+
+
+def build_bodies(seed: int = 7) -> Dict[str, Any]:
+    """
+    Build one body per benchmarked response.
+
+    Args:
+        seed: Random seed, so runs are comparable
+
+    Returns:
+        Response bodies by case name
+    """
+    rng = random.Random(seed)
+    user_id = "3f1c9b52-8d0e-4c57-a1f2-6b4e0d9a7c11"
+    now = 1_760_000_000
+    history = [history_item(rng, user_id, now - i * 600, True) for i in range(20)]
+    return {
+        "history_plain": [history_item(rng, user_id, now - i * 600, False) for i in range(20)],
+        "history_located": history,
+        "nearby_100": {
+            "items": [
+                {
+                    "createdAt": str(now - i * 60),
+                    "query": " ".join(rng.sample(QUERY_WORDS, rng.randint(1, 3))),
+                    "lat": rng.uniform(47.5, 47.7),
+                    "lng": rng.uniform(-122.4, -122.2),
+                }
+                for i in range(100)
+            ],
+            "truncated": True,
+        },
+        "bootstrap": {
+            "user": {
+                "userId": user_id,
+                "email": "ada@example.com",
+                "name": "Ada Lovelace",
+                "avatarUrl": "https://example.com/avatars/ada.png",
+            },
+            "searches": history,
+        },
+    }
+
+
+def run_benchmark(number: int = 2000, repeat: int = 5, seed: int = 7) -> List[Dict[str, Any]]:
+    """
+    Size and time every body under each format.
+
+    Args:
+        number: Encodes per timing run
+        repeat: Timing runs per case; the fastest is reported
+        seed: Random seed for the bodies
+
+    Returns:
+        One row per case and format
+    """
+    rows = []
+    for case, body in build_bodies(seed).items():
+        json_bytes = len(json.dumps(body).encode("utf-8"))
+        for name, response_format in FORMATS.items():
+            encode: Callable[[], Any] = functools.partial(encode_body, body, response_format)
+            serialized, is_base64 = encode()
+            raw = base64.b64decode(serialized) if is_base64 else serialized.encode("utf-8")
+            best = min(timeit.Timer(encode).repeat(repeat=repeat, number=number))
+            rows.append(
+                {
+                    "case": case,
+                    "format": name,
+                    "bytes": len(raw),
+                    "lambda_bytes": len(serialized),
+                    "gzip_bytes": len(gzip.compress(raw, mtime=0)),
+                    "size_vs_json": round(len(raw) / json_bytes, 3),
+                    "encode_us": round(best / number * 1e6, 2),
+                }
+            )
+    return rows
+
+
+def format_rows(rows: List[Dict[str, Any]]) -> str:
+    """Render benchmark rows as a plain-text table."""
+    out = [
+        f"{'case':<16} {'format':<17} {'bytes':>7} {'lambda':>7} {'gzip':>6} "
+        f"{'vs json':>8} {'encode us':>10}"
+    ]
+    for row in rows:
+        out.append(
+            f"{row['case']:<16} {row['format']:<17} {row['bytes']:>7} {row['lambda_bytes']:>7} "
+            f"{row['gzip_bytes']:>6} {row['size_vs_json']:>8} {row['encode_us']:>10}"
+        )
+    return "\n".join(out)
+
+
+def main(argv: Optional[List[str]] = None, stdout: TextIO = sys.stdout) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0] if __doc__ else None)
+    parser.add_argument("--number", type=int, default=2000, help="Encodes per run")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for the bodies")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    rows = run_benchmark(args.number, args.repeat, args.seed)
+    stdout.write((json.dumps(rows, indent=2) if args.json else format_rows(rows)) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
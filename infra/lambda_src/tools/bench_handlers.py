@@ -0,0 +1,352 @@
+"""
+Benchmark the Lambda handlers in-process against a seeded local DynamoDB.
+
+Seeds the moto-backed tables from ``local_dynamodb`` with a synthetic
+population (Zipf-distributed activity), drives the handler entry points with a
+weighted route mix and reports throughput and p50/p95/p99 latency per route.
+Comparing against a saved baseline flags regressions between commits.
+
+Usage (from infra/):
+    python -m lambda_src.tools.bench_handlers --requests 2000 --output base.json
+    # ...change code...
+    python -m lambda_src.tools.bench_handlers --requests 2000 --baseline base.json
+
+Absolute numbers include moto's overhead and are only comparable on the same
+machine; use the same --seed and sizes for both runs.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import uuid
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, List, Optional, Sequence, TextIO, Tuple
+
+from lambda_src.tools.local_dynamodb import (
+    LocalContext,
+    Population,
+    api_event,
+    local_dynamodb,
+    seed,
+)
+
+Handler = Callable[[Dict[str, Any], Any], Any]
+
+# Share of requests per route, roughly the production mix
+DEFAULT_MIX: Dict[str, float] = {
+    "GET /searches": 0.5,
+    "POST /searches": 0.3,
+    "GET /user": 0.15,
+    "PUT /user": 0.05,
+}
+
+PERCENTILES = (50, 95, 99)
+COMPARED_FIELDS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def load_entry_points(consolidated: bool = False) -> Dict[str, Handler]:
+    """
+    Import the handler entry points, keyed by route.
+
+    Args:
+        consolidated: Route everything through api_handler instead of the
+            per-resource functions
+
+    Returns:
+        Mapping of route to Lambda handler
+    """
+    if consolidated:
+        from lambda_src.api_handler.index import handler as api
+
+        return dict.fromkeys(DEFAULT_MIX, api)
+
+    from lambda_src.searches_handler.index import handler as searches
+    from lambda_src.user_handler.index import handler as user
+
+    return {
+        "GET /searches": searches,
+        "POST /searches": searches,
+        "GET /user": user,
+        "PUT /user": user,
+    }
+
+
+def build_event(route: str, population: Population) -> Dict[str, Any]:
+    """
+    Build a request for a route on behalf of a Zipf-chosen user.
+
+    Args:
+        route: Route such as "POST /searches"
+        population: Seeded population
+
+    Returns:
+        API Gateway proxy event
+    """
+    method, path = route.split(" ", 1)
+    user_id = population.pick_user()
+    body: Any = None
+    if route == "POST /searches":
+        body = {"query": population.query()}
+    elif route == "PUT /user":
+        body = {"name": f"Renamed {population.rng.randint(0, 9999)}"}
+    return api_event(method, path, user_id, body=body)
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of pre-sorted values.
+
+    Args:
+        sorted_values: Values in ascending order
+        pct: Percentile in 0..100
+
+    Returns:
+        The percentile, or 0.0 for no values
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_ms: List[float], errors: int) -> Dict[str, Any]:
+    """
+    Summarize one route's latencies.
+
+    Args:
+        latencies_ms: Per-request latency in milliseconds
+        errors: Number of 5xx responses or exceptions
+
+    Returns:
+        Count, error count, mean, percentiles and throughput
+    """
+    values = sorted(latencies_ms)
+    total_ms = sum(values)
+    summary: Dict[str, Any] = {
+        "count": len(values),
+        "errors": errors,
+        "mean_ms": round(total_ms / len(values), 3) if values else 0.0,
+        "ops_per_sec": round(len(values) / (total_ms / 1000.0), 1) if total_ms else 0.0,
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(percentile(values, pct), 3)
+    return summary
+
+
+def run_benchmark(
+    users: int = 500,
+    searches: int = 5000,
+    requests: int = 2000,
+    warmup: int = 50,
+    exponent: float = 1.1,
+    seed_value: int = 42,
+    mix: Optional[Dict[str, float]] = None,
+    consolidated: bool = False,
+) -> Dict[str, Any]:
+    """
+    Seed a local table set and drive the handlers.
+
+    Args:
+        users: Users in the synthetic population
+        searches: Stored searches across all users
+        requests: Measured requests
+        warmup: Unmeasured requests first (imports, client creation)
+        exponent: Zipf exponent for user activity
+        seed_value: Random seed for population and request mix
+        mix: Share of requests per route (defaults to DEFAULT_MIX)
+        consolidated: Drive api_handler instead of the per-resource handlers
+
+    Returns:
+        Report with the configuration, per-route summaries and totals
+    """
+    mix = mix or DEFAULT_MIX
+    routes = list(mix)
+    weights = [mix[route] for route in routes]
+    latencies: Dict[str, List[float]] = {route: [] for route in routes}
+    errors: Dict[str, int] = dict.fromkeys(routes, 0)
+
+    with local_dynamodb() as client:
+        population = Population(users, searches, exponent, seed_value)
+        seeded = seed(client, population)
+        entry_points = load_entry_points(consolidated)
+
+        # Handlers write log and EMF lines to stdout; keep them out of the report
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            wall_start = time.perf_counter()
+            for i in range(warmup + requests):
+                route = population.rng.choices(routes, weights)[0]
+                event = build_event(route, population)
+                context = LocalContext(str(uuid.UUID(int=population.rng.getrandbits(128))))
+                started = time.perf_counter()
+                try:
+                    status = entry_points[route](event, context).get("statusCode", 500)
+                except Exception:
+                    status = 500
+                elapsed_ms = (time.perf_counter() - started) * 1000.0
+                if i == warmup:
+                    wall_start = started
+                if i >= warmup:
+                    latencies[route].append(elapsed_ms)
+                    errors[route] += status >= 500
+            wall_seconds = time.perf_counter() - wall_start
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    total = summarize(all_latencies, sum(errors.values()))
+    total["wall_ops_per_sec"] = round(requests / wall_seconds, 1) if wall_seconds else 0.0
+    return {
+        "config": {
+            "users": users,
+            "searches": searches,
+            "requests": requests,
+            "warmup": warmup,
+            "exponent": exponent,
+            "seed": seed_value,
+            "mix": mix,
+            "consolidated": consolidated,
+            "seeded": seeded,
+            "python": sys.version.split()[0],
+        },
+        "routes": {route: summarize(latencies[route], errors[route]) for route in routes},
+        "total": total,
+    }
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    tolerance: float = 0.2,
+    min_delta_ms: float = 0.5,
+) -> List[Dict[str, Any]]:
+    """
+    Find routes whose latency or throughput regressed against a baseline.
+
+    A latency field regresses when it grows by more than ``tolerance`` (as a
+    fraction) and by more than ``min_delta_ms``, so sub-millisecond noise on
+    fast routes is ignored. Throughput regresses when it drops by more than
+    ``tolerance``.
+
+    Args:
+        baseline: Report from an earlier run
+        current: Report from this run
+        tolerance: Allowed relative change
+        min_delta_ms: Smallest absolute latency increase treated as a regression
+
+    Returns:
+        One entry per regressed route and field
+    """
+    regressions = []
+    for route, now in current.get("routes", {}).items():
+        before = baseline.get("routes", {}).get(route)
+        if not before or not before.get("count"):
+            continue
+        for field in COMPARED_FIELDS:
+            old, new = float(before.get(field, 0.0)), float(now.get(field, 0.0))
+            if new > old * (1 + tolerance) and new - old > min_delta_ms:
+                regressions.append(_regression(route, field, old, new))
+        old, new = float(before.get("ops_per_sec", 0.0)), float(now.get("ops_per_sec", 0.0))
+        if old and new < old * (1 - tolerance):
+            regressions.append(_regression(route, "ops_per_sec", old, new))
+    return regressions
+
+
+def _regression(route: str, field: str, old: float, new: float) -> Dict[str, Any]:
+    change = (new - old) / old if old else 0.0
+    return {
+        "route": route,
+        "field": field,
+        "baseline": old,
+        "current": new,
+        "change": round(change, 3),
+    }
+
+
+def format_report(report: Dict[str, Any], regressions: List[Dict[str, Any]]) -> str:
+    """Render a report and any regressions as plain text."""
+    config = report["config"]
+    out = [
+        f"users={config['users']} searches={config['searches']} "
+        f"requests={config['requests']} zipf={config['exponent']} seed={config['seed']}",
+        "",
+        f"{'route':<16} {'count':>6} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'ops/s':>8}",
+    ]
+    rows: List[Tuple[str, Dict[str, Any]]] = [*report["routes"].items(), ("total", report["total"])]
+    for name, row in rows:
+        out.append(
+            f"{name:<16} {row['count']:>6} {row['errors']:>4} {row['p50_ms']:>8} "
+            f"{row['p95_ms']:>8} {row['p99_ms']:>8} {row['ops_per_sec']:>8}"
+        )
+    if regressions:
+        out.append("")
+        out.append("REGRESSIONS")
+        for r in regressions:
+            out.append(
+                f"  {r['route']} {r['field']}: {r['baseline']} -> {r['current']} "
+                f"({r['change']:+.0%})"
+            )
+    return "\n".join(out)
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse "GET /searches=0.7,POST /searches=0.3" into a route mix."""
+    mix = {}
+    for part in value.split(","):
+        route, _, share = part.rpartition("=")
+        if route.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown route: {route.strip()!r}")
+        mix[route.strip()] = float(share)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None, stdout: TextIO = sys.stdout) -> int:
+    """Command-line entry point; exits 1 when a regression is found."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0] if __doc__ else None)
+    parser.add_argument("--users", type=int, default=500, help="Synthetic users")
+    parser.add_argument("--searches", type=int, default=5000, help="Stored searches")
+    parser.add_argument("--requests", type=int, default=2000, help="Measured requests")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured warm-up requests")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--mix", type=parse_mix, help='Route mix, e.g. "GET /user=1"')
+    parser.add_argument("--consolidated", action="store_true", help="Drive api_handler")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative change")
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=0.5, help="Ignore latency increases below this"
+    )
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        users=args.users,
+        searches=args.searches,
+        requests=args.requests,
+        warmup=args.warmup,
+        exponent=args.zipf,
+        seed_value=args.seed,
+        mix=args.mix,
+        consolidated=args.consolidated,
+    )
+
+    regressions: List[Dict[str, Any]] = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.tolerance, args.min_delta_ms)
+        report["regressions"] = regressions
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    stdout.write(
+        (json.dumps(report, indent=2) if args.json else format_report(report, regressions)) + "\n"
+    )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Benchmark request validation: legacy chained validators vs. compiled schemas.
+
+The legacy path is the pre-schema implementation (``json.loads`` followed by
+``validate_string``/``validate_url`` per field); the compiled path is
+``Schema.decode`` + ``Schema.validate`` as used by the handlers.
+
+Usage (from infra/):
+    python -m lambda_src.tools.bench_validation --number 20000
+    python -m lambda_src.tools.bench_validation --json
+"""
+
+import argparse
+import functools
+import json
+import sys
+import timeit
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from lambda_src.common.schema import RequestValidationError, Schema, string, url
+from lambda_src.common.utils import validate_string, validate_url
+
+SEARCH_SCHEMA = Schema({"query": string(max_length=500, required=True)}, max_body_bytes=4096)
+USER_SCHEMA = Schema({"name": string(max_length=100), "avatarUrl": url()}, max_body_bytes=8192)
+
+CASES: Dict[str, Tuple[str, str]] = {
+    "search_valid": ("search", json.dumps({"query": "coffee near the harbour"})),
+    "search_missing": ("search", json.dumps({})),
+    "search_too_long": ("search", json.dumps({"query": "q" * 600})),
+    "user_valid": (
+        "user",
+        json.dumps({"name": "Ada Lovelace", "avatarUrl": "https://example.com/a.png"}),
+    ),
+    "user_invalid": ("user", json.dumps({"name": "n" * 150, "avatarUrl": "ftp://x"})),
+    "user_invalid_json": ("user", '{"name": "Ada"'),
+}
+
+
+def legacy_search(raw: str) -> List[str]:
+    """Validate a search body the way the handler did before schemas."""
+    try:
+        body = json.loads(raw) if raw else {}
+    except json.JSONDecodeError:
+        return ["Invalid JSON in request body"]
+    _, error = validate_string(body.get("query"), "query", max_length=500, required=True)
+    return [error] if error else []
+
+
+def legacy_user(raw: str) -> List[str]:
+    """Validate a user body the way the handler did before schemas."""
+    try:
+        body = json.loads(raw) if raw else {}
+    except json.JSONDecodeError:
+        return ["Invalid JSON in request body"]
+    errors = []
+    name = body.get("name")
+    if name is not None:
+        _, error = validate_string(name, "name", max_length=100, required=False)
+        if error:
+            errors.append(error)
+    avatar = body.get("avatarUrl")
+    if avatar is not None and avatar != "":
+        _, error = validate_url(avatar, "avatarUrl", required=False)
+        if error:
+            errors.append(error)
+    return errors
+
+
+def compiled(schema: Schema) -> Callable[[str], List[str]]:
+    """Return a validator running the compiled schema over a raw body."""
+
+    def run(raw: str) -> List[str]:
+        try:
+            return schema.validate(schema.decode(raw))
+        except RequestValidationError as e:
+            return [e.error]
+
+    return run
+
+
+IMPLEMENTATIONS: Dict[str, Dict[str, Callable[[str], List[str]]]] = {
+    "legacy": {"search": legacy_search, "user": legacy_user},
+    "compiled": {"search": compiled(SEARCH_SCHEMA), "user": compiled(USER_SCHEMA)},
+}
+
+
+def run_benchmark(number: int = 20000, repeat: int = 5) -> List[Dict[str, Any]]:
+    """
+    Time every case under each implementation.
+
+    Args:
+        number: Validations per timing run
+        repeat: Timing runs per case; the fastest is reported
+
+    Returns:
+        One row per case with ns per request for each implementation
+    """
+    rows = []
+    for case, (kind, raw) in CASES.items():
+        row: Dict[str, Any] = {"case": case, "bytes": len(raw)}
+        for impl, validators in IMPLEMENTATIONS.items():
+            validate = validators[kind]
+            timer = timeit.Timer(functools.partial(validate, raw))
+            best = min(timer.repeat(repeat=repeat, number=number))
+            row[f"{impl}_ns"] = round(best / number * 1e9, 1)
+        row["speedup"] = round(row["legacy_ns"] / row["compiled_ns"], 2)
+        rows.append(row)
+    return rows
+
+
+def format_rows(rows: List[Dict[str, Any]]) -> str:
+    """Render benchmark rows as a plain-text table."""
+    out = [f"{'case':<20} {'bytes':>6} {'legacy ns':>10} {'compiled ns':>12} {'speedup':>8}"]
+    for row in rows:
+        out.append(
+            f"{row['case']:<20} {row['bytes']:>6} {row['legacy_ns']:>10} "
+            f"{row['compiled_ns']:>12} {row['speedup']:>8}"
+        )
+    return "\n".join(out)
+
+
+def main(argv: Optional[List[str]] = None, stdout: TextIO = sys.stdout) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0] if __doc__ else None)
+    parser.add_argument("--number", type=int, default=20000, help="Validations per run")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    rows = run_benchmark(args.number, args.repeat)
+    stdout.write((json.dumps(rows, indent=2) if args.json else format_rows(rows)) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Roll up DynamoDB consumed-capacity records into top consumers.
+
+Reads the "DynamoDB consumed capacity" records written by ``common/ddb.py`` from
+exported CloudWatch Logs (NDJSON, or text lines with a prefix before the JSON)
+and reports the routes, users and route/user pairs consuming the most capacity.
+
+Usage (from infra/):
+    aws logs filter-log-events --log-group-name /aws/lambda/mapme-dev-searches \\
+        --filter-pattern '"DynamoDB consumed capacity"' --output text \\
+        --query 'events[].message' | tr '\\t' '\\n' > capacity.ndjson
+    python -m lambda_src.tools.capacity_report capacity.ndjson --top 10
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+RECORD_MESSAGE = "DynamoDB consumed capacity"
+
+
+def parse_records(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Extract capacity records from log lines.
+
+    Args:
+        lines: Raw log lines; anything before the first "{" is ignored
+
+    Yields:
+        Decoded capacity records
+    """
+    for line in lines:
+        start = line.find("{")
+        if start < 0:
+            continue
+        try:
+            record = json.loads(line[start:])
+        except ValueError:
+            continue
+        if isinstance(record, dict) and record.get("message") == RECORD_MESSAGE:
+            yield record
+
+
+def _bump(totals: Dict[str, Dict[str, float]], key: str, record: Dict[str, Any]) -> None:
+    entry = totals.setdefault(key, {"rcu": 0.0, "wcu": 0.0, "requests": 0.0})
+    entry["rcu"] += float(record.get("rcu") or 0.0)
+    entry["wcu"] += float(record.get("wcu") or 0.0)
+    entry["requests"] += 1
+
+
+def _top(totals: Dict[str, Dict[str, float]], limit: int) -> List[Dict[str, Any]]:
+    ranked = sorted(totals.items(), key=lambda kv: kv[1]["rcu"] + kv[1]["wcu"], reverse=True)
+    return [
+        {
+            "key": key,
+            "rcu": round(values["rcu"], 3),
+            "wcu": round(values["wcu"], 3),
+            "requests": int(values["requests"]),
+        }
+        for key, values in ranked[:limit]
+    ]
+
+
+def build_report(records: Iterable[Dict[str, Any]], top: int = 10) -> Dict[str, Any]:
+    """
+    Aggregate capacity records by route, user and route/user.
+
+    Args:
+        records: Capacity records
+        top: Number of entries in each ranking
+
+    Returns:
+        Report with totals and top consumers, ranked by RCU + WCU
+    """
+    by_route: Dict[str, Dict[str, float]] = {}
+    by_user: Dict[str, Dict[str, float]] = {}
+    by_route_user: Dict[str, Dict[str, float]] = {}
+    by_table: Dict[str, Dict[str, float]] = {}
+    total_rcu = total_wcu = 0.0
+    count = 0
+
+    for record in records:
+        count += 1
+        total_rcu += float(record.get("rcu") or 0.0)
+        total_wcu += float(record.get("wcu") or 0.0)
+        route = str(record.get("route") or "unknown")
+        user = str(record.get("user_hash") or "anonymous")
+        _bump(by_route, route, record)
+        _bump(by_user, user, record)
+        _bump(by_route_user, f"{route} {user}", record)
+        for table, units in (record.get("tables") or {}).items():
+            _bump(by_table, table, units)
+
+    return {
+        "records": count,
+        "total_rcu": round(total_rcu, 3),
+        "total_wcu": round(total_wcu, 3),
+        "top_routes": _top(by_route, top),
+        "top_users": _top(by_user, top),
+        "top_route_users": _top(by_route_user, top),
+        "tables": _top(by_table, len(by_table)),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a report as plain-text tables."""
+    out = [f"Records: {report['records']}  RCU: {report['total_rcu']}  WCU: {report['total_wcu']}"]
+    sections = [
+        ("Top routes", "top_routes"),
+        ("Top users", "top_users"),
+        ("Top route/user pairs", "top_route_users"),
+        ("Tables", "tables"),
+    ]
+    for title, key in sections:
+        out.append("")
+        out.append(title)
+        out.append(f"  {'RCU':>10} {'WCU':>10} {'requests':>9}  key")
+        for row in report[key]:
+            out.append(f"  {row['rcu']:>10} {row['wcu']:>10} {row['requests']:>9}  {row['key']}")
+    return "\n".join(out)
+
+
+def main(argv: Optional[List[str]] = None, stdout: TextIO = sys.stdout) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0] if __doc__ else None)
+    parser.add_argument("files", nargs="*", help="Log files to read (default: stdin)")
+    parser.add_argument("--top", type=int, default=10, help="Entries per ranking")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    def lines() -> Iterator[str]:
+        if not args.files:
+            yield from sys.stdin
+        for path in args.files:
+            with open(path, encoding="utf-8") as f:
+                yield from f
+
+    report = build_report(parse_records(lines()), top=args.top)
+    stdout.write((json.dumps(report, indent=2) if args.json else format_report(report)) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,716 @@
+"""
+Serve the REST API locally over HTTP, as API Gateway and Lambda would.
+
+Routes are read from ``api-gw.tf``: each method's resource path, whether it
+needs the Cognito authorizer, its CORS preflight headers and the function its
+integration invokes. The functions per resource are used by default, and
+``--consolidated`` routes everything to the ``api`` function, like
+``var.consolidated_api``. Requests become API Gateway proxy events and are
+passed to that function's ``handler``. Responses are turned back into HTTP,
+with base64 bodies decoded for the REST API's binary media types.
+
+Authentication uses dev tokens in the ``Authorization`` header, with or
+without ``Bearer``:
+
+- ``dev:<sub>`` signs in as user ``<sub>``
+- a JWT, such as a real Cognito ID token from the frontend, is decoded without
+  checking its signature, and its claims are passed through
+
+Without a valid token, a protected route answers ``401``, unless
+``--default-user`` is set. Unknown routes answer ``403 Missing
+Authentication Token``, as API Gateway does.
+
+Each function has a pool of emulated containers. A request takes an idle
+container (warm) or starts a new one (cold). A cold start waits for the
+function's init time: the measured import time of its handler module, or
+``--cold-start-ms``. Containers idle longer than ``--idle-seconds`` are
+reaped. The context's remaining time counts down from the function's
+``timeout`` in ``lambda-functions.tf``, so deadlines behave as deployed.
+Responses carry ``X-Local-Container``, ``X-Local-Cold-Start`` and
+``X-Local-Queue-Wait-Ms``, and ``GET /__local/stats`` reports containers, cold
+starts, invocations and queue wait per function.
+
+Containers model concurrency: overlapping requests need separate containers,
+so load tests see realistic cold starts. Handler code still runs one
+invocation at a time across all functions, because per-invocation telemetry
+(logger, metrics) is process-global, as in a Lambda container. Time spent
+waiting for the running invocation is queue wait, which deployed Lambda does
+not have. It is reported separately and does not count against the function
+timeout; subtract it from client-side latencies under concurrent load.
+
+By default the handlers use the in-memory DynamoDB stand-in from
+``local_dynamodb``. With ``--aws`` they use whatever the environment points
+at, e.g. DynamoDB Local via ``AWS_ENDPOINT_URL_DYNAMODB`` and the table name
+variables.
+
+Usage (from infra/):
+    python -m lambda_src.tools.local_api --port 3001 --seed-users 200
+    curl -H "Authorization: dev:user-000001" localhost:3001/searches
+    VITE_API_BASE=http://localhost:3001 npm run dev   # in frontend/
+"""
+
+import argparse
+import base64
+import importlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+import uuid
+from contextlib import ExitStack, redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from lambda_src.tools.local_dynamodb import LocalContext, Population, local_dynamodb, seed
+
+Handler = Callable[[Dict[str, Any], Any], Any]
+
+INFRA_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Function timeout when lambda-functions.tf does not give a literal one
+DEFAULT_TIMEOUT_SECONDS = 10
+# Lambda reaps idle containers after minutes; long enough for a load test
+DEFAULT_IDLE_SECONDS = 600.0
+STATS_PATH = "/__local/stats"
+
+_RESOURCE = re.compile(r'^resource "(\w+)" "(\w+)" \{', re.MULTILINE)
+_ATTRIBUTE = re.compile(r'^\s*("?[\w.-]+"?)\s*=\s*(.+?)\s*$', re.MULTILINE)
+_ROUTE_FUNCTION = re.compile(
+    r"(\w+_route_function)\s*=\s*var\.consolidated_api\s*\?\s*"
+    r"aws_lambda_function\.(\w+)\s*:\s*aws_lambda_function\.(\w+)"
+)
+
+
+class Route(NamedTuple):
+    """One method on one API Gateway resource."""
+
+    method: str
+    template: str
+    function: Optional[str]
+    authorized: bool
+
+
+class ApiSpec(NamedTuple):
+    """What the emulator needs from the Terraform configuration."""
+
+    routes: Dict[Tuple[str, str], Route]
+    cors: Dict[str, Dict[str, str]]
+    binary_media_types: List[str]
+    timeouts: Dict[str, int]
+
+
+def _blocks(text: str) -> Iterator[Tuple[str, str, str]]:
+    """Yield (type, name, body) for each top-level resource block."""
+    for match in _RESOURCE.finditer(text):
+        depth, pos = 1, match.end()
+        while depth and pos < len(text):
+            depth += {"{": 1, "}": -1}.get(text[pos], 0)
+            pos += 1
+        yield match.group(1), match.group(2), text[match.end() : pos - 1]
+
+
+def _attributes(body: str) -> Dict[str, str]:
+    return {key.strip('"'): value for key, value in _ATTRIBUTE.findall(body)}
+
+
+def _reference(value: str) -> str:
+    # "aws_api_gateway_resource.user_res.id" -> "user_res"
+    parts = value.split(".")
+    return parts[1] if len(parts) > 2 else ""
+
+
+def _read(name: str, infra_dir: str) -> str:
+    with open(os.path.join(infra_dir, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def load_api_spec(infra_dir: str = INFRA_DIR, consolidated: bool = False) -> ApiSpec:
+    """
+    Read routes, CORS headers, binary media types and timeouts from Terraform.
+
+    Args:
+        infra_dir: Directory holding api-gw.tf, locals.tf and lambda-functions.tf
+        consolidated: Route every integration to the ``api`` function
+
+    Returns:
+        The API as deployed
+    """
+    locals_tf = _read("locals.tf", infra_dir)
+    routes_block = re.search(r"routes\s*=\s*\{(.*?)\}", locals_tf, re.DOTALL)
+    path_parts = dict(
+        re.findall(r'(\w+)\s*=\s*"([^"]*)"', routes_block.group(1) if routes_block else "")
+    )
+
+    functions_tf = _read("lambda-functions.tf", infra_dir)
+    route_functions = {
+        name: api if consolidated else dedicated
+        for name, api, dedicated in _ROUTE_FUNCTION.findall(functions_tf)
+    }
+    timeouts = {
+        name: int(attrs["timeout"])
+        for kind, name, body in _blocks(functions_tf)
+        if kind == "aws_lambda_function"
+        for attrs in [_attributes(body)]
+        if attrs.get("timeout", "").isdigit()
+    }
+
+    api_tf = _read("api-gw.tf", infra_dir)
+    blocks: Dict[str, Dict[str, Dict[str, str]]] = {}
+    binary_media_types: List[str] = []
+    for kind, name, body in _blocks(api_tf):
+        blocks.setdefault(kind, {})[name] = _attributes(body)
+        if kind == "aws_api_gateway_rest_api":
+            types = re.search(r"binary_media_types\s*=\s*\[(.*?)\]", body, re.DOTALL)
+            binary_media_types = re.findall(r'"([^"]+)"', types.group(1)) if types else []
+
+    def path_of(resource: str) -> str:
+        attrs = blocks["aws_api_gateway_resource"][resource]
+        part = attrs["path_part"].strip('"')
+        if part.startswith("local.routes."):
+            part = path_parts[part.rsplit(".", 1)[1]]
+        parent = attrs["parent_id"]
+        if parent.startswith("aws_api_gateway_resource."):
+            return path_of(_reference(parent)) + "/" + part
+        return "/" + part
+
+    def function_of(uri: str) -> Optional[str]:
+        if uri.startswith("local."):
+            return route_functions.get(uri.split(".")[1])
+        return _reference(uri) or None
+
+    routes: Dict[Tuple[str, str], Route] = {}
+    for attrs in blocks.get("aws_api_gateway_integration", {}).values():
+        method = blocks["aws_api_gateway_method"][_reference(attrs["http_method"])]
+        template = path_of(_reference(attrs["resource_id"]))
+        http_method = method["http_method"].strip('"')
+        routes[(http_method, template)] = Route(
+            http_method,
+            template,
+            function_of(attrs["uri"]) if "uri" in attrs else None,
+            method.get("authorization", '"NONE"').strip('"') != "NONE",
+        )
+
+    cors: Dict[str, Dict[str, str]] = {}
+    prefix = "method.response.header."
+    for attrs in blocks.get("aws_api_gateway_integration_response", {}).values():
+        cors[path_of(_reference(attrs["resource_id"]))] = {
+            key[len(prefix) :]: value.strip('"').strip("'")
+            for key, value in attrs.items()
+            if key.startswith(prefix)
+        }
+    return ApiSpec(routes, cors, binary_media_types, timeouts)
+
+
+def match_route(spec: ApiSpec, path: str) -> Tuple[Optional[str], Dict[str, str]]:
+    """
+    Find the resource template for a request path.
+
+    Args:
+        spec: API spec
+        path: Request path, without the stage
+
+    Returns:
+        Tuple of (template or None, path parameters)
+    """
+    parts = [p for p in path.split("/") if p]
+    for template in sorted({t for _, t in spec.routes}):
+        pattern = [p for p in template.split("/") if p]
+        if len(pattern) != len(parts):
+            continue
+        params = {}
+        for expected, actual in zip(pattern, parts, strict=True):
+            if expected.startswith("{") and expected.endswith("}"):
+                params[expected[1:-1]] = actual
+            elif expected != actual:
+                break
+        else:
+            return template, params
+    return None, {}
+
+
+def claims_from_token(authorization: str) -> Optional[Dict[str, str]]:
+    """
+    Turn a dev token into the claims the Cognito authorizer would pass.
+
+    Args:
+        authorization: Authorization header value
+
+    Returns:
+        Claims with at least ``sub``, or None if the token is not usable
+    """
+    token = authorization.strip()
+    if token.lower().startswith("bearer "):
+        token = token[7:].strip()
+    if token.startswith("dev:") and len(token) > 4:
+        sub = token[4:]
+        return {"sub": sub, "email": f"{sub}@example.com", "cognito:username": sub}
+
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(payload, dict) or not payload.get("sub"):
+        return None
+    # The authorizer passes claims as strings
+    return {
+        key: value if isinstance(value, str) else json.dumps(value)
+        for key, value in payload.items()
+    }
+
+
+class Container:
+    """One emulated Lambda execution environment."""
+
+    def __init__(self, function: str, number: int, now: float) -> None:
+        """
+        Create a container.
+
+        Args:
+            function: Function it belongs to
+            number: Sequence number within the function
+            now: Monotonic creation time
+        """
+        self.name = f"{function}-{number}"
+        self.created_at = now
+        self.last_used = now
+        self.invocations = 0
+
+
+class ContainerPool:
+    """Warm and cold containers for one function."""
+
+    def __init__(
+        self,
+        function: str,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Create an empty pool.
+
+        Args:
+            function: Function name
+            idle_seconds: Idle time after which a container is reaped
+            clock: Monotonic time source
+        """
+        self.function = function
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self.idle: List[Container] = []
+        self.busy = 0
+        self.started = 0
+        self.reaped = 0
+        self.invocations = 0
+        self.queue_wait_ms = 0.0
+        self.max_queue_wait_ms = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Tuple[Container, bool]:
+        """
+        Take a container for one invocation.
+
+        Returns:
+            Tuple of (container, whether it was just started)
+        """
+        with self._lock:
+            now = self.clock()
+            live = [c for c in self.idle if now - c.last_used < self.idle_seconds]
+            self.reaped += len(self.idle) - len(live)
+            self.idle = live
+            self.busy += 1
+            if self.idle:
+                # Most recently used first, as Lambda keeps a few containers hot
+                return self.idle.pop(), False
+            self.started += 1
+            return Container(self.function, self.started, now), True
+
+    def release(self, container: Container, queue_wait_ms: float = 0.0) -> None:
+        """
+        Return a container after its invocation.
+
+        Args:
+            container: Container from ``acquire``
+            queue_wait_ms: Time the invocation waited for another one to finish
+        """
+        with self._lock:
+            container.last_used = self.clock()
+            container.invocations += 1
+            self.invocations += 1
+            self.queue_wait_ms += queue_wait_ms
+            self.max_queue_wait_ms = max(self.max_queue_wait_ms, queue_wait_ms)
+            self.busy -= 1
+            self.idle.append(container)
+
+    def stats(self) -> Dict[str, Any]:
+        """Containers started, reaped, busy and idle, and total and worst queue wait."""
+        with self._lock:
+            return {
+                "cold_starts": self.started,
+                "reaped": self.reaped,
+                "busy": self.busy,
+                "idle": len(self.idle),
+                "invocations": self.invocations,
+                "queue_wait_ms": round(self.queue_wait_ms, 1),
+                "max_queue_wait_ms": round(self.max_queue_wait_ms, 1),
+            }
+
+
+class ContainerContext(LocalContext):
+    """Lambda context whose remaining time counts down from the timeout."""
+
+    def __init__(self, request_id: str, function_name: str, timeout_ms: int) -> None:
+        """
+        Create a context at the start of an invocation.
+
+        Args:
+            request_id: Value for ``aws_request_id``
+            function_name: Value for ``function_name``
+            timeout_ms: Function timeout in milliseconds
+        """
+        super().__init__(request_id, function_name=function_name, timeout_ms=timeout_ms)
+        self._started = time.monotonic()
+
+    def get_remaining_time_in_millis(self) -> int:
+        """Return the time left before the function would time out."""
+        elapsed_ms = (time.monotonic() - self._started) * 1000.0
+        return max(0, int(self._timeout_ms - elapsed_ms))
+
+
+class LocalApi:
+    """Routes HTTP requests to the Lambda handlers through emulated containers."""
+
+    def __init__(
+        self,
+        spec: ApiSpec,
+        stage: str = "",
+        default_user: str = "",
+        cold_start_ms: Optional[float] = None,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+        loader: Callable[[str], Handler] = lambda function: importlib.import_module(
+            f"lambda_src.{function}_handler.index"
+        ).handler,
+    ) -> None:
+        """
+        Create the emulator.
+
+        Args:
+            spec: Routes and settings from ``load_api_spec``
+            stage: Stage name to strip from request paths, e.g. "dev"
+            default_user: ``sub`` for requests without a valid token; empty to
+                answer 401 as API Gateway does
+            cold_start_ms: Init time of each new container; None uses the
+                measured import time of the function's handler
+            idle_seconds: Idle time after which a container is reaped
+            loader: Returns a function's Lambda handler
+        """
+        self.spec = spec
+        self.stage = stage.strip("/")
+        self.default_user = default_user
+        self.cold_start_ms = cold_start_ms
+        self.loader = loader
+        self.pools = {
+            function: ContainerPool(function, idle_seconds)
+            for function in sorted({r.function for r in spec.routes.values() if r.function})
+        }
+        self.handlers: Dict[str, Handler] = {}
+        self.init_ms: Dict[str, float] = {}
+        self._load_lock = threading.Lock()
+        self._invoke_lock = threading.Lock()
+
+    def handle(
+        self, method: str, target: str, headers: Dict[str, str], body: bytes
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Serve one HTTP request.
+
+        Args:
+            method: HTTP method
+            target: Request target (path and query string)
+            headers: Request headers
+            body: Raw request body
+
+        Returns:
+            Tuple of (status, response headers, response body)
+        """
+        url = urlsplit(target)
+        path = url.path
+        if self.stage and (path + "/").startswith(f"/{self.stage}/"):
+            path = path[len(self.stage) + 1 :] or "/"
+        if path == STATS_PATH:
+            return _json(200, self.stats())
+
+        template, params = match_route(self.spec, path)
+        route = self.spec.routes.get((method, template or ""))
+        if route is None:
+            return _json(403, {"message": "Missing Authentication Token"})
+        if route.function is None:
+            # Mock integration: the CORS preflight answer from api-gw.tf
+            return 200, dict(self.spec.cors.get(route.template, {})), b""
+
+        claims: Dict[str, str] = {}
+        if route.authorized:
+            found = claims_from_token(_header(headers, "Authorization"))
+            if found is None and self.default_user:
+                found = claims_from_token(f"dev:{self.default_user}")
+            if found is None:
+                return _json(401, {"message": "Unauthorized"})
+            claims = found
+
+        event = proxy_event(route, path, params, url.query, headers, body, claims)
+        return self.invoke(route.function, event)
+
+    def invoke(self, function: str, event: Dict[str, Any]) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Run a proxy event through a function's container pool.
+
+        Args:
+            function: Function name
+            event: API Gateway proxy event
+
+        Returns:
+            Tuple of (status, response headers, response body)
+        """
+        handler = self._handler(function)
+        pool = self.pools[function]
+        container, cold = pool.acquire()
+        queue_wait_ms = 0.0
+        try:
+            if cold:
+                time.sleep(self._init_ms(function) / 1000.0)
+            queued = time.perf_counter()
+            with self._invoke_lock:
+                queue_wait_ms = (time.perf_counter() - queued) * 1000.0
+                if cold:
+                    _mark_cold_start()
+                # Created after the queue wait, which deployed functions do not have
+                context = ContainerContext(
+                    event["requestContext"]["requestId"],
+                    function,
+                    self.spec.timeouts.get(function, DEFAULT_TIMEOUT_SECONDS) * 1000,
+                )
+                try:
+                    result = handler(event, context)
+                except Exception:
+                    # Lambda reports an unhandled error and API Gateway answers a
+                    # generic 502; the details only go to the function's log
+                    sys.stderr.write(
+                        f"{function} {context.aws_request_id} unhandled error\n"
+                        f"{traceback.format_exc()}"
+                    )
+                    result = None
+        finally:
+            pool.release(container, queue_wait_ms)
+
+        status, headers, body = self._http_response(result)
+        headers["X-Local-Container"] = container.name
+        headers["X-Local-Cold-Start"] = str(cold).lower()
+        headers["X-Local-Queue-Wait-Ms"] = f"{queue_wait_ms:.1f}"
+        return status, headers, body
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-function container statistics and init times."""
+        return {
+            function: {**pool.stats(), "init_ms": round(self.init_ms.get(function, 0.0), 1)}
+            for function, pool in self.pools.items()
+        }
+
+    def _handler(self, function: str) -> Handler:
+        with self._load_lock:
+            if function not in self.handlers:
+                started = time.perf_counter()
+                self.handlers[function] = self.loader(function)
+                self.init_ms[function] = (time.perf_counter() - started) * 1000.0
+            return self.handlers[function]
+
+    def _init_ms(self, function: str) -> float:
+        if self.cold_start_ms is not None:
+            return self.cold_start_ms
+        # The first container paid the real import; later ones wait as long
+        started = self.pools[function].started
+        return self.init_ms.get(function, 0.0) if started > 1 else 0.0
+
+    def _http_response(self, result: Any) -> Tuple[int, Dict[str, str], bytes]:
+        if not isinstance(result, dict) or "statusCode" not in result:
+            return (
+                502,
+                {"Content-Type": "application/json"},
+                b'{"message": "Internal server error"}',
+            )
+        headers = {key: str(value) for key, value in (result.get("headers") or {}).items()}
+        body = result.get("body") or ""
+        content_type = _header(headers, "Content-Type").split(";")[0].strip()
+        if result.get("isBase64Encoded") and content_type in self.spec.binary_media_types:
+            return int(result["statusCode"]), headers, base64.b64decode(body)
+        return int(result["statusCode"]), headers, body.encode("utf-8")
+
+
+def proxy_event(
+    route: Route,
+    path: str,
+    params: Dict[str, str],
+    query: str,
+    headers: Dict[str, str],
+    body: bytes,
+    claims: Dict[str, str],
+) -> Dict[str, Any]:
+    """
+    Build the proxy event API Gateway would send for a request.
+
+    Args:
+        route: Matched route
+        path: Request path, without the stage
+        params: Path parameters
+        query: Raw query string
+        headers: Request headers
+        body: Raw request body
+        claims: Authorizer claims, empty for open routes
+
+    Returns:
+        API Gateway proxy event
+    """
+    multi_query = parse_qs(query, keep_blank_values=True)
+    try:
+        text, is_base64 = body.decode("utf-8"), False
+    except UnicodeDecodeError:
+        text, is_base64 = base64.b64encode(body).decode("ascii"), True
+    request_context: Dict[str, Any] = {
+        "requestId": str(uuid.uuid4()),
+        "resourcePath": route.template,
+        "httpMethod": route.method,
+        "path": path,
+        "requestTimeEpoch": int(time.time() * 1000),
+        "identity": {"sourceIp": "127.0.0.1"},
+    }
+    if claims:
+        request_context["authorizer"] = {"claims": claims}
+    return {
+        "resource": route.template,
+        "path": path,
+        "httpMethod": route.method,
+        "headers": headers,
+        "multiValueHeaders": {key: [value] for key, value in headers.items()},
+        "queryStringParameters": {k: v[-1] for k, v in multi_query.items()} or None,
+        "multiValueQueryStringParameters": multi_query or None,
+        "pathParameters": params or None,
+        "requestContext": request_context,
+        "body": text or None,
+        "isBase64Encoded": is_base64,
+    }
+
+
+def _header(headers: Dict[str, str], name: str) -> str:
+    wanted = name.lower()
+    return next((v for k, v in headers.items() if k.lower() == wanted), "")
+
+
+def _json(status: int, body: Any) -> Tuple[int, Dict[str, str], bytes]:
+    return status, {"Content-Type": "application/json"}, json.dumps(body).encode("utf-8")
+
+
+def _mark_cold_start() -> None:
+    # Handlers import common as a top-level package; report this container's first
+    # invocation as a cold start in its EMF line
+    module = sys.modules.get("common.metrics")
+    if module is not None:
+        module._cold_start = True  # type: ignore[attr-defined]
+
+
+def make_server(api: LocalApi, host: str = "127.0.0.1", port: int = 3001) -> ThreadingHTTPServer:
+    """
+    Create an HTTP server for the emulator (not yet serving).
+
+    Args:
+        api: Emulator
+        host: Interface to bind
+        port: Port to bind; 0 picks a free one
+
+    Returns:
+        The server
+    """
+
+    class RequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _serve(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            status, headers, payload = api.handle(
+                self.command, self.path, dict(self.headers.items()), body
+            )
+            self.send_response(status)
+            for key, value in headers.items():
+                if key.lower() != "content-length":
+                    self.send_header(key, value)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = do_OPTIONS = _serve
+
+        def log_message(self, format: str, *args: Any) -> None:
+            # Access logs would drown out load test output
+            pass
+
+    server = ThreadingHTTPServer((host, port), RequestHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: Optional[List[str]] = None, stdout: TextIO = sys.stdout) -> int:
+    """Command-line entry point; serves until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0] if __doc__ else None)
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=3001, help="Port to bind")
+    parser.add_argument("--stage", default="", help="Stage prefix to strip, e.g. dev")
+    parser.add_argument(
+        "--consolidated", action="store_true", help="Route every endpoint to the api function"
+    )
+    parser.add_argument("--default-user", default="", help="sub for requests without a token")
+    parser.add_argument("--cold-start-ms", type=float, help="Init time of each new container")
+    parser.add_argument(
+        "--idle-seconds", type=float, default=DEFAULT_IDLE_SECONDS, help="Reap idle containers"
+    )
+    parser.add_argument("--seed-users", type=int, default=0, help="Users to seed locally")
+    parser.add_argument("--seed-searches", type=int, default=5000, help="Searches to seed")
+    parser.add_argument(
+        "--aws", action="store_true", help="Use the configured DynamoDB instead of the stand-in"
+    )
+    parser.add_argument("--logs", action="store_true", help="Keep handler log and EMF lines")
+    args = parser.parse_args(argv)
+
+    api = LocalApi(
+        load_api_spec(consolidated=args.consolidated),
+        stage=args.stage,
+        default_user=args.default_user,
+        cold_start_ms=args.cold_start_ms,
+        idle_seconds=args.idle_seconds,
+    )
+    with ExitStack() as stack:
+        if not args.aws:
+            client = stack.enter_context(local_dynamodb())
+            if args.seed_users:
+                seed(client, Population(users=args.seed_users, searches=args.seed_searches))
+        if not args.logs:
+            devnull = stack.enter_context(open(os.devnull, "w"))
+            stack.enter_context(redirect_stdout(devnull))
+        server = make_server(api, args.host, args.port)
+        stack.callback(server.server_close)
+        port = server.server_address[1]
+        stdout.write(f"Serving {len(api.spec.routes)} routes on http://{args.host}:{port}\n")
+        stdout.flush()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
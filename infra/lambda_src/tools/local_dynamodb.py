@@ -0,0 +1,305 @@
+"""
+In-process DynamoDB stand-in for local tools.
+
+Uses moto (a dev dependency) to create the users and searches tables with the
+same keys as ``dynamodb.tf`` and points the handlers' table environment
+variables at them. Also seeds a synthetic population with Zipf-distributed
+activity: a few users own most of the searches, as in production.
+"""
+
+import json
+import os
+import random
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import boto3
+from moto import mock_aws
+
+USERS_TABLE = "mapme-local-users"
+SEARCHES_TABLE = "mapme-local-searches"
+TRENDING_TABLE = "mapme-local-trending"
+REGION = "us-west-1"
+
+QUERY_WORDS = [
+    "coffee", "pizza", "park", "museum", "library", "tacos", "sushi", "gym",
+    "bakery", "beach", "hotel", "pharmacy", "bookstore", "ramen", "brewery",
+    "hiking", "bike", "market", "gallery", "station",
+]  # fmt: skip
+
+BATCH_SIZE = 25
+
+
+def _table_specs() -> List[Dict[str, Any]]:
+    """Key schemas mirroring dynamodb.tf."""
+    return [
+        {
+            "TableName": USERS_TABLE,
+            "KeySchema": [{"AttributeName": "userId", "KeyType": "HASH"}],
+            "AttributeDefinitions": [{"AttributeName": "userId", "AttributeType": "S"}],
+            "BillingMode": "PAY_PER_REQUEST",
+        },
+        {
+            "TableName": SEARCHES_TABLE,
+            "KeySchema": [
+                {"AttributeName": "userId", "KeyType": "HASH"},
+                {"AttributeName": "createdAt", "KeyType": "RANGE"},
+            ],
+            "AttributeDefinitions": [
+                {"AttributeName": "userId", "AttributeType": "S"},
+                {"AttributeName": "createdAt", "AttributeType": "S"},
+                {"AttributeName": "geohash", "AttributeType": "S"},
+            ],
+            "GlobalSecondaryIndexes": [
+                {
+                    "IndexName": "RecentSearches",
+                    "KeySchema": [
+                        {"AttributeName": "userId", "KeyType": "HASH"},
+                        {"AttributeName": "createdAt", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                },
+                {
+                    "IndexName": "SearchesByGeohash",
+                    "KeySchema": [
+                        {"AttributeName": "userId", "KeyType": "HASH"},
+                        {"AttributeName": "geohash", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {
+                        "ProjectionType": "INCLUDE",
+                        "NonKeyAttributes": ["query", "lat", "lng"],
+                    },
+                },
+            ],
+            "BillingMode": "PAY_PER_REQUEST",
+        },
+        {
+            "TableName": TRENDING_TABLE,
+            "KeySchema": [
+                {"AttributeName": "pk", "KeyType": "HASH"},
+                {"AttributeName": "sk", "KeyType": "RANGE"},
+            ],
+            "AttributeDefinitions": [
+                {"AttributeName": "pk", "AttributeType": "S"},
+                {"AttributeName": "sk", "AttributeType": "S"},
+            ],
+            "BillingMode": "PAY_PER_REQUEST",
+        },
+    ]
+
+
+def handler_env() -> Dict[str, str]:
+    """Environment variables the handlers read, pointed at the local tables."""
+    return {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SECURITY_TOKEN": "testing",
+        "AWS_SESSION_TOKEN": "testing",
+        "AWS_DEFAULT_REGION": REGION,
+        "AWS_REGION": REGION,
+        "USERS_TABLE_NAME": USERS_TABLE,
+        "SEARCHES_TABLE": SEARCHES_TABLE,
+        "TRENDING_TABLE": TRENDING_TABLE,
+    }
+
+
+@contextmanager
+def local_dynamodb() -> Iterator[Any]:
+    """
+    Run the enclosed block against in-memory DynamoDB tables.
+
+    Yields:
+        boto3 DynamoDB client for the local tables
+    """
+    saved = {name: os.environ.get(name) for name in handler_env()}
+    os.environ.update(handler_env())
+    try:
+        with mock_aws():
+            client = boto3.client("dynamodb", region_name=REGION)
+            for spec in _table_specs():
+                client.create_table(**spec)
+            yield client
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def zipf_weights(n: int, exponent: float = 1.1) -> List[float]:
+    """
+    Return Zipf weights for ranks 1..n.
+
+    Args:
+        n: Number of ranks
+        exponent: Skew; larger values concentrate weight on the first ranks
+
+    Returns:
+        Unnormalized weights, one per rank
+    """
+    return [1.0 / (rank**exponent) for rank in range(1, n + 1)]
+
+
+class Population:
+    """A synthetic set of users with Zipf-distributed search activity."""
+
+    def __init__(
+        self,
+        users: int = 500,
+        searches: int = 5000,
+        exponent: float = 1.1,
+        seed: int = 42,
+        start_time: int = 1_700_000_000,
+    ) -> None:
+        """
+        Generate a population.
+
+        Args:
+            users: Number of users
+            searches: Total number of stored searches across all users
+            exponent: Zipf exponent for per-user activity
+            seed: Random seed, so runs are comparable between commits
+            start_time: Epoch seconds of the oldest generated search
+        """
+        self.rng = random.Random(seed)
+        self.user_ids = [f"user-{i:06d}" for i in range(users)]
+        self.weights = zipf_weights(users, exponent)
+        self.start_time = start_time
+        self.search_counts: Dict[str, int] = dict.fromkeys(self.user_ids, 0)
+        for user_id in self.rng.choices(self.user_ids, self.weights, k=searches):
+            self.search_counts[user_id] += 1
+
+    def pick_user(self) -> str:
+        """Pick a user with probability proportional to their activity."""
+        return self.rng.choices(self.user_ids, self.weights)[0]
+
+    def query(self) -> str:
+        """Return a random search query."""
+        return " ".join(self.rng.sample(QUERY_WORDS, self.rng.randint(1, 3)))
+
+    def user_items(self) -> Iterator[Dict[str, Any]]:
+        """Yield low-level users table items."""
+        for i, user_id in enumerate(self.user_ids):
+            created = f"2024-01-01T00:00:{i % 60:02d}Z"
+            yield {
+                "userId": {"S": user_id},
+                "email": {"S": f"{user_id}@example.com"},
+                "name": {"S": f"User {i}"},
+                "avatarUrl": {"S": ""},
+                "createdAt": {"S": created},
+                "updatedAt": {"S": created},
+            }
+
+    def search_items(self) -> Iterator[Dict[str, Any]]:
+        """Yield low-level searches table items."""
+        for user_id, count in self.search_counts.items():
+            for n in range(count):
+                yield {
+                    "userId": {"S": user_id},
+                    "createdAt": {"S": str(self.start_time + n)},
+                    "query": {"S": self.query()},
+                }
+
+
+def _write_all(client: Any, table: str, items: Iterator[Dict[str, Any]]) -> int:
+    written = 0
+    batch: List[Dict[str, Any]] = []
+    for item in items:
+        batch.append({"PutRequest": {"Item": item}})
+        if len(batch) == BATCH_SIZE:
+            client.batch_write_item(RequestItems={table: batch})
+            written += len(batch)
+            batch = []
+    if batch:
+        client.batch_write_item(RequestItems={table: batch})
+        written += len(batch)
+    return written
+
+
+def seed(client: Any, population: Population) -> Dict[str, int]:
+    """
+    Write a population into the local tables.
+
+    Args:
+        client: Client from ``local_dynamodb``
+        population: Population to write
+
+    Returns:
+        Number of items written per table
+    """
+    return {
+        USERS_TABLE: _write_all(client, USERS_TABLE, population.user_items()),
+        SEARCHES_TABLE: _write_all(client, SEARCHES_TABLE, population.search_items()),
+    }
+
+
+def api_event(
+    method: str,
+    path: str,
+    user_id: Optional[str],
+    body: Any = None,
+    headers: Optional[Dict[str, str]] = None,
+    resource: Optional[str] = None,
+    query: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Build an API Gateway proxy event as the Cognito authorizer would pass it.
+
+    Args:
+        method: HTTP method
+        path: Request path
+        user_id: Cognito sub, or None for an unauthenticated request
+        body: JSON-serializable body (strings are passed through)
+        headers: Extra request headers
+        resource: Resource template; defaults to the path
+        query: Query string parameters
+
+    Returns:
+        API Gateway proxy event
+    """
+    claims: Dict[str, str] = {}
+    if user_id:
+        claims = {"sub": user_id, "email": f"{user_id}@example.com", "cognito:username": user_id}
+    if body is not None and not isinstance(body, str):
+        body = json.dumps(body)
+    return {
+        "httpMethod": method,
+        "path": path,
+        "resource": resource or path,
+        "headers": {"Content-Type": "application/json", **(headers or {})},
+        "queryStringParameters": query,
+        "requestContext": {"authorizer": {"claims": claims}},
+        "body": body,
+        "isBase64Encoded": False,
+    }
+
+
+class LocalContext:
+    """Minimal Lambda context for in-process invocations."""
+
+    def __init__(
+        self,
+        request_id: str,
+        function_name: str = "local",
+        memory_limit_in_mb: int = 128,
+        timeout_ms: int = 10000,
+    ) -> None:
+        """
+        Create a context.
+
+        Args:
+            request_id: Value for ``aws_request_id``
+            function_name: Value for ``function_name``
+            memory_limit_in_mb: Configured memory size
+            timeout_ms: Function timeout in milliseconds
+        """
+        self.aws_request_id = request_id
+        self.function_name = function_name
+        self.memory_limit_in_mb = memory_limit_in_mb
+        self.invoked_function_arn = f"arn:aws:lambda:{REGION}:000000000000:function:{function_name}"
+        self._timeout_ms = timeout_ms
+
+    def get_remaining_time_in_millis(self) -> int:
+        """Return the configured timeout; local invocations never run down the clock."""
+        return self._timeout_ms
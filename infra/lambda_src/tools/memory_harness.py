@@ -0,0 +1,389 @@
+"""
+Measure handler memory under an RSS limit and recommend Lambda memory sizes.
+
+Each route runs in a fresh interpreter (so import and cold-start memory count)
+against the seeded DynamoDB stand-in from ``local_dynamodb``, with the
+``memory_probed`` tracemalloc probe enabled. A watchdog thread samples the
+child's RSS and kills it, like Lambda does, once the handler's share exceeds
+``--limit-mb``. The stand-in's own memory is measured after seeding and
+subtracted; boto3 is imported before the baseline so it is counted as handler
+memory, as it would be in Lambda.
+
+Usage (from infra/):
+    python -m lambda_src.tools.memory_harness
+    python -m lambda_src.tools.memory_harness --routes "GET /searches" sqs --json
+    python -m lambda_src.tools.memory_harness --output mem.json
+    python -m lambda_src.tools.memory_harness --baseline mem.json   # exits 1 on growth
+
+Estimates are approximate: RSS is sampled every few milliseconds, so very short
+spikes can be missed, and the Lambda runtime's own overhead is not included.
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+# Sizes Lambda is commonly configured with (MB)
+LAMBDA_SIZES = (128, 256, 512, 1024, 2048)
+
+# Which routes each deployed function serves
+FUNCTIONS: Dict[str, List[str]] = {
+    "user": ["GET /user", "PUT /user"],
+    "searches": ["GET /searches", "POST /searches"],
+    "searches_ingest": ["sqs"],
+    "post_confirmation": ["PostConfirmation_ConfirmSignUp"],
+    "api": ["GET /user", "PUT /user", "GET /searches", "POST /searches"],
+}
+
+ROUTES = sorted({route for routes in FUNCTIONS.values() for route in routes})
+
+OOM_EXIT_CODE = 137
+WATCHDOG_INTERVAL_SECONDS = 0.005
+INGEST_BATCH = 100
+
+
+def current_rss_kb() -> int:
+    """Return the current resident set size in KiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError):
+        return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+class RssWatchdog(threading.Thread):
+    """Samples RSS in the background and kills the process over its budget."""
+
+    def __init__(self, offset_kb: int, limit_kb: int, on_kill: Callable[[int], None]) -> None:
+        """
+        Create a watchdog.
+
+        Args:
+            offset_kb: RSS not attributed to the handler (the stand-in)
+            limit_kb: Budget for the handler's share of RSS
+            on_kill: Called with the observed share just before exiting
+        """
+        super().__init__(daemon=True)
+        self.offset_kb = offset_kb
+        self.limit_kb = limit_kb
+        self.on_kill = on_kill
+        self.peak_kb = 0
+        self.stopped = threading.Event()
+
+    def sample(self) -> int:
+        """Take one sample and return the handler's share of RSS."""
+        share = current_rss_kb() - self.offset_kb
+        self.peak_kb = max(self.peak_kb, share)
+        return share
+
+    def run(self) -> None:
+        """Sample until stopped; exit like an out-of-memory kill on overrun."""
+        while not self.stopped.wait(WATCHDOG_INTERVAL_SECONDS):
+            share = self.sample()
+            if share > self.limit_kb:
+                self.on_kill(share)
+                os._exit(OOM_EXIT_CODE)
+
+
+def _events(route: str, population: Any, requests: int) -> List[Dict[str, Any]]:
+    from lambda_src.common.queue import LocalQueue
+    from lambda_src.tools.bench_handlers import build_event
+
+    if route == "sqs":
+        queue = LocalQueue("memory-harness")
+        events = []
+        for _ in range(requests):
+            for n in range(INGEST_BATCH):
+                item = {
+                    "userId": {"S": population.pick_user()},
+                    "createdAt": {"S": str(1_800_000_000 + n)},
+                    "query": {"S": population.query()},
+                }
+                queue.send({"item": item})
+            events.append(queue.receive_event(max_messages=INGEST_BATCH))
+        return events
+    if route.startswith("PostConfirmation"):
+        return [
+            {
+                "triggerSource": route,
+                "userName": f"new-{i}",
+                "request": {"userAttributes": {"sub": f"new-{i}", "email": f"new-{i}@x.com"}},
+            }
+            for i in range(requests)
+        ]
+    return [build_event(route, population) for _ in range(requests)]
+
+
+def _entry_point(route: str) -> Callable[[Dict[str, Any], Any], Any]:
+    handler: Callable[[Dict[str, Any], Any], Any]
+    if route == "sqs":
+        from lambda_src.searches_ingest_handler.index import handler
+
+        return handler
+    if route.startswith("PostConfirmation"):
+        from lambda_src.post_confirmation_handler.index import handler
+
+        return handler
+    from lambda_src.tools.bench_handlers import load_entry_points
+
+    return load_entry_points()[route]
+
+
+def run_child(
+    route: str, limit_mb: int, requests: int, users: int, searches: int, stdout: TextIO
+) -> int:
+    """
+    Measure one route in this process and print a JSON result line.
+
+    Args:
+        route: Route to drive
+        limit_mb: RSS budget for the handler's share
+        requests: Invocations (SQS batches for "sqs")
+        users: Users in the seeded population
+        searches: Stored searches in the seeded population
+        stdout: Where the result line is written
+
+    Returns:
+        Process exit code (0, or OOM_EXIT_CODE via the watchdog)
+    """
+    # Load boto3 before the baseline: Lambda pays for it too
+    import boto3
+
+    boto3.client("dynamodb", region_name="us-west-1")
+    os.environ["MEMORY_PROFILE_SAMPLE_RATE"] = "1"
+    os.environ.setdefault("SEARCHES_QUEUE_URL", "")
+    baseline_kb = current_rss_kb()
+
+    from lambda_src.tools.local_dynamodb import LocalContext, Population, local_dynamodb, seed
+
+    result: Dict[str, Any] = {"route": route, "limit_mb": limit_mb, "requests": requests}
+
+    def emit(status: str, share_kb: int) -> None:
+        result.update(status=status, estimated_peak_mb=round(share_kb / 1024.0, 1))
+        stdout.write(json.dumps(result) + "\n")
+        stdout.flush()
+
+    with local_dynamodb() as client:
+        population = Population(users, searches)
+        seed(client, population)
+        events = _events(route, population, requests)
+        standin_kb = current_rss_kb() - baseline_kb
+        result["standin_mb"] = round(standin_kb / 1024.0, 1)
+
+        watchdog = RssWatchdog(
+            standin_kb, limit_mb * 1024, lambda share: emit("out_of_memory", share)
+        )
+        watchdog.start()
+
+        captured = io.StringIO()
+        errors = 0
+        with redirect_stdout(captured):
+            handler = _entry_point(route)
+            for event in events:
+                context = LocalContext(
+                    str(uuid.uuid4()), function_name="memory-harness", memory_limit_in_mb=limit_mb
+                )
+                response = handler(event, context)
+                if isinstance(response, dict):
+                    errors += int(response.get("statusCode", 200)) >= 500
+                    errors += len(response.get("batchItemFailures", []))
+                watchdog.sample()
+
+        watchdog.stopped.set()
+        watchdog.join()
+
+    records = [
+        json.loads(line)
+        for line in captured.getvalue().splitlines()
+        if line.startswith("{") and '"Handler memory"' in line
+    ]
+    heaviest: Dict[str, Any] = max(records, key=lambda r: r.get("peak_kb", 0), default={})
+    tracing_kb = max((r.get("tracing_overhead_kb", 0) for r in records), default=0)
+    share_kb = max(0, int(watchdog.peak_kb - tracing_kb))
+    result.update(
+        errors=errors,
+        python_peak_kb=heaviest.get("peak_kb", 0.0),
+        top_allocations=heaviest.get("top_allocations", []),
+    )
+    emit("out_of_memory" if share_kb > limit_mb * 1024 else "ok", share_kb)
+    return 0
+
+
+def measure(
+    route: str, limit_mb: int, requests: int, users: int, searches: int, timeout: float = 600
+) -> Dict[str, Any]:
+    """
+    Run one route in a child interpreter.
+
+    Args:
+        route: Route to drive
+        limit_mb: RSS budget for the handler's share
+        requests: Invocations
+        users: Users in the seeded population
+        searches: Stored searches in the seeded population
+        timeout: Seconds before the child is abandoned
+
+    Returns:
+        The child's result, with status "crashed" if it printed nothing
+    """
+    argv = [
+        sys.executable, "-m", "lambda_src.tools.memory_harness", "--child", route,
+        "--limit-mb", str(limit_mb), "--requests", str(requests),
+        "--users", str(users), "--searches", str(searches),
+    ]  # fmt: skip
+    started = time.perf_counter()
+    completed = subprocess.run(argv, capture_output=True, text=True, timeout=timeout)
+    lines = [line for line in completed.stdout.splitlines() if line.startswith("{")]
+    if lines:
+        result: Dict[str, Any] = json.loads(lines[0])
+    else:
+        result = {"route": route, "limit_mb": limit_mb, "status": "crashed"}
+        result["stderr"] = completed.stderr[-2000:]
+    result["exit_code"] = completed.returncode
+    result["seconds"] = round(time.perf_counter() - started, 2)
+    return result
+
+
+def recommend(results: Dict[str, Dict[str, Any]], headroom: float = 0.25) -> Dict[str, Any]:
+    """
+    Pick the smallest Lambda size per function that leaves the given headroom.
+
+    Args:
+        results: Measurement per route
+        headroom: Fraction of the memory size to keep free
+
+    Returns:
+        Per function: the routes' largest estimated peak and the recommended size
+        (None when a route failed or no size is large enough)
+    """
+    recommendations: Dict[str, Any] = {}
+    for function, routes in FUNCTIONS.items():
+        measured = [results[route] for route in routes if route in results]
+        if not measured:
+            continue
+        failed = any(r.get("status") != "ok" for r in measured)
+        peak = max(float(r.get("estimated_peak_mb", 0.0)) for r in measured)
+        size = None
+        if not failed:
+            size = next((s for s in LAMBDA_SIZES if peak <= s * (1 - headroom)), None)
+        recommendations[function] = {"estimated_peak_mb": peak, "memory_size_mb": size}
+    return recommendations
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    tolerance: float = 0.1,
+    min_delta_mb: float = 2.0,
+) -> List[Dict[str, Any]]:
+    """
+    Find routes whose estimated peak memory grew against a baseline.
+
+    Args:
+        baseline: Report from an earlier run
+        current: Report from this run
+        tolerance: Allowed relative growth
+        min_delta_mb: Smallest absolute growth treated as a regression
+
+    Returns:
+        One entry per regressed route
+    """
+    regressions = []
+    for route, now in current.get("routes", {}).items():
+        before = baseline.get("routes", {}).get(route)
+        if not before:
+            continue
+        old = float(before.get("estimated_peak_mb", 0.0))
+        new = float(now.get("estimated_peak_mb", 0.0))
+        if new > old * (1 + tolerance) and new - old > min_delta_mb:
+            regressions.append({"route": route, "baseline_mb": old, "current_mb": new})
+    return regressions
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a harness report as plain text."""
+    out = [f"{'route':<32} {'status':<14} {'peak MB':>8} {'py peak KB':>11} {'errors':>6}"]
+    for route, r in report["routes"].items():
+        out.append(
+            f"{route:<32} {r.get('status', '?'):<14} {r.get('estimated_peak_mb', '-'):>8} "
+            f"{r.get('python_peak_kb', '-'):>11} {r.get('errors', '-'):>6}"
+        )
+    out.append("")
+    out.append(f"{'function':<20} {'peak MB':>8} {'memory_size':>12}")
+    for function, rec in report["recommendations"].items():
+        size = rec["memory_size_mb"] or "n/a"
+        out.append(f"{function:<20} {rec['estimated_peak_mb']:>8} {size:>12}")
+    for route, r in report["routes"].items():
+        if r.get("top_allocations"):
+            out.append("")
+            out.append(f"Top allocation sites for {route}")
+            for site in r["top_allocations"][:5]:
+                out.append(f"  {site['size_kb']:>9} KB {site['count']:>7}  {site['site']}")
+    for regression in report.get("regressions", []):
+        out.append(
+            f"REGRESSION {regression['route']}: "
+            f"{regression['baseline_mb']} -> {regression['current_mb']} MB"
+        )
+    return "\n".join(out)
+
+
+def main(argv: Optional[List[str]] = None, stdout: TextIO = sys.stdout) -> int:
+    """Command-line entry point; exits 1 on out-of-memory, crashes or regressions."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0] if __doc__ else None)
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=ROUTES)
+    parser.add_argument("--limit-mb", type=int, default=LAMBDA_SIZES[-1], help="RSS budget")
+    parser.add_argument("--requests", type=int, default=50, help="Invocations per route")
+    parser.add_argument("--users", type=int, default=200, help="Seeded users")
+    parser.add_argument("--searches", type=int, default=5000, help="Seeded searches")
+    parser.add_argument("--headroom", type=float, default=0.25, help="Memory to keep free")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative growth")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return run_child(
+            args.child, args.limit_mb, args.requests, args.users, args.searches, stdout
+        )
+
+    results = {
+        route: measure(route, args.limit_mb, args.requests, args.users, args.searches)
+        for route in args.routes
+    }
+    report: Dict[str, Any] = {
+        "config": {
+            "limit_mb": args.limit_mb,
+            "requests": args.requests,
+            "users": args.users,
+            "searches": args.searches,
+            "headroom": args.headroom,
+        },
+        "routes": results,
+        "recommendations": recommend(results, args.headroom),
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = compare(json.load(f), report, args.tolerance)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    stdout.write((json.dumps(report, indent=2) if args.json else format_report(report)) + "\n")
+    failed = any(r.get("status") != "ok" for r in results.values())
+    return 1 if failed or report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
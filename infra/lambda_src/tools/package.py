@@ -0,0 +1,381 @@
+"""
+Build deployment zips that hold only what each Lambda function imports.
+
+Starting from ``<function>_handler/index.py``, imports are followed through
+``lambda_src`` (including imports inside functions) to get the function's
+import closure. Tests, package shims nothing imports, ``requirements.txt`` and
+packages the Python runtime already provides (boto3, botocore and their
+dependencies) are left out. ``index.py`` goes at the archive root, as
+``handler = "index.handler"`` expects, and ``common`` and any sibling handler
+packages sit beside it as packages.
+
+Every module is precompiled to ``__pycache__`` as an unchecked-hash ``.pyc``.
+``/var/task`` is read-only, so without them each cold start compiles every
+module again; unchecked pycs are also used without stat-ing the source. The
+sources stay in the zip so tracebacks keep their lines. Pycs are only valid for
+the interpreter version that wrote them, so packaging must run on the Python
+version in the ``runtime`` of ``lambda-functions.tf``.
+
+Each package is then imported in a fresh, isolated interpreter. This checks
+that ``index.handler`` resolves, that nothing is imported from outside the
+package, and that no bytecode had to be recompiled.
+
+Usage (from infra/):
+    python -m lambda_src.tools.package --output-dir /tmp/lambda
+    python -m lambda_src.tools.package user searches --json
+"""
+
+import argparse
+import ast
+import importlib.util
+import json
+import os
+import py_compile
+import re
+import shutil
+import subprocess
+import sys
+import zipfile
+from typing import Any, Dict, List, Optional, Set, TextIO
+
+LAMBDA_SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INFRA_DIR = os.path.dirname(LAMBDA_SRC)
+
+ENTRY_POINT = "index.py"
+HANDLER_SUFFIX = "_handler"
+
+# Distributions in the Lambda Python runtime, with the module each installs
+RUNTIME_PROVIDED = {
+    "boto3": "boto3",
+    "botocore": "botocore",
+    "s3transfer": "s3transfer",
+    "jmespath": "jmespath",
+    "python-dateutil": "dateutil",
+    "urllib3": "urllib3",
+    "six": "six",
+}
+
+# Zip entries get a fixed timestamp so unchanged code gives an unchanged zip
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+VERIFY_SCRIPT = """
+import json, os, sys, time
+root, local = sys.argv[1], set(sys.argv[2:])
+sys.path.insert(0, root)
+start = time.perf_counter()
+import index
+import_ms = (time.perf_counter() - start) * 1000
+outside = sorted(
+    name for name, module in list(sys.modules.items())
+    if name.split(".")[0] in local
+    and not os.path.abspath(getattr(module, "__file__", None) or "").startswith(root + os.sep)
+)
+print(json.dumps({
+    "import_ms": round(import_ms, 1),
+    "handler": callable(getattr(index, "handler", None)),
+    "outside": outside,
+}))
+"""
+
+
+class PackagingError(Exception):
+    """A function could not be packaged, or its package does not import."""
+
+
+def functions(src: str = LAMBDA_SRC) -> List[str]:
+    """Return the function names: each ``<name>_handler`` directory with an ``index.py``."""
+    return sorted(
+        entry[: -len(HANDLER_SUFFIX)]
+        for entry in os.listdir(src)
+        if entry.endswith(HANDLER_SUFFIX) and os.path.isfile(os.path.join(src, entry, ENTRY_POINT))
+    )
+
+
+def runtime_version(infra_dir: str = INFRA_DIR) -> str:
+    """
+    Read the Python version the functions run on from ``lambda-functions.tf``.
+
+    Raises:
+        PackagingError: If the functions do not share exactly one Python runtime
+    """
+    with open(os.path.join(infra_dir, "lambda-functions.tf"), encoding="utf-8") as f:
+        versions: Set[str] = set(re.findall(r'runtime\s*=\s*"python(\d+\.\d+)"', f.read()))
+    if len(versions) != 1:
+        raise PackagingError(f"Expected one Python runtime, found {sorted(versions) or 'none'}")
+    return versions.pop()
+
+
+def _module_file(src: str, module: str) -> Optional[str]:
+    """Return the source file of ``module`` under ``src``, if it is a local module."""
+    base = os.path.join(src, *module.split("."))
+    for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _imported_names(path: str, module: str) -> Set[str]:
+    """
+    Return every module name a source file may import, resolving relative imports.
+
+    For ``from package import name`` both ``package`` and ``package.name`` are
+    returned, since ``name`` may be a submodule.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    package = module.split(".") if path.endswith("__init__.py") else module.split(".")[:-1]
+
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            parts = package[: len(package) - node.level + 1] if node.level else []
+            base = ".".join(parts + (node.module.split(".") if node.module else []))
+            names.add(base)
+            names.update(f"{base}.{alias.name}" for alias in node.names if alias.name != "*")
+    return names
+
+
+def import_closure(function: str, src: str = LAMBDA_SRC) -> Dict[str, Any]:
+    """
+    Follow imports from a function's ``index.py`` through ``lambda_src``.
+
+    Args:
+        function: Function name, e.g. ``searches`` for ``searches_handler``
+        src: The ``lambda_src`` directory
+
+    Returns:
+        ``files`` maps archive paths to source paths; ``runtime`` lists the
+        runtime-provided packages the code imports
+
+    Raises:
+        PackagingError: If the code imports a third-party package the runtime
+            does not provide, or a test module
+    """
+    entry = function + HANDLER_SUFFIX + ".index"
+    files = {ENTRY_POINT: os.path.join(src, function + HANDLER_SUFFIX, ENTRY_POINT)}
+    external: Set[str] = set()
+    pending, seen = [entry], {entry}
+
+    while pending:
+        module = pending.pop()
+        path = files[ENTRY_POINT] if module == entry else _module_file(src, module)
+        if path is None:
+            continue
+        if module != entry:
+            if module.split(".")[-1].startswith("test_") or module.endswith("conftest"):
+                raise PackagingError(f"{function} imports test module {module}")
+            files[os.path.relpath(path, src)] = path
+
+        # Importing a.b.c runs a/__init__.py and a/b/__init__.py first
+        parents = [".".join(module.split(".")[:i]) for i in range(1, module.count(".") + 1)]
+        for name in list(_imported_names(path, module)) + (parents if module != entry else []):
+            top = name.split(".")[0]
+            if not name or name in seen:
+                continue
+            seen.add(name)
+            if _module_file(src, top) is not None:
+                pending.append(name)
+            elif top not in sys.stdlib_module_names:
+                external.add(top)
+
+    missing = external - set(RUNTIME_PROVIDED.values())
+    if missing:
+        raise PackagingError(
+            f"{function} imports {', '.join(sorted(missing))}, which the Lambda runtime "
+            "does not provide; vendor it or use a layer"
+        )
+    return {"files": files, "runtime": sorted(external)}
+
+
+def _check_requirements(function: str, src: str) -> None:
+    """Refuse requirements the runtime does not provide, rather than silently dropping them."""
+    path = os.path.join(src, function + HANDLER_SUFFIX, "requirements.txt")
+    if not os.path.isfile(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        names = {
+            re.split(r"[<>=!~;\[ ]", line.strip(), maxsplit=1)[0].lower()
+            for line in f
+            if line.strip() and not line.lstrip().startswith("#")
+        }
+    extra = sorted(names - set(RUNTIME_PROVIDED))
+    if extra:
+        raise PackagingError(
+            f"{function} requires {', '.join(extra)}, which the Lambda runtime does not provide"
+        )
+
+
+def _write_zip(build_dir: str, archive: str) -> None:
+    """Zip a build directory with sorted entries and fixed timestamps."""
+    paths: List[str] = []
+    for root, _, names in os.walk(build_dir):
+        paths.extend(os.path.join(root, name) for name in names)
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        for path in sorted(paths):
+            info = zipfile.ZipInfo(os.path.relpath(path, build_dir), ZIP_DATE_TIME)
+            info.external_attr = 0o644 << 16
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with open(path, "rb") as f:
+                zf.writestr(info, f.read())
+
+
+def build_package(
+    function: str, output_dir: str, src: str = LAMBDA_SRC, python: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Lay out, precompile and zip one function.
+
+    Args:
+        function: Function name, e.g. ``searches``
+        output_dir: Where ``<function>.zip`` is written; the unzipped package
+            goes to ``build/<function>`` inside it
+        src: The ``lambda_src`` directory
+        python: Target Python version, e.g. ``3.11``; defaults to the runtime
+            in ``lambda-functions.tf``
+
+    Returns:
+        A report row with the archive path and sizes
+
+    Raises:
+        PackagingError: If the closure cannot be packaged, or this interpreter
+            is not the target version
+    """
+    python = python or runtime_version()
+    running = f"{sys.version_info.major}.{sys.version_info.minor}"
+    if running != python:
+        raise PackagingError(f"Pycs for python{python} need Python {python}, not {running}")
+    _check_requirements(function, src)
+    closure = import_closure(function, src)
+
+    build_dir = os.path.join(os.path.abspath(output_dir), "build", function)
+    shutil.rmtree(build_dir, ignore_errors=True)
+    source_bytes = pyc_bytes = 0
+    for relpath, path in sorted(closure["files"].items()):
+        dest = os.path.join(build_dir, relpath)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copyfile(path, dest)
+        pyc = importlib.util.cache_from_source(dest)
+        py_compile.compile(
+            dest,
+            cfile=pyc,
+            dfile=relpath,
+            doraise=True,
+            invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+        )
+        source_bytes += os.path.getsize(dest)
+        pyc_bytes += os.path.getsize(pyc)
+
+    archive = os.path.join(os.path.abspath(output_dir), f"{function}.zip")
+    _write_zip(build_dir, archive)
+    return {
+        "function": function,
+        "archive": archive,
+        "build_dir": build_dir,
+        "modules": len(closure["files"]),
+        "runtime_imports": closure["runtime"],
+        "source_bytes": source_bytes,
+        "pyc_bytes": pyc_bytes,
+        "zip_bytes": os.path.getsize(archive),
+    }
+
+
+def _listing(build_dir: str) -> Set[str]:
+    """Return every file under a build directory."""
+    return {os.path.join(root, name) for root, _, names in os.walk(build_dir) for name in names}
+
+
+def verify_package(build_dir: str, timeout: float = 60.0) -> Dict[str, Any]:
+    """
+    Import a built package's ``index`` in a fresh, isolated interpreter.
+
+    Args:
+        build_dir: The unzipped package
+        timeout: Seconds to wait for the import
+
+    Returns:
+        ``import_ms``, the time ``import index`` took
+
+    Raises:
+        PackagingError: If the import fails, ``index.handler`` is missing, a
+            local module came from outside the package, or a pyc was rewritten
+    """
+    build_dir = os.path.abspath(build_dir)
+    local = {os.path.splitext(name)[0] for name in os.listdir(build_dir) + os.listdir(LAMBDA_SRC)}
+    before = _listing(build_dir)
+    env = dict(os.environ)
+    env.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    completed = subprocess.run(
+        [sys.executable, "-I", "-c", VERIFY_SCRIPT, build_dir, *sorted(local)],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        env=env,
+        cwd=build_dir,
+    )
+    if completed.returncode != 0:
+        raise PackagingError(f"import index failed in {build_dir}:\n{completed.stderr.strip()}")
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    if not result["handler"]:
+        raise PackagingError(f"index.handler is not callable in {build_dir}")
+    if result["outside"]:
+        raise PackagingError(f"Imported from outside {build_dir}: {', '.join(result['outside'])}")
+    written = sorted(os.path.relpath(path, build_dir) for path in _listing(build_dir) - before)
+    if written:
+        raise PackagingError(f"Bytecode was recompiled in {build_dir}: {', '.join(written)}")
+    return {"import_ms": result["import_ms"]}
+
+
+def package_all(
+    names: List[str], output_dir: str, python: Optional[str] = None, verify: bool = True
+) -> List[Dict[str, Any]]:
+    """Build, and optionally verify, each named function."""
+    rows = []
+    for function in names:
+        row = build_package(function, output_dir, python=python)
+        if verify:
+            row.update(verify_package(row["build_dir"]))
+        rows.append(row)
+    return rows
+
+
+def format_rows(rows: List[Dict[str, Any]]) -> str:
+    """Render packaging results as a plain-text table."""
+    out = [f"{'function':<20} {'modules':>7} {'source':>8} {'pyc':>8} {'zip':>8} {'import ms':>10}"]
+    for row in rows:
+        import_ms = row.get("import_ms", "-")
+        out.append(
+            f"{row['function']:<20} {row['modules']:>7} {row['source_bytes']:>8} "
+            f"{row['pyc_bytes']:>8} {row['zip_bytes']:>8} {import_ms:>10}"
+        )
+    return "\n".join(out)
+
+
+def main(argv: Optional[List[str]] = None, stdout: TextIO = sys.stdout) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0] if __doc__ else None)
+    parser.add_argument("functions", nargs="*", help="Functions to package (default: all)")
+    parser.add_argument("--output-dir", default="dist", help="Where the zips are written")
+    parser.add_argument("--python", help="Target Python version (default: from Terraform)")
+    parser.add_argument("--no-verify", action="store_true", help="Skip the import check")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    unknown = sorted(set(args.functions) - set(functions()))
+    if unknown:
+        parser.error(f"unknown functions: {', '.join(unknown)}")
+    try:
+        rows = package_all(
+            args.functions or functions(), args.output_dir, args.python, not args.no_verify
+        )
+    except PackagingError as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+    stdout.write((json.dumps(rows, indent=2) if args.json else format_rows(rows)) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
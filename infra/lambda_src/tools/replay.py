@@ -0,0 +1,442 @@
+"""
+Replay captured Lambda events against the handlers, concurrently.
+
+Reads API Gateway proxy events and Cognito post-confirmation events (NDJSON,
+one event per line), rewrites user identities and request timestamps, and
+dispatches them to the ``user_handler``, ``searches_handler`` and
+``post_confirmation_handler`` entry points from a thread or process pool,
+either at a target rate or as fast as the pool allows. Reports latency
+histograms and percentiles, error rates and throughput per route.
+
+Usage (from infra/):
+    python -m lambda_src.tools.replay incident.ndjson --rate 50 --workers 8
+    python -m lambda_src.tools.replay incident.ndjson --max --processes --workers 4 --json
+
+By default each worker process runs against the in-memory DynamoDB stand-in
+from ``local_dynamodb``. With ``--aws`` the handlers use whatever the
+environment points at, e.g. DynamoDB Local via ``AWS_ENDPOINT_URL_DYNAMODB``
+and the table name variables, so all processes share one store.
+
+Each invocation's deadline and negotiated response format are context
+variables, so threads never see another invocation's. Per-invocation
+telemetry (logger, metrics, capacity) is process-global, as in a Lambda
+container that serves one request at a time, so with threads the reported
+phases and log context of overlapping invocations mix. Use ``--processes``
+when that isolation matters and threads when only I/O concurrency does.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, redirect_stdout
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from lambda_src.common.metrics import route_of
+from lambda_src.tools.bench_handlers import summarize
+from lambda_src.tools.local_dynamodb import LocalContext, local_dynamodb
+
+Handler = Callable[[Dict[str, Any], Any], Any]
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Maximum submitted-but-unfinished events in --max mode
+MAX_IN_FLIGHT_PER_WORKER = 4
+
+API_TIME_FORMAT = "%d/%b/%Y:%H:%M:%S +0000"
+
+_targets: Optional[Dict[str, Handler]] = None
+_worker_stack = ExitStack()
+
+
+def read_events(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Decode captured events, skipping blank and malformed lines.
+
+    Args:
+        lines: NDJSON lines; anything before the first "{" is ignored
+
+    Yields:
+        Event dicts
+    """
+    for line in lines:
+        start = line.find("{")
+        if start < 0:
+            continue
+        try:
+            event = json.loads(line[start:])
+        except ValueError:
+            continue
+        if isinstance(event, dict):
+            yield event
+
+
+class EventRewriter:
+    """
+    Rewrites captured events so they can be replayed safely.
+
+    Each distinct Cognito sub is mapped to a stable synthetic ID (with matching
+    email and username), and request timestamps are shifted so the first event
+    happens "now" while relative spacing is kept.
+    """
+
+    def __init__(self, user_prefix: str = "replay-user-", now_ms: Optional[int] = None) -> None:
+        """
+        Create a rewriter.
+
+        Args:
+            user_prefix: Prefix of the synthetic user IDs
+            now_ms: Epoch milliseconds the first event is moved to
+        """
+        self.user_prefix = user_prefix
+        self.now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        self.users: Dict[str, str] = {}
+        self._offset_ms: Optional[int] = None
+
+    def user(self, original: str) -> str:
+        """Return the synthetic ID for an original user ID."""
+        if original not in self.users:
+            self.users[original] = f"{self.user_prefix}{len(self.users):06d}"
+        return self.users[original]
+
+    def _rewrite_identity(self, attributes: Dict[str, Any], sub_key: str) -> None:
+        original = attributes.get(sub_key)
+        if not original:
+            return
+        user_id = self.user(str(original))
+        attributes[sub_key] = user_id
+        if "email" in attributes:
+            attributes["email"] = f"{user_id}@example.com"
+        if "cognito:username" in attributes:
+            attributes["cognito:username"] = user_id
+
+    def _rewrite_time(self, request_context: Dict[str, Any]) -> None:
+        epoch = request_context.get("requestTimeEpoch")
+        if not isinstance(epoch, (int, float)):
+            return
+        if self._offset_ms is None:
+            self._offset_ms = self.now_ms - int(epoch)
+        shifted = int(epoch) + self._offset_ms
+        request_context["requestTimeEpoch"] = shifted
+        if "requestTime" in request_context:
+            request_context["requestTime"] = datetime.fromtimestamp(
+                shifted / 1000.0, tz=timezone.utc
+            ).strftime(API_TIME_FORMAT)
+
+    def rewrite(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Return a rewritten copy of an event.
+
+        Args:
+            event: Captured API Gateway or Cognito trigger event
+
+        Returns:
+            Event with synthetic identities, fresh request IDs and shifted times
+        """
+        event = json.loads(json.dumps(event))
+        request_context = event.get("requestContext")
+        if isinstance(request_context, dict):
+            claims = (request_context.get("authorizer") or {}).get("claims")
+            if isinstance(claims, dict):
+                self._rewrite_identity(claims, "sub")
+            self._rewrite_time(request_context)
+            if "requestId" in request_context:
+                request_context["requestId"] = str(uuid.uuid4())
+        if "triggerSource" in event:
+            attributes = (event.get("request") or {}).get("userAttributes")
+            if isinstance(attributes, dict):
+                self._rewrite_identity(attributes, "sub")
+                event["userName"] = attributes.get("sub", event.get("userName"))
+        return event
+
+
+def target_of(event: Dict[str, Any]) -> Optional[str]:
+    """
+    Choose the handler for an event.
+
+    Args:
+        event: Rewritten event
+
+    Returns:
+        "user", "searches", "post_confirmation", or None when no handler applies
+    """
+    if str(event.get("triggerSource", "")).startswith("PostConfirmation"):
+        return "post_confirmation"
+    path = str(event.get("resource") or event.get("path") or "")
+    if path.startswith("/searches"):
+        return "searches"
+    if path.startswith("/user"):
+        return "user"
+    return None
+
+
+def _load_targets() -> Dict[str, Handler]:
+    global _targets
+    if _targets is None:
+        from lambda_src.post_confirmation_handler.index import handler as post_confirmation
+        from lambda_src.searches_handler.index import handler as searches
+        from lambda_src.user_handler.index import handler as user
+
+        _targets = {"user": user, "searches": searches, "post_confirmation": post_confirmation}
+    return _targets
+
+
+def init_worker(use_local_dynamodb: bool) -> None:
+    """
+    Prepare a worker process (or the thread pool's parent process).
+
+    Args:
+        use_local_dynamodb: Start the in-memory DynamoDB stand-in for this process
+    """
+    if use_local_dynamodb:
+        _worker_stack.enter_context(local_dynamodb())
+    # Handlers write log and EMF lines to stdout; keep them out of the report
+    devnull = _worker_stack.enter_context(open(os.devnull, "w"))
+    _worker_stack.enter_context(redirect_stdout(devnull))
+    _load_targets()
+
+
+def invoke(target: str, event: Dict[str, Any]) -> Tuple[int, float]:
+    """
+    Invoke one handler.
+
+    Args:
+        target: Key returned by ``target_of``
+        event: Event to pass to the handler
+
+    Returns:
+        Tuple of (status code, latency in ms); exceptions count as status 500
+    """
+    handler = _load_targets()[target]
+    context = LocalContext(str(uuid.uuid4()), function_name=f"replay-{target}")
+    started = time.perf_counter()
+    try:
+        result = handler(event, context)
+        status = int(result.get("statusCode", 200)) if isinstance(result, dict) else 200
+    except Exception:
+        status = 500
+    return status, (time.perf_counter() - started) * 1000.0
+
+
+def histogram(latencies_ms: Iterable[float]) -> Dict[str, int]:
+    """
+    Bucket latencies.
+
+    Args:
+        latencies_ms: Latencies in milliseconds
+
+    Returns:
+        Counts keyed by bucket label ("<=1", ..., ">5000"), in bucket order
+    """
+    labels = [f"<={bound}" for bound in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}"]
+    counts = dict.fromkeys(labels, 0)
+    for value in latencies_ms:
+        for bound, label in zip(HISTOGRAM_BUCKETS_MS, labels, strict=False):
+            if value <= bound:
+                counts[label] += 1
+                break
+        else:
+            counts[labels[-1]] += 1
+    return counts
+
+
+class Results:
+    """Thread-safe collector of per-route outcomes."""
+
+    def __init__(self) -> None:
+        """Create an empty collector."""
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, route: str, status: int, latency_ms: float) -> None:
+        """Record one completed invocation."""
+        with self.lock:
+            self.latencies.setdefault(route, []).append(latency_ms)
+            by_status = self.statuses.setdefault(route, {})
+            by_status[str(status)] = by_status.get(str(status), 0) + 1
+            self.errors[route] = self.errors.get(route, 0) + (status >= 500)
+
+    def report(self, wall_seconds: float) -> Dict[str, Any]:
+        """
+        Summarize the run.
+
+        Args:
+            wall_seconds: Elapsed time from first dispatch to last completion
+
+        Returns:
+            Per-route and total summaries with histograms and error rates
+        """
+        routes: Dict[str, Any] = {}
+        for route in sorted(self.latencies):
+            routes[route] = self._summary(
+                self.latencies[route], self.errors[route], wall_seconds, self.statuses[route]
+            )
+        everything = [value for values in self.latencies.values() for value in values]
+        statuses: Dict[str, int] = {}
+        for by_status in self.statuses.values():
+            for status, count in by_status.items():
+                statuses[status] = statuses.get(status, 0) + count
+        total = self._summary(everything, sum(self.errors.values()), wall_seconds, statuses)
+        return {"wall_seconds": round(wall_seconds, 3), "routes": routes, "total": total}
+
+    @staticmethod
+    def _summary(
+        latencies: List[float], errors: int, wall_seconds: float, statuses: Dict[str, int]
+    ) -> Dict[str, Any]:
+        summary = summarize(latencies, errors)
+        summary["error_rate"] = round(errors / len(latencies), 4) if latencies else 0.0
+        summary["throughput_rps"] = round(len(latencies) / wall_seconds, 1) if wall_seconds else 0.0
+        summary["statuses"] = dict(sorted(statuses.items()))
+        summary["histogram_ms"] = histogram(latencies)
+        return summary
+
+
+def replay(
+    events: Iterable[Dict[str, Any]],
+    rate: Optional[float] = None,
+    workers: int = 4,
+    processes: bool = False,
+    use_local_dynamodb: bool = True,
+    rewriter: Optional[EventRewriter] = None,
+) -> Dict[str, Any]:
+    """
+    Replay events and collect results.
+
+    Args:
+        events: Captured events, in order
+        rate: Target events per second, or None for as fast as possible
+        workers: Pool size
+        processes: Use a process pool instead of threads
+        use_local_dynamodb: Run against the in-memory DynamoDB stand-in
+        rewriter: Event rewriter (a fresh one by default)
+
+    Returns:
+        Report with per-route latency, histogram, error rate and throughput
+    """
+    rewriter = rewriter or EventRewriter()
+    results = Results()
+    skipped = 0
+    in_flight = threading.BoundedSemaphore(workers * MAX_IN_FLIGHT_PER_WORKER)
+
+    with ExitStack() as stack:
+        executor: Executor
+        if processes:
+            executor = ProcessPoolExecutor(
+                workers, initializer=init_worker, initargs=(use_local_dynamodb,)
+            )
+        else:
+            # Threads share this process, so prepare it once for all of them
+            init_worker(use_local_dynamodb)
+            stack.callback(_worker_stack.close)
+            executor = ThreadPoolExecutor(workers)
+        stack.enter_context(executor)
+
+        def done(route: str) -> Callable[["Future[Tuple[int, float]]"], None]:
+            def callback(future: "Future[Tuple[int, float]]") -> None:
+                in_flight.release()
+                try:
+                    status, latency_ms = future.result()
+                except Exception:
+                    status, latency_ms = 500, 0.0
+                results.add(route, status, latency_ms)
+
+            return callback
+
+        started = time.perf_counter()
+        for i, captured in enumerate(events):
+            event = rewriter.rewrite(captured)
+            target = target_of(event)
+            if target is None:
+                skipped += 1
+                continue
+            if rate:
+                delay = started + i / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            in_flight.acquire()
+            future = executor.submit(invoke, target, event)
+            future.add_done_callback(done(route_of(event)))
+        executor.shutdown(wait=True)
+        wall_seconds = time.perf_counter() - started
+
+    report = results.report(wall_seconds)
+    report["config"] = {
+        "rate": rate,
+        "workers": workers,
+        "pool": "process" if processes else "thread",
+        "local_dynamodb": use_local_dynamodb,
+        "users": len(rewriter.users),
+        "skipped": skipped,
+    }
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a replay report as plain text."""
+    config = report["config"]
+    out = [
+        f"{report['total']['count']} events in {report['wall_seconds']}s "
+        f"({config['pool']} pool x{config['workers']}, rate={config['rate'] or 'max'}, "
+        f"users={config['users']}, skipped={config['skipped']})",
+        "",
+        f"{'route':<36} {'count':>6} {'err %':>6} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8}",
+    ]
+    rows = [*report["routes"].items(), ("total", report["total"])]
+    for name, row in rows:
+        out.append(
+            f"{name:<36} {row['count']:>6} {row['error_rate'] * 100:>6.2f} "
+            f"{row['throughput_rps']:>7} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}"
+        )
+    out.append("")
+    out.append("Latency histogram (all routes)")
+    total = max(report["total"]["count"], 1)
+    for label, count in report["total"]["histogram_ms"].items():
+        bar = "#" * round(40 * count / total)
+        out.append(f"  {label:>7} ms {count:>6} {bar}")
+    return "\n".join(out)
+
+
+def main(argv: Optional[List[str]] = None, stdout: TextIO = sys.stdout) -> int:
+    """Command-line entry point; exits 1 when any replayed request failed."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0] if __doc__ else None)
+    parser.add_argument("files", nargs="*", help="NDJSON event files (default: stdin)")
+    pace = parser.add_mutually_exclusive_group()
+    pace.add_argument("--rate", type=float, help="Target events per second")
+    pace.add_argument("--max", action="store_true", help="Dispatch as fast as possible (default)")
+    parser.add_argument("--workers", type=int, default=4, help="Pool size")
+    parser.add_argument("--processes", action="store_true", help="Use processes, not threads")
+    parser.add_argument(
+        "--aws", action="store_true", help="Use the configured DynamoDB instead of the stand-in"
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    def lines() -> Iterator[str]:
+        if not args.files:
+            yield from sys.stdin
+        for path in args.files:
+            with open(path, encoding="utf-8") as f:
+                yield from f
+
+    report = replay(
+        read_events(lines()),
+        rate=args.rate,
+        workers=args.workers,
+        processes=args.processes,
+        use_local_dynamodb=not args.aws,
+    )
+    stdout.write((json.dumps(report, indent=2) if args.json else format_report(report)) + "\n")
+    return 1 if report["total"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
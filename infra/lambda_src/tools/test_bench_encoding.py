@@ -0,0 +1,32 @@
+"""Unit tests for the encoding benchmark."""
+
+import base64
+import io
+import json
+
+from lambda_src.common.encoding import encode_body, rows, unpackb
+
+from .bench_encoding import FORMATS, build_bodies, main
+
+
+class TestBenchEncoding:
+    """Test that every format decodes to the same body and the CLI runs."""
+
+    def test_formats_round_trip(self) -> None:
+        """Test that each benchmarked encoding decodes back to the JSON body."""
+        for body in build_bodies().values():
+            for response_format in FORMATS.values():
+                serialized, is_base64 = encode_body(body, response_format)
+                if is_base64:
+                    decoded = unpackb(base64.b64decode(serialized))
+                else:
+                    decoded = json.loads(serialized)
+                assert rows(decoded) == body
+
+    def test_json_output(self) -> None:
+        """Test a tiny run with JSON output."""
+        stdout = io.StringIO()
+        assert main(["--number", "2", "--repeat", "1", "--json"], stdout=stdout) == 0
+        results = json.loads(stdout.getvalue())
+        assert {row["case"] for row in results} == set(build_bodies())
+        assert all(row["encode_us"] > 0 for row in results)
@@ -0,0 +1,96 @@
+"""Unit tests for the handler benchmark suite."""
+
+import io
+import json
+from typing import Any, Dict
+
+from .bench_handlers import compare, main, percentile, run_benchmark, summarize
+from .local_dynamodb import Population, zipf_weights
+
+
+def report(p95: float, ops: float = 100.0) -> Dict[str, Any]:
+    """Build a minimal benchmark report for one route."""
+    row = {"count": 10, "p50_ms": 1.0, "p95_ms": p95, "p99_ms": p95, "ops_per_sec": ops}
+    return {"routes": {"GET /user": row}}
+
+
+class TestWorkload:
+    """Test the synthetic population."""
+
+    def test_zipf_weights_decrease(self) -> None:
+        """Test that earlier ranks get more weight."""
+        weights = zipf_weights(5)
+        assert weights == sorted(weights, reverse=True)
+        assert weights[0] == 1.0
+
+    def test_population_is_skewed_and_reproducible(self) -> None:
+        """Test that activity is concentrated and seeded."""
+        first = Population(users=100, searches=2000, seed=7)
+        second = Population(users=100, searches=2000, seed=7)
+        assert first.search_counts == second.search_counts
+        counts = sorted(first.search_counts.values(), reverse=True)
+        assert sum(counts) == 2000
+        assert sum(counts[:10]) > sum(counts[50:])
+
+
+class TestStatistics:
+    """Test percentile and regression logic."""
+
+    def test_percentile_nearest_rank(self) -> None:
+        """Test nearest-rank percentiles."""
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([], 99) == 0.0
+
+    def test_summarize(self) -> None:
+        """Test route summaries."""
+        summary = summarize([2.0, 1.0, 3.0], errors=1)
+        assert summary["count"] == 3
+        assert summary["errors"] == 1
+        assert summary["p50_ms"] == 2.0
+        assert summary["ops_per_sec"] == 500.0
+
+    def test_compare_flags_latency_regression(self) -> None:
+        """Test that a large latency increase is flagged."""
+        regressions = compare(report(10.0), report(15.0))
+        assert [(r["route"], r["field"]) for r in regressions] == [
+            ("GET /user", "p95_ms"),
+            ("GET /user", "p99_ms"),
+        ]
+
+    def test_compare_ignores_small_absolute_changes(self) -> None:
+        """Test that sub-threshold noise on fast routes is ignored."""
+        assert compare(report(0.2), report(0.4)) == []
+
+    def test_compare_flags_throughput_drop(self) -> None:
+        """Test that a throughput drop is flagged."""
+        regressions = compare(report(10.0, ops=100.0), report(10.0, ops=50.0))
+        assert [r["field"] for r in regressions] == ["ops_per_sec"]
+
+
+class TestRun:
+    """Test a small end-to-end run against the local tables."""
+
+    def test_run_benchmark(self) -> None:
+        """Test that every route is driven without errors."""
+        result = run_benchmark(users=10, searches=50, requests=40, warmup=2)
+        assert result["config"]["seeded"] == {
+            "mapme-local-users": 10,
+            "mapme-local-searches": 50,
+        }
+        assert sum(row["count"] for row in result["routes"].values()) == 40
+        assert result["total"]["errors"] == 0
+
+    def test_main_exits_nonzero_on_regression(self, tmp_path: Any) -> None:
+        """Test that the CLI compares against a baseline and fails on regression."""
+        baseline = tmp_path / "base.json"
+        fast = {"routes": {"GET /user": {"count": 1, "p50_ms": 0.001, "p95_ms": 0.001,
+                                         "p99_ms": 0.001, "ops_per_sec": 1e9}}}  # fmt: skip
+        baseline.write_text(json.dumps(fast))
+        stdout = io.StringIO()
+        argv = ["--users", "5", "--searches", "10", "--requests", "5", "--warmup", "0",
+                "--mix", "GET /user=1", "--baseline", str(baseline), "--json"]  # fmt: skip
+
+        assert main(argv, stdout=stdout) == 1
+        assert json.loads(stdout.getvalue())["regressions"]
@@ -0,0 +1,25 @@
+"""Unit tests for the validation benchmark."""
+
+import io
+import json
+
+from .bench_validation import CASES, IMPLEMENTATIONS, main
+
+
+class TestBenchValidation:
+    """Test that both implementations agree and the CLI runs."""
+
+    def test_implementations_agree(self) -> None:
+        """Test that legacy and compiled validators return the same errors."""
+        for kind, raw in CASES.values():
+            legacy = IMPLEMENTATIONS["legacy"][kind](raw)
+            compiled = IMPLEMENTATIONS["compiled"][kind](raw)
+            assert legacy == compiled, raw
+
+    def test_json_output(self) -> None:
+        """Test a tiny run with JSON output."""
+        stdout = io.StringIO()
+        assert main(["--number", "5", "--repeat", "1", "--json"], stdout=stdout) == 0
+        rows = json.loads(stdout.getvalue())
+        assert {row["case"] for row in rows} == set(CASES)
+        assert all(row["compiled_ns"] > 0 for row in rows)
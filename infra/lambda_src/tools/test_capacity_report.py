@@ -0,0 +1,87 @@
+"""Unit tests for the consumed-capacity report tool."""
+
+import io
+import json
+from pathlib import Path
+
+from .capacity_report import build_report, main, parse_records
+
+
+def record(route: str, user: str, rcu: float, wcu: float) -> str:
+    """Build one capacity log line."""
+    return json.dumps(
+        {
+            "level": "INFO",
+            "message": "DynamoDB consumed capacity",
+            "route": route,
+            "user_hash": user,
+            "rcu": rcu,
+            "wcu": wcu,
+            "tables": {"searches": {"rcu": rcu, "wcu": wcu}},
+        }
+    )
+
+
+class TestParseRecords:
+    """Test log line parsing."""
+
+    def test_skips_other_lines_and_prefixes(self) -> None:
+        """Test that only capacity records are kept, tolerating line prefixes."""
+        lines = [
+            "2026-01-01T00:00:00Z\treq\t" + record("GET /searches", "u1", 1, 0),
+            json.dumps({"message": "Search history retrieved"}),
+            "START RequestId: abc",
+            "{not json",
+        ]
+        records = list(parse_records(lines))
+        assert len(records) == 1
+        assert records[0]["route"] == "GET /searches"
+
+
+class TestBuildReport:
+    """Test aggregation."""
+
+    def test_ranks_by_total_units(self) -> None:
+        """Test that rankings are ordered by RCU + WCU."""
+        lines = [
+            record("GET /searches", "u1", 0.5, 0),
+            record("GET /searches", "u1", 0.5, 0),
+            record("POST /searches", "u2", 0, 5),
+            record("GET /searches", "u3", 0.5, 0),
+        ]
+        report = build_report(parse_records(lines), top=2)
+
+        assert report["records"] == 4
+        assert report["total_rcu"] == 1.5
+        assert report["total_wcu"] == 5.0
+        assert [row["key"] for row in report["top_routes"]] == ["POST /searches", "GET /searches"]
+        assert report["top_users"][0]["key"] == "u2"
+        assert report["top_users"][1] == {"key": "u1", "rcu": 1.0, "wcu": 0.0, "requests": 2}
+        assert len(report["top_route_users"]) == 2
+        assert report["tables"][0]["key"] == "searches"
+
+
+class TestMain:
+    """Test the command-line entry point."""
+
+    def test_json_output_from_file(self, tmp_path: Path) -> None:
+        """Test reading a log file and printing JSON."""
+        path = tmp_path / "capacity.ndjson"
+        path.write_text(record("PUT /user", "u1", 0.5, 1) + "\n")
+        out = io.StringIO()
+
+        assert main([str(path), "--json"], stdout=out) == 0
+
+        report = json.loads(out.getvalue())
+        assert report["top_routes"][0]["key"] == "PUT /user"
+
+    def test_text_output(self, tmp_path: Path) -> None:
+        """Test the plain-text rendering."""
+        path = tmp_path / "capacity.ndjson"
+        path.write_text(record("PUT /user", "u1", 0.5, 1) + "\n")
+        out = io.StringIO()
+
+        main([str(path)], stdout=out)
+
+        assert "Top routes" in out.getvalue()
+        assert "PUT /user" in out.getvalue()
@@ -0,0 +1,244 @@
+"""Unit tests for the local HTTP API emulator."""
+
+import base64
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import pytest
+
+from lambda_src.common.encoding import unpackb
+
+from .local_api import (
+    ContainerPool,
+    LocalApi,
+    claims_from_token,
+    load_api_spec,
+    make_server,
+    match_route,
+)
+from .local_dynamodb import local_dynamodb
+
+
+class FakeClock:
+    """Monotonic clock moved by hand."""
+
+    def __init__(self) -> None:
+        """Start at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+def jwt(claims: Dict[str, Any]) -> str:
+    """Build an unsigned JWT carrying ``claims``."""
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    return f"eyJhbGciOiJub25lIn0.{payload}.sig"
+
+
+@pytest.fixture
+def server() -> Iterator[str]:
+    """Serve the emulator on a free port against the in-memory tables."""
+    with local_dynamodb():
+        httpd = make_server(LocalApi(load_api_spec(), stage="dev", cold_start_ms=0), port=0)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f"http://127.0.0.1:{httpd.server_address[1]}"
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+def request(
+    url: str, method: str = "GET", body: Any = None, headers: Optional[Dict[str, str]] = None
+) -> Tuple[int, Dict[str, str], bytes]:
+    """Send one HTTP request and return (status, headers, body)."""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, dict(response.headers.items()), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers.items()), e.read()
+
+
+class TestApiSpec:
+    """Test reading the API from Terraform."""
+
+    def test_routes_from_terraform(self) -> None:
+        """Test methods, templates, authorizers and target functions."""
+        spec = load_api_spec()
+
+        assert spec.routes[("POST", "/searches")].function == "searches"
+        assert spec.routes[("GET", "/tiles/{z}/{x}/{y}")].function == "tiles"
+        assert spec.routes[("GET", "/bootstrap")].function == "api"
+        assert spec.routes[("PUT", "/user")].authorized
+        assert not spec.routes[("OPTIONS", "/user")].authorized
+        assert "Idempotency-Key" in spec.cors["/searches"]["Access-Control-Allow-Headers"]
+        assert "application/msgpack" in spec.binary_media_types
+        assert spec.timeouts["searches"] == 10
+
+    def test_consolidated(self) -> None:
+        """Test that var.consolidated_api sends every route to the api function."""
+        functions = {r.function for r in load_api_spec(consolidated=True).routes.values()}
+        assert functions == {"api", None}
+
+    def test_match_route(self) -> None:
+        """Test literal and parameterized templates."""
+        spec = load_api_spec()
+        assert match_route(spec, "/searches/nearby") == ("/searches/nearby", {})
+        assert match_route(spec, "/tiles/4/8/5") == (
+            "/tiles/{z}/{x}/{y}",
+            {"z": "4", "x": "8", "y": "5"},
+        )
+        assert match_route(spec, "/nope") == (None, {})
+
+
+class TestTokens:
+    """Test dev tokens."""
+
+    def test_dev_and_jwt_tokens(self) -> None:
+        """Test both token forms, with and without Bearer."""
+        assert claims_from_token("dev:alice") == claims_from_token("Bearer dev:alice")
+        assert claims_from_token("dev:alice") == {
+            "sub": "alice",
+            "email": "alice@example.com",
+            "cognito:username": "alice",
+        }
+
+        claims = claims_from_token(jwt({"sub": "u-1", "email": "u@x.com", "email_verified": True}))
+        assert claims == {"sub": "u-1", "email": "u@x.com", "email_verified": "true"}
+
+    @pytest.mark.parametrize("token", ["", "dev:", "a.b", "a.!!!.c", jwt({"email": "x"})])
+    def test_unusable_tokens(self, token: str) -> None:
+        """Test that tokens without a subject are refused."""
+        assert claims_from_token(token) is None
+
+
+class TestContainerPool:
+    """Test cold and warm containers."""
+
+    def test_warm_reuse_and_concurrency(self) -> None:
+        """Test that overlapping invocations need new containers and idle ones are reused."""
+        pool = ContainerPool("searches", clock=FakeClock())
+
+        first, cold = pool.acquire()
+        second, second_cold = pool.acquire()
+        assert cold and second_cold and first is not second
+        pool.release(first)
+        pool.release(second)
+
+        again, cold = pool.acquire()
+        assert not cold and again is second
+        pool.release(again)
+        assert pool.stats() == {
+            "cold_starts": 2,
+            "reaped": 0,
+            "busy": 0,
+            "idle": 2,
+            "invocations": 3,
+            "queue_wait_ms": 0.0,
+            "max_queue_wait_ms": 0.0,
+        }
+
+    def test_idle_containers_reaped(self) -> None:
+        """Test that a container idle too long is replaced by a cold one."""
+        clock = FakeClock()
+        pool = ContainerPool("user", idle_seconds=60, clock=clock)
+        container, _ = pool.acquire()
+        pool.release(container)
+
+        clock.now = 61
+        replacement, cold = pool.acquire()
+        assert cold and replacement is not container
+        assert pool.stats()["reaped"] == 1
+
+
+class TestLocalApi:
+    """Test the emulator end to end over HTTP."""
+
+    def test_write_then_read(self, server: str) -> None:
+        """Test that a search posted over HTTP is read back, through cold then warm containers."""
+        auth = {"Authorization": "dev:alice", "Content-Type": "application/json"}
+
+        status, headers, _ = request(f"{server}/dev/searches", "POST", {"query": "coffee"}, auth)
+        assert status == 201
+        assert headers["X-Local-Cold-Start"] == "true"
+
+        status, headers, body = request(f"{server}/dev/searches", headers=auth)
+        assert status == 200
+        assert headers["X-Local-Cold-Start"] == "false"
+        assert [item["query"] for item in json.loads(body)] == ["coffee"]
+
+        status, _, body = request(f"{server}/__local/stats")
+        assert json.loads(body)["searches"]["invocations"] == 2
+
+    def test_queue_wait_reported(self) -> None:
+        """Test that time spent behind another invocation is reported, not hidden in latency."""
+        running = threading.Event()
+        remaining = []
+
+        def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            remaining.append(context.get_remaining_time_in_millis())
+            running.set()
+            time.sleep(0.2)
+            return {"statusCode": 200, "body": "{}"}
+
+        api = LocalApi(load_api_spec(), cold_start_ms=0, loader=lambda function: handler)
+        event = {"requestContext": {"requestId": "r"}}
+        first = threading.Thread(target=api.invoke, args=("searches", event))
+        first.start()
+        running.wait(timeout=5)
+        _, headers, _ = api.invoke("searches", event)
+        first.join()
+
+        assert float(headers["X-Local-Queue-Wait-Ms"]) >= 100
+        stats = api.stats()["searches"]
+        assert stats["max_queue_wait_ms"] >= 100
+        assert stats["queue_wait_ms"] == pytest.approx(
+            float(headers["X-Local-Queue-Wait-Ms"]), abs=1
+        )
+        # The queued invocation still got the function's whole timeout
+        assert min(remaining) >= api.spec.timeouts["searches"] * 1000 - 50
+
+    def test_unhandled_error_body(self, capsys: Any) -> None:
+        """Test that a handler exception answers API Gateway's 502 and logs the details."""
+
+        def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            raise RuntimeError("table arn:aws:dynamodb:secret unreachable")
+
+        api = LocalApi(load_api_spec(), cold_start_ms=0, loader=lambda function: handler)
+        status, headers, body = api.invoke("searches", {"requestContext": {"requestId": "r-1"}})
+
+        assert status == 502
+        assert json.loads(body) == {"message": "Internal server error"}
+        assert headers["X-Local-Container"] == "searches-1"
+        logged = capsys.readouterr().err
+        assert "searches r-1 unhandled error" in logged
+        assert "RuntimeError: table arn:aws:dynamodb:secret unreachable" in logged
+
+    def test_binary_body(self, server: str) -> None:
+        """Test that MessagePack responses reach the client as raw bytes."""
+        headers = {"Authorization": "dev:alice", "Accept": "application/msgpack"}
+        status, response_headers, body = request(f"{server}/searches", headers=headers)
+        assert status == 200
+        assert response_headers["Content-Type"] == "application/msgpack"
+        assert unpackb(body) == []
+
+    def test_gateway_errors(self, server: str) -> None:
+        """Test missing tokens, unknown routes and CORS preflight."""
+        status, _, body = request(f"{server}/user")
+        assert status == 401 and json.loads(body) == {"message": "Unauthorized"}
+
+        status, _, body = request(f"{server}/nope", headers={"Authorization": "dev:alice"})
+        assert status == 403 and json.loads(body) == {"message": "Missing Authentication Token"}
+
+        status, headers, _ = request(f"{server}/user", "OPTIONS")
+        assert status == 200
+        assert headers["Access-Control-Allow-Methods"] == "GET,PUT,DELETE,OPTIONS"
@@ -0,0 +1,57 @@
+"""Unit tests for the memory harness."""
+
+from typing import Any, Dict
+
+from .memory_harness import RssWatchdog, compare, current_rss_kb, measure, recommend
+
+
+def ok(peak_mb: float) -> Dict[str, Any]:
+    """Build a passing route result."""
+    return {"status": "ok", "estimated_peak_mb": peak_mb}
+
+
+class TestRecommend:
+    """Test memory size recommendations."""
+
+    def test_smallest_size_with_headroom(self) -> None:
+        """Test that each function gets the smallest size leaving 25% free."""
+        results = {"GET /user": ok(90.0), "PUT /user": ok(100.0), "sqs": ok(200.0)}
+        recommendations = recommend(results)
+        assert recommendations["user"] == {"estimated_peak_mb": 100.0, "memory_size_mb": 256}
+        assert recommendations["searches_ingest"]["memory_size_mb"] == 512
+        assert "searches" not in recommendations
+
+    def test_failed_route_has_no_recommendation(self) -> None:
+        """Test that an out-of-memory route blocks a recommendation."""
+        results = {"GET /user": ok(50.0), "PUT /user": {"status": "out_of_memory"}}
+        assert recommend(results)["user"]["memory_size_mb"] is None
+
+
+class TestCompare:
+    """Test memory regression detection."""
+
+    def test_growth_flagged(self) -> None:
+        """Test that growth beyond tolerance and the absolute floor is flagged."""
+        baseline = {"routes": {"GET /user": ok(40.0), "sqs": ok(40.0)}}
+        current = {"routes": {"GET /user": ok(50.0), "sqs": ok(41.0)}}
+        assert compare(baseline, current) == [
+            {"route": "GET /user", "baseline_mb": 40.0, "current_mb": 50.0}
+        ]
+
+
+class TestMeasurement:
+    """Test RSS sampling and a real child run."""
+
+    def test_watchdog_tracks_peak_share(self) -> None:
+        """Test that samples subtract the offset and keep the peak."""
+        watchdog = RssWatchdog(offset_kb=0, limit_kb=10**9, on_kill=lambda share: None)
+        assert watchdog.sample() > 0
+        assert watchdog.peak_kb >= current_rss_kb() // 2
+
+    def test_measure_route_in_child(self) -> None:
+        """Test one route end to end in a fresh interpreter."""
+        result = measure("GET /user", limit_mb=1024, requests=2, users=5, searches=20)
+        assert result["status"] == "ok", result
+        assert result["exit_code"] == 0
+        assert result["estimated_peak_mb"] > 0
+        assert result["top_allocations"]
@@ -0,0 +1,104 @@
+"""Unit tests for the deployment packager."""
+
+import io
+import json
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from .package import (
+    PackagingError,
+    build_package,
+    functions,
+    import_closure,
+    main,
+    runtime_version,
+    verify_package,
+)
+
+
+def write_handler(src: Path, source: str, requirements: str = "boto3>=1.28.0\n") -> None:
+    """Create a one-function ``lambda_src`` with a small ``common`` package."""
+    (src / "common").mkdir(parents=True)
+    (src / "common" / "__init__.py").write_text('"""Common."""\n')
+    (src / "common" / "util.py").write_text("from . import fmt\n\nimport boto3\n")
+    (src / "common" / "fmt.py").write_text("def fmt():\n    return 1\n")
+    (src / "common" / "unused.py").write_text("x = 1\n")
+    (src / "common" / "test_util.py").write_text("from .util import fmt\n")
+    (src / "demo_handler").mkdir()
+    (src / "demo_handler" / "__init__.py").write_text("")
+    (src / "demo_handler" / "index.py").write_text(source)
+    (src / "demo_handler" / "requirements.txt").write_text(requirements)
+
+
+class TestImportClosure:
+    """Test following imports through lambda_src."""
+
+    def test_closure_excludes_tests_and_unused(self, tmp_path: Path) -> None:
+        """Test relative imports, parent packages and what is left out."""
+        write_handler(
+            tmp_path, "import json\n\ndef handler(e, c):\n    from common.util import fmt\n"
+        )
+        closure = import_closure("demo", str(tmp_path))
+
+        assert sorted(closure["files"]) == [
+            "common/__init__.py",
+            "common/fmt.py",
+            "common/util.py",
+            "index.py",
+        ]
+        assert closure["runtime"] == ["boto3"]
+        assert functions(str(tmp_path)) == ["demo"]
+
+    def test_real_handlers(self) -> None:
+        """Test that the consolidated function brings its sibling handler packages."""
+        user = import_closure("user")["files"]
+        assert "common/ratelimit.py" in user and "common/trending.py" not in user
+        assert not any(os.path.basename(path).startswith("test_") for path in user)
+
+        api = import_closure("api")["files"]
+        assert {"searches_handler/__init__.py", "searches_handler/index.py"} <= set(api)
+        assert runtime_version() == "3.11"
+
+    def test_unprovided_dependencies_refused(self, tmp_path: Path) -> None:
+        """Test that third-party imports and requirements the runtime lacks are errors."""
+        write_handler(tmp_path, "import requests\n")
+        with pytest.raises(PackagingError, match="requests"):
+            import_closure("demo", str(tmp_path))
+
+        other = tmp_path / "other"
+        write_handler(other, "import json\n", requirements="# pinned\nrequests==2.31\n")
+        with pytest.raises(PackagingError, match="requires requests"):
+            build_package("demo", str(tmp_path / "dist"), src=str(other))
+
+
+class TestBuild:
+    """Test building and verifying real packages."""
+
+    def test_package_and_verify(self, tmp_path: Path) -> None:
+        """Test the zip layout, unchecked-hash pycs and the fresh-interpreter import."""
+        stdout = io.StringIO()
+        assert main(["user", "--output-dir", str(tmp_path), "--json"], stdout=stdout) == 0
+        (row,) = json.loads(stdout.getvalue())
+        assert row["function"] == "user" and row["import_ms"] > 0
+
+        with zipfile.ZipFile(row["archive"]) as zf:
+            names = set(zf.namelist())
+            pyc = zf.read("common/__pycache__/ratelimit.cpython-311.pyc")
+        assert {"index.py", "common/__init__.py", "__pycache__/index.cpython-311.pyc"} <= names
+        assert not any("test_" in name or name.endswith(".txt") for name in names)
+        # Flags word: hash-based, source not checked
+        assert int.from_bytes(pyc[4:8], "little") == 1
+
+    def test_broken_package_fails_verification(self, tmp_path: Path) -> None:
+        """Test that a package missing a module does not pass."""
+        assert main(["tiles", "--output-dir", str(tmp_path), "--no-verify"], io.StringIO()) == 0
+        build_dir = tmp_path / "build" / "tiles"
+        verify_package(str(build_dir))
+
+        os.remove(build_dir / "common" / "utils.py")
+        os.remove(build_dir / "common" / "__pycache__" / "utils.cpython-311.pyc")
+        with pytest.raises(PackagingError, match="import index failed"):
+            verify_package(str(build_dir))
@@ -0,0 +1,127 @@
+"""Unit tests for the traffic replay tool."""
+
+import io
+import json
+from typing import Any, Dict, List
+
+from .replay import EventRewriter, histogram, main, read_events, replay, target_of
+
+
+def api(method: str, path: str, sub: str, epoch: int = 1_700_000_000_000) -> Dict[str, Any]:
+    """Build a captured API Gateway event."""
+    return {
+        "httpMethod": method,
+        "resource": path,
+        "path": path,
+        "requestContext": {
+            "requestId": "orig",
+            "requestTimeEpoch": epoch,
+            "requestTime": "14/Nov/2023:22:13:20 +0000",
+            "authorizer": {"claims": {"sub": sub, "email": f"{sub}@corp.com"}},
+        },
+        "body": json.dumps({"query": "pizza"}) if method == "POST" else None,
+    }
+
+
+def cognito(sub: str) -> Dict[str, Any]:
+    """Build a captured post-confirmation event."""
+    return {
+        "triggerSource": "PostConfirmation_ConfirmSignUp",
+        "userName": sub,
+        "request": {"userAttributes": {"sub": sub, "email": f"{sub}@corp.com"}},
+    }
+
+
+class TestEventRewriter:
+    """Test identity and timestamp rewriting."""
+
+    def test_users_map_to_stable_synthetic_ids(self) -> None:
+        """Test that the same sub always maps to the same synthetic user."""
+        rewriter = EventRewriter()
+        first = rewriter.rewrite(api("GET", "/user", "alice"))
+        second = rewriter.rewrite(api("GET", "/user", "bob"))
+        third = rewriter.rewrite(cognito("alice"))
+
+        claims = first["requestContext"]["authorizer"]["claims"]
+        assert claims == {"sub": "replay-user-000000", "email": "replay-user-000000@example.com"}
+        assert second["requestContext"]["authorizer"]["claims"]["sub"] == "replay-user-000001"
+        assert third["request"]["userAttributes"]["sub"] == "replay-user-000000"
+        assert third["userName"] == "replay-user-000000"
+
+    def test_timestamps_shift_keeping_spacing(self) -> None:
+        """Test that the first event moves to now and later ones keep their offsets."""
+        rewriter = EventRewriter(now_ms=1_800_000_000_000)
+        first = rewriter.rewrite(api("GET", "/user", "a", epoch=1_700_000_000_000))
+        second = rewriter.rewrite(api("GET", "/user", "a", epoch=1_700_000_002_500))
+
+        assert first["requestContext"]["requestTimeEpoch"] == 1_800_000_000_000
+        assert second["requestContext"]["requestTimeEpoch"] == 1_800_000_002_500
+        assert first["requestContext"]["requestTime"] == "15/Jan/2027:08:00:00 +0000"
+        assert first["requestContext"]["requestId"] != "orig"
+
+    def test_original_event_untouched(self) -> None:
+        """Test that rewriting works on a copy."""
+        event = api("GET", "/user", "alice")
+        EventRewriter().rewrite(event)
+        assert event["requestContext"]["authorizer"]["claims"]["sub"] == "alice"
+
+
+class TestHelpers:
+    """Test event parsing, targeting and histograms."""
+
+    def test_read_events_skips_noise(self) -> None:
+        """Test that prefixes, blank and malformed lines are tolerated."""
+        lines = ['2024-01-01 {"httpMethod": "GET"}', "", "{oops", "[1]"]
+        assert list(read_events(lines)) == [{"httpMethod": "GET"}]
+
+    def test_target_of(self) -> None:
+        """Test handler selection."""
+        assert target_of(api("GET", "/searches", "a")) == "searches"
+        assert target_of(api("PUT", "/user", "a")) == "user"
+        assert target_of(cognito("a")) == "post_confirmation"
+        assert target_of({"httpMethod": "GET", "path": "/other"}) is None
+
+    def test_histogram(self) -> None:
+        """Test bucket boundaries."""
+        counts = histogram([0.5, 1.0, 1.5, 7.0, 9000.0])
+        assert counts["<=1"] == 2
+        assert counts["<=2"] == 1
+        assert counts["<=10"] == 1
+        assert counts[">5000"] == 1
+
+
+class TestReplay:
+    """Test end-to-end replays against the local DynamoDB stand-in."""
+
+    def test_thread_pool_replay(self) -> None:
+        """Test that a mixed capture is replayed with per-route results."""
+        events: List[Dict[str, Any]] = [
+            cognito("alice"),
+            api("POST", "/searches", "alice"),
+            api("GET", "/searches", "alice"),
+            api("GET", "/user", "alice"),
+            {"httpMethod": "GET", "path": "/unknown"},
+        ]
+        report = replay(events, workers=2)
+
+        assert set(report["routes"]) == {
+            "PostConfirmation_ConfirmSignUp",
+            "POST /searches",
+            "GET /searches",
+            "GET /user",
+        }
+        assert report["total"]["count"] == 4
+        assert report["total"]["error_rate"] == 0.0
+        assert report["config"]["skipped"] == 1
+        assert report["config"]["users"] == 1
+
+    def test_main_with_rate(self, tmp_path: Any) -> None:
+        """Test the CLI at a target rate with JSON output."""
+        capture = tmp_path / "capture.ndjson"
+        capture.write_text("\n".join(json.dumps(api("GET", "/user", f"u{i}")) for i in range(3)))
+        stdout = io.StringIO()
+
+        assert main([str(capture), "--rate", "100", "--json"], stdout=stdout) == 0
+        report = json.loads(stdout.getvalue())
+        assert report["routes"]["GET /user"]["statuses"] == {"200": 3}
+        assert report["config"]["rate"] == 100.0
@@ -0,0 +1 @@
+"""Trending searches aggregator Lambda handler package."""
@@ -0,0 +1,100 @@
+"""Lambda handler that merges trending counter shards into per-bucket top-K lists."""
+
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+import boto3
+
+# Add parent directory to path for common imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common.ddb import account_capacity  # noqa: E402
+from common.deadline import current_deadline, deadline_bound  # noqa: E402
+from common.log import log_invocation, logger  # noqa: E402
+from common.memory import memory_probed  # noqa: E402
+from common.metrics import metrics, record_metrics  # noqa: E402
+from common.profiling import profiled  # noqa: E402
+from common.resilience import ddb_client_config  # noqa: E402
+from common.trending import (  # noqa: E402
+    DEFAULT_RETENTION_SECONDS,
+    DEFAULT_TOP_K,
+    LATEST,
+    bucket_name,
+    bucket_seconds,
+    bucket_start,
+    read_bucket_counts,
+    shard_count,
+    top_k,
+    write_top,
+)
+from common.utils import env_int  # noqa: E402
+
+# The current bucket plus the previous one, so the panel is not empty when a
+# new bucket starts and late increments to the previous bucket are folded in
+DEFAULT_WINDOW_BUCKETS = 2
+
+
+def get_ddb_client() -> Tuple[Any, str]:
+    """Get DynamoDB client and trending table name."""
+    ddb = boto3.client("dynamodb", config=ddb_client_config())
+    table = os.environ.get("TRENDING_TABLE", "")
+    return ddb, table
+
+
+@profiled
+@record_metrics
+@memory_probed
+@account_capacity
+@log_invocation
+@deadline_bound
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Aggregate the trending window on an EventBridge schedule.
+
+    Each bucket in the window gets its own ``top#<bucket>`` item, and the
+    window's merged counts become ``top#latest``, the item served by
+    ``GET /searches/trending``. Re-running is idempotent.
+
+    Buckets are aggregated newest first. If the invocation's deadline passes
+    between buckets, ``top#latest`` is written from the buckets done so far
+    and the summary says so; the next scheduled run redoes the whole window.
+
+    Args:
+        event: EventBridge scheduled event
+        context: Lambda context object
+
+    Returns:
+        Summary of the aggregated buckets, and whether the whole window was read
+    """
+    ddb, table = get_ddb_client()
+    now = int(time.time())
+    width = bucket_seconds()
+    window = max(1, env_int("TRENDING_WINDOW_BUCKETS", DEFAULT_WINDOW_BUCKETS))
+    k = env_int("TRENDING_TOP_K", DEFAULT_TOP_K)
+    retention = env_int("TRENDING_RETENTION_SECONDS", DEFAULT_RETENTION_SECONDS)
+    shards = shard_count()
+
+    current = bucket_start(now, width)
+    merged: Counter[str] = Counter()
+    buckets: List[str] = []
+    for offset in range(window):
+        if buckets and current_deadline().expired():
+            metrics.add("DeadlinePartialResults", 1, unit="Count")
+            logger.warning("Trending window cut short at deadline", buckets=buckets)
+            break
+        start = current - offset * width
+        bucket = bucket_name(start)
+        with metrics.phase("dynamodb"):
+            counts = read_bucket_counts(ddb, table, bucket, shards)
+            write_top(ddb, table, bucket, bucket, top_k(counts, k), now, start + retention)
+        merged.update(counts)
+        buckets.append(bucket)
+
+    with metrics.phase("dynamodb"):
+        write_top(ddb, table, LATEST, buckets[-1], top_k(merged, k), now, now + retention)
+
+    logger.info("Trending aggregated", buckets=buckets, queries=len(merged))
+
+    return {"buckets": buckets, "queries": len(merged), "complete": len(buckets) == window}
@@ -0,0 +1,100 @@
+"""Unit tests for trending_aggregator_handler Lambda function."""
+
+import os
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import boto3
+
+from ..common.trending import read_top, record_searches
+from .index import get_ddb_client, handler
+
+TABLE = "test-trending-table"
+NOW = 1_700_000_000  # 2023-11-14T22:13:20Z
+
+SCHEDULED_EVENT = {"source": "aws.events", "detail-type": "Scheduled Event", "detail": {}}
+
+
+def create_trending_table() -> Any:
+    """Create the trending table and return a client."""
+    client = boto3.client("dynamodb")
+    client.create_table(
+        TableName=TABLE,
+        KeySchema=[
+            {"AttributeName": "pk", "KeyType": "HASH"},
+            {"AttributeName": "sk", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "pk", "AttributeType": "S"},
+            {"AttributeName": "sk", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return client
+
+
+class TestHandler:
+    """Test aggregation against moto."""
+
+    def test_window_merged_into_latest(
+        self, mock_dynamodb: None, lambda_context: MagicMock
+    ) -> None:
+        """Test per-bucket lists and the merged latest list."""
+        client = create_trending_table()
+        env = {"TRENDING_TABLE": TABLE, "TRENDING_SHARDS": "3", "TRENDING_TOP_K": "2"}
+        with patch.dict(os.environ, env):
+            record_searches(client, TABLE, [(NOW, "pizza")] * 2 + [(NOW, "coffee")])
+            record_searches(client, TABLE, [(NOW - 3600, "coffee")] * 3 + [(NOW - 3600, "gym")])
+            # Outside the two-bucket window
+            record_searches(client, TABLE, [(NOW - 7200, "tacos")] * 9)
+
+            with patch("lambda_src.trending_aggregator_handler.index.time.time", return_value=NOW):
+                result = handler(SCHEDULED_EVENT, lambda_context)
+
+        assert result == {
+            "buckets": ["20231114T2200", "20231114T2100"],
+            "queries": 3,
+            "complete": True,
+        }
+
+        latest = read_top(client, TABLE)
+        assert latest is not None
+        assert latest["bucket"] == "20231114T2100"
+        assert latest["generatedAt"] == NOW
+        assert latest["items"] == [{"query": "coffee", "count": 4}, {"query": "pizza", "count": 2}]
+
+        current = read_top(client, TABLE, "20231114T2200")
+        assert current is not None
+        assert current["items"][0] == {"query": "pizza", "count": 2}
+
+    def test_window_cut_short_at_deadline(
+        self, mock_dynamodb: None, lambda_context: MagicMock
+    ) -> None:
+        """Test that latest is still written from the current bucket when time runs out."""
+        client = create_trending_table()
+        deadline = MagicMock()
+        deadline.expired.return_value = True
+        env = {"TRENDING_TABLE": TABLE, "TRENDING_SHARDS": "1"}
+        with (
+            patch.dict(os.environ, env),
+            patch(
+                "lambda_src.trending_aggregator_handler.index.current_deadline",
+                return_value=deadline,
+            ),
+        ):
+            record_searches(client, TABLE, [(NOW, "pizza")])
+            with patch("lambda_src.trending_aggregator_handler.index.time.time", return_value=NOW):
+                result = handler(SCHEDULED_EVENT, lambda_context)
+
+        assert result == {"buckets": ["20231114T2200"], "queries": 1, "complete": False}
+        latest = read_top(client, TABLE)
+        assert latest is not None
+        assert latest["items"] == [{"query": "pizza", "count": 1}]
+
+    def test_get_ddb_client_uses_env_var(self) -> None:
+        """Test that the table name comes from TRENDING_TABLE."""
+        with patch.dict(
+            os.environ, {"TRENDING_TABLE": "custom", "AWS_DEFAULT_REGION": "us-west-1"}
+        ):
+            _, table = get_ddb_client()
+        assert table == "custom"
@@ -1,77 +1,132 @@
 """Lambda handler for user profile endpoint."""
 
-import json
 import os
 import sys
+import time
 from datetime import datetime
 from typing import Any, Dict, List, Tuple
 
 import boto3
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 
 # Add parent directory to path for common imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from common.utils import (  # noqa: E402
-    create_response,
-    extract_user_claims,
-    log_error,
-    log_info,
-    log_warning,
-    validate_string,
-    validate_url,
+from common.ddb import ddb_call  # noqa: E402
+from common.idempotency import idempotent  # noqa: E402
+from common.log import logger  # noqa: E402
+from common.metrics import metrics  # noqa: E402
+from common.queue import get_queue  # noqa: E402
+from common.ratelimit import rate_limited  # noqa: E402
+from common.resilience import ddb_client_config  # noqa: E402
+from common.router import Request, Router, authenticate, map_errors  # noqa: E402
+from common.schema import Schema, string, url  # noqa: E402
+from common.utils import create_response  # noqa: E402
+
+# Compiled once per container; see common/schema.py
+USER_SCHEMA = Schema(
+    {"name": string(max_length=100), "avatarUrl": url()},
+    max_body_bytes=8192,
 )
 
 
+def summary_fields(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the search summary kept on the user item by the summary stream consumer.
+
+    Args:
+        item: User item (empty for users without one)
+
+    Returns:
+        searchCount, lastSearchAt (epoch seconds or None) and lastQuery
+    """
+    last_search_at = item.get("lastSearchAt")
+    return {
+        "searchCount": int(item.get("searchCount", 0)),
+        "lastSearchAt": int(last_search_at) if last_search_at is not None else None,
+        "lastQuery": item.get("lastQuery", ""),
+    }
+
+
 def get_dynamodb_table() -> Any:
     """Get DynamoDB table resource."""
-    dynamodb = boto3.resource("dynamodb")
+    dynamodb = boto3.resource("dynamodb", config=ddb_client_config())
     table_name = os.environ.get("USERS_TABLE_NAME", "")
     return dynamodb.Table(table_name)
 
 
-def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+def get_identity_client() -> Any:
+    """Get Cognito identity client."""
+    return boto3.client("cognito-identity")
+
+
+def resolve_identity_id(event: Dict[str, Any]) -> str:
     """
-    Handle GET and PUT /user requests.
+    Look up the caller's Cognito identity ID from their own ID token.
 
-    GET: Returns authenticated user information from DynamoDB
-    PUT: Updates user profile information
+    Browsers upload avatars under ``avatars/<identity ID>/``, a folder the API
+    cannot derive from the user pool claims. ``GetId`` maps the token the
+    authorizer already accepted to that identity, so the folder the account
+    purge empties is one the server verified, never one the client named.
 
     Args:
-        event: API Gateway event containing request context and user claims
-        context: Lambda context object
+        event: API Gateway event carrying the Authorization header
 
     Returns:
-        API Gateway response with user profile data
+        The identity ID, or "" if unconfigured or the lookup failed
     """
-    request_id = context.aws_request_id if context else "unknown"
-    http_method = event.get("httpMethod", "")
+    pool_id = os.environ.get("IDENTITY_POOL_ID", "")
+    provider = os.environ.get("USER_POOL_PROVIDER", "")
+    token = ""
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == "authorization":
+            token = str(value).removeprefix("Bearer ").strip()
+    if not pool_id or not provider or not token:
+        return ""
+    try:
+        with metrics.phase("identity"):
+            response = get_identity_client().get_id(
+                IdentityPoolId=pool_id, Logins={provider: token}
+            )
+    except (BotoCoreError, ClientError) as e:
+        logger.warning("Identity lookup failed", error=str(e))
+        return ""
+    return str(response.get("IdentityId", ""))
 
-    log_info(
-        "Processing user request",
-        request_id=request_id,
-        http_method=http_method,
-    )
 
-    # Extract user claims from Cognito authorizer
-    claims = extract_user_claims(event)
-    user_id = claims.get("user_id", "")
-    email = claims.get("email", "")
+def get_purge_queue() -> Any:
+    """
+    Get the queue the account purge worker reads deletion requests from.
+
+    Returns:
+        Queue object, or None when unconfigured
+    """
+    return get_queue(os.environ.get("ACCOUNT_PURGE_QUEUE_URL", ""))
+
 
-    if not user_id:
-        log_error("Missing user ID in claims", request_id=request_id)
-        return create_response(401, {"error": "Unauthorized"})
+router = Router(middleware=[authenticate])
 
-    if http_method == "GET":
-        return handle_get_user(user_id, email, request_id)
-    elif http_method == "PUT":
-        return handle_put_user(user_id, email, event, request_id)
-    else:
-        log_warning(
-            "Method not allowed",
-            request_id=request_id,
-            method=http_method,
-        )
-        return create_response(405, {"error": "Method not allowed"})
+
+@router.route("GET", "/user")
+def get_user(request: Request) -> Dict[str, Any]:
+    """GET /user: the authenticated user's profile."""
+    return handle_get_user(request.user_id, request.email, request.request_id)
+
+
+@router.route("PUT", "/user", rate_limited, idempotent)
+def put_user(request: Request) -> Dict[str, Any]:
+    """PUT /user: update the authenticated user's profile."""
+    return handle_put_user(request.user_id, request.email, request.event, request.request_id)
+
+
+@router.route("DELETE", "/user", rate_limited)
+def delete_user(request: Request) -> Dict[str, Any]:
+    """DELETE /user: delete the authenticated user's account data."""
+    return handle_delete_user(request.user_id, request.request_id)
+
+
+# Entry point for the dedicated user function; API Gateway has already matched
+# /user, so only the method is dispatched
+handler = router.lambda_handler(path="/user")
 
 
 def validate_user_input(body: Dict[str, Any]) -> Tuple[bool, List[str]]:
@@ -84,32 +139,11 @@ def validate_user_input(body: Dict[str, Any]) -> Tuple[bool, List[str]]:
     Returns:
         Tuple of (is_valid, list of error messages)
     """
-    errors = []
-
-    # Validate name if provided
-    if "name" in body:
-        is_valid, error = validate_string(
-            body.get("name"),
-            "name",
-            max_length=100,
-            required=False,
-        )
-        if not is_valid and error:
-            errors.append(error)
-
-    # Validate avatarUrl if provided
-    if "avatarUrl" in body:
-        is_valid, error = validate_url(
-            body.get("avatarUrl"),
-            "avatarUrl",
-            required=False,
-        )
-        if not is_valid and error:
-            errors.append(error)
-
+    errors = USER_SCHEMA.validate(body)
     return len(errors) == 0, errors
 
 
+@map_errors("Failed to retrieve user profile")
 def handle_get_user(user_id: str, email: str, request_id: str) -> Dict[str, Any]:
     """
     Handle GET request to retrieve user profile.
@@ -122,80 +156,71 @@ def handle_get_user(user_id: str, email: str, request_id: str) -> Dict[str, Any]
     Returns:
         API Gateway response with user profile
     """
-    try:
-        log_info(
-            "Fetching user profile",
-            request_id=request_id,
-            user_id=user_id,
-        )
+    return create_response(200, load_user_profile(user_id, email))
 
-        # Get DynamoDB table
-        table = get_dynamodb_table()
 
-        # Try to get user from DynamoDB
-        response = table.get_item(Key={"userId": user_id})
+def load_user_profile(user_id: str, email: str) -> Dict[str, Any]:
+    """
+    Read a user's profile and search summary with one GetItem.
 
-        if "Item" in response:
-            user_data = response["Item"]
-            # Calculate onboarding complete status
-            name_provided = bool(user_data.get("name"))
+    Args:
+        user_id: User's Cognito sub (UUID)
+        email: User's email from Cognito claims
 
-            log_info(
-                "User profile retrieved",
-                request_id=request_id,
-                user_id=user_id,
-                has_name=name_provided,
-            )
+    Returns:
+        Profile body; a default profile if the user has no item yet
 
-            return create_response(
-                200,
-                {
-                    "userId": user_id,
-                    "email": user_data.get("email", email),
-                    "name": user_data.get("name", ""),
-                    "avatarUrl": user_data.get("avatarUrl", ""),
-                    "nameProvided": name_provided,
-                    "avatarUploaded": bool(user_data.get("avatarUrl")),
-                    "onboardingComplete": name_provided,
-                    "createdAt": user_data.get("createdAt", ""),
-                    "updatedAt": user_data.get("updatedAt", ""),
-                },
-            )
-        else:
-            # User doesn't exist in DB yet, return default profile
-            log_info(
-                "User not found in database, returning default profile",
-                request_id=request_id,
-                user_id=user_id,
-            )
+    Raises:
+        ClientError: If the read fails
+    """
+    logger.debug("Fetching user profile")
 
-            return create_response(
-                200,
-                {
-                    "userId": user_id,
-                    "email": email,
-                    "name": "",
-                    "avatarUrl": "",
-                    "nameProvided": False,
-                    "avatarUploaded": False,
-                    "onboardingComplete": False,
-                    "createdAt": "",
-                    "updatedAt": "",
-                },
-            )
+    # Get DynamoDB table
+    table = get_dynamodb_table()
 
-    except ClientError as e:
-        log_error(
-            "DynamoDB error",
-            request_id=request_id,
-            user_id=user_id,
-            error=str(e),
-            error_code=e.response.get("Error", {}).get("Code", "Unknown"),
-        )
-        return create_response(500, {"error": "Failed to retrieve user profile"})
+    # Try to get user from DynamoDB
+    with metrics.phase("dynamodb"):
+        response = ddb_call(table, "get_item", Key={"userId": user_id})
+
+    if "Item" in response:
+        user_data = response["Item"]
+        # Calculate onboarding complete status
+        name_provided = bool(user_data.get("name"))
 
+        logger.info("User profile retrieved", has_name=name_provided)
 
-def handle_put_user(  # noqa: C901
+        return {
+            "userId": user_id,
+            "email": user_data.get("email", email),
+            "name": user_data.get("name", ""),
+            "avatarUrl": user_data.get("avatarUrl", ""),
+            "nameProvided": name_provided,
+            "avatarUploaded": bool(user_data.get("avatarUrl")),
+            "onboardingComplete": name_provided,
+            "createdAt": user_data.get("createdAt", ""),
+            "updatedAt": user_data.get("updatedAt", ""),
+            **summary_fields(user_data),
+        }
+
+    # User doesn't exist in DB yet, return default profile
+    logger.info("User not found in database, returning default profile")
+
+    return {
+        "userId": user_id,
+        "email": email,
+        "name": "",
+        "avatarUrl": "",
+        "nameProvided": False,
+        "avatarUploaded": False,
+        "onboardingComplete": False,
+        "createdAt": "",
+        "updatedAt": "",
+        **summary_fields({}),
+    }
+
+
+@map_errors("Failed to update user profile")
+def handle_put_user(
     user_id: str,
     email: str,
     event: Dict[str, Any],
@@ -213,120 +238,122 @@ def handle_put_user(  # noqa: C901
     Returns:
         API Gateway response with updated user profile
     """
-    try:
-        # Parse request body
-        try:
-            body = json.loads(event.get("body", "{}"))
-        except json.JSONDecodeError as e:
-            log_error(
-                "Invalid JSON in request body",
-                request_id=request_id,
-                error=str(e),
-            )
-            return create_response(400, {"error": "Invalid JSON in request body"})
-
-        # Validate input
-        is_valid, errors = validate_user_input(body)
-        if not is_valid:
-            log_error(
-                "Validation failed",
-                request_id=request_id,
-                errors=errors,
-            )
-            return create_response(
-                400,
-                {
-                    "error": "Validation failed",
-                    "details": errors,
-                },
-            )
+    body = USER_SCHEMA.load(event.get("body"))
 
-        log_info(
-            "Updating user profile",
-            request_id=request_id,
-            user_id=user_id,
-            has_name="name" in body,
-            has_avatar="avatarUrl" in body,
-        )
+    logger.debug("Updating user profile", has_name="name" in body, has_avatar="avatarUrl" in body)
 
-        # Get DynamoDB table
-        table = get_dynamodb_table()
+    # Get DynamoDB table
+    table = get_dynamodb_table()
 
-        # Get current timestamp
-        now = datetime.utcnow().isoformat() + "Z"
+    # Get current timestamp
+    now = datetime.utcnow().isoformat() + "Z"
 
-        # Check if user exists
-        response = table.get_item(Key={"userId": user_id})
-        is_new_user = "Item" not in response
+    # Check if user exists
+    with metrics.phase("dynamodb"):
+        response = ddb_call(table, "get_item", Key={"userId": user_id})
+    is_new_user = "Item" not in response
 
-        # Build update data
-        update_data: Dict[str, Any] = {
-            "userId": user_id,
-            "email": email,
-            "updatedAt": now,
-        }
+    # Build update data
+    update_data: Dict[str, Any] = {
+        "userId": user_id,
+        "email": email,
+        "updatedAt": now,
+    }
 
-        # Set createdAt only for new users
-        if is_new_user:
-            update_data["createdAt"] = now
-        else:
-            # Preserve existing createdAt
-            update_data["createdAt"] = response["Item"].get("createdAt", now)
-
-        # Update name if provided
-        if "name" in body:
-            update_data["name"] = body["name"]
-        elif not is_new_user and "name" in response["Item"]:
-            # Preserve existing name if not updating
-            update_data["name"] = response["Item"]["name"]
-        else:
-            update_data["name"] = ""
-
-        # Update avatarUrl if provided
-        if "avatarUrl" in body:
-            update_data["avatarUrl"] = body["avatarUrl"]
-        elif not is_new_user and "avatarUrl" in response["Item"]:
-            # Preserve existing avatarUrl if not updating
-            update_data["avatarUrl"] = response["Item"]["avatarUrl"]
-        else:
-            update_data["avatarUrl"] = ""
-
-        # Save to DynamoDB
-        table.put_item(Item=update_data)
-
-        # Calculate onboarding status
-        name_provided = bool(update_data.get("name"))
-        avatar_uploaded = bool(update_data.get("avatarUrl"))
-
-        log_info(
-            "User profile updated successfully",
-            request_id=request_id,
-            user_id=user_id,
-            is_new_user=is_new_user,
-        )
+    # Set createdAt only for new users
+    if is_new_user:
+        update_data["createdAt"] = now
+    else:
+        # Preserve existing createdAt
+        update_data["createdAt"] = response["Item"].get("createdAt", now)
 
-        # Return updated profile
-        return create_response(
-            200,
-            {
-                "userId": user_id,
-                "email": update_data["email"],
-                "name": update_data.get("name", ""),
-                "avatarUrl": update_data.get("avatarUrl", ""),
-                "nameProvided": name_provided,
-                "avatarUploaded": avatar_uploaded,
-                "onboardingComplete": name_provided,
-                "createdAt": update_data["createdAt"],
-                "updatedAt": update_data["updatedAt"],
-            },
-        )
+    # Update name if provided
+    if "name" in body:
+        update_data["name"] = body["name"]
+    elif not is_new_user and "name" in response["Item"]:
+        # Preserve existing name if not updating
+        update_data["name"] = response["Item"]["name"]
+    else:
+        update_data["name"] = ""
 
-    except ClientError as e:
-        log_error(
-            "DynamoDB error",
-            request_id=request_id,
-            user_id=user_id,
-            error=str(e),
-            error_code=e.response.get("Error", {}).get("Code", "Unknown"),
+    # Update avatarUrl if provided
+    if "avatarUrl" in body:
+        update_data["avatarUrl"] = body["avatarUrl"]
+    elif not is_new_user and "avatarUrl" in response["Item"]:
+        # Preserve existing avatarUrl if not updating
+        update_data["avatarUrl"] = response["Item"]["avatarUrl"]
+    else:
+        update_data["avatarUrl"] = ""
+
+    # Record the verified upload folder once, for the account purge to empty
+    if body.get("avatarUrl") and (is_new_user or not response["Item"].get("identityId")):
+        identity_id = resolve_identity_id(event)
+        if identity_id:
+            update_data["identityId"] = identity_id
+
+    # Save to DynamoDB. Only the profile attributes are set, so the search
+    # summary maintained by the stream consumer is left alone.
+    profile = {key: value for key, value in update_data.items() if key != "userId"}
+    with metrics.phase("dynamodb"):
+        ddb_call(
+            table,
+            "update_item",
+            Key={"userId": user_id},
+            UpdateExpression="SET " + ", ".join(f"#{key} = :{key}" for key in profile),
+            ExpressionAttributeNames={f"#{key}": key for key in profile},
+            ExpressionAttributeValues={f":{key}": value for key, value in profile.items()},
         )
-        return create_response(500, {"error": "Failed to update user profile"})
+
+    # Calculate onboarding status
+    name_provided = bool(update_data.get("name"))
+    avatar_uploaded = bool(update_data.get("avatarUrl"))
+
+    logger.info("User profile updated successfully", is_new_user=is_new_user)
+
+    # Return updated profile
+    return create_response(
+        200,
+        {
+            "userId": user_id,
+            "email": update_data["email"],
+            "name": update_data.get("name", ""),
+            "avatarUrl": update_data.get("avatarUrl", ""),
+            "nameProvided": name_provided,
+            "avatarUploaded": avatar_uploaded,
+            "onboardingComplete": name_provided,
+            "createdAt": update_data["createdAt"],
+            "updatedAt": update_data["updatedAt"],
+            **summary_fields({} if is_new_user else response["Item"]),
+        },
+    )
+
+
+@map_errors("Failed to delete account")
+def handle_delete_user(user_id: str, request_id: str) -> Dict[str, Any]:
+    """
+    Handle DELETE request to delete the user's account data.
+
+    The purge can outlast an API Gateway request for users with a long
+    history, so it is queued for ``account_purge_handler`` and the request is
+    accepted at once. Repeated requests queue repeated purges, which are
+    harmless: each deletes whatever is left.
+
+    Args:
+        user_id: User's Cognito sub (UUID)
+        request_id: Request ID for logging
+
+    Returns:
+        API Gateway response (202) once the purge is queued
+    """
+    queue = get_purge_queue()
+    if queue is None:
+        logger.error("Account purge queue not configured")
+        return create_response(500, {"error": "Failed to delete account"})
+
+    requested_at = int(time.time())
+    with metrics.phase("queue"):
+        message_id = queue.send({"userId": user_id, "requestedAt": requested_at})
+
+    logger.info("Account deletion queued", message_id=message_id)
+
+    return create_response(202, {"userId": user_id, "deletionRequestedAt": requested_at})
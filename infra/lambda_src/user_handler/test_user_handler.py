@@ -6,9 +6,11 @@ from typing import Any, Dict
 from unittest.mock import MagicMock, patch
 
 import pytest
-from botocore.exceptions import ClientError
+from botocore.exceptions import ClientError, ReadTimeoutError
 
+from ..common.queue import LocalQueue
 from .index import (
+    handle_delete_user,
     handle_get_user,
     handle_put_user,
     handler,
@@ -56,6 +58,13 @@ class TestValidation:
         assert is_valid is False
         assert len(errors) == 2
 
+    def test_validate_user_input_unknown_field(self) -> None:
+        """Test validation rejects fields outside the profile schema."""
+        body = {"name": "John Doe", "isAdmin": True}
+        is_valid, errors = validate_user_input(body)
+        assert is_valid is False
+        assert errors == ["isAdmin is not an allowed field"]
+
     def test_validate_user_input_empty_fields(self) -> None:
         """Test validation with empty optional fields."""
         body = {"name": "", "avatarUrl": ""}
@@ -98,7 +107,7 @@ class TestHandlerRouting:
         with patch("lambda_src.user_handler.index.get_dynamodb_table") as mock_get_table:
             mock_table = MagicMock()
             mock_table.get_item.return_value = {}
-            mock_table.put_item.return_value = {}
+            mock_table.update_item.return_value = {}
             mock_get_table.return_value = mock_table
             result = handler(api_gateway_event, lambda_context)
             assert result["statusCode"] == 200
@@ -110,7 +119,7 @@ class TestHandlerRouting:
         mock_env_vars: None,
     ) -> None:
         """Test handler returns 405 for unsupported methods."""
-        api_gateway_event["httpMethod"] = "DELETE"
+        api_gateway_event["httpMethod"] = "PATCH"
         result = handler(api_gateway_event, lambda_context)
         assert result["statusCode"] == 405
 
@@ -199,6 +208,18 @@ class TestGetUser:
             body = json.loads(result["body"])
             assert "error" in body
 
+    def test_handle_get_user_read_timeout(self, mock_env_vars: None) -> None:
+        """Test that a DynamoDB read timeout is a 504, not an unhandled error."""
+        with patch("lambda_src.user_handler.index.get_dynamodb_table") as mock_get_table:
+            mock_get_table.return_value.get_item.side_effect = ReadTimeoutError(
+                endpoint_url="https://dynamodb"
+            )
+
+            result = handle_get_user("test-123", "test@example.com", "req-123")
+
+        assert result["statusCode"] == 504
+        assert json.loads(result["body"]) == {"error": "Failed to retrieve user profile"}
+
 
 class TestPutUser:
     """Test PUT user handler."""
@@ -220,7 +241,7 @@ class TestPutUser:
         with patch("lambda_src.user_handler.index.get_dynamodb_table") as mock_get_table:
             mock_table = MagicMock()
             mock_table.get_item.return_value = {}  # User doesn't exist
-            mock_table.put_item.return_value = {}
+            mock_table.update_item.return_value = {}
             mock_get_table.return_value = mock_table
 
             result = handle_put_user("test-123", "test@example.com", event, "req-123")
@@ -254,7 +275,7 @@ class TestPutUser:
                     "createdAt": "2023-01-01T00:00:00Z",
                 }
             }
-            mock_table.put_item.return_value = {}
+            mock_table.update_item.return_value = {}
             mock_get_table.return_value = mock_table
 
             result = handle_put_user("test-123", "test@example.com", event, "req-123")
@@ -317,8 +338,8 @@ class TestPutUser:
         with patch("lambda_src.user_handler.index.get_dynamodb_table") as mock_get_table:
             mock_table = MagicMock()
             mock_table.get_item.return_value = {}
-            mock_table.put_item.side_effect = ClientError(
-                {"Error": {"Code": "ServiceUnavailable"}}, "PutItem"
+            mock_table.update_item.side_effect = ClientError(
+                {"Error": {"Code": "ServiceUnavailable"}}, "UpdateItem"
             )
             mock_get_table.return_value = mock_table
 
@@ -329,6 +350,87 @@ class TestPutUser:
             assert "error" in body
 
 
+class TestIdentityRecording:
+    """Test recording the avatar upload folder on the user item."""
+
+    def test_identity_resolved_from_token_once(self, api_gateway_event: Dict[str, Any]) -> None:
+        """Test that the identity ID comes from the caller's token, and only when missing."""
+        env = {
+            "IDENTITY_POOL_ID": "us-west-1:pool",
+            "USER_POOL_PROVIDER": "cognito-idp.us-west-1.amazonaws.com/us-west-1_abc",
+        }
+        event = api_gateway_event.copy()
+        event["body"] = json.dumps({"avatarUrl": "https://example.com/a.png"})
+
+        with (
+            patch.dict(os.environ, env),
+            patch("lambda_src.user_handler.index.get_dynamodb_table") as mock_get_table,
+            patch("lambda_src.user_handler.index.get_identity_client") as mock_identity,
+        ):
+            mock_table = mock_get_table.return_value
+            mock_table.get_item.return_value = {}
+            mock_identity.return_value.get_id.return_value = {"IdentityId": "us-west-1:id-1"}
+
+            assert handle_put_user("test-123", "t@x", event, "req-1")["statusCode"] == 200
+            values = mock_table.update_item.call_args[1]["ExpressionAttributeValues"]
+            assert values[":identityId"] == "us-west-1:id-1"
+            mock_identity.return_value.get_id.assert_called_once_with(
+                IdentityPoolId="us-west-1:pool", Logins={env["USER_POOL_PROVIDER"]: "mock-token"}
+            )
+
+            mock_table.get_item.return_value = {
+                "Item": {"userId": "test-123", "identityId": "us-west-1:id-1"}
+            }
+            handle_put_user("test-123", "t@x", event, "req-2")
+            assert mock_identity.return_value.get_id.call_count == 1
+            values = mock_table.update_item.call_args[1]["ExpressionAttributeValues"]
+            assert ":identityId" not in values
+
+
+class TestDeleteUser:
+    """Test DELETE request handling."""
+
+    def test_delete_queues_purge(
+        self,
+        api_gateway_event: Dict[str, Any],
+        lambda_context: MagicMock,
+        mock_env_vars: None,
+    ) -> None:
+        """Test that the purge is queued for the caller and accepted with 202."""
+        api_gateway_event["httpMethod"] = "DELETE"
+        queue = LocalQueue()
+
+        with patch("lambda_src.user_handler.index.get_purge_queue", return_value=queue):
+            result = handler(api_gateway_event, lambda_context)
+
+        assert result["statusCode"] == 202
+        body = json.loads(result["body"])
+        assert body["userId"] == "test-user-123"
+        (record,) = queue.receive_event()["Records"]
+        message = json.loads(record["body"])
+        assert message == {"userId": "test-user-123", "requestedAt": body["deletionRequestedAt"]}
+
+    def test_delete_without_queue(self) -> None:
+        """Test that an unconfigured purge queue is a server error, not a silent success."""
+        with patch("lambda_src.user_handler.index.get_purge_queue", return_value=None):
+            result = handle_delete_user("test-123", "req-123")
+
+        assert result["statusCode"] == 500
+
+    def test_delete_queue_error(self) -> None:
+        """Test handling of a failed send."""
+        queue = MagicMock()
+        queue.send.side_effect = ClientError(
+            {"Error": {"Code": "AWS.SimpleQueueService.NonExistentQueue", "Message": "gone"}},
+            "SendMessage",
+        )
+        with patch("lambda_src.user_handler.index.get_purge_queue", return_value=queue):
+            result = handle_delete_user("test-123", "req-123")
+
+        assert result["statusCode"] == 500
+        assert json.loads(result["body"])["error"] == "Failed to delete account"
+
+
 class TestResponseFormat:
     """Test response format and headers."""
 
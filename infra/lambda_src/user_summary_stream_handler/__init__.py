@@ -0,0 +1 @@
+"""User search summary stream consumer Lambda handler package."""
@@ -0,0 +1,180 @@
+"""Lambda handler that keeps each user's search summary on their user item."""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+# Add parent directory to path for common imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common.ddb import account_capacity, ddb_call  # noqa: E402
+from common.deadline import deadline_bound  # noqa: E402
+from common.log import log_invocation, logger  # noqa: E402
+from common.memory import memory_probed  # noqa: E402
+from common.metrics import metrics, record_metrics  # noqa: E402
+from common.profiling import profiled  # noqa: E402
+from common.resilience import ddb_client_config  # noqa: E402
+from common.utils import in_context  # noqa: E402
+
+# User updates for a batch run on this many threads
+SUMMARY_WRITE_WORKERS = 8
+
+
+def get_ddb_client() -> Tuple[Any, str]:
+    """Get DynamoDB client and users table name."""
+    ddb = boto3.client("dynamodb", config=ddb_client_config())
+    table = os.environ.get("USERS_TABLE_NAME", "")
+    return ddb, table
+
+
+@profiled
+@record_metrics
+@memory_probed
+@account_capacity
+@log_invocation
+@deadline_bound
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle a DynamoDB stream batch from the searches table.
+
+    Inserted searches are grouped by user, so a batch costs one UpdateItem per
+    user however many searches they made. Each update adds to ``searchCount``
+    and moves ``lastSearchAt``/``lastQuery`` forward, never back.
+
+    If an update fails, the batch is reported as failed from that user's first
+    record and Lambda retries from there. Users already updated from the
+    retried records are counted again, so counts are at-least-once.
+
+    Args:
+        event: DynamoDB stream event (NEW_IMAGE records)
+        context: Lambda context object
+
+    Returns:
+        Partial batch response with the sequence number to retry from
+    """
+    records = event.get("Records", [])
+
+    with metrics.phase("parse"):
+        summaries = summarize(records)
+
+    ddb, table = get_ddb_client()
+    failed: List[str] = []
+    if summaries:
+        with (
+            metrics.phase("dynamodb"),
+            ThreadPoolExecutor(max_workers=min(SUMMARY_WRITE_WORKERS, len(summaries))) as pool,
+        ):
+            errors = list(
+                pool.map(
+                    in_context(
+                        lambda user_id: update_summary(ddb, table, user_id, summaries[user_id])
+                    ),
+                    list(summaries),
+                )
+            )
+        for summary, error_code in zip(summaries.values(), errors, strict=True):
+            if error_code is not None:
+                logger.warning("User summary update failed", error_code=error_code)
+                failed.append(summary["firstSequence"])
+
+    logger.info(
+        "User summary batch complete",
+        records=len(records),
+        users=len(summaries),
+        failed=len(failed),
+    )
+
+    if not failed:
+        return {"batchItemFailures": []}
+    return {"batchItemFailures": [{"itemIdentifier": min(failed, key=int)}]}
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fold inserted searches into one summary per user.
+
+    Args:
+        records: DynamoDB stream records, in shard order
+
+    Returns:
+        userId -> {"count", "lastSearchAt", "lastQuery", "firstSequence"}
+    """
+    summaries: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        if record.get("eventName") != "INSERT":
+            continue
+        change = record.get("dynamodb") or {}
+        image = change.get("NewImage") or {}
+        user_id = image.get("userId", {}).get("S", "")
+        created_at = image.get("createdAt", {}).get("S", "")
+        if not user_id or not created_at.isdigit():
+            continue
+
+        summary = summaries.setdefault(
+            user_id,
+            {
+                "count": 0,
+                "lastSearchAt": -1,
+                "lastQuery": "",
+                "firstSequence": change.get("SequenceNumber", "0"),
+            },
+        )
+        summary["count"] += 1
+        # Later records win ties, matching the write that landed last
+        if int(created_at) >= summary["lastSearchAt"]:
+            summary["lastSearchAt"] = int(created_at)
+            summary["lastQuery"] = image.get("query", {}).get("S", "")
+    return summaries
+
+
+def update_summary(ddb: Any, table: str, user_id: str, summary: Dict[str, Any]) -> Optional[str]:
+    """
+    Apply one user's summary on a worker thread.
+
+    The first update also moves the last search forward, on condition that
+    it is not older than the stored one. If that condition fails, a newer
+    search is already recorded and only the count is added.
+
+    Args:
+        ddb: DynamoDB client
+        table: Users table name
+        user_id: User's Cognito sub
+        summary: Output of ``summarize`` for the user
+
+    Returns:
+        None on success, else the DynamoDB error code (logged by the caller)
+    """
+    key = {"userId": {"S": user_id}}
+    count = {":n": {"N": str(summary["count"])}}
+    try:
+        try:
+            ddb_call(
+                ddb,
+                "update_item",
+                TableName=table,
+                Key=key,
+                UpdateExpression="ADD searchCount :n SET lastSearchAt = :at, lastQuery = :q",
+                ConditionExpression="attribute_not_exists(lastSearchAt) OR lastSearchAt <= :at",
+                ExpressionAttributeValues={
+                    **count,
+                    ":at": {"N": str(summary["lastSearchAt"])},
+                    ":q": {"S": summary["lastQuery"]},
+                },
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+            ddb_call(
+                ddb,
+                "update_item",
+                TableName=table,
+                Key=key,
+                UpdateExpression="ADD searchCount :n",
+                ExpressionAttributeValues=count,
+            )
+    except ClientError as e:
+        return str(e.response.get("Error", {}).get("Code", "Unknown"))
+    return None
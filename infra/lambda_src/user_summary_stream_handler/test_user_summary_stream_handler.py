@@ -0,0 +1,148 @@
+"""Unit tests for user_summary_stream_handler Lambda function."""
+
+import json
+import os
+from typing import Any, Dict
+from unittest.mock import MagicMock, patch
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ..user_handler.index import handle_get_user, handle_put_user
+from .index import handler, summarize
+
+TABLE = "test-users-table"
+
+
+def make_record(
+    sequence: int, user_id: str, created_at: int, query: str, event_name: str = "INSERT"
+) -> Dict[str, Any]:
+    """Build a searches table stream record."""
+    return {
+        "eventName": event_name,
+        "eventSource": "aws:dynamodb",
+        "dynamodb": {
+            "SequenceNumber": str(sequence),
+            "NewImage": {
+                "userId": {"S": user_id},
+                "createdAt": {"S": str(created_at)},
+                "query": {"S": query},
+            },
+        },
+    }
+
+
+def create_users_table() -> Any:
+    """Create the users table and return a client."""
+    client = boto3.client("dynamodb")
+    client.create_table(
+        TableName=TABLE,
+        KeySchema=[{"AttributeName": "userId", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "userId", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return client
+
+
+class TestSummarize:
+    """Test folding stream records per user."""
+
+    def test_one_summary_per_user(self) -> None:
+        """Test counts, the latest search and the first sequence number per user."""
+        records = [
+            make_record(1, "u1", 200, "pizza"),
+            make_record(2, "u2", 150, "tacos"),
+            make_record(3, "u1", 100, "older"),
+            make_record(4, "u1", 200, "same second"),
+            make_record(5, "u1", 300, "removed", event_name="REMOVE"),
+            make_record(6, "", 300, "no user"),
+        ]
+
+        summaries = summarize(records)
+
+        assert summaries["u1"] == {
+            "count": 3,
+            "lastSearchAt": 200,
+            "lastQuery": "same second",
+            "firstSequence": "1",
+        }
+        assert summaries["u2"]["count"] == 1
+        assert set(summaries) == {"u1", "u2"}
+
+
+class TestHandler:
+    """Test the stream consumer against moto."""
+
+    def test_summary_accumulates_and_never_moves_back(
+        self, mock_dynamodb: None, lambda_context: MagicMock
+    ) -> None:
+        """Test one update per user per batch and out-of-order batches."""
+        client = create_users_table()
+        with patch.dict(os.environ, {"USERS_TABLE_NAME": TABLE}):
+            batch = [make_record(i, "u1", 1000 + i, f"q{i}") for i in range(5)]
+            assert handler({"Records": batch}, lambda_context) == {"batchItemFailures": []}
+            # A late batch with older searches only adds to the count
+            handler({"Records": [make_record(9, "u1", 10, "stale")]}, lambda_context)
+
+        item = client.get_item(TableName=TABLE, Key={"userId": {"S": "u1"}})["Item"]
+        assert item["searchCount"] == {"N": "6"}
+        assert item["lastSearchAt"] == {"N": "1004"}
+        assert item["lastQuery"] == {"S": "q4"}
+
+    def test_failed_user_retried_from_its_first_record(self, lambda_context: MagicMock) -> None:
+        """Test that a failed update reports the earliest record for that user."""
+        mock_ddb = MagicMock()
+
+        def update_item(**kwargs: Any) -> Dict[str, Any]:
+            if kwargs["Key"]["userId"]["S"] == "u2":
+                raise ClientError({"Error": {"Code": "ThrottlingException"}}, "UpdateItem")
+            return {}
+
+        mock_ddb.update_item.side_effect = update_item
+        records = [
+            make_record(10, "u1", 1, "a"),
+            make_record(11, "u2", 1, "b"),
+            make_record(12, "u2", 2, "c"),
+        ]
+        with patch("lambda_src.user_summary_stream_handler.index.get_ddb_client") as mock_client:
+            mock_client.return_value = (mock_ddb, TABLE)
+            result = handler({"Records": records}, lambda_context)
+
+        assert mock_ddb.update_item.call_count == 2
+        assert result == {"batchItemFailures": [{"itemIdentifier": "11"}]}
+
+
+class TestUserProfile:
+    """Test that GET /user and PUT /user serve the summary."""
+
+    def test_summary_in_profile_and_kept_by_put(
+        self,
+        mock_dynamodb: None,
+        mock_env_vars: None,
+        api_gateway_event: Dict[str, Any],
+        lambda_context: MagicMock,
+    ) -> None:
+        """Test the summary round trip through the profile endpoints."""
+        create_users_table()
+        with patch.dict(os.environ, {"USERS_TABLE_NAME": TABLE}):
+            empty = json.loads(handle_get_user("u1", "u1@example.com", "req")["body"])
+            assert (empty["searchCount"], empty["lastSearchAt"], empty["lastQuery"]) == (
+                0,
+                None,
+                "",
+            )
+
+            handler({"Records": [make_record(1, "u1", 1700000000, "pizza")]}, lambda_context)
+            api_gateway_event["body"] = json.dumps({"name": "Ada"})
+            put = json.loads(
+                handle_put_user("u1", "u1@example.com", api_gateway_event, "req")["body"]
+            )
+            handler({"Records": [make_record(2, "u1", 1700000100, "coffee")]}, lambda_context)
+
+            body = json.loads(handle_get_user("u1", "u1@example.com", "req")["body"])
+
+        assert put["searchCount"] == 1
+        assert body["name"] == "Ada"
+        assert body["searchCount"] == 2
+        assert body["lastSearchAt"] == 1700000100
+        assert body["lastQuery"] == "coffee"
@@ -8,8 +8,80 @@ locals {
   avatars_bucket_name = "${local.name_prefix}-avatars-${local.suffix}"
 
   routes = {
-    user     = "user"
-    searches = "searches"
+    user      = "user"
+    searches  = "searches"
+    trending  = "trending"
+    nearby    = "nearby"
+    tiles     = "tiles"
+    bootstrap = "bootstrap"
+    suggest   = "suggest"
+  }
+
+  # Namespace for the EMF metrics written by common/metrics.py
+  metrics_namespace = "MapMe/${local.environment}"
+
+  # Environment variables shared by every Lambda function
+  lambda_common_env = {
+    ENVIRONMENT                = local.environment
+    LOG_LEVEL                  = var.log_level
+    LOG_INFO_SAMPLE_RATE       = tostring(var.log_info_sample_rate)
+    METRICS_NAMESPACE          = local.metrics_namespace
+    PROFILE_SAMPLE_RATE        = tostring(var.profile_sample_rate)
+    PROFILE_DUMP_DIR           = var.profile_dump_dir
+    MEMORY_PROFILE_SAMPLE_RATE = tostring(var.memory_profile_sample_rate)
+    CAPACITY_HASH_SALT         = random_password.capacity_hash_salt.result
+    DDB_MAX_RETRIES            = tostring(var.ddb_max_retries)
+    DDB_BREAKER_FAILURES       = tostring(var.ddb_breaker_failures)
+    DDB_HEDGE_AFTER_MS         = tostring(var.ddb_hedge_after_ms)
+    DEADLINE_RESERVE_MS        = tostring(var.lambda_deadline_reserve_ms)
+  }
+
+  # Trending counter settings shared by the writers and the aggregator
+  trending_env = {
+    TRENDING_TABLE             = aws_dynamodb_table.trending.name
+    TRENDING_SHARDS            = tostring(var.trending_shards)
+    TRENDING_BUCKET_SECONDS    = tostring(var.trending_bucket_seconds)
+    TRENDING_RETENTION_SECONDS = tostring(var.trending_retention_seconds)
+  }
+
+  # Heatmap tile settings shared by the stream consumer and the readers
+  tiles_env = {
+    TILES_TABLE        = aws_dynamodb_table.tiles.name
+    TILE_ZOOMS         = join(",", [for z in var.tile_zooms : tostring(z)])
+    TILE_CACHE_SECONDS = tostring(var.tile_cache_seconds)
+  }
+
+  # Suggest index settings shared by the indexer and GET /suggest
+  suggest_env = {
+    SUGGEST_TOP_K           = tostring(var.suggest_top_k)
+    SUGGEST_REFRESH_SECONDS = tostring(var.suggest_refresh_seconds)
+  }
+
+  # Idempotency-Key settings for every function serving a write route
+  idempotency_env = {
+    IDEMPOTENCY_TABLE       = aws_dynamodb_table.idempotency.name
+    IDEMPOTENCY_TTL_SECONDS = tostring(var.idempotency_ttl_seconds)
+  }
+
+  # Write rate limits for every function serving a write route
+  rate_limit_env = {
+    RATE_LIMIT_TABLE       = aws_dynamodb_table.rate_limits.name
+    RATE_LIMIT_PER_MINUTE  = tostring(var.rate_limit_per_minute)
+    RATE_LIMIT_BURST       = tostring(var.rate_limit_burst)
+    RATE_LIMIT_LOCAL_LEASE = tostring(var.rate_limit_local_lease)
+  }
+
+  # Geocoding settings for every function that writes searches
+  geocoding_env = {
+    GEOCODER = (
+      var.geocoder == "location"
+      ? "location://${one(aws_location_place_index.geocoder[*].index_name)}"
+      : var.geocoder
+    )
+    GEOCODE_CACHE_TABLE          = aws_dynamodb_table.geocode_cache.name
+    GEOCODE_LRU_SIZE             = tostring(var.geocode_lru_size)
+    GEOCODE_TTL_SECONDS          = tostring(var.geocode_ttl_seconds)
+    GEOCODE_NEGATIVE_TTL_SECONDS = tostring(var.geocode_negative_ttl_seconds)
   }
 
   # Common tags for all resources
@@ -29,3 +29,13 @@ resource "random_string" "suffix" {
     ignore_changes = all
   }
 }
+
+# Salt for pseudonymized user IDs in capacity accounting records
+resource "random_password" "capacity_hash_salt" {
+  length  = 32
+  special = false
+
+  lifecycle {
+    ignore_changes = all
+  }
+}
@@ -0,0 +1,51 @@
+# SQS queue buffering asynchronous POST /searches writes
+# Enabled per environment with var.searches_async_ingest; the queue always exists
+# so the consumer can drain any backlog after the flag is turned off.
+
+resource "aws_sqs_queue" "searches_ingest_dlq" {
+  name                      = "${local.name_prefix}-searches-ingest-dlq"
+  message_retention_seconds = 1209600 # 14 days
+
+  tags = local.common_tags
+}
+
+resource "aws_sqs_queue" "searches_ingest" {
+  name = "${local.name_prefix}-searches-ingest"
+
+  # Must be at least 6x the consumer timeout so in-flight batches are not redelivered
+  visibility_timeout_seconds = 180
+  message_retention_seconds  = 345600 # 4 days
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.searches_ingest_dlq.arn
+    maxReceiveCount     = 5
+  })
+
+  tags = local.common_tags
+}
+
+# Account deletion requests from DELETE /user, drained by the account purge
+# function. A purge cut short is redelivered after the visibility timeout and
+# carries on from what is left.
+
+resource "aws_sqs_queue" "account_purge_dlq" {
+  name                      = "${local.name_prefix}-account-purge-dlq"
+  message_retention_seconds = 1209600 # 14 days
+
+  tags = local.common_tags
+}
+
+resource "aws_sqs_queue" "account_purge" {
+  name = "${local.name_prefix}-account-purge"
+
+  # Must be at least 6x the consumer timeout so in-flight purges are not redelivered
+  visibility_timeout_seconds = 1800
+  message_retention_seconds  = 1209600 # 14 days
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.account_purge_dlq.arn
+    maxReceiveCount     = 10
+  })
+
+  tags = local.common_tags
+}
@@ -37,3 +37,242 @@ variable "alarm_email" {
   default     = ""
   sensitive   = true
 }
+
+variable "searches_async_ingest" {
+  description = "Queue POST /searches writes through SQS and return 202 instead of writing synchronously"
+  type        = bool
+  default     = false
+}
+
+variable "consolidated_api" {
+  description = "Route every REST endpoint to the single consolidated api Lambda instead of one function per resource"
+  type        = bool
+  default     = false
+}
+
+variable "log_level" {
+  description = "Minimum log level for Lambda functions (DEBUG, INFO, WARNING, ERROR)"
+  type        = string
+  default     = "INFO"
+}
+
+variable "log_info_sample_rate" {
+  description = "Fraction of invocations whose INFO log lines are written; errors always flush the full buffer"
+  type        = number
+  default     = 1.0
+}
+
+variable "profile_sample_rate" {
+  description = "Fraction of Lambda invocations to run under cProfile (0 disables profiling entirely)"
+  type        = number
+  default     = 0
+}
+
+variable "profile_dump_dir" {
+  description = "Directory for raw pstats dumps of profiled invocations (e.g. /tmp); empty to skip dumps"
+  type        = string
+  default     = ""
+}
+
+variable "memory_profile_sample_rate" {
+  description = "Fraction of Lambda invocations to trace with tracemalloc (0 disables the memory probe entirely)"
+  type        = number
+  default     = 0
+}
+
+variable "ddb_max_retries" {
+  description = "Retries of a throttled DynamoDB call, with full-jitter backoff and a per-container budget"
+  type        = number
+  default     = 3
+}
+
+variable "ddb_breaker_failures" {
+  description = "Consecutive throttled or failed DynamoDB calls that open a table's circuit breaker"
+  type        = number
+  default     = 5
+}
+
+variable "ddb_hedge_after_ms" {
+  description = "Send a second copy of a GetItem or Query still running after this long (0 disables hedging)"
+  type        = number
+  default     = 0
+}
+
+variable "lambda_deadline_reserve_ms" {
+  description = "Time kept back from each Lambda timeout to return a response; DynamoDB work stops this long before the timeout"
+  type        = number
+  default     = 500
+}
+
+variable "lambda_memory_sizes" {
+  description = "Memory size in MB per Lambda function; see the memory harness in README for recommendations"
+  type        = map(number)
+  default = {
+    user                = 128
+    searches            = 128
+    api                 = 128
+    searches_ingest     = 128
+    post_confirmation   = 128
+    trending_aggregator = 128
+    tiles               = 128
+    tiles_stream        = 128
+    user_summary_stream = 128
+    suggest_indexer     = 3584
+    account_purge       = 256
+  }
+}
+
+variable "trending_shards" {
+  description = "Counter partitions per trending bucket; raise if a bucket's writes throttle"
+  type        = number
+  default     = 8
+}
+
+variable "trending_bucket_seconds" {
+  description = "Width of a trending time bucket in seconds"
+  type        = number
+  default     = 3600
+}
+
+variable "trending_retention_seconds" {
+  description = "How long trending counters and lists are kept before DynamoDB TTL removes them"
+  type        = number
+  default     = 172800
+}
+
+variable "trending_window_buckets" {
+  description = "Buckets merged into the list served by GET /searches/trending (the current one and those before it)"
+  type        = number
+  default     = 2
+}
+
+variable "trending_top_k" {
+  description = "Queries kept in each precomputed trending list"
+  type        = number
+  default     = 20
+}
+
+variable "trending_aggregate_schedule" {
+  description = "EventBridge schedule for the trending aggregator"
+  type        = string
+  default     = "rate(5 minutes)"
+}
+
+variable "geocoder" {
+  description = "Geocoding provider for searches without coordinates: \"location\" (Amazon Location Service), \"local://\" (built-in gazetteer) or \"\" to disable"
+  type        = string
+  default     = ""
+
+  validation {
+    condition     = contains(["", "local://", "location"], var.geocoder)
+    error_message = "geocoder must be \"\", \"local://\" or \"location\"."
+  }
+}
+
+variable "geocoder_data_source" {
+  description = "Amazon Location Service data provider for the place index"
+  type        = string
+  default     = "Esri"
+}
+
+variable "geocode_lru_size" {
+  description = "Geocoding results kept in each container's memory"
+  type        = number
+  default     = 1024
+}
+
+variable "geocode_ttl_seconds" {
+  description = "How long a found geocoding result is kept in the cache table"
+  type        = number
+  default     = 2592000
+}
+
+variable "geocode_negative_ttl_seconds" {
+  description = "How long a query with no geocoding match is kept in the cache table"
+  type        = number
+  default     = 86400
+}
+
+variable "tile_zooms" {
+  description = "Zoom levels counted for the heatmap and served by GET /tiles; each tile has a 16x16 cell grid"
+  type        = list(number)
+  default     = [4, 8, 12]
+}
+
+variable "idempotency_ttl_seconds" {
+  description = "How long a write's response is replayed for retries with the same Idempotency-Key"
+  type        = number
+  default     = 86400
+}
+
+variable "rate_limit_per_minute" {
+  description = "Sustained writes per minute each user may send to POST /searches, PUT /user and DELETE /user"
+  type        = number
+  default     = 60
+}
+
+variable "rate_limit_burst" {
+  description = "Writes a user may send at once before rate_limit_per_minute applies"
+  type        = number
+  default     = 20
+}
+
+variable "rate_limit_local_lease" {
+  description = "Extra tokens a container takes per rate-limit check for users well under their limit; 0 checks every write"
+  type        = number
+  default     = 4
+}
+
+variable "tile_cache_seconds" {
+  description = "Cache-Control max-age of heatmap tile responses"
+  type        = number
+  default     = 3600
+}
+
+variable "suggest_top_k" {
+  description = "Suggestions kept per prefix in the global suggest index, and the largest limit GET /suggest accepts"
+  type        = number
+  default     = 8
+}
+
+variable "suggest_min_users" {
+  description = "Users who must have searched a query before it is suggested to anyone"
+  type        = number
+  default     = 3
+}
+
+variable "suggest_scan_segments" {
+  description = "Parallel scan segments the suggest indexer splits the searches table into"
+  type        = number
+  default     = 8
+}
+
+variable "suggest_workers" {
+  description = "Processes the suggest indexer scans with; Lambda gives a second vCPU from 1769 MB"
+  type        = number
+  default     = 2
+}
+
+variable "suggest_refresh_seconds" {
+  description = "How often a warm container checks for a new suggest index version"
+  type        = number
+  default     = 300
+}
+
+variable "suggest_index_schedule" {
+  description = "EventBridge schedule for rebuilding the suggest index"
+  type        = string
+  default     = "rate(6 hours)"
+}
+
+variable "account_purge_delete_workers" {
+  description = "Concurrent 25-item BatchWriteItem deletes per account purge"
+  type        = number
+  default     = 8
+}
+
+variable "account_purge_sweep_delay_seconds" {
+  description = "Delay before the second purge pass that removes late writes (at most 900); 0 skips it"
+  type        = number
+  default     = 900
+}